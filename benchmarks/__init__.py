@@ -0,0 +1,6 @@
+"""
+Pacote benchmarks do projeto Django.
+
+Este pacote contém o benchmark de ingestão e busca: corpora sintéticos
+reproduzíveis, as etapas medidas e a comparação com uma referência.
+"""
@@ -0,0 +1,18 @@
+"""
+Configuração da aplicação benchmarks.
+
+Este módulo define a configuração da aplicação Django que mede a
+vazão da ingestão e a latência das buscas (comando bench).
+"""
+from django.apps import AppConfig
+
+
+class BenchmarksConfig(AppConfig):
+    """
+    Configuração da aplicação benchmarks.
+
+    Define o tipo de campo automático para chaves primárias
+    e o nome da aplicação.
+    """
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "benchmarks"
@@ -0,0 +1,356 @@
+"""
+Corpora sintéticos de documentos institucionais para os benchmarks.
+
+Um corpus é descrito por um CorpusSpec (quantidade de arquivos,
+profundidade da árvore, semente e mistura de formatos) e gerado de
+forma reproduzível: a pasta, o nome e o conteúdo do arquivo de número
+i dependem só de (semente, i), então a mesma especificação produz os
+mesmos caminhos e os mesmos bytes em qualquer máquina, em qualquer
+ordem de geração.
+
+A árvore imita o upload de pasta de uma prefeitura: secretarias no
+primeiro nível, anos, categorias de documento e, abaixo delas,
+processos e anexos até a profundidade pedida. Os textos são frases
+montadas com vocabulário administrativo em português (editais,
+portarias, contratos, folhas de pagamento), com acentos, números de
+processo e valores, o que exercita a extração, o chunking e a busca
+com um perfil parecido com o do acervo real.
+"""
+import random
+from dataclasses import dataclass, field
+
+from .formats import build_csv, build_docx, build_pdf, build_txt, build_xlsx
+
+DEFAULT_MIX = {
+    ".pdf": 0.35,
+    ".docx": 0.25,
+    ".xlsx": 0.15,
+    ".csv": 0.15,
+    ".txt": 0.10,
+}
+
+DEPARTMENTS = [
+    "Secretaria de Educação",
+    "Secretaria de Saúde",
+    "Secretaria de Administração",
+    "Secretaria de Finanças",
+    "Secretaria de Obras",
+    "Procuradoria Jurídica",
+    "Gabinete do Prefeito",
+    "Controladoria Geral",
+]
+
+YEARS = ["2021", "2022", "2023", "2024", "2025"]
+
+CATEGORIES = {
+    "Editais": "Edital",
+    "Portarias": "Portaria",
+    "Contratos": "Contrato",
+    "Relatórios": "Relatório",
+    "Atas": "Ata",
+    "Ofícios": "Ofício",
+    "Planilhas": "Planilha",
+    "Folhas de Pagamento": "Folha",
+}
+
+SUBJECTS = [
+    "A Secretaria Municipal de Educação",
+    "O Departamento de Compras",
+    "A Comissão Permanente de Licitação",
+    "O Conselho Municipal de Saúde",
+    "A Coordenação Pedagógica",
+    "A Procuradoria do Município",
+    "O Setor de Recursos Humanos",
+    "A Diretoria de Obras e Infraestrutura",
+    "A Controladoria Geral",
+    "O Gabinete do Prefeito",
+]
+
+ACTIONS = [
+    "aprovou",
+    "publicou",
+    "homologou",
+    "encaminhou para análise",
+    "revogou",
+    "prorrogou",
+    "autorizou a contratação referente a",
+    "determinou a revisão de",
+    "registrou em ata",
+    "solicitou parecer sobre",
+]
+
+OBJECTS = [
+    "o edital de licitação do pregão eletrônico nº {number}/{year}",
+    "a portaria de nomeação dos servidores aprovados no concurso",
+    "o calendário escolar do ano letivo de {year}",
+    "o contrato de fornecimento da merenda escolar",
+    "o relatório de gestão orçamentária do {quarter}º trimestre",
+    "a folha de pagamento dos servidores efetivos",
+    "o plano de vacinação das unidades básicas de saúde",
+    "o termo aditivo do contrato de transporte escolar",
+    "a ordem de serviço das obras de pavimentação do bairro Centro",
+    "o inventário patrimonial dos bens móveis",
+    "a prestação de contas do convênio estadual nº {number}",
+    "o cronograma de manutenção da frota municipal",
+]
+
+COMPLEMENTS = [
+    "conforme o processo administrativo nº {number}.{small}/{year}",
+    "no valor global de R$ {amount}",
+    "com vigência de doze meses a partir da assinatura",
+    "nos termos da Lei nº 14.133/2021",
+    "após parecer favorável da assessoria jurídica",
+    "com dotação orçamentária da unidade {small}",
+    "em reunião ordinária realizada em {day}/{month}/{year}",
+    "para atendimento de {small} alunos da rede municipal",
+]
+
+SHEET_ITEMS = [
+    "Arroz tipo 1",
+    "Feijão carioca",
+    "Papel sulfite A4",
+    "Cartucho de toner",
+    "Combustível diesel S10",
+    "Luva de procedimento",
+    "Cimento CP II",
+    "Material de limpeza",
+    "Serviço de manutenção predial",
+    "Locação de veículo",
+    "Medicamento básico",
+    "Uniforme escolar",
+]
+
+UNITS = ["kg", "unidade", "caixa", "litro", "pacote", "mês"]
+
+FIRST_NAMES = [
+    "Ana", "João", "Maria", "José", "Francisca", "Antônio", "Luíza",
+    "Paulo", "Márcia", "Raimundo", "Conceição", "Sebastião",
+]
+
+LAST_NAMES = [
+    "Silva", "Souza", "Oliveira", "Pereira", "Lima", "Araújo",
+    "Gonçalves", "Ribeiro", "Carvalho", "Conceição", "Barbosa",
+]
+
+ROLES = [
+    "Professor", "Agente administrativo", "Enfermeiro",
+    "Motorista", "Merendeira", "Engenheiro civil", "Contador",
+]
+
+QUERIES = [
+    "edital de licitação do pregão eletrônico",
+    "calendário escolar do ano letivo",
+    "contrato de fornecimento da merenda escolar",
+    "folha de pagamento dos servidores efetivos",
+    "relatório de gestão orçamentária",
+    "plano de vacinação das unidades de saúde",
+    "obras de pavimentação",
+    "transporte escolar termo aditivo",
+    "prestação de contas do convênio",
+    "parecer da assessoria jurídica",
+]
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """
+    Especificação de um corpus sintético.
+
+    Args:
+        files: Quantidade de arquivos
+        depth: Níveis de pasta abaixo da raiz do upload (secretaria,
+            ano, categoria, processos e anexos)
+        seed: Semente do sorteio
+        mix: Peso de cada extensão
+    """
+    files: int
+    depth: int
+    seed: int = 0
+    mix: dict = field(default_factory=lambda: dict(DEFAULT_MIX))
+
+    def as_dict(self):
+        """Especificação serializável em JSON."""
+        return {
+            "files": self.files,
+            "depth": self.depth,
+            "seed": self.seed,
+            "mix": self.mix,
+        }
+
+
+PROFILES = {
+    "small": CorpusSpec(files=200, depth=4),
+    "medium": CorpusSpec(files=2000, depth=5),
+    "large": CorpusSpec(files=20_000, depth=7),
+}
+
+
+@dataclass
+class SyntheticFile:
+    """Arquivo do corpus: caminho relativo (como no upload) e bytes."""
+    path: str
+    data: bytes
+
+
+def _rng(spec, index):
+    """Gerador de números aleatórios do arquivo de número index."""
+    return random.Random(f"{spec.seed}:{index}")
+
+
+def _fill(template, rng):
+    """Preenche os números e datas de um modelo de frase."""
+    return template.format(
+        number=rng.randint(1, 999),
+        small=rng.randint(10, 99),
+        year=rng.choice(YEARS),
+        quarter=rng.randint(1, 4),
+        day=f"{rng.randint(1, 28):02d}",
+        month=f"{rng.randint(1, 12):02d}",
+        amount=f"{rng.randint(1000, 999_999):,}".replace(",", ".") + ",00",
+    )
+
+
+def sentence(rng):
+    """Frase administrativa: sujeito, ação, objeto e complemento."""
+    return (
+        f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} "
+        f"{_fill(rng.choice(OBJECTS), rng)}, "
+        f"{_fill(rng.choice(COMPLEMENTS), rng)}."
+    )
+
+
+def paragraph(rng):
+    """Parágrafo de três a seis frases."""
+    return " ".join(sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+def _folder_parts(rng, depth):
+    """Pastas do arquivo, da secretaria até a profundidade pedida."""
+    parts = [rng.choice(DEPARTMENTS), rng.choice(YEARS)]
+    parts.append(rng.choice(list(CATEGORIES)))
+    for level in range(3, depth):
+        if level % 2:
+            parts.append(f"Processo {rng.randint(1, 6):03d}")
+        else:
+            parts.append("Anexos")
+    return parts[:max(depth, 1)]
+
+
+def _extension(rng, mix):
+    """Extensão sorteada conforme os pesos da mistura."""
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def _document_bytes(extension, rng, title):
+    """Conteúdo do arquivo no formato da extensão."""
+    if extension == ".pdf":
+        return build_pdf([
+            [paragraph(rng) for _ in range(rng.randint(3, 6))]
+            for _ in range(rng.randint(1, 6))
+        ])
+    if extension == ".docx":
+        return build_docx([
+            (
+                f"Art. {number} - {title}",
+                [paragraph(rng) for _ in range(rng.randint(2, 5))],
+            )
+            for number in range(1, rng.randint(2, 6))
+        ])
+    if extension == ".xlsx":
+        return build_xlsx("Itens", _item_rows(rng))
+    if extension == ".csv":
+        return build_csv(_payroll_rows(rng))
+    return build_txt([paragraph(rng) for _ in range(rng.randint(2, 8))])
+
+
+def _item_rows(rng):
+    """Linhas de uma planilha de itens de compra."""
+    rows = [[
+        "Item", "Descrição", "Unidade", "Quantidade", "Valor unitário",
+        "Valor total",
+    ]]
+    for number in range(1, rng.randint(20, 200)):
+        quantity = rng.randint(1, 500)
+        price = round(rng.uniform(1, 2000), 2)
+        rows.append([
+            number,
+            rng.choice(SHEET_ITEMS),
+            rng.choice(UNITS),
+            quantity,
+            price,
+            round(quantity * price, 2),
+        ])
+    return rows
+
+
+def _payroll_rows(rng):
+    """Linhas de um CSV de folha de pagamento."""
+    rows = [["Matrícula", "Servidor", "Cargo", "Lotação", "Salário"]]
+    for _ in range(rng.randint(20, 300)):
+        rows.append([
+            rng.randint(10_000, 99_999),
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} "
+            f"{rng.choice(LAST_NAMES)}",
+            rng.choice(ROLES),
+            rng.choice(DEPARTMENTS),
+            f"{rng.uniform(1412, 15_000):.2f}".replace(".", ","),
+        ])
+    return rows
+
+
+def file_path(spec, index):
+    """
+    Caminho relativo do arquivo de número index, como enviado pelo
+    navegador no upload de pasta (secretaria/ano/categoria/.../nome).
+    """
+    rng = _rng(spec, index)
+    parts = _folder_parts(rng, spec.depth)
+    category = next(
+        (CATEGORIES[part] for part in parts if part in CATEGORIES),
+        "Documento",
+    )
+    extension = _extension(rng, spec.mix)
+    return "/".join([*parts, f"{category} {index:06d}{extension}"])
+
+
+def build_file(spec, index):
+    """
+    Gera o arquivo de número index do corpus.
+
+    Returns:
+        SyntheticFile: Caminho e conteúdo
+    """
+    path = file_path(spec, index)
+    rng = _rng(spec, f"{index}:content")
+    name = path.rsplit("/", 1)[-1]
+    stem, extension = name.rsplit(".", 1)
+    return SyntheticFile(
+        path=path, data=_document_bytes(f".{extension}", rng, stem)
+    )
+
+
+def iter_upload_batches(spec, batch_size):
+    """
+    Agrupa o corpus em uploads de pasta de até batch_size arquivos.
+
+    Cada lote contém arquivos de uma única secretaria, como se a pasta
+    da secretaria fosse enviada (em partes, quando é grande); os bytes
+    de um lote só são gerados quando ele é pedido.
+
+    Yields:
+        tuple: (nome da pasta enviada, lista de SyntheticFile)
+    """
+    by_department = {}
+    for index in range(spec.files):
+        department = file_path(spec, index).split("/", 1)[0]
+        by_department.setdefault(department, []).append(index)
+
+    for department, indexes in sorted(by_department.items()):
+        for start in range(0, len(indexes), batch_size):
+            yield (
+                department,
+                [
+                    build_file(spec, index)
+                    for index in indexes[start:start + batch_size]
+                ],
+            )
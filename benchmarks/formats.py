@@ -0,0 +1,335 @@
+"""
+Geração dos documentos sintéticos dos benchmarks, byte a byte.
+
+Cada função recebe o conteúdo já sorteado e devolve os bytes do
+arquivo no formato pedido:
+- PDF: páginas de texto em Helvetica (WinAnsiEncoding), com a tabela
+  xref calculada
+- DOCX: word/document.xml com títulos (estilo Heading1), parágrafos e
+  quebras de página
+- XLSX: uma planilha com strings inline e números
+- CSV e TXT: texto UTF-8
+
+Os formatos ZIP são montados com data fixa nas entradas e os
+documentos não têm metadados de criação: o mesmo conteúdo produz
+sempre os mesmos bytes, o que mantém os corpora reproduzíveis (e o
+hash SHA-256 dos blobs estável entre execuções).
+"""
+import csv
+import io
+import textwrap
+import zipfile
+from xml.sax.saxutils import escape
+
+ZIP_DATE = (2025, 1, 1, 0, 0, 0)
+
+PDF_LINE_CHARS = 90
+
+PDF_PAGE_LINES = 60
+
+PDF_FONT_SIZE = 10
+
+PDF_LEADING = 12
+
+PDF_TOP = 800
+
+CONTENT_TYPES = {
+    "docx": (
+        "word/document.xml",
+        "application/vnd.openxmlformats-officedocument."
+        "wordprocessingml.document.main+xml",
+    ),
+    "xlsx": (
+        "xl/workbook.xml",
+        "application/vnd.openxmlformats-officedocument."
+        "spreadsheetml.sheet.main+xml",
+    ),
+}
+
+OFFICE_RELATIONSHIP = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+)
+
+PACKAGE_RELATIONSHIPS = (
+    "http://schemas.openxmlformats.org/package/2006/relationships"
+)
+
+WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+def _zip(parts):
+    """
+    Monta um pacote ZIP com as partes na ordem dada e data fixa.
+
+    Args:
+        parts: Lista de (nome, conteúdo em str)
+
+    Returns:
+        bytes: Conteúdo do ZIP
+    """
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in parts:
+            info = zipfile.ZipInfo(name, date_time=ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, content.encode("utf-8"))
+    return output.getvalue()
+
+
+def _package_parts(kind, main_part, extra_types=()):
+    """
+    [Content_Types].xml e _rels/.rels de um pacote OOXML.
+    """
+    main_name, main_type = CONTENT_TYPES[kind]
+    overrides = "".join(
+        f'<Override PartName="/{name}" ContentType="{content_type}"/>'
+        for name, content_type in ((main_name, main_type), *extra_types)
+    )
+    return [
+        (
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+            'content-types">'
+            '<Default Extension="rels" ContentType="application/'
+            'vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f"{overrides}</Types>",
+        ),
+        (
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="{PACKAGE_RELATIONSHIPS}">'
+            f'<Relationship Id="rId1" Type="{OFFICE_RELATIONSHIP}/'
+            f'officeDocument" Target="{main_part}"/></Relationships>',
+        ),
+    ]
+
+
+def _pdf_literal(text):
+    """Texto como string literal de PDF em cp1252, com escapes."""
+    data = text.encode("cp1252", errors="replace")
+    return (
+        data.replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+    )
+
+
+def build_pdf(pages):
+    """
+    Gera um PDF com uma página por item de pages.
+
+    Args:
+        pages: Lista de páginas, cada uma uma lista de parágrafos
+
+    Returns:
+        bytes: Conteúdo do PDF
+    """
+    page_count = len(pages)
+    font_id = 3
+    first_page_id = 4
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: (
+            "<< /Type /Pages /Count {} /Kids [{}] >>".format(
+                page_count,
+                " ".join(
+                    f"{first_page_id + 2 * number} 0 R"
+                    for number in range(page_count)
+                ),
+            ).encode("ascii")
+        ),
+        font_id: (
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+            b"/Encoding /WinAnsiEncoding >>"
+        ),
+    }
+    for number, paragraphs in enumerate(pages):
+        lines = []
+        for paragraph in paragraphs:
+            lines.extend(textwrap.wrap(paragraph, PDF_LINE_CHARS) or [""])
+        stream = [
+            f"BT /F1 {PDF_FONT_SIZE} Tf {PDF_LEADING} TL "
+            f"50 {PDF_TOP} Td".encode("ascii")
+        ]
+        stream.extend(
+            b"(" + _pdf_literal(line) + b") Tj T*"
+            for line in lines[:PDF_PAGE_LINES]
+        )
+        stream.append(b"ET")
+        content = b"\n".join(stream)
+
+        page_id = first_page_id + 2 * number
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+            f"/Contents {page_id + 1} 0 R >>"
+        ).encode("ascii")
+        objects[page_id + 1] = (
+            f"<< /Length {len(content)} >>\nstream\n".encode("ascii")
+            + content
+            + b"\nendstream"
+        )
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for object_id in sorted(objects):
+        offsets.append(len(output))
+        output += f"{object_id} 0 obj\n".encode("ascii")
+        output += objects[object_id]
+        output += b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n".encode("ascii")
+    output += b"0000000000 65535 f \n"
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("ascii")
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("ascii")
+    return bytes(output)
+
+
+def _docx_paragraph(text, style=None, page_break=False):
+    """Parágrafo de word/document.xml."""
+    properties = (
+        f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    )
+    run = f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+    if page_break:
+        run += '<w:r><w:br w:type="page"/></w:r>'
+    return f"<w:p>{properties}{run}</w:p>"
+
+
+def build_docx(sections):
+    """
+    Gera um DOCX com uma seção (título e parágrafos) por página.
+
+    Args:
+        sections: Lista de (título, lista de parágrafos)
+
+    Returns:
+        bytes: Conteúdo do DOCX
+    """
+    body = []
+    for number, (heading, paragraphs) in enumerate(sections, start=1):
+        body.append(_docx_paragraph(heading, style="Heading1"))
+        for position, paragraph in enumerate(paragraphs, start=1):
+            body.append(_docx_paragraph(
+                paragraph,
+                page_break=(
+                    position == len(paragraphs) and number < len(sections)
+                ),
+            ))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document xmlns:w="{WORD_NS}"><w:body>{"".join(body)}'
+        "</w:body></w:document>"
+    )
+    return _zip([
+        *_package_parts("docx", "word/document.xml"),
+        ("word/document.xml", document),
+    ])
+
+
+def _column_name(index):
+    """Nome da coluna de planilha (0 -> A, 26 -> AA)."""
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def _sheet_cell(reference, value):
+    """Célula de planilha: número ou string inline."""
+    if isinstance(value, (int, float)):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    return (
+        f'<c r="{reference}" t="inlineStr"><is><t>{escape(str(value))}'
+        "</t></is></c>"
+    )
+
+
+def build_xlsx(sheet_name, rows):
+    """
+    Gera um XLSX com uma planilha.
+
+    Args:
+        sheet_name: Nome da planilha
+        rows: Linhas (a primeira é o cabeçalho), listas de str ou
+            números
+
+    Returns:
+        bytes: Conteúdo do XLSX
+    """
+    sheet_rows = "".join(
+        f'<row r="{number}">'
+        + "".join(
+            _sheet_cell(f"{_column_name(column)}{number}", value)
+            for column, value in enumerate(row)
+        )
+        + "</row>"
+        for number, row in enumerate(rows, start=1)
+    )
+    sheet_type = (
+        "application/vnd.openxmlformats-officedocument."
+        "spreadsheetml.worksheet+xml"
+    )
+    return _zip([
+        *_package_parts(
+            "xlsx",
+            "xl/workbook.xml",
+            extra_types=[("xl/worksheets/sheet1.xml", sheet_type)],
+        ),
+        (
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{SHEET_NS}" '
+            f'xmlns:r="{OFFICE_RELATIONSHIP}"><sheets>'
+            f'<sheet name="{escape(sheet_name)}" sheetId="1" r:id="rId1"/>'
+            "</sheets></workbook>",
+        ),
+        (
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="{PACKAGE_RELATIONSHIPS}">'
+            f'<Relationship Id="rId1" Type="{OFFICE_RELATIONSHIP}/'
+            'worksheet" Target="worksheets/sheet1.xml"/></Relationships>',
+        ),
+        (
+            "xl/worksheets/sheet1.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<worksheet xmlns="{SHEET_NS}"><sheetData>{sheet_rows}'
+            "</sheetData></worksheet>",
+        ),
+    ])
+
+
+def build_csv(rows):
+    """
+    Gera um CSV UTF-8 separado por ponto e vírgula.
+
+    Args:
+        rows: Linhas (a primeira é o cabeçalho)
+
+    Returns:
+        bytes: Conteúdo do CSV
+    """
+    output = io.StringIO()
+    csv.writer(output, delimiter=";", lineterminator="\n").writerows(rows)
+    return output.getvalue().encode("utf-8")
+
+
+def build_txt(paragraphs):
+    """
+    Gera um texto UTF-8 com parágrafos separados por linha em branco.
+
+    Returns:
+        bytes: Conteúdo do arquivo
+    """
+    return ("\n\n".join(paragraphs) + "\n").encode("utf-8")
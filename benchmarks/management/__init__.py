@@ -0,0 +1,6 @@
+"""
+Pacote de comandos de gerenciamento do Django.
+
+Este pacote contém comandos customizados de gerenciamento do app
+benchmarks que podem ser executados através do 'python manage.py'.
+"""
@@ -0,0 +1,143 @@
+"""
+Comando do benchmark de ingestão e busca.
+
+Gera um corpus sintético reproduzível (ver benchmarks.corpus), mede
+upload, extração, chunking, embeddings, indexação e buscas (ver
+benchmarks.suite) e emite o relatório em JSON. Com --baseline, compara
+a vazão e as latências com um relatório de referência e termina com
+erro se alguma métrica piorou além da tolerância.
+
+O JSON vai para a saída padrão (ou para --output); o progresso e a
+tabela de comparação vão para a saída de erro.
+
+Uso:
+    python manage.py bench --profile small --output baseline.json
+    python manage.py bench --profile small --baseline baseline.json
+    python manage.py bench --results atual.json --baseline baseline.json
+"""
+import dataclasses
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.corpus import PROFILES
+from benchmarks.report import (
+    DEFAULT_TOLERANCE,
+    compare_reports,
+    dump_report,
+    format_comparison,
+    load_report,
+    write_report,
+)
+from benchmarks.suite import DEFAULT_REPEAT, UPLOAD_BATCH_FILES, run_suite
+
+
+class Command(BaseCommand):
+    """
+    Executa o benchmark e, opcionalmente, compara com a referência.
+    """
+
+    help = "Mede a vazão da ingestão e a latência das buscas"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define o corpus, as saídas e a comparação."""
+        parser.add_argument(
+            "--profile",
+            choices=sorted(PROFILES),
+            default="small",
+            help="Tamanho do corpus (padrão: small)",
+        )
+        parser.add_argument(
+            "--files",
+            type=int,
+            help="Substitui a quantidade de arquivos do perfil",
+        )
+        parser.add_argument(
+            "--depth",
+            type=int,
+            help="Substitui a profundidade da árvore do perfil",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=DEFAULT_REPEAT,
+            help="Repetições de cada consulta nas medidas de busca",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=UPLOAD_BATCH_FILES,
+            help="Arquivos por requisição de upload",
+        )
+        parser.add_argument(
+            "--output",
+            help="Grava o relatório JSON neste arquivo",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="Relatório de referência para a comparação",
+        )
+        parser.add_argument(
+            "--results",
+            help="Compara este relatório já gravado em vez de executar",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help="Piora relativa aceita (padrão: 0.1 = 10%%)",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Executa (ou lê) o relatório, grava e compara.
+        """
+        if options["results"]:
+            if not options["baseline"]:
+                raise CommandError("--results exige --baseline.")
+            report = load_report(options["results"])
+        else:
+            report = run_suite(
+                _build_spec(options),
+                repeat=options["repeat"],
+                batch_size=options["batch_size"],
+                log=self.stderr.write,
+            )
+            if options["output"]:
+                write_report(report, options["output"])
+                self.stderr.write(f"relatório gravado em {options['output']}")
+            else:
+                self.stdout.write(dump_report(report), ending="")
+
+        if options["baseline"]:
+            self._compare(
+                report, load_report(options["baseline"]), options["tolerance"]
+            )
+
+    def _compare(self, report, baseline, tolerance):
+        """
+        Mostra a comparação e falha se houver regressões.
+        """
+        comparisons = compare_reports(report, baseline, tolerance)
+        for line in format_comparison(comparisons):
+            self.stderr.write(line)
+        regressions = [item for item in comparisons if item.regressed]
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} métrica(s) piorou(aram) mais de "
+                f"{tolerance:.0%} em relação à referência."
+            )
+        self.stderr.write(self.style.SUCCESS(
+            f"{len(comparisons)} métrica(s) dentro da tolerância"
+        ))
+
+
+def _build_spec(options):
+    """CorpusSpec do perfil, com as substituições da linha de comando."""
+    spec = PROFILES[options["profile"]]
+    overrides = {"seed": options["seed"]}
+    if options["files"] is not None:
+        overrides["files"] = options["files"]
+    if options["depth"] is not None:
+        overrides["depth"] = options["depth"]
+    return dataclasses.replace(spec, **overrides)
@@ -0,0 +1,467 @@
+"""
+Comando do benchmark de concorrência entre uploads e navegação.
+
+Mede, contra um servidor em execução (serve ou runserver), quanto os
+uploads de pasta atrasam a navegação no workspace:
+- navigation.idle: clientes abrindo pastas (GET /workspace?folder=),
+  sem uploads
+- navigation.mixed: os mesmos clientes, enquanto outros enviam lotes
+  do corpus sintético (ver benchmarks.corpus) para /upload-folder/
+- upload.mixed: vazão dos uploads durante a fase mista
+
+A tabela mostra as latências das duas fases e a razão entre os p95;
+com --output, o resultado é gravado no formato dos relatórios do bench
+e pode ser comparado com uma referência por
+"bench --results ... --baseline ...".
+
+O comando usa o banco configurado, o mesmo do servidor: cria um
+usuário próprio com uma sessão autenticada, envia uma pasta do corpus
+que serve de árvore de navegação e, ao final, remove o usuário, os
+arquivos (com os blobs) e as tarefas de extração enfileiradas.
+
+Uso:
+    python manage.py serve --port 8000
+    python manage.py bench_concurrency --url http://127.0.0.1:8000 \\
+        --navigators 16 --uploaders 4 --duration 15
+"""
+import itertools
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from benchmarks.corpus import CorpusSpec, iter_upload_batches
+from benchmarks.report import write_report
+from benchmarks.suite import MEGABYTE, REPORT_FORMAT, latency_percentiles
+from jobs.models import Job
+from rag.extraction import EXTRACT_TASK
+from workspace.blobs import purge_files
+from workspace.models import File, Folder
+
+User = get_user_model()
+
+BENCH_USERNAME = "__bench_concurrency__"
+
+UPLOAD_FOLDER_NAME = "Uploads"
+
+NAVIGATION_FOLDER_NAME = "Navegação"
+
+UPLOAD_BATCHES = 8
+
+CORPUS_DEPTH = 4
+
+REQUEST_TIMEOUT = 300
+
+PAGE_OK = 200
+
+SERVER_ERROR = 500
+
+
+@dataclass
+class UploadLoad:
+    """Uploads da fase mista: servidor, pasta de destino e lotes."""
+    base_url: str
+    folder_id: int
+    batches: list
+    clients: int
+
+
+@dataclass
+class Phase:
+    """Prazo de uma fase e as medidas coletadas pelos clientes."""
+    deadline: float
+    timings: list = field(default_factory=list)
+    errors: int = 0
+    uploads: list = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class Command(BaseCommand):
+    """
+    Mede a latência da navegação com e sem uploads simultâneos.
+    """
+
+    help = "Mede a navegação no workspace durante uploads de pasta"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define o servidor, os clientes e a duração das fases."""
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Endereço do servidor (padrão: http://127.0.0.1:8000)",
+        )
+        parser.add_argument(
+            "--navigators",
+            type=int,
+            default=16,
+            help="Clientes navegando entre as pastas",
+        )
+        parser.add_argument(
+            "--uploaders",
+            type=int,
+            default=4,
+            help="Clientes enviando pastas na fase mista",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Arquivos por upload de pasta",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10.0,
+            help="Segundos de medição de cada fase",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=float,
+            default=2.0,
+            help="Segundos de navegação não medida antes das fases",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            help="Grava o resultado em JSON neste arquivo",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Prepara o usuário e as pastas, mede as duas fases e limpa.
+        """
+        base_url = options["url"].rstrip("/")
+        spec = CorpusSpec(
+            files=options["batch_size"] * UPLOAD_BATCHES,
+            depth=CORPUS_DEPTH,
+            seed=options["seed"],
+        )
+        batches = [
+            batch
+            for _, batch in iter_upload_batches(spec, options["batch_size"])
+        ]
+
+        _remove_bench_user()
+        user = User.objects.create(username=BENCH_USERNAME)
+        client = Client()
+        client.force_login(user)
+        try:
+            cookies = _session_cookies(base_url, client)
+            metrics = self._measure(
+                base_url, cookies, user, batches, options
+            )
+        finally:
+            client.logout()
+            _remove_bench_user()
+
+        self._print(metrics)
+        if options["output"]:
+            write_report(
+                {
+                    "format": REPORT_FORMAT,
+                    "created_at": timezone.now().isoformat(),
+                    "load": {
+                        "url": base_url,
+                        "navigators": options["navigators"],
+                        "uploaders": options["uploaders"],
+                        "batch_size": options["batch_size"],
+                        "duration": options["duration"],
+                    },
+                    "metrics": metrics,
+                },
+                options["output"],
+            )
+
+    def _measure(self, base_url, cookies, user, batches, options):
+        """
+        Executa as fases de navegação e de navegação com uploads.
+
+        Returns:
+            dict: Métricas navigation.idle, navigation.mixed e
+                upload.mixed
+        """
+        self.stderr.write("preparando a árvore de navegação")
+        navigation = _upload(
+            _http_session(cookies),
+            base_url,
+            batches[0],
+            folder_name=NAVIGATION_FOLDER_NAME,
+        )
+        if navigation["failed"]:
+            raise CommandError(
+                f"O upload inicial falhou em {base_url}"
+                f"{reverse('upload_folder')}."
+            )
+        uploads_folder = Folder.objects.create(
+            name=UPLOAD_FOLDER_NAME, owner=user
+        )
+        urls = [
+            f"{base_url}{reverse('workspace_home')}?folder={folder_id}"
+            for folder_id in Folder.objects.filter(owner=user)
+            .exclude(pk=uploads_folder.pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        ]
+
+        _run_phase(cookies, urls, options["navigators"], options["warmup"])
+        self.stderr.write("navegação sem uploads")
+        idle = _run_phase(
+            cookies, urls, options["navigators"], options["duration"]
+        )
+        self.stderr.write("navegação com uploads")
+        mixed = _run_phase(
+            cookies,
+            urls,
+            options["navigators"],
+            options["duration"],
+            uploads=UploadLoad(
+                base_url=base_url,
+                folder_id=uploads_folder.pk,
+                batches=batches,
+                clients=options["uploaders"],
+            ),
+        )
+        return {
+            "navigation.idle": idle["navigation"],
+            "navigation.mixed": mixed["navigation"],
+            "upload.mixed": mixed["upload"],
+        }
+
+    def _print(self, metrics):
+        """Mostra as latências das fases e a vazão dos uploads."""
+        for stage in ("navigation.idle", "navigation.mixed"):
+            result = metrics[stage]
+            self.stdout.write(
+                f"{stage:<18} {result['requests_per_second']:>8.1f} req/s | "
+                f"p50 {result['p50_ms']:7.1f} ms, "
+                f"p95 {result['p95_ms']:7.1f} ms, "
+                f"p99 {result['p99_ms']:7.1f} ms | "
+                f"{result['errors']} erro(s)"
+            )
+        upload = metrics["upload.mixed"]
+        self.stdout.write(
+            f"{'upload.mixed':<18} {upload['requests']} upload(s), "
+            f"{upload['files_per_second']:.1f} arquivos/s, "
+            f"{upload['mb_per_second']:.2f} MB/s | "
+            f"{upload['errors']} erro(s)"
+        )
+        idle_p95 = metrics["navigation.idle"]["p95_ms"]
+        if idle_p95:
+            ratio = metrics["navigation.mixed"]["p95_ms"] / idle_p95
+            self.stdout.write(f"p95 com uploads / sem uploads: {ratio:.2f}x")
+
+
+def _remove_bench_user():
+    """
+    Remove o usuário do benchmark, seus arquivos (liberando os blobs) e
+    as extrações enfileiradas para eles.
+    """
+    files = File.objects.filter(uploader__username=BENCH_USERNAME)
+    Job.objects.filter(
+        task=EXTRACT_TASK,
+        key__in=[
+            f"{EXTRACT_TASK}:{file_id}"
+            for file_id in files.values_list("pk", flat=True)
+        ],
+    ).delete()
+    purge_files(files)
+    User.objects.filter(username=BENCH_USERNAME).delete()
+
+
+def _session_cookies(base_url, client):
+    """
+    Cookies de sessão e de CSRF do usuário autenticado no client.
+
+    O cookie de CSRF vem de uma página do próprio servidor.
+    """
+    session_cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+    url = f"{base_url}{reverse('workspace_home')}"
+    response = requests.get(
+        url,
+        cookies={settings.SESSION_COOKIE_NAME: session_cookie},
+        timeout=REQUEST_TIMEOUT,
+        allow_redirects=False,
+    )
+    csrf_cookie = response.cookies.get(settings.CSRF_COOKIE_NAME)
+    if response.status_code != PAGE_OK or not csrf_cookie:
+        raise CommandError(
+            f"{url} respondeu {response.status_code}; "
+            "o servidor usa o mesmo banco deste comando?"
+        )
+    return {
+        settings.SESSION_COOKIE_NAME: session_cookie,
+        settings.CSRF_COOKIE_NAME: csrf_cookie,
+    }
+
+
+def _http_session(cookies):
+    """Sessão HTTP autenticada, com o token de CSRF nos cabeçalhos."""
+    session = requests.Session()
+    session.cookies.update(cookies)
+    session.headers["X-CSRFToken"] = cookies[settings.CSRF_COOKIE_NAME]
+    return session
+
+
+def _upload(session, base_url, batch, folder_name, folder_id=None):
+    """
+    Envia um lote de arquivos como upload de pasta.
+
+    Returns:
+        dict: Bytes enviados, falha e duração (ms)
+    """
+    data = {
+        "folder_name": folder_name,
+        "file_paths": json.dumps([item.path for item in batch]),
+    }
+    if folder_id:
+        data["folder"] = folder_id
+    started = time.perf_counter()
+    try:
+        response = session.post(
+            f"{base_url}{reverse('upload_folder')}",
+            data=data,
+            files=[
+                ("files", (item.path.rsplit("/", 1)[-1], item.data))
+                for item in batch
+            ],
+            timeout=REQUEST_TIMEOUT,
+            allow_redirects=False,
+        )
+        failed = response.status_code >= SERVER_ERROR
+    except requests.RequestException:
+        failed = True
+    return {
+        "bytes": sum(len(item.data) for item in batch),
+        "failed": failed,
+        "ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def _navigator(cookies, urls, offset, phase):
+    """
+    Laço de um cliente de navegação: abre as pastas em sequência, na
+    mesma conexão, até o prazo.
+    """
+    session = _http_session(cookies)
+    timings = []
+    errors = 0
+    for url in itertools.islice(itertools.cycle(urls), offset, None):
+        if time.perf_counter() >= phase.deadline:
+            break
+        started = time.perf_counter()
+        try:
+            response = session.get(
+                url, timeout=REQUEST_TIMEOUT, allow_redirects=False
+            )
+            failed = response.status_code >= SERVER_ERROR
+        except requests.RequestException:
+            failed = True
+        if failed:
+            errors += 1
+        else:
+            timings.append((time.perf_counter() - started) * 1000)
+    session.close()
+    with phase.lock:
+        phase.timings.extend(timings)
+        phase.errors += errors
+
+
+def _uploader(cookies, uploads, offset, phase):
+    """
+    Laço de um cliente de upload: envia os lotes em sequência até o
+    prazo (o upload em andamento no prazo é concluído e contado).
+    """
+    session = _http_session(cookies)
+    batches = itertools.cycle(uploads.batches)
+    for batch in itertools.islice(batches, offset, None):
+        if time.perf_counter() >= phase.deadline:
+            break
+        result = _upload(
+            session,
+            uploads.base_url,
+            batch,
+            folder_name="",
+            folder_id=uploads.folder_id,
+        )
+        with phase.lock:
+            phase.uploads.append((len(batch), result))
+    session.close()
+
+
+def _navigation_metrics(phase, seconds):
+    """Vazão, erros e latências da navegação em uma fase."""
+    timings = phase.timings
+    metrics = {
+        "requests": len(timings),
+        "errors": phase.errors,
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(timings) / seconds, 2),
+    }
+    if len(timings) > 1:
+        metrics.update(latency_percentiles(timings))
+    else:
+        metrics.update(p50_ms=0.0, p95_ms=0.0, p99_ms=0.0, mean_ms=0.0)
+    return metrics
+
+
+def _upload_metrics(phase, seconds):
+    """Uploads concluídos, erros e vazão em uma fase."""
+    done = [
+        (files, result)
+        for files, result in phase.uploads
+        if not result["failed"]
+    ]
+    files = sum(count for count, _ in done)
+    total_bytes = sum(result["bytes"] for _, result in done)
+    return {
+        "requests": len(done),
+        "files": files,
+        "errors": len(phase.uploads) - len(done),
+        "bytes": total_bytes,
+        "seconds": round(seconds, 3),
+        "files_per_second": round(files / seconds, 2),
+        "mb_per_second": round(total_bytes / MEGABYTE / seconds, 2),
+    }
+
+
+def _run_phase(cookies, urls, navigators, duration, uploads=None):
+    """
+    Executa navigators clientes de navegação por duration segundos e,
+    com uploads (UploadLoad), os clientes de upload ao mesmo tempo.
+
+    Returns:
+        dict: Métricas de navigation e, com uploads, de upload
+    """
+    started = time.perf_counter()
+    phase = Phase(deadline=started + duration)
+    threads = [
+        threading.Thread(
+            target=_navigator, args=(cookies, urls, offset, phase)
+        )
+        for offset in range(max(navigators, 1))
+    ]
+    if uploads:
+        threads += [
+            threading.Thread(
+                target=_uploader, args=(cookies, uploads, offset, phase)
+            )
+            for offset in range(max(uploads.clients, 1))
+        ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    metrics = {"navigation": _navigation_metrics(phase, duration)}
+    if uploads:
+        metrics["upload"] = _upload_metrics(phase, seconds)
+    return metrics
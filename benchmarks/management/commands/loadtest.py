@@ -0,0 +1,169 @@
+"""
+Comando de teste de carga HTTP.
+
+Dispara requisições GET contra uma ou mais URLs por um tempo fixo, com
+N clientes concorrentes (threads, cada uma com sua conexão keep-alive),
+e informa requisições por segundo, erros e latências p50/p95/p99. Com
+mais de uma URL, mostra a vazão de cada uma em relação à primeira,
+por exemplo o runserver contra o comando serve:
+
+    python manage.py runserver 8000
+    python manage.py serve --port 8001
+    python manage.py loadtest --url http://127.0.0.1:8000/ \\
+        --url http://127.0.0.1:8001/ --concurrency 32 --duration 15
+
+Com --output, grava o resultado no formato dos relatórios do bench
+(métricas load.<url>), que pode ser comparado com uma referência por
+"bench --results ... --baseline ...".
+"""
+import threading
+import time
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from benchmarks.report import write_report
+from benchmarks.suite import REPORT_FORMAT, latency_percentiles
+
+REQUEST_TIMEOUT = 30
+
+SERVER_ERROR = 500
+
+
+class Command(BaseCommand):
+    """
+    Mede a vazão e a latência de URLs sob carga concorrente.
+    """
+
+    help = "Mede requisições por segundo de uma ou mais URLs"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define as URLs, a concorrência e a duração."""
+        parser.add_argument(
+            "--url",
+            action="append",
+            dest="urls",
+            required=True,
+            help="URL medida (pode repetir; a primeira é a referência)",
+        )
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10.0,
+            help="Segundos de medição por URL",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=float,
+            default=2.0,
+            help="Segundos de carga não medida antes de cada URL",
+        )
+        parser.add_argument(
+            "--output",
+            help="Grava o resultado em JSON neste arquivo",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Mede cada URL em sequência e mostra a comparação.
+        """
+        metrics = {}
+        for url in options["urls"]:
+            _run_load(url, options["concurrency"], options["warmup"])
+            result = _run_load(
+                url, options["concurrency"], options["duration"]
+            )
+            if not result["requests"]:
+                raise CommandError(f"Nenhuma resposta de {url}.")
+            metrics[f"load.{url}"] = result
+
+        reference = next(iter(metrics.values()))["requests_per_second"]
+        for stage, result in metrics.items():
+            self.stdout.write(
+                f"{stage[len('load.'):]:<40} "
+                f"{result['requests_per_second']:>9.1f} req/s "
+                f"({result['requests_per_second'] / reference:4.2f}x) | "
+                f"p50 {result['p50_ms']:7.1f} ms, "
+                f"p95 {result['p95_ms']:7.1f} ms, "
+                f"p99 {result['p99_ms']:7.1f} ms | "
+                f"{result['errors']} erro(s)"
+            )
+
+        if options["output"]:
+            write_report(
+                {
+                    "format": REPORT_FORMAT,
+                    "created_at": timezone.now().isoformat(),
+                    "load": {
+                        "concurrency": options["concurrency"],
+                        "duration": options["duration"],
+                    },
+                    "metrics": metrics,
+                },
+                options["output"],
+            )
+
+
+def _client(url, deadline, timings, errors, lock):
+    """
+    Laço de um cliente: GETs sequenciais na mesma conexão até o prazo.
+    """
+    session = requests.Session()
+    local_timings = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = session.get(
+                url, timeout=REQUEST_TIMEOUT, allow_redirects=False
+            )
+            failed = response.status_code >= SERVER_ERROR
+        except requests.RequestException:
+            failed = True
+        if failed:
+            local_errors += 1
+        else:
+            local_timings.append((time.perf_counter() - started) * 1000)
+    session.close()
+    with lock:
+        timings.extend(local_timings)
+        errors.append(local_errors)
+
+
+def _run_load(url, concurrency, duration):
+    """
+    Executa concurrency clientes contra url por duration segundos.
+
+    Returns:
+        dict: Requisições, erros, vazão e latências
+    """
+    timings = []
+    errors = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [
+        threading.Thread(
+            target=_client, args=(url, deadline, timings, errors, lock)
+        )
+        for _ in range(max(concurrency, 1))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "requests": len(timings),
+        "errors": sum(errors),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(timings) / elapsed, 2),
+    }
+    if len(timings) > 1:
+        result.update(latency_percentiles(timings))
+    else:
+        result.update(p50_ms=0.0, p95_ms=0.0, p99_ms=0.0, mean_ms=0.0)
+    return result
@@ -0,0 +1,114 @@
+"""
+Leitura, gravação e comparação dos relatórios de benchmark.
+
+Um relatório é o JSON produzido por benchmarks.suite.run_suite. A
+comparação com um relatório de referência (baseline) olha apenas as
+métricas com direção conhecida:
+- *_per_second: vazão, maior é melhor
+- *_ms: latência, menor é melhor
+
+Uma métrica regrediu quando piorou mais que a tolerância relativa
+(por exemplo, 0.1 = 10%). Contagens e tempos totais são informativos
+e não entram na comparação, pois dependem do tamanho do corpus.
+"""
+import json
+from dataclasses import dataclass
+
+DEFAULT_TOLERANCE = 0.10
+
+THROUGHPUT_SUFFIX = "_per_second"
+
+LATENCY_SUFFIX = "_ms"
+
+
+@dataclass
+class Comparison:
+    """Uma métrica comparada com a referência."""
+    stage: str
+    metric: str
+    baseline: float
+    current: float
+    regressed: bool
+
+    @property
+    def change(self):
+        """Variação relativa em relação à referência (0.1 = +10%)."""
+        if not self.baseline:
+            return 0.0
+        return (self.current - self.baseline) / self.baseline
+
+
+def load_report(path):
+    """Lê um relatório gravado em JSON."""
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)
+
+
+def dump_report(report):
+    """Serializa um relatório em JSON legível."""
+    return json.dumps(report, ensure_ascii=False, indent=2) + "\n"
+
+
+def write_report(report, path):
+    """Grava um relatório em JSON."""
+    with open(path, "w", encoding="utf-8") as output:
+        output.write(dump_report(report))
+
+
+def _regressed(metric, baseline, current, tolerance):
+    """Se a métrica piorou além da tolerância."""
+    if metric.endswith(THROUGHPUT_SUFFIX):
+        return current < baseline * (1 - tolerance)
+    return current > baseline * (1 + tolerance)
+
+
+def compare_reports(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compara as métricas de vazão e latência de dois relatórios.
+
+    Métricas ausentes em um dos relatórios são ignoradas.
+
+    Args:
+        current: Relatório da execução atual
+        baseline: Relatório de referência
+        tolerance: Piora relativa aceita antes de acusar regressão
+
+    Returns:
+        list: Comparison de cada métrica presente nos dois relatórios
+    """
+    comparisons = []
+    for stage, metrics in current.get("metrics", {}).items():
+        reference = baseline.get("metrics", {}).get(stage, {})
+        for metric, value in metrics.items():
+            if not metric.endswith((THROUGHPUT_SUFFIX, LATENCY_SUFFIX)):
+                continue
+            if metric not in reference:
+                continue
+            comparisons.append(Comparison(
+                stage=stage,
+                metric=metric,
+                baseline=reference[metric],
+                current=value,
+                regressed=_regressed(
+                    metric, reference[metric], value, tolerance
+                ),
+            ))
+    return comparisons
+
+
+def format_comparison(comparisons):
+    """
+    Tabela de texto com as métricas comparadas.
+
+    Returns:
+        list: Linhas da tabela, uma por métrica
+    """
+    lines = []
+    for item in comparisons:
+        status = "REGRESSÃO" if item.regressed else "ok"
+        lines.append(
+            f"{item.stage + '.' + item.metric:<45} "
+            f"{item.baseline:>12.2f} -> {item.current:>12.2f} "
+            f"({item.change:+7.1%})  {status}"
+        )
+    return lines
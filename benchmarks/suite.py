@@ -0,0 +1,405 @@
+"""
+Etapas do benchmark de ingestão e busca.
+
+run_suite gera o corpus de um CorpusSpec e o passa pelo mesmo caminho
+de um upload real, etapa por etapa, medindo cada uma:
+- upload: POST multipart em /upload-folder/ (cliente de teste do
+  Django, com validação, blobs e criação da árvore), em lotes de
+  arquivos de uma secretaria
+- extraction: rag.extraction.run_extraction de cada arquivo
+- chunking: rag.chunking.sync_chunks de cada arquivo
+- embedding: rag.embeddings.embed_file de cada arquivo, com o encoder
+  configurado
+- indexing: rag.vector_index.index_chunks dos chunks do corpus, e a
+  compactação do índice em seguida (compaction)
+- search.*: latências p50/p95/p99 da busca híbrida (com e sem filtro
+  de metadados) e da busca do workspace, depois de uma rodada de
+  aquecimento
+
+As tarefas enfileiradas pelo upload não são executadas pelos workers:
+cada etapa chama diretamente a função da tarefa, para que o tempo
+medido seja o do trabalho e não o da espera na fila. Tudo acontece em
+uma transação revertida ao final, com MEDIA_ROOT e RAG_INDEX_ROOT
+temporários, de modo que o banco, o storage e o índice reais não são
+alterados; o upload roda sem o executor de uploads
+(WORKSPACE_UPLOAD_WORKERS = 0), na conexão dessa transação.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rag import vector_index
+from rag.chunking import sync_chunks
+from rag.embeddings import EmbeddingReport, embed_file, get_encoder
+from rag.extraction import run_extraction
+from rag.facets import build_filter
+from rag.models import Chunk, DocumentExtraction
+from rag.retrieval import hybrid_search
+from rag.vector_index import get_index, index_chunks, live_chunk_ids
+from workspace.models import File, Folder
+from workspace.search import search_workspace
+
+from .corpus import QUERIES, iter_upload_batches
+
+User = get_user_model()
+
+BENCH_USERNAME = "__bench__"
+
+REPORT_FORMAT = 1
+
+DEFAULT_REPEAT = 20
+
+UPLOAD_BATCH_FILES = 50
+
+SEARCH_TOP_K = 8
+
+SEARCH_FILTER = "tipo:planilha"
+
+MEGABYTE = 1024 * 1024
+
+
+def _rate(count, seconds):
+    """Vazão por segundo, arredondada."""
+    return round(count / seconds, 2) if seconds else 0.0
+
+
+def latency_percentiles(timings):
+    """
+    Latências p50, p95, p99 e média, em milissegundos (timings com
+    pelo menos duas medidas).
+    """
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "samples": len(timings),
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+    }
+
+
+@contextmanager
+def _isolated_indexes():
+    """
+    Esvazia o cache de índices vetoriais do processo durante o bloco,
+    para que get_index abra o índice no RAG_INDEX_ROOT temporário.
+    """
+    saved = dict(vector_index._indexes)
+    vector_index._indexes.clear()
+    try:
+        yield
+    finally:
+        vector_index._indexes.clear()
+        vector_index._indexes.update(saved)
+
+
+def _revision():
+    """Commit atual do repositório, se disponível."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment():
+    """
+    Dados do ambiente de execução, gravados junto com os resultados.
+    """
+    encoder = get_encoder()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "database": connection.vendor,
+        "database_version": getattr(connection, "pg_version", None),
+        "encoder": encoder.name,
+        "dimension": encoder.dimension,
+        "revision": _revision(),
+    }
+
+
+def bench_upload(user, spec, batch_size, log):
+    """
+    Envia o corpus pela view de upload de pasta.
+
+    Returns:
+        dict: Arquivos, bytes, requisições e vazão do upload
+    """
+    client = Client()
+    client.force_login(user)
+    url = reverse("upload_folder")
+    files = 0
+    total_bytes = 0
+    requests = 0
+    seconds = 0.0
+
+    for folder_name, batch in iter_upload_batches(spec, batch_size):
+        payload = {
+            "files": [
+                SimpleUploadedFile(item.path.rsplit("/", 1)[-1], item.data)
+                for item in batch
+            ],
+            "file_paths": json.dumps([item.path for item in batch]),
+            "folder_name": folder_name,
+        }
+        started = time.perf_counter()
+        client.post(url, payload)
+        seconds += time.perf_counter() - started
+        files += len(batch)
+        total_bytes += sum(len(item.data) for item in batch)
+        requests += 1
+        log(f"upload: {files}/{spec.files} arquivo(s)")
+
+    stored = File.objects.filter(uploader=user).count()
+    return {
+        "files": files,
+        "stored": stored,
+        "bytes": total_bytes,
+        "requests": requests,
+        "seconds": round(seconds, 3),
+        "files_per_second": _rate(files, seconds),
+        "mb_per_second": _rate(total_bytes / MEGABYTE, seconds),
+    }
+
+
+def bench_extraction(file_ids):
+    """
+    Extrai o texto de cada arquivo.
+
+    Returns:
+        dict: Arquivos, falhas, páginas, bytes lidos e vazão
+    """
+    started = time.perf_counter()
+    for file_id in file_ids:
+        run_extraction(file_id)
+    seconds = time.perf_counter() - started
+
+    extractions = DocumentExtraction.objects.filter(file_id__in=file_ids)
+    totals = extractions.aggregate(
+        pages=Sum("page_count"), bytes_read=Sum("bytes_read")
+    )
+    pages = totals["pages"] or 0
+    bytes_read = totals["bytes_read"] or 0
+    return {
+        "files": len(file_ids),
+        "failed": extractions.filter(
+            status=DocumentExtraction.STATUS_FAILED
+        ).count(),
+        "pages": pages,
+        "bytes": bytes_read,
+        "seconds": round(seconds, 3),
+        "files_per_second": _rate(len(file_ids), seconds),
+        "pages_per_second": _rate(pages, seconds),
+        "mb_per_second": _rate(bytes_read / MEGABYTE, seconds),
+    }
+
+
+def bench_chunking(file_ids):
+    """
+    Divide o texto extraído de cada arquivo em chunks.
+
+    Returns:
+        dict: Chunks, tokens e vazão
+    """
+    started = time.perf_counter()
+    chunks = sum(sync_chunks(file_id) for file_id in file_ids)
+    seconds = time.perf_counter() - started
+
+    tokens = Chunk.objects.filter(file_id__in=file_ids).aggregate(
+        tokens=Sum("token_count")
+    )["tokens"] or 0
+    return {
+        "chunks": chunks,
+        "tokens": tokens,
+        "seconds": round(seconds, 3),
+        "chunks_per_second": _rate(chunks, seconds),
+        "tokens_per_second": _rate(tokens, seconds),
+    }
+
+
+def bench_embedding(file_ids):
+    """
+    Gera os embeddings dos chunks de cada arquivo.
+
+    Returns:
+        dict: Chunks codificados e vindos do cache, e vazão
+    """
+    report = EmbeddingReport()
+    started = time.perf_counter()
+    for file_id in file_ids:
+        report.add(embed_file(file_id))
+    seconds = time.perf_counter() - started
+    return {
+        "chunks": report.chunks,
+        "encoded": report.encoded,
+        "cached": report.cached,
+        "seconds": round(seconds, 3),
+        "chunks_per_second": _rate(report.chunks, seconds),
+    }
+
+
+def bench_indexing(user):
+    """
+    Anexa os vetores do corpus ao índice e compacta os segmentos.
+
+    Returns:
+        tuple: (métricas da indexação, métricas da compactação)
+    """
+    started = time.perf_counter()
+    vectors = index_chunks(Chunk.objects.filter(file__uploader=user))
+    seconds = time.perf_counter() - started
+
+    index = get_index()
+    segments = len(index.segments)
+    compact_started = time.perf_counter()
+    index.compact(live_chunk_ids(user))
+    compact_seconds = time.perf_counter() - compact_started
+    return (
+        {
+            "vectors": vectors,
+            "segments": segments,
+            "seconds": round(seconds, 3),
+            "vectors_per_second": _rate(vectors, seconds),
+        },
+        {
+            "vectors": index.rows,
+            "seconds": round(compact_seconds, 3),
+            "vectors_per_second": _rate(index.rows, compact_seconds),
+        },
+    )
+
+
+def bench_latency(run, queries, repeat):
+    """
+    Mede a latência de run(query) para cada consulta, repeat vezes,
+    depois de uma rodada de aquecimento não medida.
+
+    Returns:
+        dict: Quantidade de medidas e latências p50/p95/p99/média
+    """
+    for query in queries:
+        run(query)
+    timings = []
+    for _ in range(max(repeat, 1)):
+        for query in queries:
+            started = time.perf_counter()
+            run(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    return latency_percentiles(timings)
+
+
+def bench_search(user, repeat):
+    """
+    Mede as buscas sobre o corpus indexado.
+
+    Returns:
+        dict: Latências por tipo de busca
+    """
+    filters = build_filter(user, SEARCH_FILTER)
+    return {
+        "search.hybrid": bench_latency(
+            lambda query: hybrid_search(user, query, k=SEARCH_TOP_K),
+            QUERIES,
+            repeat,
+        ),
+        "search.hybrid_filtered": bench_latency(
+            lambda query: hybrid_search(
+                user, query, k=SEARCH_TOP_K, filters=filters
+            ),
+            QUERIES,
+            repeat,
+        ),
+        "search.workspace": bench_latency(
+            lambda query: search_workspace(user, query),
+            QUERIES,
+            repeat,
+        ),
+    }
+
+
+def run_suite(spec, repeat=DEFAULT_REPEAT, batch_size=UPLOAD_BATCH_FILES,
+              log=None):
+    """
+    Executa todas as etapas sobre o corpus e descarta os dados.
+
+    Args:
+        spec: CorpusSpec do corpus gerado
+        repeat: Repetições de cada consulta nas medidas de busca
+        batch_size: Arquivos por requisição de upload
+        log: Função chamada com mensagens de progresso (opcional)
+
+    Returns:
+        dict: Relatório serializável em JSON (ambiente, corpus e
+            métricas por etapa)
+    """
+    log = log or (lambda message: None)
+    metrics = {}
+
+    with (
+        tempfile.TemporaryDirectory() as media_root,
+        tempfile.TemporaryDirectory() as index_root,
+        override_settings(
+            MEDIA_ROOT=media_root,
+            RAG_INDEX_ROOT=index_root,
+            JOBS_BACKEND="database",
+            WORKSPACE_UPLOAD_WORKERS=0,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        ),
+        _isolated_indexes(),
+        transaction.atomic(),
+    ):
+        report = {
+            "format": REPORT_FORMAT,
+            "created_at": timezone.now().isoformat(),
+            "environment": environment(),
+        }
+        user = User.objects.create(username=BENCH_USERNAME)
+
+        metrics["upload"] = bench_upload(user, spec, batch_size, log)
+        file_ids = list(
+            File.objects.filter(uploader=user)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        log("extração")
+        metrics["extraction"] = bench_extraction(file_ids)
+        log("chunking")
+        metrics["chunking"] = bench_chunking(file_ids)
+        log("embeddings")
+        metrics["embedding"] = bench_embedding(file_ids)
+        log("indexação")
+        metrics["indexing"], metrics["compaction"] = bench_indexing(user)
+        log("buscas")
+        metrics.update(bench_search(user, repeat))
+
+        report["corpus"] = {
+            **spec.as_dict(),
+            "folders": Folder.objects.filter(owner=user).count(),
+            "bytes": metrics["upload"]["bytes"],
+        }
+        report["metrics"] = metrics
+        transaction.set_rollback(True)
+
+    return report
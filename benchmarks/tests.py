@@ -0,0 +1,139 @@
+"""
+Testes do app benchmarks.
+
+Cobrem a comparação de relatórios com a referência (baseline): a
+direção de cada métrica, a tolerância, as métricas ignoradas e o
+código de saída do comando bench quando há regressão.
+"""
+import io
+import os
+import shutil
+import tempfile
+
+import pytest
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from .management.commands.bench import Command
+from .report import compare_reports, write_report
+
+BASELINE = {
+    "metrics": {
+        "upload": {
+            "files_per_second": 100.0,
+            "files": 50,
+            "seconds": 0.5,
+        },
+        "search": {
+            "p95_ms": 20.0,
+        },
+    },
+}
+
+
+def _report(files_per_second, p95_ms):
+    """Relatório com a vazão do upload e a latência da busca dadas."""
+    return {
+        "metrics": {
+            "upload": {
+                "files_per_second": files_per_second,
+                "files": 500,
+                "seconds": 9.0,
+            },
+            "search": {
+                "p95_ms": p95_ms,
+                "p99_ms": 99.0,
+            },
+            "chunking": {
+                "chunks_per_second": 1.0,
+            },
+        },
+    }
+
+
+class CompareReportsTests(SimpleTestCase):
+    """Comparação das métricas com a referência."""
+
+    def setUp(self):
+        """Usa a referência padrão dos testes."""
+        self.baseline = BASELINE
+
+    def regressions(self, report, tolerance=0.10):
+        """Métricas acusadas como regressão, como "etapa.métrica"."""
+        return [
+            f"{item.stage}.{item.metric}"
+            for item in compare_reports(report, self.baseline, tolerance)
+            if item.regressed
+        ]
+
+    def test_only_known_directions_present_in_both_are_compared(self):
+        """Contagens, totais e métricas sem referência ficam de fora."""
+        comparisons = compare_reports(_report(100.0, 20.0), self.baseline)
+
+        assert [
+            (item.stage, item.metric) for item in comparisons
+        ] == [("upload", "files_per_second"), ("search", "p95_ms")]
+        assert not any(item.regressed for item in comparisons)
+
+    def test_throughput_regresses_when_it_drops(self):
+        """Vazão menor que a tolerância permite é regressão."""
+        assert self.regressions(_report(91.0, 20.0)) == []
+        assert self.regressions(_report(89.0, 20.0)) == [
+            "upload.files_per_second"
+        ]
+        assert self.regressions(_report(500.0, 20.0)) == []
+
+    def test_latency_regresses_when_it_grows(self):
+        """Latência maior que a tolerância permite é regressão."""
+        assert self.regressions(_report(100.0, 21.9)) == []
+        assert self.regressions(_report(100.0, 22.1)) == ["search.p95_ms"]
+        assert self.regressions(_report(100.0, 22.1), tolerance=0.2) == []
+        assert self.regressions(_report(100.0, 1.0)) == []
+
+
+class BenchCommandTests(SimpleTestCase):
+    """Comparação de relatórios gravados pelo comando bench."""
+
+    def setUp(self):
+        """Grava a referência em um diretório temporário."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.baseline = os.path.join(self.directory, "baseline.json")
+        write_report(BASELINE, self.baseline)
+
+    def results(self, report):
+        """Grava o relatório atual e devolve o caminho."""
+        path = os.path.join(self.directory, "atual.json")
+        write_report(report, path)
+        return path
+
+    def test_within_tolerance_succeeds(self):
+        """Sem regressões o comando termina normalmente."""
+        stderr = io.StringIO()
+
+        call_command(
+            "bench",
+            results=self.results(_report(95.0, 21.0)),
+            baseline=self.baseline,
+            stderr=stderr,
+        )
+
+        assert "2 métrica(s) dentro da tolerância" in stderr.getvalue()
+
+    def test_regression_exits_with_an_error(self):
+        """Uma regressão termina o comando com código de saída 1."""
+        argv = [
+            "manage.py",
+            "bench",
+            "--results",
+            self.results(_report(50.0, 21.0)),
+            "--baseline",
+            self.baseline,
+        ]
+        stderr = io.StringIO()
+
+        with pytest.raises(SystemExit) as exit_info:
+            Command(stderr=stderr).run_from_argv(argv)
+
+        assert exit_info.value.code == 1
+        assert "REGRESSÃO" in stderr.getvalue()
@@ -0,0 +1,162 @@
+"""
+Comando que executa a aplicação ASGI em produção.
+
+Sobe o uvicorn (core.asgi:application) com um supervisor e N processos
+que compartilham o mesmo socket:
+- N = SERVE_WORKERS, ou 2 x CPUs + 1 (as views síncronas do Django
+  rodam uma por vez em cada processo, então a espera pelo banco é
+  coberta com processos extras)
+- Reciclagem: cada processo encerra após SERVE_MAX_REQUESTS
+  requisições, mais um desvio aleatório de até
+  SERVE_MAX_REQUESTS_JITTER, e o supervisor sobe outro no lugar; o
+  desvio evita que todos reiniciem ao mesmo tempo
+- Reload gracioso: SIGHUP no processo principal reinicia os processos
+  um a um (cada um termina as requisições em andamento, até
+  SERVE_GRACEFUL_TIMEOUT segundos), sem fechar o socket; SIGTTIN e
+  SIGTTOU somam ou retiram um processo
+- Keep-alive: SERVE_KEEPALIVE segundos, acima do keepalive_timeout do
+  upstream no nginx
+
+Com --reload, roda um único processo que reinicia quando o código muda
+(desenvolvimento, no lugar do runserver).
+
+Uso:
+    python manage.py serve
+    python manage.py serve --workers 4 --max-requests 5000
+    docker compose kill -s HUP web    # reload gracioso
+"""
+import functools
+import os
+import random
+
+import uvicorn
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from uvicorn.supervisors import Multiprocess
+
+ASGI_APPLICATION = "core.asgi:application"
+
+
+def default_workers():
+    """
+    Processos padrão: 2 x CPUs disponíveis + 1.
+
+    Usa as CPUs às quais o processo está restrito (cpuset do
+    container), quando o sistema informa.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return 2 * cpus + 1
+
+
+class Command(BaseCommand):
+    """
+    Executa o uvicorn com processos supervisionados e reciclados.
+    """
+
+    help = "Executa a aplicação ASGI com vários processos (produção)"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define endereço, processos, reciclagem e keep-alive."""
+        parser.add_argument(
+            "--host", default=getattr(settings, "SERVE_HOST", "127.0.0.1")
+        )
+        parser.add_argument(
+            "--port", type=int, default=getattr(settings, "SERVE_PORT", 8000)
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "SERVE_WORKERS", 0),
+            help="Processos (padrão: 2 x CPUs + 1)",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=getattr(settings, "SERVE_MAX_REQUESTS", 0),
+            help="Recicla cada processo após esse número de requisições "
+                 "(0 desativa)",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            default=getattr(settings, "SERVE_MAX_REQUESTS_JITTER", 0),
+        )
+        parser.add_argument(
+            "--keep-alive",
+            type=int,
+            default=getattr(settings, "SERVE_KEEPALIVE", 5),
+            help="Segundos de keep-alive das conexões ociosas",
+        )
+        parser.add_argument(
+            "--graceful-timeout",
+            type=int,
+            default=getattr(settings, "SERVE_GRACEFUL_TIMEOUT", 30),
+            help="Espera pelas requisições em andamento ao encerrar",
+        )
+        parser.add_argument(
+            "--forwarded-allow-ips",
+            default=getattr(settings, "SERVE_FORWARDED_ALLOW_IPS", None),
+        )
+        parser.add_argument(
+            "--access-log",
+            action="store_true",
+            help="Registra cada requisição (o nginx já registra)",
+        )
+        parser.add_argument(
+            "--reload",
+            action="store_true",
+            help="Um processo, reiniciado quando o código muda",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Sobe o supervisor e bloqueia até SIGTERM/SIGINT.
+        """
+        server_options = {
+            "host": options["host"],
+            "port": options["port"],
+            "lifespan": "off",
+            "proxy_headers": True,
+            "forwarded_allow_ips": options["forwarded_allow_ips"],
+            "timeout_keep_alive": options["keep_alive"],
+            "timeout_graceful_shutdown": options["graceful_timeout"],
+            "access_log": options["access_log"],
+        }
+        if options["reload"]:
+            uvicorn.run(ASGI_APPLICATION, reload=True, **server_options)
+            return
+
+        workers = options["workers"] or default_workers()
+        config = uvicorn.Config(
+            ASGI_APPLICATION, workers=workers, **server_options
+        )
+        self.stdout.write(
+            f"Servindo {ASGI_APPLICATION} em "
+            f"{options['host']}:{options['port']} com {workers} processo(s)"
+        )
+        target = functools.partial(
+            _run_worker,
+            config,
+            options["max_requests"],
+            options["max_requests_jitter"],
+        )
+        # Mesmo com um processo, o supervisor reinicia o worker
+        # reciclado ou que morreu
+        Multiprocess(
+            config, target=target, sockets=[config.bind_socket()]
+        ).run()
+
+
+def _run_worker(config, max_requests, jitter, sockets=None):
+    """
+    Corpo de cada processo: define o próprio limite de requisições e
+    serve no socket herdado do supervisor.
+    """
+    if max_requests:
+        config.limit_max_requests = max_requests + random.randint(
+            0, max(jitter, 0)
+        )
+    uvicorn.Server(config).run(sockets=sockets)
@@ -0,0 +1,144 @@
+"""
+Métricas do processo no formato de texto do Prometheus.
+
+Expõe as estatísticas do pool de conexões do Postgres (psycopg_pool)
+de cada banco configurado com a opção "pool":
+- db_pool_connections{state="in_use"|"idle"}: conexões emprestadas às
+  requisições e paradas no pool
+- db_pool_min_size / db_pool_max_size: limites configurados
+- db_pool_waiting: requisições esperando uma conexão agora
+- db_pool_requests_total, db_pool_requests_queued_total: conexões
+  pedidas e quantas precisaram esperar
+- db_pool_wait_seconds_total: tempo total de espera por conexões
+- db_pool_timeouts_total: esperas que estouraram POSTGRES_POOL_TIMEOUT
+- db_pool_connections_opened_total, db_pool_connections_lost_total:
+  conexões abertas com o servidor e perdidas (quebradas ao voltar para
+  o pool ou encontradas mortas)
+
+O pool é de cada processo do servidor, então toda série leva o rótulo
+pid; com vários processos, cada coleta responde pelo processo que
+atendeu a requisição.
+"""
+import os
+
+from django.db import connections
+
+# Contadores: (nome da métrica, ajuda, chave de get_stats(), divisor)
+POOL_COUNTERS = [
+    (
+        "db_pool_requests_total",
+        "Conexões pedidas ao pool",
+        "requests_num",
+        1,
+    ),
+    (
+        "db_pool_requests_queued_total",
+        "Pedidos que esperaram por uma conexão",
+        "requests_queued",
+        1,
+    ),
+    (
+        "db_pool_wait_seconds_total",
+        "Tempo total de espera por conexões",
+        "requests_wait_ms",
+        1000,
+    ),
+    (
+        "db_pool_timeouts_total",
+        "Esperas que estouraram o timeout do pool",
+        "requests_errors",
+        1,
+    ),
+    (
+        "db_pool_connections_opened_total",
+        "Conexões abertas com o servidor",
+        "connections_num",
+        1,
+    ),
+    (
+        "db_pool_connections_lost_total",
+        "Conexões descartadas por estarem quebradas",
+        "connections_lost",
+        1,
+    ),
+]
+
+
+def pool_stats(alias="default"):
+    """
+    Estatísticas do pool de conexões de um banco.
+
+    Args:
+        alias: Alias do banco em DATABASES
+
+    Returns:
+        dict: Estatísticas do psycopg_pool, com in_use e idle
+            calculados, ou None se o banco não usa pool
+    """
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    idle = stats.get("pool_available", 0)
+    return {
+        **stats,
+        "in_use": stats.get("pool_size", 0) - idle,
+        "idle": idle,
+        "waiting": stats.get("requests_waiting", 0),
+    }
+
+
+def _format_value(value):
+    """Número no formato do Prometheus (inteiros sem casas decimais)."""
+    if isinstance(value, float) and not value.is_integer():
+        return f"{value:.6g}"
+    return str(int(value))
+
+
+def render_metrics():
+    """
+    Gera as métricas dos pools de todos os bancos.
+
+    Returns:
+        str: Texto no formato de exposição do Prometheus
+    """
+    pid = os.getpid()
+    samples = {}
+    for alias in connections:
+        stats = pool_stats(alias)
+        labels = f'alias="{alias}",pid="{pid}"'
+        samples.setdefault(
+            ("db_pool_enabled", "gauge", "Se o banco usa pool"), []
+        ).append((labels, int(stats is not None)))
+        if stats is None:
+            continue
+
+        connections_metric = (
+            "db_pool_connections", "gauge", "Conexões do pool por estado"
+        )
+        for state in ("in_use", "idle"):
+            samples.setdefault(connections_metric, []).append(
+                (f'{labels},state="{state}"', stats[state])
+            )
+        for name, key, help_text in (
+            ("db_pool_min_size", "pool_min", "Mínimo de conexões"),
+            ("db_pool_max_size", "pool_max", "Máximo de conexões"),
+            ("db_pool_waiting", "waiting", "Pedidos esperando conexão"),
+        ):
+            samples.setdefault((name, "gauge", help_text), []).append(
+                (labels, stats.get(key, 0))
+            )
+        for name, help_text, key, divisor in POOL_COUNTERS:
+            samples.setdefault((name, "counter", help_text), []).append(
+                (labels, stats.get(key, 0) / divisor)
+            )
+
+    lines = []
+    for (name, metric_type, help_text), values in samples.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(
+            f"{name}{{{labels}}} {_format_value(value)}"
+            for labels, value in values
+        )
+    return "\n".join(lines) + "\n"
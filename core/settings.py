@@ -58,7 +58,11 @@ INSTALLED_APPS = [
     "allauth.socialaccount.providers.google",
     "allauth.socialaccount.providers.github",
     "users",
+    "jobs",
     "workspace",
+    "core",
+    "rag",
+    "benchmarks",
 ]
 
 
@@ -143,6 +147,121 @@ DATABASES = {
     }
 }
 
+# Conexões com o Postgres. Com POSTGRES_POOL (padrão), cada processo
+# mantém um pool do psycopg 3 com POSTGRES_POOL_MIN_SIZE a
+# POSTGRES_POOL_MAX_SIZE conexões: a requisição pega uma conexão pronta
+# e a devolve ao terminar. Quem espera mais que POSTGRES_POOL_TIMEOUT
+# segundos recebe erro; conexões são recicladas após
+# POSTGRES_POOL_MAX_LIFETIME segundos de vida ou POSTGRES_POOL_MAX_IDLE
+# ociosas (acima do mínimo). Sem o pool, POSTGRES_CONN_MAX_AGE mantém
+# uma conexão persistente por thread, verificada antes de ser reusada;
+# sob ASGI as threads variam por requisição e essas conexões se
+# acumulam até expirar, por isso o pool é o padrão
+POSTGRES_POOL = (
+    os.getenv('POSTGRES_POOL', 'True').lower()
+    in ('true', '1', 'yes')
+)
+
+if POSTGRES_POOL:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv('POSTGRES_POOL_MIN_SIZE', 2)),
+            "max_size": int(os.getenv('POSTGRES_POOL_MAX_SIZE', 10)),
+            "timeout": float(os.getenv('POSTGRES_POOL_TIMEOUT', 10)),
+            "max_lifetime": float(
+                os.getenv('POSTGRES_POOL_MAX_LIFETIME', 30 * 60)
+            ),
+            "max_idle": float(os.getenv('POSTGRES_POOL_MAX_IDLE', 5 * 60)),
+        },
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.getenv('POSTGRES_CONN_MAX_AGE', 60)
+    )
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Redes autorizadas a ler /metrics (a partir do próprio host ou da rede
+# interna; o nginx não expõe a rota)
+METRICS_ALLOWED_NETWORKS = [
+    network.strip()
+    for network in os.getenv(
+        'METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128'
+    ).split(',')
+    if network.strip()
+]
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+
+# Cache de respostas do RAG no Redis (database 2). O despejo LRU é
+# feito pelo próprio Redis (maxmemory-policy no docker-compose)
+RAG_ANSWER_CACHE_TTL = int(os.getenv('RAG_ANSWER_CACHE_TTL', 24 * 60 * 60))
+
+# Cache do workspace (workspace.cache): TTL das entradas versionadas
+WORKSPACE_CACHE_TTL = int(os.getenv('WORKSPACE_CACHE_TTL', 60 * 60))
+
+# Caches no Redis do docker-compose:
+# - "default" (database 1): sessões e limites de tentativas do allauth,
+#   compartilhados entre os processos
+# - "workspace" (database 1, prefixo próprio): workspace.cache
+# - "answers" (database 2): cache de respostas do RAG
+# Com CACHE_BACKEND=locmem, todos ficam na memória do processo (testes
+# e desenvolvimento sem Redis)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'redis')
+
+CACHE_URL = os.getenv('CACHE_URL', f"redis://{REDIS_HOST}:{REDIS_PORT}/1")
+
+if CACHE_BACKEND == 'locmem':
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "workspace": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "workspace",
+            "TIMEOUT": WORKSPACE_CACHE_TTL,
+        },
+        "answers": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "answers",
+            "TIMEOUT": RAG_ANSWER_CACHE_TTL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": "django",
+        },
+        "workspace": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "TIMEOUT": WORKSPACE_CACHE_TTL,
+            "KEY_PREFIX": "workspace",
+        },
+        "answers": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv(
+                "RAG_ANSWER_CACHE_URL",
+                f"redis://{REDIS_HOST}:{REDIS_PORT}/2",
+            ),
+            "TIMEOUT": RAG_ANSWER_CACHE_TTL,
+            "KEY_PREFIX": "rag",
+        },
+    }
+
+# Sessões lidas do cache e gravadas também no banco (cached_db): a
+# requisição autenticada não consulta a tabela de sessões, e uma
+# sessão despejada do Redis é recuperada do banco. O cache em memória
+# não é compartilhado entre processos, então com locmem as sessões
+# ficam só no banco
+if CACHE_BACKEND == 'locmem':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -195,6 +314,142 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Tamanho de cada parte no upload em partes (chunked upload)
+WORKSPACE_UPLOAD_CHUNK_BYTES = int(
+    os.getenv('WORKSPACE_UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024)
+)
+
+# Validade, em horas, de uma sessão de upload em partes; sessões
+# vencidas são removidas com o arquivo reservado
+WORKSPACE_UPLOAD_SESSION_HOURS = int(
+    os.getenv('WORKSPACE_UPLOAD_SESSION_HOURS', 24)
+)
+
+# Threads por processo do executor das views de upload (leitura do
+# multipart, gravação dos blobs e criação dos arquivos); uploads além
+# desse número esperam na fila, sem ocupar as threads da navegação.
+# 0 executa o upload no thread da requisição
+WORKSPACE_UPLOAD_WORKERS = int(os.getenv('WORKSPACE_UPLOAD_WORKERS', 4))
+
+# Dias que itens excluídos ficam na lixeira antes do purge_trash
+WORKSPACE_TRASH_RETENTION_DAYS = int(
+    os.getenv('WORKSPACE_TRASH_RETENTION_DAYS', 30)
+)
+
+# Tamanho (em tokens) e sobreposição dos chunks usados na indexação
+RAG_CHUNK_TOKENS = int(os.getenv('RAG_CHUNK_TOKENS', 400))
+
+RAG_CHUNK_OVERLAP_TOKENS = int(os.getenv('RAG_CHUNK_OVERLAP_TOKENS', 60))
+
+# Encoder de embeddings: "hashing" (local, determinístico) ou "http"
+# (API compatível com /embeddings da OpenAI)
+RAG_EMBEDDING_BACKEND = os.getenv('RAG_EMBEDDING_BACKEND', 'hashing')
+
+RAG_EMBEDDING_DIMENSION = int(os.getenv('RAG_EMBEDDING_DIMENSION', 384))
+
+RAG_EMBEDDING_URL = os.getenv('RAG_EMBEDDING_URL', '')
+
+RAG_EMBEDDING_MODEL = os.getenv('RAG_EMBEDDING_MODEL', '')
+
+RAG_EMBEDDING_API_KEY = os.getenv('RAG_EMBEDDING_API_KEY', '')
+
+# Textos por lote e teto de memória (MB) de cada lote de embeddings
+RAG_EMBEDDING_BATCH_SIZE = int(os.getenv('RAG_EMBEDDING_BATCH_SIZE', 64))
+
+RAG_EMBEDDING_MEMORY_MB = int(os.getenv('RAG_EMBEDDING_MEMORY_MB', 256))
+
+# Índice vetorial: diretório dos segmentos (ao lado do MEDIA_ROOT),
+# quantização int8 e listas IVF lidas por consulta
+RAG_INDEX_ROOT = os.getenv('RAG_INDEX_ROOT', BASE_DIR / 'index')
+
+RAG_INDEX_INT8 = (
+    os.getenv('RAG_INDEX_INT8', 'False').lower()
+    in ('true', '1', 'yes')
+)
+
+RAG_INDEX_NPROBE = int(os.getenv('RAG_INDEX_NPROBE', 8))
+
+# Consulta: chunks recuperados por pergunta e orçamento (em tokens) do
+# contexto enviado ao LLM
+RAG_QUERY_TOP_K = int(os.getenv('RAG_QUERY_TOP_K', 8))
+
+RAG_CONTEXT_TOKENS = int(os.getenv('RAG_CONTEXT_TOKENS', 3000))
+
+# Reranking dos candidatos: "" (desativado), "lexical" (local, sem
+# dependências) ou "cross-encoder" (sentence-transformers em CPU), com
+# lotes e orçamento de tempo por consulta
+RAG_RERANKER = os.getenv('RAG_RERANKER', '')
+
+RAG_RERANKER_MODEL = os.getenv(
+    'RAG_RERANKER_MODEL', 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1'
+)
+
+RAG_RERANK_CANDIDATES = int(os.getenv('RAG_RERANK_CANDIDATES', 50))
+
+RAG_RERANK_BATCH_SIZE = int(os.getenv('RAG_RERANK_BATCH_SIZE', 16))
+
+RAG_RERANK_BUDGET_MS = float(os.getenv('RAG_RERANK_BUDGET_MS', 300))
+
+# Cliente do LLM: "stub" (local, determinístico) ou "http" (API
+# compatível com /chat/completions da OpenAI, com streaming)
+RAG_LLM_BACKEND = os.getenv('RAG_LLM_BACKEND', 'stub')
+
+RAG_LLM_URL = os.getenv('RAG_LLM_URL', '')
+
+RAG_LLM_MODEL = os.getenv('RAG_LLM_MODEL', '')
+
+RAG_LLM_API_KEY = os.getenv('RAG_LLM_API_KEY', '')
+
+RAG_LLM_MAX_TOKENS = int(os.getenv('RAG_LLM_MAX_TOKENS', 512))
+
+RAG_LLM_TIMEOUT = int(os.getenv('RAG_LLM_TIMEOUT', 120))
+
+# Cache semântico de respostas: similaridade mínima para reaproveitar a
+# resposta de uma pergunta parecida e perguntas guardadas por escopo
+RAG_ANSWER_CACHE_THRESHOLD = float(
+    os.getenv('RAG_ANSWER_CACHE_THRESHOLD', 0.9)
+)
+
+RAG_ANSWER_CACHE_ENTRIES = int(os.getenv('RAG_ANSWER_CACHE_ENTRIES', 200))
+
+# Backend da fila de tarefas: "database" (workers do run_workers) ou
+# "local" (executa a tarefa imediatamente, usado em testes)
+JOBS_BACKEND = os.getenv('JOBS_BACKEND', 'database')
+
+# Servidor de produção (comando serve): uvicorn com SERVE_WORKERS
+# processos (0 = 2 x CPUs + 1), cada um reciclado após
+# SERVE_MAX_REQUESTS requisições (mais um desvio aleatório de até
+# SERVE_MAX_REQUESTS_JITTER, para que não reiniciem todos juntos)
+SERVE_HOST = os.getenv('UVICORN_HOST', '127.0.0.1')
+
+SERVE_PORT = int(os.getenv('UVICORN_PORT', 8000))
+
+SERVE_WORKERS = int(os.getenv('SERVE_WORKERS', 0))
+
+SERVE_MAX_REQUESTS = int(os.getenv('SERVE_MAX_REQUESTS', 10000))
+
+SERVE_MAX_REQUESTS_JITTER = int(os.getenv('SERVE_MAX_REQUESTS_JITTER', 1000))
+
+# Keep-alive maior que o keepalive_timeout do upstream no nginx (60s),
+# para que o nginx nunca reutilize uma conexão que o uvicorn já fechou
+SERVE_KEEPALIVE = int(os.getenv('SERVE_KEEPALIVE', 75))
+
+SERVE_GRACEFUL_TIMEOUT = int(os.getenv('SERVE_GRACEFUL_TIMEOUT', 30))
+
+# IPs dos proxies cujos cabeçalhos X-Forwarded-* são aceitos
+SERVE_FORWARDED_ALLOW_IPS = os.getenv(
+    'SERVE_FORWARDED_ALLOW_IPS', '127.0.0.1'
+)
+
+# Valida extensão, tamanho e assinatura e calcula o SHA-256 enquanto
+# o upload é lido, antes dos handlers padrão (memória / temporário)
+FILE_UPLOAD_HANDLERS = [
+    'workspace.upload_handlers.ValidatingUploadHandler',
+    'workspace.upload_handlers.HashingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 
 USE_X_FORWARDED_HOST = True
 
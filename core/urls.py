@@ -7,9 +7,13 @@ as URLs dos apps instalados.
 from django.contrib import admin
 from django.urls import include, path
 
+from . import views
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", views.metrics, name="metrics"),
     path("accounts/", include("allauth.urls")),
     path("", include("users.urls")),
     path("", include("workspace.urls")),
+    path("rag/", include("rag.urls")),
 ]
@@ -0,0 +1,48 @@
+"""
+Views do projeto.
+
+Este módulo contém as views que não pertencem a um app, como a
+coleta de métricas do processo.
+"""
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import render_metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _metrics_allowed(remote_addr):
+    """
+    Verifica se o endereço está em METRICS_ALLOWED_NETWORKS.
+    """
+    try:
+        address = ipaddress.ip_address(remote_addr)
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics(request):
+    """
+    View de métricas no formato do Prometheus.
+
+    Restrita às redes de METRICS_ALLOWED_NETWORKS (o coletor acessa o
+    processo diretamente, sem passar pelo nginx).
+
+    Args:
+        request: Objeto HttpRequest do Django
+
+    Returns:
+        HttpResponse: Métricas em texto ou 403
+    """
+    if not _metrics_allowed(request.META.get("REMOTE_ADDR", "")):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
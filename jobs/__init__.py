@@ -0,0 +1,6 @@
+"""
+Pacote jobs do projeto Django.
+
+Este pacote contém a fila de tarefas em segundo plano usada para
+ingestão e manutenção (extração de texto, limpeza da lixeira).
+"""
@@ -0,0 +1,11 @@
+"""
+Configuração do Django Admin para o app jobs.
+
+Este módulo registra o modelo Job no painel administrativo do Django,
+permitindo acompanhar a fila de tarefas.
+"""
+from django.contrib import admin
+
+from .models import Job
+
+admin.site.register(Job)
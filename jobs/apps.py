@@ -0,0 +1,24 @@
+"""
+Configuração da aplicação jobs.
+
+Este módulo define a configuração da aplicação Django responsável
+pela fila de tarefas em segundo plano.
+"""
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    """
+    Configuração da aplicação jobs.
+
+    Define o tipo de campo automático para chaves primárias
+    e o nome da aplicação. Ao iniciar, importa o módulo tasks de cada
+    app instalado para registrar as tarefas.
+    """
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "jobs"
+
+    def ready(self):  # noqa: PLR6301
+        """Registra as tarefas declaradas em <app>/tasks.py."""
+        autodiscover_modules("tasks")
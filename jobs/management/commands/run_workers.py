@@ -0,0 +1,149 @@
+"""
+Comando que executa os workers da fila de tarefas.
+
+Inicia N processos (spawn) que reservam e executam tarefas da fila. O
+processo principal atua como supervisor:
+- Reinicia workers que terminaram (falha ou reciclagem por --max-jobs)
+- Devolve à fila tarefas de workers que pararam de responder
+- Em SIGTERM/Ctrl+C, pede o encerramento e espera a tarefa atual de
+  cada worker terminar
+
+Uso:
+    python manage.py run_workers --concurrency 4
+    python manage.py run_workers --lanes interactive,default
+    python manage.py run_workers --burst
+"""
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.models import Job
+from jobs.queue import requeue_stale_jobs
+from jobs.worker import WorkerOptions, worker_main
+
+SUPERVISOR_INTERVAL = 1.0
+
+SHUTDOWN_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    """
+    Supervisiona um pool de processos que consome a fila de tarefas.
+    """
+
+    help = "Executa os workers da fila de tarefas"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define a concorrência, as filas e o modo de execução."""
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=multiprocessing.cpu_count(),
+        )
+        parser.add_argument(
+            "--lanes",
+            default="",
+            help=(
+                "Filas atendidas, separadas por vírgula "
+                f"({', '.join(Job.LANES)}); padrão: todas"
+            ),
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=None,
+            help="Recicla cada worker após esse número de tarefas",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Encerra quando não houver tarefas prontas",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Inicia os workers e os supervisiona até o encerramento.
+        """
+        worker_options = WorkerOptions(
+            lanes=_parse_lanes(options["lanes"]),
+            poll_interval=options["poll_interval"],
+            burst=options["burst"],
+            max_jobs=options["max_jobs"],
+        )
+        context = multiprocessing.get_context("spawn")
+        stop_event = context.Event()
+
+        def start_worker():
+            process = context.Process(
+                target=worker_main,
+                args=(stop_event, worker_options),
+                daemon=True,
+            )
+            process.start()
+            return process
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+        concurrency = max(1, options["concurrency"])
+        workers = [start_worker() for _ in range(concurrency)]
+        self.stdout.write(f"{concurrency} worker(s) iniciado(s)")
+
+        try:
+            self.supervise(workers, stop_event, worker_options, start_worker)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_event.set()
+            _stop_workers(workers)
+
+        self.stdout.write(self.style.SUCCESS("Workers encerrados"))
+
+    def supervise(self, workers, stop_event, worker_options, start_worker):
+        """
+        Devolve à fila as tarefas de workers mortos e repõe os workers
+        até o encerramento (ou, em modo burst, até todos terminarem).
+
+        A lista workers é atualizada no lugar com os processos novos.
+        """
+        while not stop_event.is_set():
+            recovered = requeue_stale_jobs()
+            if recovered:
+                self.stderr.write(
+                    f"{recovered} tarefa(s) devolvida(s) à fila"
+                )
+
+            if worker_options.burst:
+                if not any(process.is_alive() for process in workers):
+                    break
+            else:
+                workers[:] = [
+                    process if process.is_alive() else start_worker()
+                    for process in workers
+                ]
+            time.sleep(SUPERVISOR_INTERVAL)
+
+
+def _parse_lanes(value):
+    """
+    Converte "interactive,default" nas prioridades correspondentes.
+    """
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in Job.LANES]
+    if unknown:
+        raise CommandError(f"Fila(s) desconhecida(s): {', '.join(unknown)}")
+    return tuple(Job.LANES[name] for name in names)
+
+
+def _stop_workers(workers):
+    """Espera os workers terminarem a tarefa atual e força o resto."""
+    deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+    for process in workers:
+        process.join(max(0, deadline - time.monotonic()))
+        if process.is_alive():
+            process.terminate()
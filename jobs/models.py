@@ -0,0 +1,112 @@
+"""
+Modelos do app jobs.
+
+Este módulo define a tarefa persistida na fila de segundo plano (Job).
+"""
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Job(models.Model):
+    """
+    Tarefa enfileirada para execução pelos workers (run_workers).
+
+    A prioridade define a fila (lane): valores menores são executados
+    primeiro, de modo que reindexações pedidas pelo usuário passem na
+    frente de backfills em massa. A chave (key) torna o enfileiramento
+    idempotente: só pode existir uma tarefa ativa (queued ou running)
+    com a mesma chave.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _("Queued")),
+        (STATUS_RUNNING, _("Running")),
+        (STATUS_DONE, _("Done")),
+        (STATUS_FAILED, _("Failed")),
+    ]
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+    PRIORITY_INTERACTIVE = 0
+    PRIORITY_DEFAULT = 50
+    PRIORITY_BULK = 100
+    LANES = {
+        "interactive": PRIORITY_INTERACTIVE,
+        "default": PRIORITY_DEFAULT,
+        "bulk": PRIORITY_BULK,
+    }
+
+    task = models.CharField(_("task"), max_length=100)
+
+    payload = models.JSONField(_("payload"), default=dict, blank=True)
+
+    key = models.CharField(
+        _("key"),
+        max_length=255,
+        null=True,
+        blank=True,
+    )
+
+    priority = models.PositiveSmallIntegerField(
+        _("priority"),
+        default=PRIORITY_DEFAULT,
+    )
+
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+    )
+
+    attempts = models.PositiveIntegerField(_("attempts"), default=0)
+
+    max_attempts = models.PositiveIntegerField(
+        _("max attempts"),
+        default=3,
+    )
+
+    timeout = models.PositiveIntegerField(_("timeout (s)"), default=300)
+
+    run_after = models.DateTimeField(default=timezone.now)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(_("last error"), blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["priority", "run_after", "id"]
+        verbose_name = _("Job")
+        verbose_name_plural = _("Jobs")
+        indexes = [
+            models.Index(
+                fields=["priority", "run_after", "id"],
+                name="job_ready_idx",
+                condition=Q(status="queued"),
+            ),
+            models.Index(
+                fields=["expires_at"],
+                name="job_running_idx",
+                condition=Q(status="running"),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=Q(status__in=["queued", "running"]),
+                name="job_active_key_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,418 @@
+"""
+Fila de tarefas em segundo plano.
+
+As tarefas são funções registradas com o decorador task (em
+<app>/tasks.py) e enfileiradas com enqueue / enqueue_many. O destino
+depende de JOBS_BACKEND:
+- "database": grava um Job por tarefa; os workers do comando
+  run_workers reservam as tarefas com SELECT ... FOR UPDATE SKIP
+  LOCKED, na ordem (prioridade, run_after)
+- "local": executa a tarefa imediatamente, no próprio processo (usado
+  em testes e em desenvolvimento sem workers)
+
+Cada tarefa tem tempo limite, número máximo de tentativas e backoff
+exponencial entre as tentativas. Tarefas de um worker que morreu são
+devolvidas à fila quando o prazo da reserva (expires_at) vence.
+"""
+import logging
+import random
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 300
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+RETRY_BACKOFF_SECONDS = 10
+
+MAX_BACKOFF_SECONDS = 60 * 60
+
+LOCK_GRACE_SECONDS = 60
+
+STALE_BATCH_SIZE = 100
+
+MAX_ERROR_CHARS = 2000
+
+
+class JobTimeoutError(Exception):
+    """Tarefa excedeu o tempo limite."""
+
+
+@dataclass(frozen=True)
+class TaskDefinition:
+    """Função registrada e suas opções padrão."""
+    name: str
+    func: object
+    priority: int
+    timeout: int
+    max_attempts: int
+    release_key: bool = False
+
+
+_registry = {}
+
+
+def task(name, priority=Job.PRIORITY_DEFAULT, timeout=DEFAULT_TIMEOUT,
+         max_attempts=DEFAULT_MAX_ATTEMPTS, release_key=False):
+    """
+    Registra uma função como tarefa da fila.
+
+    A função recebe o payload do Job como argumentos nomeados, então o
+    payload deve conter apenas valores serializáveis em JSON.
+
+    Args:
+        name: Nome único da tarefa (ex.: "rag.extract_document")
+        priority: Prioridade padrão (ver Job.LANES)
+        timeout: Tempo limite de cada tentativa, em segundos
+        max_attempts: Máximo de tentativas antes de falhar
+        release_key: Libera a chave quando a tarefa é reservada, de
+            modo que a chave só deduplique tarefas ainda na fila. Usado
+            por tarefas que consomem tudo o que está pendente: um novo
+            enqueue durante a execução cria outra tarefa, em vez de ser
+            descartado depois da última leitura da execução atual
+
+    Returns:
+        Callable: Decorador que devolve a própria função
+    """
+    def decorator(func):
+        _registry[name] = TaskDefinition(
+            name=name,
+            func=func,
+            priority=priority,
+            timeout=timeout,
+            max_attempts=max_attempts,
+            release_key=release_key,
+        )
+        return func
+    return decorator
+
+
+def get_task(name):
+    """
+    Retorna a definição de uma tarefa registrada.
+
+    Raises:
+        LookupError: Se a tarefa não estiver registrada
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Tarefa '{name}' não registrada.") from None
+
+
+def enqueue(task_name, payload=None, key=None, priority=None,
+            run_after=None):
+    """
+    Enfileira uma tarefa (ver enqueue_many).
+    """
+    enqueue_many(
+        task_name,
+        [(key, payload or {})],
+        priority=priority,
+        run_after=run_after,
+    )
+
+
+def enqueue_many(task_name, items, priority=None, run_after=None):
+    """
+    Enfileira várias execuções de uma tarefa com um único INSERT.
+
+    Itens cuja chave já pertence a uma tarefa ativa são ignorados.
+
+    Args:
+        task_name: Nome da tarefa registrada
+        items: Lista de (key, payload); key pode ser None
+        priority: Prioridade (padrão: a da tarefa)
+        run_after: Data mínima de execução (padrão: agora)
+    """
+    definition = get_task(task_name)
+    if priority is None:
+        priority = definition.priority
+    run_after = run_after or timezone.now()
+
+    jobs = []
+    seen_keys = set()
+    for key, payload in items:
+        if key is not None:
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+        jobs.append(Job(
+            task=task_name,
+            payload=payload,
+            key=key,
+            priority=priority,
+            timeout=definition.timeout,
+            max_attempts=definition.max_attempts,
+            run_after=run_after,
+        ))
+
+    if jobs:
+        _get_backend()(jobs)
+
+
+def _enqueue_database(jobs):
+    """Backend "database": persiste as tarefas para os workers."""
+    Job.objects.bulk_create(jobs, ignore_conflicts=True)
+
+
+def _enqueue_local(jobs):
+    """
+    Backend "local": executa as tarefas imediatamente.
+
+    As tentativas são repetidas sem espera; a falha final é apenas
+    registrada no log, como faria um worker.
+    """
+    for job in jobs:
+        definition = get_task(job.task)
+        for attempt in range(1, job.max_attempts + 1):
+            try:
+                definition.func(**job.payload)
+                break
+            except Exception:
+                if attempt == job.max_attempts:
+                    logger.exception("Tarefa %s falhou", job.task)
+
+
+BACKENDS = {
+    "database": _enqueue_database,
+    "local": _enqueue_local,
+}
+
+
+def _get_backend():
+    """Função de enfileiramento configurada em JOBS_BACKEND."""
+    name = getattr(settings, "JOBS_BACKEND", "database")
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"JOBS_BACKEND inválido: '{name}'."
+        ) from None
+
+
+@contextmanager
+def time_limit(seconds):
+    """
+    Interrompe o bloco com JobTimeoutError após seconds segundos.
+
+    Usa SIGALRM, então só tem efeito na thread principal de sistemas
+    POSIX (caso dos processos de run_workers).
+    """
+    if (
+        not seconds
+        or not hasattr(signal, "SIGALRM")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise JobTimeoutError(f"Tempo limite de {seconds}s excedido.")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def backoff_delay(attempts):
+    """
+    Espera antes da próxima tentativa (exponencial, com jitter).
+
+    Args:
+        attempts: Tentativas já realizadas
+
+    Returns:
+        timedelta: Atraso até a próxima tentativa
+    """
+    delay = min(
+        RETRY_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        MAX_BACKOFF_SECONDS,
+    )
+    return timedelta(seconds=delay * random.uniform(1.0, 1.1))
+
+
+def claim_jobs(worker_id, lanes=None, limit=1):
+    """
+    Reserva as próximas tarefas prontas para um worker.
+
+    Args:
+        worker_id: Identificação do worker (host:pid)
+        lanes: Prioridades atendidas (padrão: todas)
+        limit: Quantidade máxima de tarefas
+
+    Returns:
+        list: Jobs reservados, já marcados como "running" (sem chave,
+            se a tarefa foi registrada com release_key)
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.STATUS_QUEUED,
+            run_after__lte=now,
+        )
+        if lanes:
+            queryset = queryset.filter(priority__in=lanes)
+        jobs = list(queryset.order_by("priority", "run_after", "id")[:limit])
+
+        for job in jobs:
+            job.status = Job.STATUS_RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_at = now
+            job.expires_at = now + timedelta(
+                seconds=job.timeout + LOCK_GRACE_SECONDS
+            )
+            definition = _registry.get(job.task)
+            if definition and definition.release_key:
+                job.key = None
+        Job.objects.bulk_update(jobs, [
+            "status", "attempts", "locked_by", "locked_at", "expires_at",
+            "key",
+        ])
+    return jobs
+
+
+def _finish(job, **fields):
+    """
+    Atualiza uma tarefa reservada, se a reserva ainda for deste worker.
+
+    Returns:
+        bool: False se a tarefa já foi devolvida à fila por expirar
+    """
+    return bool(
+        Job.objects.filter(
+            pk=job.pk,
+            status=Job.STATUS_RUNNING,
+            locked_at=job.locked_at,
+        ).update(**fields)
+    )
+
+
+def _retry_or_fail(job, error):
+    """
+    Agenda uma nova tentativa com backoff ou marca a tarefa como falha.
+    """
+    message = f"{type(error).__name__}: {error}"[:MAX_ERROR_CHARS]
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        return _finish(
+            job,
+            status=Job.STATUS_QUEUED,
+            run_after=now + backoff_delay(job.attempts),
+            last_error=message,
+            locked_by="",
+            locked_at=None,
+            expires_at=None,
+        )
+    return _finish(
+        job,
+        status=Job.STATUS_FAILED,
+        last_error=message,
+        finished_at=now,
+    )
+
+
+def run_job(job):
+    """
+    Executa uma tarefa reservada com o tempo limite configurado.
+
+    Args:
+        job: Job retornado por claim_jobs
+
+    Returns:
+        bool: True se a tarefa foi concluída com sucesso
+    """
+    started = time.perf_counter()
+    try:
+        definition = get_task(job.task)
+        with time_limit(job.timeout):
+            definition.func(**job.payload)
+    except Exception as e:
+        logger.warning(
+            "Tarefa %s #%s falhou (tentativa %s/%s): %s",
+            job.task, job.pk, job.attempts, job.max_attempts, e,
+        )
+        _retry_or_fail(job, e)
+        return False
+
+    _finish(
+        job,
+        status=Job.STATUS_DONE,
+        last_error="",
+        finished_at=timezone.now(),
+    )
+    logger.info(
+        "Tarefa %s #%s concluída em %.2fs",
+        job.task, job.pk, time.perf_counter() - started,
+    )
+    return True
+
+
+def requeue_stale_jobs():
+    """
+    Devolve à fila as tarefas cujo worker parou de responder.
+
+    Returns:
+        int: Quantidade de tarefas recuperadas
+    """
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.STATUS_RUNNING,
+                expires_at__lt=timezone.now(),
+            )[:STALE_BATCH_SIZE]
+        )
+        for job in jobs:
+            _retry_or_fail(
+                job, JobTimeoutError("Worker interrompido durante a tarefa.")
+            )
+    return len(jobs)
+
+
+def work(worker_id, stop_event, options):
+    """
+    Laço de um worker: reserva e executa tarefas até ser interrompido.
+
+    Args:
+        worker_id: Identificação do worker (host:pid)
+        stop_event: Evento que encerra o laço entre duas tarefas
+        options: WorkerOptions com as filas atendidas, o intervalo de
+            consulta, o modo burst (encerra com a fila vazia) e o
+            limite de tarefas antes da reciclagem do processo
+    """
+    processed = 0
+    while not stop_event.is_set():
+        # Como no fim de uma requisição: devolve a conexão ao pool (ou
+        # a fecha, se passou de CONN_MAX_AGE) entre uma rodada e outra
+        close_old_connections()
+        jobs = claim_jobs(worker_id, lanes=options.lanes)
+        if not jobs:
+            if options.burst:
+                return
+            stop_event.wait(options.poll_interval)
+            continue
+
+        for job in jobs:
+            run_job(job)
+            processed += 1
+
+        if options.max_jobs and processed >= options.max_jobs:
+            return
@@ -0,0 +1,275 @@
+"""
+Testes do app jobs.
+
+Cobrem a fila de tarefas nos dois backends: no "database", as chaves
+idempotentes, a ordem das filas (lanes), as retentativas com backoff,
+o tempo limite por SIGALRM e a reserva com SKIP LOCKED entre workers;
+no "local", a execução imediata usada em desenvolvimento.
+"""
+import signal
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.db import connection, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from .models import Job
+from .queue import (
+    MAX_BACKOFF_SECONDS,
+    RETRY_BACKOFF_SECONDS,
+    JobTimeoutError,
+    backoff_delay,
+    claim_jobs,
+    enqueue,
+    enqueue_many,
+    run_job,
+    task,
+    time_limit,
+)
+
+RECORD_TASK = "jobs.tests.record"
+FAIL_TASK = "jobs.tests.fail"
+DRAIN_TASK = "jobs.tests.drain"
+
+calls = []
+
+
+@task(RECORD_TASK)
+def record(value=None):
+    """Tarefa de teste: guarda o valor recebido."""
+    calls.append(value)
+
+
+@task(FAIL_TASK, max_attempts=2)
+def fail():
+    """Tarefa de teste: sempre falha."""
+    calls.append("falha")
+    raise RuntimeError("falha simulada")
+
+
+@task(DRAIN_TASK, release_key=True)
+def drain():
+    """Tarefa de teste: libera a chave ao ser reservada."""
+    calls.append("drain")
+
+
+def _make_ready():
+    """Torna executáveis as tarefas agendadas para depois."""
+    Job.objects.update(run_after=timezone.now())
+
+
+@override_settings(JOBS_BACKEND="database")
+class DatabaseQueueTests(TestCase):
+    """Enfileiramento e reserva no backend "database"."""
+
+    def setUp(self):
+        """Limpa as chamadas registradas pelas tarefas de teste."""
+        calls.clear()
+        self.worker_id = "teste:1"
+
+    def test_key_is_idempotent_while_job_is_active(self):
+        """Uma chave ativa não é enfileirada de novo."""
+        enqueue(RECORD_TASK, {"value": 1}, key="arquivo:1")
+        enqueue(RECORD_TASK, {"value": 2}, key="arquivo:1")
+        enqueue_many(RECORD_TASK, [("arquivo:2", {}), ("arquivo:2", {})])
+
+        assert Job.objects.count() == len(["arquivo:1", "arquivo:2"])
+        job = Job.objects.get(key="arquivo:1")
+        assert job.payload == {"value": 1}
+
+        run_job(claim_jobs(self.worker_id, limit=1)[0])
+        enqueue(RECORD_TASK, {"value": 3}, key="arquivo:1")
+        assert Job.objects.filter(
+            key="arquivo:1", status=Job.STATUS_QUEUED
+        ).get().payload == {"value": 3}
+
+    def test_released_key_only_dedupes_queued_jobs(self):
+        """Com release_key, a chave não vale para a tarefa em execução."""
+        enqueue(DRAIN_TASK, key="feed")
+        running = claim_jobs(self.worker_id, limit=1)[0]
+
+        assert running.key is None
+        enqueue(DRAIN_TASK, key="feed")
+        enqueue(DRAIN_TASK, key="feed")
+        assert Job.objects.get(status=Job.STATUS_QUEUED).key == "feed"
+
+        run_job(running)
+        run_job(claim_jobs(self.worker_id, limit=1)[0])
+        assert calls == ["drain", "drain"]
+
+    def test_claims_by_lane_priority(self):
+        """Interactive passa na frente de default e de bulk."""
+        enqueue(RECORD_TASK, {"value": "bulk"}, priority=Job.PRIORITY_BULK)
+        enqueue(RECORD_TASK, {"value": "default"})
+        enqueue(
+            RECORD_TASK,
+            {"value": "interactive"},
+            priority=Job.PRIORITY_INTERACTIVE,
+        )
+        enqueue(
+            RECORD_TASK,
+            {"value": "depois"},
+            priority=Job.PRIORITY_INTERACTIVE,
+            run_after=timezone.now() + timedelta(hours=1),
+        )
+
+        bulk_only = claim_jobs(self.worker_id, lanes=(Job.PRIORITY_BULK,))
+        assert [job.payload["value"] for job in bulk_only] == ["bulk"]
+
+        jobs = claim_jobs(self.worker_id, limit=10)
+        assert [job.payload["value"] for job in jobs] == [
+            "interactive", "default"
+        ]
+        assert all(job.status == Job.STATUS_RUNNING for job in jobs)
+        assert all(job.locked_by == self.worker_id for job in jobs)
+
+    def test_failure_is_retried_with_backoff_then_fails(self):
+        """Falhas voltam à fila com backoff até max_attempts."""
+        enqueue(FAIL_TASK)
+        before = timezone.now()
+
+        assert not run_job(claim_jobs(self.worker_id)[0])
+        job = Job.objects.get()
+        assert job.status == Job.STATUS_QUEUED
+        assert job.attempts == 1
+        assert job.last_error == "RuntimeError: falha simulada"
+        assert job.run_after >= before + backoff_delay(1) / 1.1
+        assert not claim_jobs(self.worker_id)
+
+        _make_ready()
+        assert not run_job(claim_jobs(self.worker_id)[0])
+        job.refresh_from_db()
+        assert job.status == Job.STATUS_FAILED
+        assert job.finished_at is not None
+        assert calls == ["falha", "falha"]
+
+    def test_success_marks_job_done(self):
+        """Tarefas concluídas ficam como done com o payload aplicado."""
+        enqueue(RECORD_TASK, {"value": "ok"})
+
+        assert run_job(claim_jobs(self.worker_id)[0])
+        assert Job.objects.get().status == Job.STATUS_DONE
+        assert calls == ["ok"]
+
+
+class BackoffAndTimeoutTests(SimpleTestCase):
+    """Atraso entre tentativas e tempo limite por tarefa."""
+
+    def setUp(self):
+        """Limites usados nos testes."""
+        self.base = RETRY_BACKOFF_SECONDS
+        self.alarm_seconds = 0.05
+
+    def test_backoff_doubles_up_to_the_limit(self):
+        """O atraso dobra a cada tentativa, até MAX_BACKOFF_SECONDS."""
+        with mock.patch("jobs.queue.random.uniform", return_value=1.0):
+            delays = [
+                backoff_delay(attempts).total_seconds()
+                for attempts in (1, 2, 3, 20)
+            ]
+
+        assert delays == [
+            self.base, self.base * 2, self.base * 4, MAX_BACKOFF_SECONDS
+        ]
+
+    def test_backoff_adds_up_to_ten_percent_of_jitter(self):
+        """O jitter acrescenta até 10% ao atraso."""
+        delay = backoff_delay(1).total_seconds()
+
+        assert self.base <= delay <= self.base * 1.1
+
+    def test_time_limit_interrupts_with_sigalrm(self):
+        """O bloco é interrompido ao estourar o tempo limite."""
+        started = time.monotonic()
+        with pytest.raises(JobTimeoutError, match="Tempo limite"):
+            _sleep_within(self.alarm_seconds, seconds=5)
+
+        assert time.monotonic() - started < 1
+        assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+    def test_time_limit_is_ignored_outside_the_main_thread(self):
+        """Fora da thread principal o SIGALRM não é usado."""
+        errors = []
+
+        def target():
+            try:
+                _sleep_within(self.alarm_seconds, seconds=0.1)
+            except JobTimeoutError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        assert errors == []
+
+
+def _sleep_within(limit, seconds):
+    """Dorme dentro de time_limit(limit)."""
+    with time_limit(limit):
+        time.sleep(seconds)
+
+
+@override_settings(JOBS_BACKEND="database")
+class SkipLockedTests(TransactionTestCase):
+    """Workers concorrentes não reservam a mesma tarefa."""
+
+    def setUp(self):
+        """Identificação do worker principal."""
+        self.worker_id = "teste:1"
+
+    def test_claim_skips_rows_locked_by_another_worker(self):
+        """Uma linha bloqueada é pulada em vez de esperar o lock."""
+        enqueue(RECORD_TASK, {"value": "primeira"})
+        enqueue(RECORD_TASK, {"value": "segunda"})
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.extend(claim_jobs("outro:2", limit=10))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            locked = Job.objects.select_for_update().order_by("id").first()
+            thread = threading.Thread(target=other_worker)
+            thread.start()
+            thread.join(timeout=10)
+
+        assert not thread.is_alive()
+        assert [job.payload["value"] for job in claimed] == ["segunda"]
+        locked.refresh_from_db()
+        assert locked.status == Job.STATUS_QUEUED
+        assert claim_jobs(self.worker_id, limit=10) == [locked]
+
+
+@override_settings(JOBS_BACKEND="local")
+class LocalBackendTests(TestCase):
+    """Backend "local": execução imediata, sem linhas na fila."""
+
+    def setUp(self):
+        """Limpa as chamadas registradas pelas tarefas de teste."""
+        calls.clear()
+        self.values = ["a", "b"]
+
+    def test_runs_tasks_immediately(self):
+        """As tarefas rodam no enqueue, sem persistir Job."""
+        enqueue_many(RECORD_TASK, [(None, {"value": v}) for v in self.values])
+
+        assert calls == self.values
+        assert not Job.objects.exists()
+
+    def test_retries_then_logs_the_failure(self):
+        """Falhas são repetidas até max_attempts e só registradas."""
+        with self.assertLogs("jobs.queue", level="ERROR"):
+            enqueue(FAIL_TASK)
+
+        assert calls == ["falha"] * len(self.values)
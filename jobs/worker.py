@@ -0,0 +1,38 @@
+"""
+Ponto de entrada dos processos de worker.
+
+Os processos são criados com o método "spawn", que importa este módulo
+antes de o Django estar configurado; por isso nada aqui importa
+modelos no nível do módulo.
+"""
+import os
+import signal
+import socket
+from dataclasses import dataclass
+
+import django
+
+
+@dataclass(frozen=True)
+class WorkerOptions:
+    """Opções do laço de cada worker (ver jobs.queue.work)."""
+    lanes: tuple = ()
+    poll_interval: float = 1.0
+    burst: bool = False
+    max_jobs: int | None = None
+
+
+def worker_main(stop_event, options):
+    """
+    Configura o Django no processo filho e executa o laço do worker.
+
+    O Ctrl+C é ignorado aqui: o supervisor (run_workers) sinaliza o
+    encerramento por stop_event, e o worker termina a tarefa atual
+    antes de sair.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+
+    from .queue import work  # noqa: PLC0415
+
+    work(f"{socket.gethostname()}:{os.getpid()}", stop_event, options)
@@ -0,0 +1,6 @@
+"""
+Pacote rag do projeto Django.
+
+Este pacote contém a aplicação do pipeline de RAG: extração de texto
+dos arquivos do workspace, indexação e consulta.
+"""
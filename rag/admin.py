@@ -0,0 +1,15 @@
+"""
+Configuração do Django Admin para o app rag.
+
+Este módulo registra os modelos DocumentExtraction, Chunk, Embedding e
+IndexChange no painel administrativo do Django, permitindo acompanhar
+a ingestão.
+"""
+from django.contrib import admin
+
+from .models import Chunk, DocumentExtraction, Embedding, IndexChange
+
+admin.site.register(DocumentExtraction)
+admin.site.register(Chunk)
+admin.site.register(Embedding)
+admin.site.register(IndexChange)
@@ -0,0 +1,350 @@
+"""
+Cache semântico das respostas do RAG.
+
+Perguntas repetidas ("calendário escolar 2026") não precisam passar de
+novo por busca e geração. As respostas ficam no cache "answers" (o
+Redis do docker-compose, com TTL por chave e despejo allkeys-lru) em
+um escopo formado por usuário, pasta consultada, filtros de metadados
+e versão do acervo:
+- Acerto exato: a pergunta normalizada (sem acentos, maiúsculas nem
+  pontuação) é a chave da entrada
+- Acerto semântico: cada escopo guarda um índice com o embedding das
+  últimas RAG_ANSWER_CACHE_ENTRIES perguntas (ordem LRU); uma pergunta
+  parecida, com similaridade de cosseno a partir de
+  RAG_ANSWER_CACHE_THRESHOLD, reaproveita a resposta
+
+Invalidação:
+- A versão do acervo do usuário é um token aleatório trocado sempre
+  que um arquivo termina de ser indexado ou que uma pasta é movida ou
+  excluída (bump_corpus_version); entradas de versões antigas deixam
+  de ser lidas e expiram pelo TTL. Um token (e não um contador) evita
+  que a versão volte a um valor antigo se a chave for despejada
+- Cada arquivo citado aponta para as entradas que o citam; renomear,
+  mover, excluir ou reenviar o arquivo apaga essas entradas
+  (invalidate_files)
+
+Falhas do Redis nunca interrompem a consulta: são registradas no log
+e tratadas como ausência de cache.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from redis.exceptions import RedisError
+
+from .embeddings import encode_query
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ALIAS = "answers"
+
+DEFAULT_THRESHOLD = 0.9
+
+DEFAULT_MAX_ENTRIES = 200
+
+DEFAULT_TTL = 24 * 60 * 60
+
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_question(question):
+    """
+    Normaliza uma pergunta para a chave exata do cache.
+
+    Remove acentos, maiúsculas e pontuação e junta os espaços, de modo
+    que "Calendário escolar 2026?" e "calendario  escolar 2026" têm a
+    mesma chave.
+    """
+    text = unicodedata.normalize("NFKD", question.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_WORD_PATTERN.sub(" ", text).strip()
+
+
+def get_answer_cache():
+    """Cache "answers" configurado em CACHES, ou None se ausente."""
+    try:
+        return caches[ANSWER_CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return None
+
+
+def _version_key(user_id):
+    """Chave da versão do acervo de um usuário."""
+    return f"version:{user_id}"
+
+
+def _file_key(file_id):
+    """Chave da lista de entradas que citam um arquivo."""
+    return f"file:{file_id}"
+
+
+def bump_corpus_version(user_ids):
+    """
+    Troca a versão do acervo dos usuários informados.
+
+    Args:
+        user_ids: IDs dos usuários cujo acervo mudou
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return
+    try:
+        cache.set_many(
+            {_version_key(user_id): uuid.uuid4().hex for user_id in user_ids},
+            timeout=None,
+        )
+    except RedisError:
+        logger.warning("Cache de respostas indisponível", exc_info=True)
+
+
+def invalidate_files(file_ids):
+    """
+    Apaga as respostas em cache que citam os arquivos informados.
+
+    Args:
+        file_ids: IDs dos arquivos renomeados, movidos, excluídos ou
+            reenviados
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return
+    file_keys = [_file_key(file_id) for file_id in file_ids]
+    try:
+        entries = cache.get_many(file_keys)
+        cache.delete_many([
+            *file_keys,
+            *(key for keys in entries.values() for key in keys),
+        ])
+    except RedisError:
+        logger.warning("Cache de respostas indisponível", exc_info=True)
+
+
+@dataclass
+class CachedAnswer:
+    """Resposta encontrada no cache."""
+    sources: list
+    answer: str
+    citations: list
+    similarity: float
+
+
+class AnswerCache:
+    """
+    Cache de respostas de uma pergunta em um escopo (usuário, pasta e
+    filtros de metadados, um rag.facets.FacetFilter).
+
+    lookup() lê a versão do acervo uma única vez; store() grava com
+    essa mesma versão, de modo que uma resposta gerada enquanto o
+    acervo mudava fica em uma versão que já não é consultada.
+    """
+
+    def __init__(self, user, question, folder=None, filters=None):
+        self.cache = get_answer_cache()
+        self.user_id = user.pk
+        self.folder_id = folder.pk if folder is not None else None
+        self.filter_key = filters.key() if filters else ""
+        self.question = question
+        self.normalized = normalize_question(question)
+        self.scope = None
+        self.ttl = getattr(settings, "RAG_ANSWER_CACHE_TTL", DEFAULT_TTL)
+        self.threshold = getattr(
+            settings, "RAG_ANSWER_CACHE_THRESHOLD", DEFAULT_THRESHOLD
+        )
+        self.max_entries = getattr(
+            settings, "RAG_ANSWER_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES
+        )
+
+    @property
+    def enabled(self):
+        """Se há cache configurado e pergunta normalizada não vazia."""
+        return self.cache is not None and bool(self.normalized)
+
+    @property
+    def entry_key(self):
+        """Chave da entrada exata desta pergunta no escopo."""
+        digest = hashlib.sha256(self.normalized.encode("utf-8")).hexdigest()
+        return f"answer:{self.scope}:{digest[:32]}"
+
+    @property
+    def index_key(self):
+        """Chave do índice semântico do escopo."""
+        return f"index:{self.scope}"
+
+    def _resolve_scope(self):
+        """Lê (ou cria) a versão do acervo e monta o escopo."""
+        key = _version_key(self.user_id)
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = self.cache.get(key)
+        scope = f"{self.user_id}:{self.folder_id or 'root'}"
+        if self.filter_key:
+            digest = hashlib.sha256(self.filter_key.encode("utf-8"))
+            scope += f":{digest.hexdigest()[:16]}"
+        self.scope = f"{scope}:{version}"
+
+    def _update_index(self, index, key, vector):
+        """
+        Move (ou insere) a entrada para o fim do índice, o mais
+        recente, descartando as mais antigas além de max_entries.
+        """
+        index = [item for item in index if item[0] != key]
+        index.append((key, vector))
+        self.cache.set(self.index_key, index[-self.max_entries:], self.ttl)
+
+    def _nearest(self, index):
+        """
+        Entrada do índice semântico mais parecida com a pergunta.
+
+        Returns:
+            tuple: (chave da entrada, similaridade) ou (None, 0.0)
+        """
+        if not index:
+            return (None, 0.0)
+        matrix = np.stack([
+            np.frombuffer(vector, dtype=np.float16) for _, vector in index
+        ]).astype(np.float32)
+        scores = matrix @ encode_query(self.question)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return (None, float(scores[best]))
+        return (index[best][0], float(scores[best]))
+
+    def lookup(self):
+        """
+        Procura a resposta da pergunta (exata ou semântica).
+
+        Returns:
+            CachedAnswer: Resposta em cache, ou None
+        """
+        if not self.enabled:
+            return None
+        try:
+            found = self._find_entry()
+        except RedisError:
+            logger.warning("Cache de respostas indisponível", exc_info=True)
+            self.scope = None
+            return None
+        if found is None:
+            return None
+        entry, similarity = found
+        return CachedAnswer(similarity=similarity, **entry)
+
+    def _find_entry(self):
+        """
+        Corpo de lookup: resolve o escopo e lê a entrada exata ou a
+        mais parecida, renovando o TTL e a posição no índice.
+
+        Returns:
+            tuple: (entrada, similaridade) ou None
+        """
+        self._resolve_scope()
+        index = self.cache.get(self.index_key) or []
+        key, similarity = self.entry_key, 1.0
+        entry = self.cache.get(key)
+        if entry is None:
+            key, similarity = self._nearest(index)
+            entry = self.cache.get(key) if key else None
+        if entry is None:
+            return None
+        self.cache.touch(key, self.ttl)
+        vector = dict(index).get(key)
+        if vector is not None:
+            self._update_index(index, key, vector)
+        return (entry, similarity)
+
+    def store(self, sources, answer, citations):
+        """
+        Grava a resposta, o vetor da pergunta e os vínculos com os
+        arquivos citados.
+
+        Args:
+            sources: Citações das fontes (Source.citation())
+            answer: Texto completo da resposta
+            citations: Números das fontes citadas na resposta
+        """
+        if not self.enabled or self.scope is None:
+            return
+        key = self.entry_key
+        vector = encode_query(self.question).astype(np.float16).tobytes()
+        try:
+            self.cache.set(
+                key,
+                {
+                    "sources": sources,
+                    "answer": answer,
+                    "citations": citations,
+                },
+                self.ttl,
+            )
+            self._update_index(
+                self.cache.get(self.index_key) or [], key, vector
+            )
+
+            file_keys = {_file_key(source["file_id"]) for source in sources}
+            linked = self.cache.get_many(file_keys)
+            self.cache.set_many(
+                {
+                    file_key: [*linked.get(file_key, []), key]
+                    for file_key in file_keys
+                },
+                self.ttl,
+            )
+        except RedisError:
+            logger.warning("Cache de respostas indisponível", exc_info=True)
+
+    def remember(self, events):
+        """
+        Repassa os eventos da resposta e grava a resposta no final.
+
+        A gravação acontece depois do evento "done" ser repassado, sem
+        atrasar o fim da resposta para o cliente. Respostas sem fontes
+        ou com erro de geração não são gravadas.
+
+        Args:
+            events: Gerador de (evento, dados) de iter_answer_events
+
+        Yields:
+            tuple: Os mesmos eventos, inalterados
+        """
+        sources = []
+        pieces = []
+        failed = False
+        for event, data in events:
+            if event == "sources":
+                sources = data
+            elif event == "token":
+                pieces.append(data["text"])
+            elif event == "error":
+                failed = True
+            yield (event, data)
+            if event == "done" and sources and not failed:
+                self.store(sources, "".join(pieces), data["citations"])
+
+
+def iter_cached_events(cached, timer):
+    """
+    Eventos de uma resposta vinda do cache, no formato de
+    rag.query.iter_answer_events.
+
+    Args:
+        cached: CachedAnswer
+        timer: StageTimer da consulta
+
+    Yields:
+        tuple: (nome do evento, dados serializáveis em JSON)
+    """
+    yield ("sources", cached.sources)
+    yield ("token", {"text": cached.answer})
+    yield ("done", {
+        "citations": cached.citations,
+        "timings": timer.as_dict(),
+        "cached": True,
+        "similarity": round(cached.similarity, 4),
+    })
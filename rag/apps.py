@@ -0,0 +1,19 @@
+"""
+Configuração da aplicação rag.
+
+Este módulo define a configuração da aplicação Django responsável
+pelo pipeline de RAG: ingestão, indexação e consulta dos documentos
+do workspace.
+"""
+from django.apps import AppConfig
+
+
+class RagConfig(AppConfig):
+    """
+    Configuração da aplicação rag.
+
+    Define o tipo de campo automático para chaves primárias
+    e o nome da aplicação.
+    """
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "rag"
@@ -0,0 +1,134 @@
+"""
+Feed de mudanças de metadados do workspace para os índices.
+
+Renomear, mover ou excluir pastas e arquivos só altera metadados: o
+texto extraído, os chunks e os embeddings continuam válidos. As views
+registram cada mudança em IndexChange, na mesma transação da
+alteração (record_file_changes, record_folder_change), e a tarefa
+CHANGES_TASK, enfileirada após o commit, consome o feed em lotes
+(apply_index_changes). A tarefa usa a própria CHANGES_TASK como chave:
+como cada execução consome todo o feed, uma rajada de alterações
+enfileira uma única tarefa. A chave é liberada quando a tarefa é
+reservada (release_key), então ela só deduplica tarefas ainda na fila:
+uma mudança gravada depois da última leitura de uma execução em
+andamento enfileira a execução seguinte, em vez de ficar parada no
+feed. Só as facetas das linhas afetadas são
+reescritas no índice vetorial (rag.vector_index.update_file_facets):
+- arquivo renomeado, movido ou excluído: as linhas do arquivo
+- pasta excluída: as linhas dos arquivos da subárvore
+- pasta renomeada ou movida: nada; as facetas guardam o ID da pasta e
+  a subárvore é resolvida pelo path na hora da consulta, então mover
+  uma pasta com milhares de descendentes custa apenas o UPDATE de
+  paths feito por Folder.move_to
+
+O índice por palavras-chave (tsvector dos chunks) não guarda
+metadados: seus filtros são junções com File e Folder, sempre atuais.
+Enquanto uma mudança não é aplicada, a busca confere os chunks
+encontrados com o banco (ver rag.retrieval.hybrid_search), de modo que
+um arquivo recém-excluído não aparece nos resultados.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+
+from jobs.queue import enqueue
+from workspace.models import File, Folder
+
+from .models import IndexChange
+from .vector_index import update_file_facets
+
+CHANGES_TASK = "rag.apply_index_changes"
+
+CHANGES_BATCH_SIZE = 1000
+
+
+def _record(kind, object_ids, action):
+    """Grava as mudanças e agenda a aplicação para depois do commit."""
+    IndexChange.objects.bulk_create([
+        IndexChange(kind=kind, object_id=object_id, action=action)
+        for object_id in object_ids
+    ])
+    transaction.on_commit(lambda: enqueue(CHANGES_TASK, key=CHANGES_TASK))
+
+
+def record_file_changes(file_ids, action):
+    """
+    Registra mudanças de metadados de arquivos.
+
+    Args:
+        file_ids: IDs dos arquivos alterados
+        action: IndexChange.ACTION_RENAME, ACTION_MOVE ou ACTION_DELETE
+    """
+    _record(IndexChange.KIND_FILE, file_ids, action)
+
+
+def record_folder_change(folder, action):
+    """
+    Registra a mudança de uma pasta (e, implicitamente, da subárvore).
+
+    Args:
+        folder: Pasta alterada
+        action: IndexChange.ACTION_RENAME, ACTION_MOVE ou ACTION_DELETE
+    """
+    _record(IndexChange.KIND_FOLDER, [folder.pk], action)
+
+
+def _affected_file_ids(changes):
+    """
+    Arquivos cujas facetas precisam ser reescritas por um lote de
+    mudanças.
+    """
+    file_ids = {
+        change.object_id
+        for change in changes
+        if change.kind == IndexChange.KIND_FILE
+    }
+    deleted_folders = list(Folder.objects.filter(pk__in=[
+        change.object_id
+        for change in changes
+        if change.kind == IndexChange.KIND_FOLDER
+        and change.action == IndexChange.ACTION_DELETE
+    ]))
+    if deleted_folders:
+        file_ids.update(
+            File.objects.filter(reduce(or_, (
+                Q(folder=folder)
+                | Q(folder__path__startswith=folder.subtree_path)
+                for folder in deleted_folders
+            ))).values_list("pk", flat=True)
+        )
+    return file_ids
+
+
+def apply_index_changes(batch_size=CHANGES_BATCH_SIZE):
+    """
+    Aplica aos índices as mudanças pendentes do feed, em lotes.
+
+    Cada lote é reservado com SELECT ... FOR UPDATE SKIP LOCKED e
+    apagado na mesma transação em que é aplicado, de modo que vários
+    workers possam consumir o feed sem aplicar a mesma mudança duas
+    vezes.
+
+    Args:
+        batch_size: Mudanças por lote
+
+    Returns:
+        int: Mudanças aplicadas
+    """
+    applied = 0
+    while True:
+        with transaction.atomic():
+            changes = list(
+                IndexChange.objects.select_for_update(skip_locked=True)
+                .order_by("pk")[:batch_size]
+            )
+            if not changes:
+                break
+            update_file_facets(_affected_file_ids(changes))
+            IndexChange.objects.filter(
+                pk__in=[change.pk for change in changes]
+            ).delete()
+        applied += len(changes)
+    return applied
@@ -0,0 +1,307 @@
+"""
+Divisão do texto extraído em chunks para indexação.
+
+O chunker percorre as páginas extraídas como um gerador e monta
+chunks com um orçamento de tokens (RAG_CHUNK_TOKENS) e sobreposição
+(RAG_CHUNK_OVERLAP_TOKENS), sem nunca manter o documento inteiro em
+memória:
+- A unidade mínima é a linha: parágrafo de DOCX, linha de planilha ou
+  CSV, linha de texto ou PDF; linhas nunca são cortadas, a menos que
+  sozinhas excedam o orçamento (aí são divididas por frases e, em
+  último caso, por tokens)
+- Um título (linha iniciada por "#") sempre começa um chunk novo e
+  não recebe sobreposição da seção anterior
+- A sobreposição repete as últimas linhas do chunk anterior
+
+Cada chunk guarda o SHA-256 do seu texto (content_hash): ele identifica
+o chunk de forma estável entre reprocessamentos e é a chave do cache
+de embeddings, de modo que só chunks com texto novo precisam ser
+codificados de novo.
+"""
+import hashlib
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+
+from .extraction import iter_extracted_pages
+from .models import Chunk, DocumentExtraction
+from .retrieval import update_search_vectors
+
+DEFAULT_CHUNK_TOKENS = 400
+
+DEFAULT_CHUNK_OVERLAP_TOKENS = 60
+
+CHUNK_WRITE_BATCH_SIZE = 500
+
+PAGE_SEPARATOR = "\n\n"
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+LINE_PATTERN = re.compile(r"[^\n]+")
+SENTENCE_PATTERN = re.compile(r"[^.!?;]+(?:[.!?;]+|$)")
+
+
+def count_tokens(text):
+    """
+    Estima a quantidade de tokens de um texto.
+
+    Conta palavras e sinais de pontuação, uma aproximação estável (e
+    sem dependências) dos tokenizadores de subpalavras.
+    """
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+
+def chunk_budget():
+    """
+    Orçamento (tokens por chunk, tokens de sobreposição) configurado.
+    """
+    max_tokens = getattr(settings, "RAG_CHUNK_TOKENS", DEFAULT_CHUNK_TOKENS)
+    overlap = getattr(
+        settings,
+        "RAG_CHUNK_OVERLAP_TOKENS",
+        DEFAULT_CHUNK_OVERLAP_TOKENS,
+    )
+    return (max_tokens, min(overlap, max_tokens // 2))
+
+
+@dataclass
+class _Piece:
+    """Trecho indivisível do documento (linha ou parte de linha)."""
+    text: str
+    tokens: int
+    page: int
+    start: int
+    separator: str
+    heading: bool = False
+
+
+@dataclass
+class ChunkDraft:
+    """Chunk gerado pelo chunker, ainda não gravado."""
+    text: str
+    token_count: int
+    page_start: int
+    page_end: int
+    char_start: int
+    char_end: int
+    heading: str = ""
+    content_hash: str = field(init=False)
+
+    def __post_init__(self):
+        self.content_hash = hashlib.sha256(
+            self.text.encode("utf-8")
+        ).hexdigest()
+
+
+def _split_long(text, start, max_tokens):
+    """
+    Divide uma linha maior que o orçamento em frases e, se preciso,
+    em janelas de tokens.
+
+    Yields:
+        tuple: (texto, tokens, deslocamento)
+    """
+    for sentence in SENTENCE_PATTERN.finditer(text):
+        words = list(TOKEN_PATTERN.finditer(sentence.group()))
+        offset = start + sentence.start()
+        for index in range(0, len(words), max_tokens):
+            window = words[index:index + max_tokens]
+            piece = sentence.group()[window[0].start():window[-1].end()]
+            yield (piece, len(window), offset + window[0].start())
+
+
+def _iter_pieces(pages, max_tokens):
+    """
+    Converte as páginas extraídas em trechos com posição no documento.
+
+    As posições (start) são relativas ao texto do documento inteiro,
+    formado pelas páginas unidas por PAGE_SEPARATOR.
+    """
+    page_offset = 0
+    for page in pages:
+        text = page["text"]
+        previous_end = None
+        for line in LINE_PATTERN.finditer(text):
+            if previous_end is None:
+                separator = PAGE_SEPARATOR
+            elif text.count("\n", previous_end, line.start()) > 1:
+                separator = "\n\n"
+            else:
+                separator = "\n"
+            previous_end = line.end()
+
+            content = line.group()
+            start = page_offset + line.start()
+            tokens = count_tokens(content)
+            if not tokens:
+                continue
+            if tokens <= max_tokens:
+                yield _Piece(
+                    text=content,
+                    tokens=tokens,
+                    page=page["page"],
+                    start=start,
+                    separator=separator,
+                    heading=content.startswith("#"),
+                )
+                continue
+
+            for part, part_tokens, part_start in _split_long(
+                content, start, max_tokens
+            ):
+                yield _Piece(
+                    text=part,
+                    tokens=part_tokens,
+                    page=page["page"],
+                    start=part_start,
+                    separator=separator,
+                )
+                separator = " "
+
+        page_offset += len(text) + len(PAGE_SEPARATOR)
+
+
+def _build_chunk(pieces, heading):
+    """Monta um ChunkDraft a partir de trechos consecutivos."""
+    parts = [pieces[0].text]
+    for piece in pieces[1:]:
+        parts.extend((piece.separator, piece.text))
+    last = pieces[-1]
+    return ChunkDraft(
+        text="".join(parts),
+        token_count=sum(piece.tokens for piece in pieces),
+        page_start=pieces[0].page,
+        page_end=last.page,
+        char_start=pieces[0].start,
+        char_end=last.start + len(last.text),
+        heading=heading,
+    )
+
+
+def _overlap_tail(pieces, overlap_tokens):
+    """Últimos trechos de um chunk que cabem na sobreposição."""
+    tail = []
+    total = 0
+    for piece in reversed(pieces):
+        if piece.heading or total + piece.tokens > overlap_tokens:
+            break
+        tail.insert(0, piece)
+        total += piece.tokens
+    return tail
+
+
+def iter_chunks(pages, max_tokens=None, overlap_tokens=None):
+    """
+    Gera os chunks de um documento a partir das páginas extraídas.
+
+    Args:
+        pages: Iterável de {"page", "label", "text"} (ver
+            iter_extracted_pages)
+        max_tokens: Tokens por chunk (padrão: RAG_CHUNK_TOKENS)
+        overlap_tokens: Tokens repetidos entre chunks vizinhos (padrão:
+            RAG_CHUNK_OVERLAP_TOKENS)
+
+    Yields:
+        ChunkDraft: Chunks na ordem do documento
+    """
+    default_max, default_overlap = chunk_budget()
+    max_tokens = max_tokens or default_max
+    if overlap_tokens is None:
+        overlap_tokens = default_overlap
+
+    current = []
+    tokens = 0
+    fresh = 0
+    heading = ""
+
+    for piece in _iter_pieces(pages, max_tokens):
+        if piece.heading:
+            if fresh:
+                yield _build_chunk(current, heading)
+            current, tokens, fresh = [], 0, 0
+            heading = piece.text.lstrip("#").strip()[:255]
+        elif tokens + piece.tokens > max_tokens and fresh:
+            yield _build_chunk(current, heading)
+            current = _overlap_tail(current, overlap_tokens)
+            tokens = sum(item.tokens for item in current)
+            fresh = 0
+            while current and tokens + piece.tokens > max_tokens:
+                tokens -= current.pop(0).tokens
+
+        current.append(piece)
+        tokens += piece.tokens
+        fresh += 1
+
+    if fresh:
+        yield _build_chunk(current, heading)
+
+
+def sync_chunks(file_id, batch_size=CHUNK_WRITE_BATCH_SIZE):
+    """
+    Recalcula os chunks de um arquivo a partir do texto extraído.
+
+    Os chunks são comparados pela posição (ordinal) e pelo hash: os
+    que não mudaram são mantidos (com seus embeddings), os alterados
+    são substituídos e os que sobraram são apagados. As escritas são
+    feitas em lotes de batch_size enquanto o gerador avança, e cada
+    lote recebe seu tsvector no mesmo passo.
+
+    Args:
+        file_id: ID do File
+        batch_size: Chunks por INSERT
+
+    Returns:
+        int: Quantidade de chunks novos ou alterados
+    """
+    extraction = DocumentExtraction.objects.filter(
+        file_id=file_id,
+        status=DocumentExtraction.STATUS_DONE,
+    ).first()
+    if extraction is None:
+        return 0
+
+    existing = dict(
+        Chunk.objects.filter(file_id=file_id).values_list(
+            "ordinal", "content_hash"
+        )
+    )
+    pending = []
+    changed = 0
+
+    def flush():
+        with transaction.atomic():
+            Chunk.objects.filter(
+                file_id=file_id,
+                ordinal__in=[chunk.ordinal for chunk in pending],
+            ).delete()
+            created = Chunk.objects.bulk_create(pending)
+            update_search_vectors([chunk.pk for chunk in created])
+        pending.clear()
+
+    ordinal = -1
+    for ordinal, draft in enumerate(
+        iter_chunks(iter_extracted_pages(extraction))
+    ):
+        if existing.pop(ordinal, None) == draft.content_hash:
+            continue
+        pending.append(Chunk(
+            file_id=file_id,
+            ordinal=ordinal,
+            text=draft.text,
+            content_hash=draft.content_hash,
+            token_count=draft.token_count,
+            page_start=draft.page_start,
+            page_end=draft.page_end,
+            char_start=draft.char_start,
+            char_end=draft.char_end,
+            heading=draft.heading,
+        ))
+        changed += 1
+        if len(pending) >= batch_size:
+            flush()
+
+    if pending:
+        flush()
+    Chunk.objects.filter(file_id=file_id, ordinal__gt=ordinal).delete()
+    return changed
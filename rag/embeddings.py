@@ -0,0 +1,437 @@
+"""
+Geração de embeddings dos chunks.
+
+Os textos são codificados em lotes (matrizes NumPy float32, uma linha
+por texto, normalizadas para norma 1) por um encoder plugável,
+escolhido em RAG_EMBEDDING_BACKEND:
+- "hashing": feature hashing de palavras e bigramas, determinístico e
+  sem dependências externas (testes e uso offline)
+- "http": API compatível com o endpoint /embeddings da OpenAI
+  (RAG_EMBEDDING_URL, RAG_EMBEDDING_MODEL, RAG_EMBEDDING_API_KEY)
+
+Os vetores ficam em cache no banco (Embedding), indexados pelo hash do
+conteúdo do chunk e pelo nome do encoder: chunks idênticos, mesmo de
+usuários diferentes, são codificados uma única vez. Os lotes são
+limitados por RAG_EMBEDDING_BATCH_SIZE e pelo teto de memória
+RAG_EMBEDDING_MEMORY_MB.
+"""
+import hashlib
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Exists, OuterRef
+
+from .models import Chunk, Embedding
+
+DEFAULT_DIMENSION = 384
+
+DEFAULT_BATCH_SIZE = 64
+
+DEFAULT_MEMORY_MB = 256
+
+HTTP_TIMEOUT = 60
+
+QUERY_CACHE_SIZE = 256
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+@dataclass
+class EmbeddingReport:
+    """Totais de uma execução de embed_texts."""
+    chunks: int = 0
+    encoded: int = 0
+    cached: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self):
+        """Vazão de chunks processados por segundo."""
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def add(self, other):
+        """Acumula os totais de outro relatório."""
+        self.chunks += other.chunks
+        self.encoded += other.encoded
+        self.cached += other.cached
+        self.seconds += other.seconds
+
+
+def normalize_rows(matrix):
+    """Normaliza as linhas de uma matriz para norma 1 (in-place)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class HashingEncoder:
+    """
+    Encoder local por feature hashing.
+
+    Cada palavra (sem acentos, em minúsculas) e cada bigrama soma +1
+    ou -1 em uma posição do vetor escolhida pelo hash BLAKE2b. Textos
+    com vocabulário parecido ficam próximos no espaço, o que basta
+    para testes e para uso offline.
+    """
+
+    def __init__(self, dimension=DEFAULT_DIMENSION):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def _features(self, text):
+        """Posições e sinais das features de um texto."""
+        text = unicodedata.normalize("NFKD", text.lower())
+        text = "".join(char for char in text if not unicodedata.combining(
+            char
+        ))
+        words = WORD_PATTERN.findall(text)
+        features = words + [
+            f"{first} {second}" for first, second in zip(words, words[1:])
+        ]
+        columns = []
+        signs = []
+        for feature in features:
+            value = int.from_bytes(
+                hashlib.blake2b(
+                    feature.encode("utf-8"), digest_size=8
+                ).digest(),
+                "little",
+            )
+            columns.append(value % self.dimension)
+            signs.append(1.0 if value >> 63 else -1.0)
+        return (columns, signs)
+
+    def encode(self, texts):
+        """
+        Codifica uma lista de textos.
+
+        Returns:
+            np.ndarray: Matriz float32 (len(texts), dimension)
+        """
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            columns, signs = self._features(text)
+            np.add.at(matrix[row], columns, signs)
+        return normalize_rows(matrix)
+
+
+class HttpEncoder:
+    """
+    Encoder remoto compatível com a API /embeddings da OpenAI.
+
+    Envia {"model", "input": [textos]} e lê data[i].embedding.
+    """
+
+    def __init__(self, url, model, dimension, api_key=""):
+        self.url = url
+        self.model = model
+        self.dimension = dimension
+        self.name = f"http-{model}"
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def encode(self, texts):
+        """
+        Codifica uma lista de textos com uma requisição.
+
+        Returns:
+            np.ndarray: Matriz float32 (len(texts), dimension)
+
+        Raises:
+            requests.HTTPError: Se a API responder com erro
+            ValueError: Se a dimensão devolvida for diferente da
+                configurada
+        """
+        response = self.session.post(
+            self.url,
+            json={"model": self.model, "input": list(texts)},
+            timeout=HTTP_TIMEOUT,
+        )
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        matrix = np.asarray(
+            [item["embedding"] for item in data], dtype=np.float32
+        )
+        if matrix.shape != (len(texts), self.dimension):
+            raise ValueError(
+                f"Resposta com formato {matrix.shape}, esperado "
+                f"({len(texts)}, {self.dimension})."
+            )
+        return normalize_rows(matrix)
+
+
+@lru_cache(maxsize=1)
+def get_encoder():
+    """
+    Encoder configurado em RAG_EMBEDDING_BACKEND (um por processo).
+
+    Raises:
+        ImproperlyConfigured: Se o backend for desconhecido ou se o
+            backend "http" não tiver RAG_EMBEDDING_URL
+    """
+    backend = getattr(settings, "RAG_EMBEDDING_BACKEND", "hashing")
+    dimension = getattr(
+        settings, "RAG_EMBEDDING_DIMENSION", DEFAULT_DIMENSION
+    )
+
+    if backend == "hashing":
+        return HashingEncoder(dimension)
+    if backend == "http":
+        url = getattr(settings, "RAG_EMBEDDING_URL", "")
+        if not url:
+            raise ImproperlyConfigured(
+                "RAG_EMBEDDING_URL é obrigatório para o backend 'http'."
+            )
+        return HttpEncoder(
+            url,
+            getattr(settings, "RAG_EMBEDDING_MODEL", ""),
+            dimension,
+            getattr(settings, "RAG_EMBEDDING_API_KEY", ""),
+        )
+    raise ImproperlyConfigured(
+        f"RAG_EMBEDDING_BACKEND inválido: '{backend}'."
+    )
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _query_vector(encoder, text):
+    """Vetor de uma consulta, guardado em memória por encoder e texto."""
+    vector = encoder.encode([text])[0]
+    vector.flags.writeable = False
+    return vector
+
+
+def encode_query(text, encoder=None):
+    """
+    Codifica o texto de uma consulta.
+
+    As consultas recentes ficam em um cache LRU do processo, de modo
+    que a mesma pergunta (por exemplo, no cache de respostas e na
+    busca vetorial) é codificada uma única vez.
+
+    Returns:
+        np.ndarray: Vetor float32 (dimension,) somente leitura
+    """
+    return _query_vector(encoder or get_encoder(), text)
+
+
+def memory_ceiling_bytes():
+    """Teto de memória dos lotes, em bytes (RAG_EMBEDDING_MEMORY_MB)."""
+    return getattr(
+        settings, "RAG_EMBEDDING_MEMORY_MB", DEFAULT_MEMORY_MB
+    ) * 1024 * 1024
+
+
+def iter_batches(items, dimension, max_items=None, max_bytes=None):
+    """
+    Agrupa (hash, texto) em lotes limitados por quantidade e memória.
+
+    A memória de um lote é estimada como o texto em UTF-8 mais duas
+    cópias da matriz float32 (saída do encoder e normalização).
+
+    Yields:
+        list: Lotes de (hash, texto)
+    """
+    max_items = max_items or getattr(
+        settings, "RAG_EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE
+    )
+    max_bytes = max_bytes or memory_ceiling_bytes()
+    row_bytes = dimension * 4 * 2
+
+    batch = []
+    used = 0
+    for content_hash, text in items:
+        size = len(text.encode("utf-8")) + row_bytes
+        if batch and (len(batch) >= max_items or used + size > max_bytes):
+            yield batch
+            batch = []
+            used = 0
+        batch.append((content_hash, text))
+        used += size
+    if batch:
+        yield batch
+
+
+def embed_texts(items, encoder=None, max_bytes=None):
+    """
+    Garante o embedding de cada texto, usando o cache quando possível.
+
+    Args:
+        items: Lista de (content_hash, texto)
+        encoder: Encoder (padrão: get_encoder())
+        max_bytes: Teto de memória por lote (padrão: configuração)
+
+    Returns:
+        EmbeddingReport: Chunks processados, codificados, em cache e
+            tempo gasto
+    """
+    encoder = encoder or get_encoder()
+    started = time.perf_counter()
+    unique = dict(items)
+    report = EmbeddingReport(chunks=len(items))
+
+    cached = set(
+        Embedding.objects.filter(
+            model=encoder.name,
+            content_hash__in=unique,
+        ).values_list("content_hash", flat=True)
+    )
+    missing = [
+        (content_hash, text)
+        for content_hash, text in unique.items()
+        if content_hash not in cached
+    ]
+    report.cached = len(items) - len(missing)
+
+    for batch in iter_batches(
+        missing, encoder.dimension, max_bytes=max_bytes
+    ):
+        matrix = encoder.encode([text for _, text in batch])
+        Embedding.objects.bulk_create(
+            [
+                Embedding(
+                    model=encoder.name,
+                    content_hash=content_hash,
+                    dimension=encoder.dimension,
+                    vector=matrix[row].tobytes(),
+                )
+                for row, (content_hash, _) in enumerate(batch)
+            ],
+            ignore_conflicts=True,
+        )
+        report.encoded += len(batch)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def missing_embeddings(encoder=None):
+    """
+    Chunks cujo texto ainda não tem embedding no encoder atual.
+    """
+    encoder = encoder or get_encoder()
+    return Chunk.objects.exclude(
+        Exists(
+            Embedding.objects.filter(
+                model=encoder.name,
+                content_hash=OuterRef("content_hash"),
+            )
+        )
+    )
+
+
+def _embedding_batch_size(batch_size=None):
+    """Chunks lidos por consulta (padrão: RAG_EMBEDDING_BATCH_SIZE)."""
+    return batch_size or getattr(
+        settings, "RAG_EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE
+    )
+
+
+def _embed_pending(pending, batch_size, encoder, max_bytes=None,
+                   on_batch=None):
+    """
+    Gera os embeddings de um QuerySet de chunks pendentes, lendo-o por
+    pk (keyset), batch_size chunks por vez.
+
+    Returns:
+        EmbeddingReport: Totais da execução
+    """
+    report = EmbeddingReport()
+    pending = pending.order_by("pk")
+
+    last_pk = 0
+    while True:
+        rows = list(
+            pending.filter(pk__gt=last_pk).values_list(
+                "pk", "content_hash", "text"
+            )[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        report.add(embed_texts(
+            [(content_hash, text) for _, content_hash, text in rows],
+            encoder,
+            max_bytes=max_bytes,
+        ))
+        if on_batch:
+            on_batch(report)
+
+    return report
+
+
+def embed_file(file_id, encoder=None, batch_size=None):
+    """
+    Gera os embeddings que faltam para os chunks de um arquivo.
+
+    Os chunks pendentes são lidos em lotes de batch_size (ver
+    backfill_embeddings), então arquivos grandes não são carregados
+    inteiros em memória.
+
+    Args:
+        file_id: ID do File
+        encoder: Encoder (padrão: get_encoder())
+        batch_size: Chunks lidos por consulta
+
+    Returns:
+        EmbeddingReport: Totais da execução
+    """
+    encoder = encoder or get_encoder()
+    return _embed_pending(
+        missing_embeddings(encoder).filter(file_id=file_id),
+        _embedding_batch_size(batch_size),
+        encoder,
+    )
+
+
+def backfill_embeddings(batch_size=None, encoder=None, max_bytes=None,
+                        on_batch=None):
+    """
+    Gera os embeddings de todos os chunks pendentes, em lotes.
+
+    Os chunks são lidos por pk (keyset), batch_size por vez, de modo
+    que a memória usada não depende do tamanho do acervo.
+
+    Args:
+        batch_size: Chunks lidos por consulta
+        encoder: Encoder (padrão: get_encoder())
+        max_bytes: Teto de memória por lote (padrão: configuração)
+        on_batch: Callback opcional chamado com o relatório acumulado
+
+    Returns:
+        EmbeddingReport: Totais da execução
+    """
+    encoder = encoder or get_encoder()
+    return _embed_pending(
+        missing_embeddings(encoder),
+        _embedding_batch_size(batch_size),
+        encoder,
+        max_bytes=max_bytes,
+        on_batch=on_batch,
+    )
+
+
+def load_vectors(content_hashes, encoder=None):
+    """
+    Carrega os vetores em cache para uma lista de hashes.
+
+    Returns:
+        dict: {content_hash: np.ndarray float32}
+    """
+    encoder = encoder or get_encoder()
+    return {
+        content_hash: np.frombuffer(vector, dtype=np.float32)
+        for content_hash, vector in Embedding.objects.filter(
+            model=encoder.name,
+            content_hash__in=content_hashes,
+        ).values_list("content_hash", "vector")
+    }
@@ -0,0 +1,249 @@
+"""
+Pipeline de extração de texto dos arquivos do workspace.
+
+A extração nunca roda durante a requisição de upload: as views apenas
+registram um DocumentExtraction pendente e enfileiram a tarefa
+"rag.extract_document" (enqueue_extractions), executada pelos workers
+do comando run_workers:
+- run_extraction lê o arquivo em streaming, página por página, e grava
+  o texto normalizado no storage em JSON Lines
+- Arquivos com o mesmo conteúdo (mesmo blob) reaproveitam a saída já
+  extraída, sem ler o documento de novo
+
+Cada extração registra bytes lidos, páginas, caracteres e duração,
+permitindo medir a vazão (bytes/s e páginas/s) por formato.
+"""
+import json
+import os
+import tempfile
+import time
+
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.queue import enqueue_many
+from workspace.blobs import extracted_text_name, storage_sha256
+
+from .extractors import extract_pages
+from .models import DocumentExtraction
+
+EXTRACT_TASK = "rag.extract_document"
+
+MAX_ERROR_CHARS = 2000
+
+
+class _CountingReader:
+    """
+    Envolve um arquivo binário contando os bytes lidos.
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self._fileobj.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        count = self._fileobj.readinto(buffer)
+        self.bytes_read += count or 0
+        return count
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+
+def enqueue_extractions(files, priority=None):
+    """
+    Registra extrações pendentes e enfileira a tarefa de cada arquivo.
+
+    Usa um INSERT para as extrações e outro para as tarefas; arquivos
+    que já têm extração não são duplicados e a chave da tarefa evita
+    enfileirar o mesmo arquivo duas vezes.
+
+    Args:
+        files: Lista de File
+        priority: Prioridade da tarefa (padrão: a de
+            "rag.extract_document")
+    """
+    files = [file for file in files if file.pk]
+    if not files:
+        return
+
+    DocumentExtraction.objects.bulk_create(
+        [DocumentExtraction(file=file) for file in files],
+        ignore_conflicts=True,
+    )
+    enqueue_many(
+        EXTRACT_TASK,
+        [
+            (f"{EXTRACT_TASK}:{file.pk}", {"file_id": file.pk})
+            for file in files
+        ],
+        priority=priority,
+    )
+
+
+def _content_digest(file):
+    """SHA-256 do conteúdo de um File (com ou sem blob)."""
+    if file.blob_id:
+        return file.blob.sha256
+    return storage_sha256(file.file.name)
+
+
+def _write_jsonl(output, pages):
+    """
+    Grava as páginas com texto, uma por linha JSON.
+
+    Returns:
+        tuple: (páginas, caracteres)
+    """
+    page_count = 0
+    char_count = 0
+    for number, (label, text) in enumerate(pages, start=1):
+        if not text:
+            continue
+        output.write(json.dumps(
+            {"page": number, "label": label, "text": text},
+            ensure_ascii=False,
+        ))
+        output.write("\n")
+        page_count += 1
+        char_count += len(text)
+    return (page_count, char_count)
+
+
+def _write_pages(fileobj, file_name, output_name):
+    """
+    Extrai as páginas e grava o JSON Lines de forma atômica.
+
+    O texto é escrito em um arquivo temporário no mesmo diretório e só
+    então renomeado, de modo que leitores nunca vejam uma saída pela
+    metade.
+
+    Returns:
+        tuple: (páginas, caracteres)
+    """
+    target = default_storage.path(output_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(target), suffix=".part"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as output:
+            counts = _write_jsonl(output, extract_pages(fileobj, file_name))
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return counts
+
+
+def _extract(extraction, file):
+    """
+    Extrai o texto de um File e preenche a extração como concluída.
+
+    Reaproveita a saída de uma extração concluída do mesmo conteúdo
+    quando ela ainda existe no storage.
+    """
+    output_name = extracted_text_name(_content_digest(file))
+    previous = DocumentExtraction.objects.filter(
+        output_name=output_name,
+        status=DocumentExtraction.STATUS_DONE,
+    ).exclude(pk=extraction.pk).first()
+
+    if previous and default_storage.exists(output_name):
+        extraction.page_count = previous.page_count
+        extraction.char_count = previous.char_count
+        extraction.bytes_read = 0
+    else:
+        with default_storage.open(file.file.name, "rb") as stored:
+            reader = _CountingReader(stored)
+            pages, chars = _write_pages(reader, file.name, output_name)
+        extraction.page_count = pages
+        extraction.char_count = chars
+        extraction.bytes_read = reader.bytes_read
+
+    extraction.output_name = output_name
+    extraction.status = DocumentExtraction.STATUS_DONE
+    extraction.error = ""
+
+
+def run_extraction(file_id):
+    """
+    Extrai o texto de um arquivo e registra o resultado.
+
+    Erros do documento (arquivo corrompido, formato não suportado)
+    marcam a extração como "failed" com a mensagem de erro, sem
+    provocar novas tentativas da tarefa. Erros de storage (OSError)
+    também são registrados, mas propagados para que a fila tente de
+    novo com backoff.
+
+    Args:
+        file_id: ID do File
+
+    Returns:
+        str: Status final da extração, ou None se o arquivo já foi
+            removido definitivamente
+    """
+    extraction = DocumentExtraction.objects.select_related(
+        "file__blob"
+    ).filter(file_id=file_id).first()
+    if extraction is None:
+        return None
+
+    DocumentExtraction.objects.filter(pk=extraction.pk).update(
+        status=DocumentExtraction.STATUS_PROCESSING,
+        started_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    )
+    started = time.perf_counter()
+    retry_error = None
+
+    try:
+        _extract(extraction, extraction.file)
+    except Exception as e:
+        extraction.status = DocumentExtraction.STATUS_FAILED
+        extraction.error = f"{type(e).__name__}: {e}"[:MAX_ERROR_CHARS]
+        if isinstance(e, OSError):
+            retry_error = e
+
+    extraction.duration = time.perf_counter() - started
+    extraction.finished_at = timezone.now()
+    extraction.save(update_fields=[
+        "output_name",
+        "status",
+        "error",
+        "bytes_read",
+        "page_count",
+        "char_count",
+        "duration",
+        "finished_at",
+    ])
+    if retry_error is not None:
+        raise retry_error
+    return extraction.status
+
+
+def iter_extracted_pages(extraction):
+    """
+    Lê as páginas extraídas sem carregar o arquivo inteiro.
+
+    Args:
+        extraction: DocumentExtraction concluída
+
+    Yields:
+        dict: {"page", "label", "text"} de cada página com texto
+    """
+    if extraction.status != DocumentExtraction.STATUS_DONE:
+        return
+    with default_storage.open(extraction.output_name, "rb") as stored:
+        for line in stored:
+            if line.strip():
+                yield json.loads(line)
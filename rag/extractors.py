@@ -0,0 +1,500 @@
+"""
+Extratores de texto por formato de arquivo.
+
+Cada extrator recebe um arquivo binário aberto e devolve um gerador de
+páginas (rótulo, texto), lendo o documento aos poucos:
+- PDF: uma página por vez (pypdf)
+- DOCX: parágrafos e linhas de tabela lidos com iterparse do XML
+- DOC: texto das peças do documento Word 97-2003 (olefile)
+- XLSX/XLSM: linhas em modo read-only (openpyxl), agrupadas em blocos
+- XLS: uma planilha carregada por vez (xlrd, on_demand)
+- CSV/TXT: decodificação incremental em blocos
+
+Planilhas e textos longos são divididos em páginas de tamanho limitado,
+de modo que nenhum documento precisa caber inteiro em memória.
+
+As dependências de cada formato são importadas apenas quando o formato
+é usado.
+"""
+import codecs
+import csv
+import io
+import os
+import re
+import struct
+import unicodedata
+import zipfile
+from datetime import date, datetime
+from xml.etree import ElementTree
+
+PAGE_CHARS = 20_000
+
+ROWS_PER_PAGE = 500
+
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+CELL_SEPARATOR = " | "
+
+CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+INLINE_SPACES = re.compile(r"[ \t ]+")
+BLANK_LINES = re.compile(r"\n{3,}")
+HYPHENATED_BREAK = re.compile(r"(\w)-\n(\w)")
+HEADING_LEVEL = re.compile(r"(\d)")
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class UnsupportedFormatError(ValueError):
+    """Extensão sem extrator registrado."""
+
+
+def normalize_text(text):
+    """
+    Normaliza o texto extraído.
+
+    Aplica Unicode NFC, unifica quebras de linha, remove caracteres de
+    controle, colapsa espaços e limita linhas em branco consecutivas.
+
+    Args:
+        text: Texto bruto
+
+    Returns:
+        str: Texto normalizado
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = CONTROL_CHARS.sub(" ", text)
+    text = "\n".join(
+        INLINE_SPACES.sub(" ", line).strip() for line in text.split("\n")
+    )
+    return BLANK_LINES.sub("\n\n", text).strip()
+
+
+def _cell_text(value):
+    """Converte o valor de uma célula em texto."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        if value.time() == datetime.min.time():
+            return value.strftime("%d/%m/%Y")
+        return value.strftime("%d/%m/%Y %H:%M")
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    return str(value).strip()
+
+
+def _row_pages(sheet_name, rows):
+    """
+    Agrupa linhas de planilha em páginas de ROWS_PER_PAGE linhas.
+
+    Cada linha vira uma linha de texto com as células separadas por
+    CELL_SEPARATOR; linhas vazias são ignoradas.
+    """
+    lines = []
+    first_row = None
+    row_number = 0
+    for row_number, row in enumerate(rows, start=1):
+        cells = [_cell_text(value) for value in row]
+        cells = [cell for cell in cells if cell]
+        if not cells:
+            continue
+        if first_row is None:
+            first_row = row_number
+        lines.append(CELL_SEPARATOR.join(cells))
+        if len(lines) >= ROWS_PER_PAGE:
+            yield (
+                f"{sheet_name} (linhas {first_row}-{row_number})",
+                "\n".join(lines),
+            )
+            lines = []
+            first_row = None
+
+    if lines:
+        yield (
+            f"{sheet_name} (linhas {first_row}-{row_number})",
+            "\n".join(lines),
+        )
+
+
+def _text_blocks(chunks):
+    """
+    Reagrupa blocos de texto em páginas de até PAGE_CHARS caracteres,
+    cortando de preferência em uma quebra de linha.
+    """
+    carry = ""
+    for chunk in chunks:
+        carry += chunk
+        while len(carry) >= PAGE_CHARS:
+            cut = carry.rfind("\n", 0, PAGE_CHARS)
+            if cut <= 0:
+                cut = PAGE_CHARS
+            yield carry[:cut]
+            carry = carry[cut:].lstrip("\n")
+    if carry.strip():
+        yield carry
+
+
+def _numbered(blocks):
+    """Rotula blocos sequenciais como "Parte n"."""
+    for number, block in enumerate(blocks, start=1):
+        yield (f"Parte {number}", block)
+
+
+def _detect_encoding(fileobj):
+    """
+    Detecta a codificação de um arquivo de texto pela amostra inicial.
+
+    Reconhece BOMs UTF-8/UTF-16; sem BOM, usa UTF-8 se a amostra for
+    válida e cp1252 (comum em arquivos gerados no Windows) caso
+    contrário.
+    """
+    sample = fileobj.read(ENCODING_SAMPLE_BYTES)
+    fileobj.seek(0)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8"
+
+
+def _open_text(fileobj):
+    """Abre um arquivo binário como texto com a codificação detectada."""
+    return io.TextIOWrapper(
+        fileobj,
+        encoding=_detect_encoding(fileobj),
+        errors="replace",
+        newline="",
+    )
+
+
+def iter_text_pages(fileobj):
+    """
+    Extrai arquivos .txt em blocos de até PAGE_CHARS caracteres.
+    """
+    text = _open_text(fileobj)
+    try:
+        yield from _numbered(
+            _text_blocks(iter(lambda: text.read(PAGE_CHARS), ""))
+        )
+    finally:
+        text.detach()
+
+
+def iter_csv_pages(fileobj):
+    """
+    Extrai arquivos .csv em páginas de ROWS_PER_PAGE linhas.
+
+    O delimitador (vírgula, ponto e vírgula, tab ou barra vertical) é
+    detectado pela amostra inicial.
+    """
+    text = _open_text(fileobj)
+    try:
+        sample = text.read(ENCODING_SAMPLE_BYTES)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        csv.field_size_limit(PAGE_CHARS * 10)
+        yield from _row_pages("CSV", csv.reader(text, dialect))
+    finally:
+        text.detach()
+
+
+def iter_pdf_pages(fileobj):
+    """
+    Extrai arquivos .pdf uma página por vez.
+    """
+    from pypdf import PdfReader  # noqa: PLC0415
+
+    reader = PdfReader(fileobj)
+    if reader.is_encrypted:
+        reader.decrypt("")
+
+    for number, page in enumerate(reader.pages, start=1):
+        text = page.extract_text() or ""
+        yield (f"Página {number}", HYPHENATED_BREAK.sub(r"\1\2", text))
+
+
+def _docx_paragraph(element):
+    """
+    Texto de um parágrafo DOCX; títulos recebem prefixo "#".
+    """
+    parts = []
+    for node in element.iter():
+        if node.tag == f"{WORD_NS}t" and node.text:
+            parts.append(node.text)
+        elif node.tag == f"{WORD_NS}tab":
+            parts.append("\t")
+        elif node.tag in {f"{WORD_NS}br", f"{WORD_NS}cr"}:
+            parts.append("\n")
+    text = "".join(parts).strip()
+
+    style = element.find(f"{WORD_NS}pPr/{WORD_NS}pStyle")
+    style_name = style.get(f"{WORD_NS}val", "") if style is not None else ""
+    if text and style_name.lower().startswith(("heading", "titulo",
+                                               "ttulo", "title")):
+        level = HEADING_LEVEL.search(style_name)
+        text = f"{'#' * int(level.group(1) if level else 1)} {text}"
+    return text
+
+
+def _has_page_break(element):
+    """Indica se o parágrafo contém uma quebra de página explícita."""
+    return any(
+        node.get(f"{WORD_NS}type") == "page"
+        for node in element.iter(f"{WORD_NS}br")
+    )
+
+
+def _docx_blocks(fileobj):
+    """
+    Percorre word/document.xml com iterparse e produz parágrafos e
+    linhas de tabela; None sinaliza uma quebra de página.
+    """
+    with zipfile.ZipFile(fileobj) as archive:
+        with archive.open("word/document.xml") as xml:
+            table_depth = 0
+            for event, element in ElementTree.iterparse(
+                xml, events=("start", "end")
+            ):
+                if element.tag == f"{WORD_NS}tbl":
+                    table_depth += 1 if event == "start" else -1
+                    continue
+                if event != "end":
+                    continue
+
+                if element.tag == f"{WORD_NS}p" and table_depth == 0:
+                    yield _docx_paragraph(element)
+                    if _has_page_break(element):
+                        yield None
+                    element.clear()
+                elif element.tag == f"{WORD_NS}tr" and table_depth == 1:
+                    cells = [
+                        " ".join(
+                            _docx_paragraph(paragraph)
+                            for paragraph in cell.iter(f"{WORD_NS}p")
+                        ).strip()
+                        for cell in element.iter(f"{WORD_NS}tc")
+                    ]
+                    yield CELL_SEPARATOR.join(cell for cell in cells if cell)
+                    element.clear()
+
+
+def iter_docx_pages(fileobj):
+    """
+    Extrai arquivos .docx agrupando parágrafos em páginas.
+
+    Uma página termina em uma quebra de página explícita ou ao atingir
+    PAGE_CHARS caracteres.
+    """
+    def pages():
+        lines = []
+        size = 0
+        for block in _docx_blocks(fileobj):
+            if block is None or size >= PAGE_CHARS:
+                if lines:
+                    yield "\n".join(lines)
+                lines, size = [], 0
+            if block:
+                lines.append(block)
+                size += len(block) + 1
+        if lines:
+            yield "\n".join(lines)
+
+    yield from _numbered(pages())
+
+
+def _doc_piece_table(ole):
+    """
+    Lê a tabela de peças (CLX) de um .doc e retorna, para cada peça,
+    (deslocamento no stream WordDocument, caracteres, compactada).
+    """
+    word = ole.openstream("WordDocument")
+    fib = word.read(0x01AA)
+    flags = struct.unpack_from("<H", fib, 0x0A)[0]
+    fc_clx, lcb_clx = struct.unpack_from("<iI", fib, 0x01A2)
+
+    table = ole.openstream("1Table" if flags & 0x0200 else "0Table")
+    table.seek(fc_clx)
+    clx = table.read(lcb_clx)
+
+    pos = 0
+    while clx[pos] == 0x01:
+        pos += 3 + struct.unpack_from("<h", clx, pos + 1)[0]
+    lcb = struct.unpack_from("<I", clx, pos + 1)[0]
+    plc = clx[pos + 5:pos + 5 + lcb]
+
+    count = (lcb - 4) // 12
+    cps = struct.unpack_from(f"<{count + 1}i", plc, 0)
+    pieces = []
+    for index in range(count):
+        fc = struct.unpack_from("<I", plc, 4 * (count + 1) + 8 * index + 2)
+        fc = fc[0]
+        length = cps[index + 1] - cps[index]
+        if fc & 0x40000000:
+            pieces.append(((fc & 0x3FFFFFFF) // 2, length, True))
+        else:
+            pieces.append((fc, length, False))
+    return word, pieces
+
+
+def _doc_pieces(fileobj):
+    """
+    Lê as peças de texto de um .doc (Word 97-2003), uma por vez.
+    """
+    import olefile  # noqa: PLC0415
+
+    ole = olefile.OleFileIO(fileobj)
+    try:
+        word, pieces = _doc_piece_table(ole)
+        for offset, length, compressed in pieces:
+            word.seek(offset)
+            if compressed:
+                yield word.read(length).decode("cp1252", errors="replace")
+            else:
+                yield word.read(length * 2).decode(
+                    "utf-16-le", errors="replace"
+                )
+    finally:
+        ole.close()
+
+
+def _doc_text(pieces):
+    """
+    Converte marcas especiais do Word em texto simples.
+
+    Remove instruções de campos (entre 0x13 e 0x14/0x15), converte
+    fim de célula (0x07) em separador e quebra de página (0x0C) em
+    linha em branco dupla.
+    """
+    fields = []
+    for piece in pieces:
+        out = []
+        for token in re.split(r"([\x13\x14\x15])", piece):
+            if token == "\x13":
+                fields.append(True)
+            elif token == "\x14":
+                if fields:
+                    fields[-1] = False
+            elif token == "\x15":
+                if fields:
+                    fields.pop()
+            elif not any(fields):
+                out.append(
+                    token.replace("\x07", CELL_SEPARATOR)
+                    .replace("\x0c", "\n\n\n")
+                    .replace("\r", "\n")
+                )
+        yield "".join(out)
+
+
+def iter_doc_pages(fileobj):
+    """
+    Extrai arquivos .doc em blocos de até PAGE_CHARS caracteres.
+    """
+    yield from _numbered(_text_blocks(_doc_text(_doc_pieces(fileobj))))
+
+
+def iter_xlsx_pages(fileobj):
+    """
+    Extrai arquivos .xlsx/.xlsm planilha por planilha, em modo
+    read-only (as linhas são lidas sob demanda do XML).
+    """
+    from openpyxl import load_workbook  # noqa: PLC0415
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield from _row_pages(
+                sheet.title, sheet.iter_rows(values_only=True)
+            )
+    finally:
+        workbook.close()
+
+
+def iter_xls_pages(fileobj):
+    """
+    Extrai arquivos .xls carregando uma planilha por vez.
+
+    Quando o arquivo está em disco ele é aberto com mmap pelo xlrd.
+    """
+    import xlrd  # noqa: PLC0415
+
+    path = getattr(fileobj, "name", None)
+    if isinstance(path, str) and os.path.exists(path):
+        book = xlrd.open_workbook(path, on_demand=True)
+    else:
+        book = xlrd.open_workbook(
+            file_contents=fileobj.read(), on_demand=True
+        )
+
+    def row_values(sheet, index):
+        values = []
+        for cell in sheet.row(index):
+            if cell.ctype == xlrd.XL_CELL_DATE:
+                values.append(
+                    xlrd.xldate_as_datetime(cell.value, book.datemode)
+                )
+            else:
+                values.append(cell.value)
+        return values
+
+    try:
+        for index in range(book.nsheets):
+            sheet = book.sheet_by_index(index)
+            yield from _row_pages(
+                sheet.name,
+                (row_values(sheet, row) for row in range(sheet.nrows)),
+            )
+            book.unload_sheet(index)
+    finally:
+        book.release_resources()
+
+
+# Um extrator para cada extensão de workspace.validators.ALLOWED_EXTENSIONS
+EXTRACTORS = {
+    ".pdf": iter_pdf_pages,
+    ".txt": iter_text_pages,
+    ".csv": iter_csv_pages,
+    ".doc": iter_doc_pages,
+    ".docx": iter_docx_pages,
+    ".xls": iter_xls_pages,
+    ".xlsx": iter_xlsx_pages,
+    ".xlsm": iter_xlsx_pages,
+}
+
+
+def extract_pages(fileobj, file_name):
+    """
+    Extrai o texto normalizado de um arquivo, página por página.
+
+    Args:
+        fileobj: Arquivo binário aberto (com seek)
+        file_name: Nome do arquivo (define o extrator pela extensão)
+
+    Yields:
+        tuple: (rótulo, texto normalizado) de cada página; o texto pode
+            ser vazio (por exemplo, páginas digitalizadas)
+
+    Raises:
+        UnsupportedFormatError: Se a extensão não tiver extrator
+    """
+    ext = os.path.splitext(file_name)[1].lower()
+    extractor = EXTRACTORS.get(ext)
+    if extractor is None:
+        raise UnsupportedFormatError(
+            f"Formato '{ext}' não suportado para extração."
+        )
+
+    for label, text in extractor(fileobj):
+        yield (label, normalize_text(text))
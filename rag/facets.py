@@ -0,0 +1,559 @@
+"""
+Facetas dos chunks e filtros de metadados da busca.
+
+Cada linha do índice vetorial guarda, ao lado do vetor, as facetas do
+arquivo de origem (FACET_DTYPE):
+- file: ID do arquivo
+- folder: pasta do arquivo (0 na raiz)
+- uploader: dono do arquivo
+- day: dia do envio (dias desde 1970-01-01, no fuso do projeto)
+- type: extensão do nome (posição em FILE_TYPES)
+- state: STATE_LIVE, STATE_TRASHED (arquivo na lixeira) ou
+  STATE_REMOVED (chunk substituído ou apagado)
+
+Os filtros são avaliados antes da pontuação: cada segmento ordena uma
+vez cada coluna (FacetPostings) e cada cláusula vira um bitmap das
+linhas com os valores pedidos, por busca binária na coluna ordenada,
+sem ler vetores nem consultar chunks no banco. Quanto mais estreito o
+filtro, menos linhas são pontuadas. Na busca por palavras-chave, as
+mesmas cláusulas viram condições SQL (FacetFilter.q).
+
+Sintaxe dos filtros (parse_filter): cláusulas separadas por espaço,
+combinadas com E; valores de uma cláusula separados por vírgula,
+combinados com OU; "-" na frente nega a cláusula; aspas permitem
+valores com espaços.
+
+    type:planilha folder:"Secretaria 2025" uploaded>=2025-01-01
+
+- folder (pasta): ID ou nome da pasta, incluindo a subárvore
+- uploader (autor): ID ou nome de usuário
+- type (tipo): extensão (xlsx, .pdf) ou grupo (TYPE_GROUPS)
+- uploaded (data): AAAA, AAAA-MM ou AAAA-MM-DD, com ":" (o período
+  inteiro) ou com >=, >, <= e <
+"""
+import datetime
+import os
+import re
+import shlex
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+from workspace.models import Folder
+
+from .models import Chunk
+
+FACET_DTYPE = np.dtype([
+    ("file", "<i8"),
+    ("folder", "<i8"),
+    ("uploader", "<i8"),
+    ("day", "<i4"),
+    ("type", "u1"),
+    ("state", "u1"),
+])
+
+STATE_LIVE = 0
+STATE_TRASHED = 1
+STATE_REMOVED = 2
+
+# A posição de cada extensão é o código gravado no índice: novas
+# extensões entram sempre no fim
+FILE_TYPES = (
+    "",
+    ".pdf",
+    ".txt",
+    ".doc",
+    ".docx",
+    ".xls",
+    ".xlsx",
+    ".xlsm",
+    ".csv",
+)
+
+TYPE_GROUPS = {
+    "planilha": (".xls", ".xlsx", ".xlsm", ".csv"),
+    "documento": (".doc", ".docx"),
+    "texto": (".txt",),
+}
+
+FIELD_ALIASES = {
+    "folder": "folder",
+    "pasta": "folder",
+    "uploader": "uploader",
+    "autor": "uploader",
+    "type": "type",
+    "tipo": "type",
+    "uploaded": "uploaded",
+    "data": "uploaded",
+}
+
+DAY_MIN = int(np.iinfo(np.int32).min)
+DAY_MAX = int(np.iinfo(np.int32).max)
+
+EPOCH = datetime.date(1970, 1, 1)
+
+FACETS_BATCH_SIZE = 5000
+
+CLAUSE_PATTERN = re.compile(r"^(-?)(\w+)(:|>=|<=|>|<)(.+)$")
+
+DATE_PATTERN = re.compile(r"^(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?$")
+
+
+def file_type(name):
+    """Código em FILE_TYPES da extensão do nome (0 se desconhecida)."""
+    extension = os.path.splitext(name)[1].lower()
+    return FILE_TYPES.index(extension) if extension in FILE_TYPES else 0
+
+
+def day_number(value):
+    """Dia (desde 1970-01-01) de uma data ou de um datetime."""
+    if isinstance(value, datetime.datetime):
+        value = timezone.localdate(value)
+    return (value - EPOCH).days
+
+
+def _day_start(number):
+    """Início (datetime com fuso) do dia informado."""
+    day = EPOCH + datetime.timedelta(days=number)
+    return timezone.make_aware(
+        datetime.datetime.combine(day, datetime.time.min)
+    )
+
+
+def chunk_facets(chunk_ids):
+    """
+    Facetas atuais dos chunks, lidas do banco.
+
+    Chunks que não existem mais ficam com STATE_REMOVED.
+
+    Args:
+        chunk_ids: IDs dos chunks, na ordem das linhas do índice
+
+    Returns:
+        np.ndarray: Array FACET_DTYPE, uma linha por chunk
+    """
+    chunk_ids = [int(chunk_id) for chunk_id in chunk_ids]
+    rows = {}
+    for start in range(0, len(chunk_ids), FACETS_BATCH_SIZE):
+        rows.update(
+            (row[0], row[1:])
+            for row in Chunk.objects.filter(
+                pk__in=chunk_ids[start:start + FACETS_BATCH_SIZE]
+            ).values_list(
+                "pk",
+                "file_id",
+                "file__folder_id",
+                "file__uploader_id",
+                "file__uploaded_at",
+                "file__name",
+                "file__is_deleted",
+            )
+        )
+    facets = np.zeros(len(chunk_ids), dtype=FACET_DTYPE)
+    for position, chunk_id in enumerate(chunk_ids):
+        row = rows.get(chunk_id)
+        if row is None:
+            facets["state"][position] = STATE_REMOVED
+            continue
+        file_id, folder_id, uploader_id, uploaded_at, name, deleted = row
+        facets[position] = (
+            file_id,
+            folder_id or 0,
+            uploader_id,
+            day_number(uploaded_at),
+            file_type(name),
+            STATE_TRASHED if deleted else STATE_LIVE,
+        )
+    return facets
+
+
+class FacetPostings:
+    """
+    Coluna de facetas ordenada, para achar as linhas de um intervalo
+    de valores por busca binária.
+    """
+
+    def __init__(self, column):
+        column = np.asarray(column)
+        self.order = np.argsort(column, kind="stable")
+        self.values = column[self.order]
+
+    def rows(self, ranges):
+        """
+        Linhas (ordenadas) com valor em algum dos intervalos.
+
+        Args:
+            ranges: Intervalos (mínimo, máximo), inclusivos
+        """
+        lows = np.array([low for low, _ in ranges])
+        highs = np.array([high for _, high in ranges])
+        starts = np.searchsorted(self.values, lows, side="left")
+        ends = np.searchsorted(self.values, highs, side="right")
+        slices = [
+            self.order[start:end]
+            for start, end in zip(starts.tolist(), ends.tolist())
+            if end > start
+        ]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(slices))
+
+    def bitmap(self, ranges):
+        """Máscara booleana das linhas com valor nos intervalos."""
+        mask = np.zeros(len(self.values), dtype=bool)
+        lows = np.array([low for low, _ in ranges])
+        highs = np.array([high for _, high in ranges])
+        starts = np.searchsorted(self.values, lows, side="left")
+        ends = np.searchsorted(self.values, highs, side="right")
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            mask[self.order[start:end]] = True
+        return mask
+
+
+@dataclass(frozen=True)
+class FacetClause:
+    """
+    Condição sobre uma coluna de facetas: o valor está em algum dos
+    intervalos (mínimo, máximo) inclusivos, ou em nenhum se negate.
+    """
+    column: str
+    ranges: tuple
+    negate: bool = False
+
+    @classmethod
+    def values(cls, column, values, negate=False):
+        """Cláusula de igualdade a um dos valores."""
+        return cls(
+            column,
+            tuple((value, value) for value in sorted(set(values))),
+            negate,
+        )
+
+    def bitmap(self, segment):
+        """Máscara booleana das linhas do segmento que atendem."""
+        if not self.ranges:
+            mask = np.zeros(segment.rows, dtype=bool)
+        else:
+            mask = segment.bitmap(self.column, self.ranges)
+        return ~mask if self.negate else mask
+
+    def _range_q(self, low, high):
+        """Condição SQL (sobre Chunk) de um intervalo."""
+        if self.column == "day":
+            condition = Q()
+            if low > DAY_MIN:
+                condition &= Q(file__uploaded_at__gte=_day_start(low))
+            if high < DAY_MAX:
+                condition &= Q(file__uploaded_at__lt=_day_start(high + 1))
+            return condition
+        if self.column == "type":
+            return reduce(or_, (
+                Q(file__name__iendswith=FILE_TYPES[code])
+                if code else ~reduce(or_, (
+                    Q(file__name__iendswith=extension)
+                    for extension in FILE_TYPES[1:]
+                ))
+                for code in range(low, high + 1)
+            ))
+        if self.column == "state":
+            return Q(file__is_deleted=low == STATE_TRASHED)
+        if self.column == "folder" and low == 0:
+            return Q(file__folder__isnull=True)
+        return Q(**{f"file__{self.column}_id": low})
+
+    def q(self):
+        """
+        Condição SQL equivalente, para filtrar um QuerySet de Chunk.
+        """
+        if not self.ranges:
+            condition = Q(pk__in=[])
+        elif self.column in {"file", "folder", "uploader"} and all(
+            low == high != 0 for low, high in self.ranges
+        ):
+            condition = Q(**{
+                f"file__{self.column}_id__in": [
+                    low for low, _ in self.ranges
+                ]
+            })
+        else:
+            condition = reduce(or_, (
+                self._range_q(low, high) for low, high in self.ranges
+            ))
+        return ~condition if self.negate else condition
+
+    def key(self):
+        """Representação canônica, para chaves de cache."""
+        ranges = ",".join(f"{low}-{high}" for low, high in self.ranges)
+        return f"{'-' if self.negate else ''}{self.column}:{ranges}"
+
+
+@dataclass
+class FacetFilter:
+    """
+    Conjunto de cláusulas combinadas com E.
+    """
+    clauses: tuple = ()
+
+    def __add__(self, other):
+        return FacetFilter((*self.clauses, *other.clauses))
+
+    def __bool__(self):
+        return bool(self.clauses)
+
+    def bitmap(self, segment):
+        """
+        Máscara das linhas do segmento que atendem a todas as
+        cláusulas, ou None se o filtro for vazio.
+        """
+        mask = None
+        for clause in self.clauses:
+            if mask is None:
+                mask = clause.bitmap(segment).copy()
+            else:
+                np.logical_and(mask, clause.bitmap(segment), out=mask)
+        return mask
+
+    def q(self):
+        """Condição SQL equivalente (ver FacetClause.q)."""
+        return reduce(
+            lambda condition, clause: condition & clause.q(),
+            self.clauses,
+            Q(),
+        )
+
+    def key(self):
+        """Representação canônica, para chaves de cache."""
+        return " ".join(sorted(clause.key() for clause in self.clauses))
+
+
+@dataclass(frozen=True)
+class FilterTerm:
+    """Cláusula do filtro como escrita pelo usuário."""
+    field: str
+    operator: str
+    values: tuple
+    negate: bool = False
+
+
+def parse_filter(text):
+    """
+    Lê a expressão de filtro (sintaxe no docstring do módulo).
+
+    Args:
+        text: Expressão de filtro
+
+    Returns:
+        list: FilterTerm, na ordem da expressão
+
+    Raises:
+        ValidationError: Se a expressão for inválida
+    """
+    try:
+        tokens = shlex.split(text or "")
+    except ValueError as e:
+        raise ValidationError("Filtro inválido: aspas sem par.") from e
+
+    terms = []
+    for token in tokens:
+        match = CLAUSE_PATTERN.match(token)
+        if match is None:
+            raise ValidationError(f"Filtro inválido: '{token}'.")
+        negate, field, operator, raw_values = match.groups()
+        if field.lower() not in FIELD_ALIASES:
+            raise ValidationError(f"Campo de filtro desconhecido: '{field}'.")
+        field = FIELD_ALIASES[field.lower()]
+        values = tuple(
+            value.strip() for value in raw_values.split(",") if value.strip()
+        )
+        if not values:
+            raise ValidationError(f"Filtro sem valor: '{token}'.")
+        if operator != ":" and (field != "uploaded" or len(values) > 1):
+            raise ValidationError(
+                f"Comparação só vale para uma data: '{token}'."
+            )
+        terms.append(FilterTerm(field, operator, values, bool(negate)))
+    return terms
+
+
+def _date_range(value):
+    """
+    Primeiro e último dia (números de dia) de AAAA, AAAA-MM ou
+    AAAA-MM-DD.
+    """
+    match = DATE_PATTERN.match(value)
+    if match is None:
+        raise ValidationError(f"Data inválida: '{value}'.")
+    year, month, day = (int(part) if part else None for part in match.groups())
+    try:
+        first, last = _calendar_period(year, month, day)
+    except ValueError as e:
+        raise ValidationError(f"Data inválida: '{value}'.") from e
+    return (day_number(first), day_number(last))
+
+
+def _calendar_period(year, month=None, day=None):
+    """
+    Primeira e última data de um ano, de um mês ou de um dia.
+
+    Raises:
+        ValueError: Se o mês ou o dia não existirem
+    """
+    if day is not None:
+        first = datetime.date(year, month, day)
+        return (first, first)
+    if month is not None:
+        last = (
+            datetime.date(year + month // 12, month % 12 + 1, 1)
+            - datetime.timedelta(days=1)
+        )
+        return (datetime.date(year, month, 1), last)
+    return (datetime.date(year, 1, 1), datetime.date(year, 12, 31))
+
+
+def _uploaded_clause(term):
+    """Cláusula de dia de envio."""
+    if term.operator == ":":
+        ranges = [_date_range(value) for value in term.values]
+    else:
+        first, last = _date_range(term.values[0])
+        ranges = [{
+            ">=": (first, DAY_MAX),
+            ">": (last + 1, DAY_MAX),
+            "<=": (DAY_MIN, last),
+            "<": (DAY_MIN, first - 1),
+        }[term.operator]]
+    return FacetClause("day", tuple(sorted(ranges)), term.negate)
+
+
+def _type_clause(term):
+    """Cláusula de tipo (extensões e grupos de extensões)."""
+    codes = set()
+    for value in term.values:
+        name = value.lower()
+        extensions = TYPE_GROUPS.get(name) or (f".{name.lstrip('.')}",)
+        for extension in extensions:
+            if extension not in FILE_TYPES:
+                raise ValidationError(
+                    f"Tipo de arquivo desconhecido: '{value}'."
+                )
+            codes.add(FILE_TYPES.index(extension))
+    return FacetClause.values("type", codes, term.negate)
+
+
+def _split_ids(values):
+    """Separa valores numéricos (IDs) de nomes."""
+    ids = {int(value) for value in values if value.isdigit()}
+    names = [value for value in values if not value.isdigit()]
+    return (ids, names)
+
+
+def subtree_folder_ids(user, roots):
+    """
+    IDs das pastas (ativas) de um usuário nas subárvores informadas.
+
+    Args:
+        user: Dono das pastas
+        roots: Pastas raiz das subárvores
+
+    Returns:
+        set: IDs das raízes e de todas as descendentes
+    """
+    if not roots:
+        return set()
+    return set(
+        Folder.objects.filter(owner=user, is_deleted=False)
+        .filter(reduce(or_, (
+            Q(pk=root.pk) | Q(path__startswith=root.subtree_path)
+            for root in roots
+        )))
+        .values_list("pk", flat=True)
+    )
+
+
+def _folder_clause(user, term):
+    """Cláusula de pasta: as pastas nomeadas e suas subárvores."""
+    ids, names = _split_ids(term.values)
+    condition = Q(pk__in=ids)
+    for name in names:
+        condition |= Q(name__iexact=name)
+    roots = list(
+        Folder.objects.filter(condition, owner=user, is_deleted=False)
+    )
+    if not roots:
+        raise ValidationError(
+            f"Pasta não encontrada: '{', '.join(term.values)}'."
+        )
+    return FacetClause.values(
+        "folder", subtree_folder_ids(user, roots), term.negate
+    )
+
+
+def _uploader_clause(term):
+    """Cláusula de autor (IDs ou nomes de usuário)."""
+    ids, names = _split_ids(term.values)
+    found = set(
+        get_user_model().objects.filter(
+            Q(pk__in=ids) | Q(username__in=names)
+        ).values_list("pk", flat=True)
+    )
+    if not found:
+        raise ValidationError(
+            f"Usuário não encontrado: '{', '.join(term.values)}'."
+        )
+    return FacetClause.values("uploader", found, term.negate)
+
+
+def build_filter(user, text):
+    """
+    Converte a expressão de filtro nas cláusulas sobre as facetas.
+
+    Args:
+        user: Usuário da consulta (dono das pastas citadas)
+        text: Expressão de filtro (ver parse_filter)
+
+    Returns:
+        FacetFilter: Filtro resolvido (vazio se text for vazio)
+
+    Raises:
+        ValidationError: Se a expressão for inválida ou citar pasta,
+            usuário ou tipo inexistente
+    """
+    clauses = []
+    for term in parse_filter(text):
+        if term.field == "folder":
+            clauses.append(_folder_clause(user, term))
+        elif term.field == "uploader":
+            clauses.append(_uploader_clause(term))
+        elif term.field == "type":
+            clauses.append(_type_clause(term))
+        else:
+            clauses.append(_uploaded_clause(term))
+    return FacetFilter(tuple(clauses))
+
+
+def scope_filter(user=None, folder=None):
+    """
+    Filtro do escopo de uma busca: chunks ativos, de arquivos fora da
+    lixeira e, opcionalmente, de um usuário e de uma subárvore.
+
+    Args:
+        user: Dono dos arquivos (opcional)
+        folder: Pasta raiz da subárvore (opcional)
+
+    Returns:
+        FacetFilter: Filtro do escopo
+    """
+    clauses = [FacetClause.values("state", [STATE_LIVE])]
+    if user is not None:
+        clauses.append(FacetClause.values("uploader", [user.pk]))
+    if folder is not None:
+        clauses.append(FacetClause.values(
+            "folder", subtree_folder_ids(folder.owner, [folder])
+        ))
+    return FacetFilter(tuple(clauses))
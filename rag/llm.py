@@ -0,0 +1,160 @@
+"""
+Clientes de LLM usados na geração das respostas.
+
+O cliente é plugável e escolhido em RAG_LLM_BACKEND:
+- "stub": monta a resposta a partir dos próprios trechos recuperados,
+  de forma determinística e sem dependências externas (testes e uso
+  offline)
+- "http": API compatível com o endpoint /chat/completions da OpenAI,
+  com streaming (RAG_LLM_URL, RAG_LLM_MODEL, RAG_LLM_API_KEY)
+
+Todo cliente expõe stream(prompt), um gerador de pedaços de texto da
+resposta na ordem em que são produzidos, para que o primeiro token
+chegue ao usuário antes do fim da geração.
+"""
+import json
+import re
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_MAX_TOKENS = 512
+
+DEFAULT_TIMEOUT = 120
+
+STUB_SOURCES = 3
+
+STUB_SENTENCE_WORDS = 40
+
+PIECE_PATTERN = re.compile(r"\S+\s*")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s")
+
+
+class StubLLM:
+    """
+    LLM local e determinístico.
+
+    A resposta é a primeira frase (ignorando títulos) de cada um dos
+    STUB_SOURCES primeiros trechos, seguida da citação ([1], [2], ...),
+    emitida palavra por palavra como um modelo real faria.
+    """
+
+    name = "stub"
+
+    def stream(self, prompt):  # noqa: PLR6301
+        """
+        Gera a resposta em pedaços.
+
+        Args:
+            prompt: Prompt montado por rag.query.build_prompt
+
+        Yields:
+            str: Pedaços de texto da resposta
+        """
+        sentences = []
+        for source in prompt.sources[:STUB_SOURCES]:
+            text = " ".join(
+                line for line in source.chunk.text.splitlines()
+                if not line.startswith("#")
+            )
+            text = " ".join(text.split())
+            sentence = SENTENCE_END_PATTERN.split(text, maxsplit=1)[0]
+            words = sentence.split()[:STUB_SENTENCE_WORDS]
+            sentences.append(f"{' '.join(words)} [{source.index}]")
+        yield from PIECE_PATTERN.findall(" ".join(sentences))
+
+
+class HttpLLM:
+    """
+    Cliente de API compatível com /chat/completions da OpenAI.
+
+    Envia {"model", "messages", "max_tokens", "stream": true} e lê os
+    eventos "data:" da resposta (choices[0].delta.content) até
+    "[DONE]".
+    """
+
+    def __init__(self, url, model, api_key="", max_tokens=DEFAULT_MAX_TOKENS,
+                 timeout=DEFAULT_TIMEOUT):
+        self.url = url
+        self.model = model
+        self.name = f"http-{model}"
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def stream(self, prompt):
+        """
+        Gera a resposta em pedaços, à medida que a API os envia.
+
+        As linhas são lidas à medida que chegam (chunk_size=None), sem
+        esperar um buffer de tamanho fixo encher.
+
+        Args:
+            prompt: Prompt montado por rag.query.build_prompt
+
+        Yields:
+            str: Pedaços de texto da resposta
+
+        Raises:
+            requests.RequestException: Se a API falhar ou responder
+                com erro
+        """
+        with self.session.post(
+            self.url,
+            json={
+                "model": self.model,
+                "messages": prompt.messages,
+                "max_tokens": self.max_tokens,
+                "stream": True,
+            },
+            stream=True,
+            timeout=self.timeout,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(
+                chunk_size=None, decode_unicode=True
+            ):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    """
+    Cliente configurado em RAG_LLM_BACKEND (um por processo).
+
+    Raises:
+        ImproperlyConfigured: Se o backend for desconhecido ou se o
+            backend "http" não tiver RAG_LLM_URL
+    """
+    backend = getattr(settings, "RAG_LLM_BACKEND", "stub")
+
+    if backend == "stub":
+        return StubLLM()
+    if backend == "http":
+        url = getattr(settings, "RAG_LLM_URL", "")
+        if not url:
+            raise ImproperlyConfigured(
+                "RAG_LLM_URL é obrigatório para o backend 'http'."
+            )
+        return HttpLLM(
+            url,
+            getattr(settings, "RAG_LLM_MODEL", ""),
+            getattr(settings, "RAG_LLM_API_KEY", ""),
+            getattr(settings, "RAG_LLM_MAX_TOKENS", DEFAULT_MAX_TOKENS),
+            getattr(settings, "RAG_LLM_TIMEOUT", DEFAULT_TIMEOUT),
+        )
+    raise ImproperlyConfigured(
+        f"RAG_LLM_BACKEND inválido: '{backend}'."
+    )
@@ -0,0 +1,5 @@
+"""
+Comandos de gerenciamento customizados.
+
+Este pacote contém os comandos de gerenciamento do app rag.
+"""
@@ -0,0 +1,73 @@
+"""
+Comando que gera os embeddings dos chunks pendentes.
+
+Percorre os chunks sem vetor no encoder atual em lotes, respeitando o
+teto de memória, e informa a vazão em chunks por segundo. Útil após
+trocar de encoder (RAG_EMBEDDING_BACKEND) ou em uma carga inicial.
+
+Uso:
+    python manage.py backfill_embeddings --batch-size 256 --memory-mb 128
+"""
+from django.core.management.base import BaseCommand
+
+from rag.embeddings import backfill_embeddings, get_encoder
+
+
+class Command(BaseCommand):
+    """
+    Gera em lotes os embeddings que faltam e relata a vazão.
+    """
+
+    help = "Gera os embeddings dos chunks que ainda não têm vetor"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define o tamanho dos lotes e o teto de memória."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Chunks lidos por consulta (padrão: "
+                 "RAG_EMBEDDING_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--memory-mb",
+            type=int,
+            default=None,
+            help="Teto de memória por lote (padrão: "
+                 "RAG_EMBEDDING_MEMORY_MB)",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Executa o backfill mostrando o progresso de cada lote.
+        """
+        encoder = get_encoder()
+        verbose = options["verbosity"] > 1
+        max_bytes = (
+            options["memory_mb"] * 1024 * 1024
+            if options["memory_mb"]
+            else None
+        )
+
+        def on_batch(report):
+            if verbose:
+                self.stdout.write(_format_report(report))
+
+        report = backfill_embeddings(
+            batch_size=options["batch_size"],
+            encoder=encoder,
+            max_bytes=max_bytes,
+            on_batch=on_batch,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"{encoder.name}: {_format_report(report)}")
+        )
+
+
+def _format_report(report):
+    """Texto com os totais e a vazão de um EmbeddingReport."""
+    return (
+        f"{report.chunks} chunk(s), {report.encoded} codificado(s), "
+        f"{report.cached} em cache, "
+        f"{report.chunks_per_second:.1f} chunks/s"
+    )
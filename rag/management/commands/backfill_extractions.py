@@ -0,0 +1,66 @@
+"""
+Comando que enfileira a extração de texto de arquivos antigos.
+
+Arquivos enviados antes do pipeline de extração (ou cujas extrações
+falharam, com --retry-failed) são enfileirados na fila "bulk", de
+modo que não atrasem as extrações dos uploads recentes.
+
+Uso:
+    python manage.py backfill_extractions --batch-size 500
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from jobs.models import Job
+from rag.extraction import enqueue_extractions
+from rag.models import DocumentExtraction
+from workspace.models import File
+
+BACKFILL_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    """
+    Enfileira, em lotes, extrações para arquivos sem texto extraído.
+    """
+
+    help = "Enfileira a extração de texto dos arquivos existentes"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define o tamanho dos lotes e o reprocessamento de falhas."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BACKFILL_BATCH_SIZE,
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Enfileira de novo as extrações que falharam",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Percorre os arquivos ativos por pk e enfileira cada lote.
+        """
+        missing = Q(extraction__isnull=True)
+        if options["retry_failed"]:
+            missing |= Q(extraction__status=DocumentExtraction.STATUS_FAILED)
+
+        queryset = File.objects.filter(missing, is_deleted=False)
+        total = 0
+        last_pk = 0
+        while True:
+            files = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by("pk")[:options["batch_size"]]
+            )
+            if not files:
+                break
+            enqueue_extractions(files, priority=Job.PRIORITY_BULK)
+            total += len(files)
+            last_pk = files[-1].pk
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} arquivo(s) enfileirado(s)")
+        )
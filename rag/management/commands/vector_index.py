@@ -0,0 +1,57 @@
+"""
+Comando de manutenção do índice vetorial.
+
+Ações:
+- stats: segmentos e vetores do índice do encoder atual
+- index: anexa os chunks com embedding que ainda não estão no índice
+- compact: junta os segmentos, descarta chunks removidos e constrói o
+  IVF quando o índice é grande
+- rebuild: apaga o índice e o recria a partir dos embeddings em cache
+
+Uso:
+    python manage.py vector_index compact
+"""
+from django.core.management.base import BaseCommand
+
+from rag.embeddings import get_encoder
+from rag.models import Chunk
+from rag.vector_index import get_index, index_chunks, live_chunk_ids
+
+
+class Command(BaseCommand):
+    """
+    Executa ações de manutenção no índice vetorial.
+    """
+
+    help = "Mantém o índice vetorial (stats, index, compact, rebuild)"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define a ação a executar."""
+        parser.add_argument(
+            "action",
+            choices=["stats", "index", "compact", "rebuild"],
+        )
+
+    def handle(self, *args, **options):
+        """
+        Executa a ação e mostra o estado final do índice.
+        """
+        encoder = get_encoder()
+        index = get_index(encoder)
+        action = options["action"]
+
+        if action == "rebuild":
+            index.clear()
+            Chunk.objects.update(indexed_at=None)
+
+        if action in {"index", "rebuild"}:
+            added = index_chunks(Chunk.objects.all(), encoder)
+            self.stdout.write(f"{added} chunk(s) indexado(s)")
+
+        if action in {"compact", "rebuild"}:
+            index.compact(live_chunk_ids())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{encoder.name}: {len(index.segments)} segmento(s), "
+            f"{index.rows} vetor(es)"
+        ))
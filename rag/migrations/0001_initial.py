@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('workspace', '0008_trash_subtree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentExtraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('output_name', models.CharField(blank=True, max_length=255, verbose_name='output name')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('bytes_read', models.BigIntegerField(default=0, verbose_name='bytes read')),
+                ('page_count', models.PositiveIntegerField(default=0, verbose_name='page count')),
+                ('char_count', models.BigIntegerField(default=0, verbose_name='char count')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='duration (s)')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='extraction', to='workspace.file')),
+            ],
+            options={
+                'verbose_name': 'Document extraction',
+                'verbose_name_plural': 'Document extractions',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='extraction_status_idx')],
+            },
+        ),
+    ]
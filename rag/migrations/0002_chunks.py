@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag', '0001_initial'),
+        ('workspace', '0008_trash_subtree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Chunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordinal', models.PositiveIntegerField(verbose_name='ordinal')),
+                ('text', models.TextField(verbose_name='text')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='content hash')),
+                ('token_count', models.PositiveIntegerField(verbose_name='token count')),
+                ('heading', models.CharField(blank=True, max_length=255, verbose_name='heading')),
+                ('page_start', models.PositiveIntegerField(verbose_name='first page')),
+                ('page_end', models.PositiveIntegerField(verbose_name='last page')),
+                ('char_start', models.BigIntegerField(verbose_name='start offset')),
+                ('char_end', models.BigIntegerField(verbose_name='end offset')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='workspace.file')),
+            ],
+            options={
+                'verbose_name': 'Chunk',
+                'verbose_name_plural': 'Chunks',
+                'ordering': ['file', 'ordinal'],
+                'indexes': [models.Index(fields=['content_hash'], name='chunk_hash_idx')],
+                'constraints': [models.UniqueConstraint(fields=('file', 'ordinal'), name='unique_chunk_ordinal')],
+            },
+        ),
+    ]
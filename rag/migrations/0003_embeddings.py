@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag', '0002_chunks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Embedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='model')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='content hash')),
+                ('dimension', models.PositiveSmallIntegerField(verbose_name='dimension')),
+                ('vector', models.BinaryField(verbose_name='vector (float32)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Embedding',
+                'verbose_name_plural': 'Embeddings',
+                'constraints': [models.UniqueConstraint(fields=('model', 'content_hash'), name='unique_embedding_hash')],
+            },
+        ),
+    ]
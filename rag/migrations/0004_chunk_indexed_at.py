@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag', '0003_embeddings'),
+        ('workspace', '0008_trash_subtree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='indexed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(condition=models.Q(('indexed_at__isnull', True)), fields=['id'], name='chunk_unindexed_idx'),
+        ),
+    ]
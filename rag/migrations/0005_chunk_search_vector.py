@@ -0,0 +1,40 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def fill_search_vectors(apps, schema_editor):
+    """
+    Calcula o tsvector (português) dos chunks já existentes.
+    """
+    Chunk = apps.get_model("rag", "Chunk")
+    Chunk.objects.update(
+        search_vector=SearchVector(
+            "heading", weight="A", config="portuguese"
+        ) + SearchVector("text", weight="B", config="portuguese")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag', '0004_chunk_indexed_at'),
+        ('workspace', '0008_trash_subtree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='chunk_search_idx'),
+        ),
+        migrations.RunPython(
+            fill_search_vectors,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag', '0005_chunk_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('file', 'File'), ('folder', 'Folder')], max_length=8)),
+                ('object_id', models.BigIntegerField(verbose_name='object id')),
+                ('action', models.CharField(choices=[('rename', 'Rename'), ('move', 'Move'), ('delete', 'Delete')], max_length=8)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Index change',
+                'verbose_name_plural': 'Index changes',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,239 @@
+"""
+Modelos do app rag.
+
+Este módulo define o estado da extração de texto de cada arquivo do
+workspace (DocumentExtraction), os trechos do texto usados na
+indexação (Chunk), o cache de vetores dos trechos (Embedding) e o
+feed de mudanças de metadados ainda não aplicadas aos índices
+(IndexChange).
+"""
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from workspace.models import File
+
+
+class DocumentExtraction(models.Model):
+    """
+    Estado da extração de texto de um File.
+
+    O texto normalizado não fica no banco: ele é gravado no storage,
+    uma página por linha (JSON Lines), no caminho output_name. Arquivos
+    com o mesmo conteúdo (mesmo blob) compartilham a mesma saída.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_PROCESSING, _("Processing")),
+        (STATUS_DONE, _("Done")),
+        (STATUS_FAILED, _("Failed")),
+    ]
+
+    file = models.OneToOneField(
+        File,
+        on_delete=models.CASCADE,
+        related_name="extraction",
+    )
+
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+
+    output_name = models.CharField(
+        _("output name"),
+        max_length=255,
+        blank=True,
+    )
+
+    error = models.TextField(_("error"), blank=True)
+
+    bytes_read = models.BigIntegerField(_("bytes read"), default=0)
+
+    page_count = models.PositiveIntegerField(_("page count"), default=0)
+
+    char_count = models.BigIntegerField(_("char count"), default=0)
+
+    duration = models.FloatField(
+        _("duration (s)"),
+        null=True,
+        blank=True,
+    )
+
+    attempts = models.PositiveIntegerField(_("attempts"), default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        verbose_name = _("Document extraction")
+        verbose_name_plural = _("Document extractions")
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"],
+                name="extraction_status_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return f"{self.file_id} ({self.status})"
+
+
+class Chunk(models.Model):
+    """
+    Trecho do texto extraído de um File, unidade da indexação.
+
+    O ordinal é a posição do chunk no documento; content_hash é o
+    SHA-256 do texto e identifica o chunk entre reprocessamentos (ver
+    rag.chunking.sync_chunks). char_start e char_end são posições no
+    texto do documento (páginas unidas por uma linha em branco).
+    indexed_at marca quando o vetor do chunk entrou no índice vetorial
+    (ver rag.vector_index) e search_vector guarda o tsvector (português)
+    usado na busca por palavras-chave (ver rag.retrieval).
+    """
+
+    file = models.ForeignKey(
+        File,
+        on_delete=models.CASCADE,
+        related_name="chunks",
+    )
+
+    ordinal = models.PositiveIntegerField(_("ordinal"))
+
+    text = models.TextField(_("text"))
+
+    content_hash = models.CharField(_("content hash"), max_length=64)
+
+    token_count = models.PositiveIntegerField(_("token count"))
+
+    heading = models.CharField(_("heading"), max_length=255, blank=True)
+
+    page_start = models.PositiveIntegerField(_("first page"))
+    page_end = models.PositiveIntegerField(_("last page"))
+
+    char_start = models.BigIntegerField(_("start offset"))
+    char_end = models.BigIntegerField(_("end offset"))
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    indexed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["file", "ordinal"]
+        verbose_name = _("Chunk")
+        verbose_name_plural = _("Chunks")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["file", "ordinal"],
+                name="unique_chunk_ordinal",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["content_hash"],
+                name="chunk_hash_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                name="chunk_unindexed_idx",
+                condition=models.Q(indexed_at__isnull=True),
+            ),
+            GinIndex(
+                fields=["search_vector"],
+                name="chunk_search_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return f"{self.file_id}#{self.ordinal}"
+
+
+class Embedding(models.Model):
+    """
+    Vetor de um texto de chunk, em cache pelo hash do conteúdo.
+
+    Não aponta para um Chunk: todos os chunks com o mesmo
+    content_hash (de qualquer arquivo ou usuário) compartilham o mesmo
+    vetor. model identifica o encoder que gerou o vetor, permitindo
+    trocar de encoder sem misturar espaços vetoriais.
+    """
+
+    model = models.CharField(_("model"), max_length=100)
+
+    content_hash = models.CharField(_("content hash"), max_length=64)
+
+    dimension = models.PositiveSmallIntegerField(_("dimension"))
+
+    vector = models.BinaryField(_("vector (float32)"))
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Embedding")
+        verbose_name_plural = _("Embeddings")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model", "content_hash"],
+                name="unique_embedding_hash",
+            ),
+        ]
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return f"{self.model}:{self.content_hash[:12]}"
+
+
+class IndexChange(models.Model):
+    """
+    Mudança de metadados do workspace pendente nos índices (outbox).
+
+    Gravada na mesma transação que renomeia, move ou exclui o item e
+    apagada quando aplicada (ver rag.changes). object_id não é chave
+    estrangeira: o item pode ser removido definitivamente antes da
+    mudança ser aplicada.
+    """
+
+    KIND_FILE = "file"
+    KIND_FOLDER = "folder"
+    KIND_CHOICES = [
+        (KIND_FILE, _("File")),
+        (KIND_FOLDER, _("Folder")),
+    ]
+
+    ACTION_RENAME = "rename"
+    ACTION_MOVE = "move"
+    ACTION_DELETE = "delete"
+    ACTION_CHOICES = [
+        (ACTION_RENAME, _("Rename")),
+        (ACTION_MOVE, _("Move")),
+        (ACTION_DELETE, _("Delete")),
+    ]
+
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+
+    object_id = models.BigIntegerField(_("object id"))
+
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = _("Index change")
+        verbose_name_plural = _("Index changes")
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return f"{self.action} {self.kind} {self.object_id}"
@@ -0,0 +1,283 @@
+"""
+Respostas a perguntas sobre os documentos do workspace.
+
+Uma consulta passa por quatro etapas, cada uma cronometrada:
+- retrieval: busca híbrida dos chunks (rag.retrieval.hybrid_search)
+- rerank: reordenação opcional de RAG_RERANK_CANDIDATES candidatos
+  por um reranker (rag.reranking), mantendo os k melhores
+- prompt: montagem do contexto numerado ([1], [2], ...) dentro do
+  orçamento RAG_CONTEXT_TOKENS
+- generation: geração da resposta pelo LLM configurado (rag.llm), em
+  streaming
+
+As três primeiras etapas rodam antes da resposta HTTP começar e vão no
+cabeçalho Server-Timing; a geração é transmitida como server-sent
+events (iter_answer_events) e suas medidas, incluindo o tempo até o
+primeiro token, seguem no evento final "done".
+"""
+import json
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import requests
+from django.conf import settings
+
+from .retrieval import hybrid_search
+
+DEFAULT_TOP_K = 8
+
+DEFAULT_RERANK_CANDIDATES = 50
+
+MAX_TOP_K = 20
+
+DEFAULT_CONTEXT_TOKENS = 3000
+
+NO_CONTEXT_ANSWER = (
+    "Não encontrei nos seus documentos informações para responder a "
+    "essa pergunta."
+)
+
+SYSTEM_PROMPT = (
+    "Você é um assistente que responde perguntas usando apenas os "
+    "trechos de documentos fornecidos. Cite as fontes com o número do "
+    "trecho entre colchetes, por exemplo [1]. Se a resposta não estiver "
+    "nos trechos, diga que não sabe."
+)
+
+CITATION_PATTERN = re.compile(r"\[(\d+)\]")
+
+
+class StageTimer:
+    """
+    Cronômetro das etapas de uma consulta, em milissegundos.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.details = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Mede o bloco e registra a duração com o nome informado."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def record(self, name, started):
+        """Registra a duração desde started (time.perf_counter())."""
+        self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name, duration):
+        """Registra uma duração já medida, em milissegundos."""
+        self.stages[name] = duration
+
+    def server_timing(self):
+        """Valor do cabeçalho Server-Timing com as etapas medidas."""
+        return ", ".join(
+            f"{name};dur={duration:.1f}"
+            for name, duration in self.stages.items()
+        )
+
+    def as_dict(self):
+        """Durações arredondadas, para serialização em JSON."""
+        return {
+            name: round(duration, 1)
+            for name, duration in self.stages.items()
+        }
+
+
+@dataclass
+class Source:
+    """Chunk usado como contexto, com o número da citação."""
+    index: int
+    chunk: object
+    score: float
+
+    def citation(self):
+        """Dados da citação: arquivo e posição do trecho."""
+        chunk = self.chunk
+        return {
+            "index": self.index,
+            "file_id": chunk.file_id,
+            "file_name": chunk.file.name,
+            "chunk_id": chunk.pk,
+            "ordinal": chunk.ordinal,
+            "heading": chunk.heading,
+            "page_start": chunk.page_start,
+            "page_end": chunk.page_end,
+            "char_start": chunk.char_start,
+            "char_end": chunk.char_end,
+            "score": round(self.score, 6),
+        }
+
+
+@dataclass
+class QueryOptions:
+    """Parâmetros opcionais de uma consulta."""
+    folder: object = None
+    k: int | None = None
+    reranker: object = None
+    filters: object = None
+
+
+@dataclass
+class Prompt:
+    """Pergunta, contexto numerado e mensagens enviadas ao LLM."""
+    question: str
+    sources: list
+    messages: list
+
+
+def _source_block(source):
+    """Texto de um trecho no contexto: cabeçalho e conteúdo."""
+    chunk = source.chunk
+    location = f"{chunk.file.name}, p. {chunk.page_start}"
+    if chunk.page_end != chunk.page_start:
+        location += f"-{chunk.page_end}"
+    return f"[{source.index}] ({location})\n{chunk.text}"
+
+
+def build_prompt(question, hits, max_tokens=None):
+    """
+    Monta o prompt com os chunks que cabem no orçamento de contexto.
+
+    Os chunks entram na ordem recebida até somarem max_tokens; o
+    primeiro sempre entra, mesmo que sozinho exceda o orçamento.
+
+    Args:
+        question: Pergunta do usuário
+        hits: Lista de (Chunk, score) em ordem de relevância
+        max_tokens: Orçamento de tokens do contexto (padrão:
+            RAG_CONTEXT_TOKENS)
+
+    Returns:
+        Prompt: Pergunta, fontes numeradas e mensagens do chat
+    """
+    max_tokens = max_tokens or getattr(
+        settings, "RAG_CONTEXT_TOKENS", DEFAULT_CONTEXT_TOKENS
+    )
+    sources = []
+    used = 0
+    for chunk, score in hits:
+        if sources and used + chunk.token_count > max_tokens:
+            break
+        sources.append(Source(len(sources) + 1, chunk, score))
+        used += chunk.token_count
+
+    context = "\n\n".join(_source_block(source) for source in sources)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"Trechos:\n\n{context}\n\nPergunta: {question}",
+        },
+    ]
+    return Prompt(question=question, sources=sources, messages=messages)
+
+
+def prepare_answer(user, question, options=None, timer=None):
+    """
+    Executa as etapas anteriores à geração: busca, rerank e prompt.
+
+    Args:
+        user: Dono dos documentos
+        question: Pergunta do usuário
+        options: QueryOptions com pasta, quantidade de chunks (padrão:
+            RAG_QUERY_TOP_K), reranker (objeto com
+            rerank(question, hits, timer), ver rag.reranking) e
+            filtros de metadados (rag.facets.FacetFilter); todos
+            opcionais
+        timer: StageTimer que recebe as medidas (opcional)
+
+    Returns:
+        Prompt: Prompt pronto para o LLM
+    """
+    options = options or QueryOptions()
+    timer = timer or StageTimer()
+    k = options.k or getattr(settings, "RAG_QUERY_TOP_K", DEFAULT_TOP_K)
+
+    candidates = k
+    if options.reranker is not None:
+        candidates = max(k, getattr(
+            settings, "RAG_RERANK_CANDIDATES", DEFAULT_RERANK_CANDIDATES
+        ))
+
+    with timer.stage("retrieval"):
+        hits = hybrid_search(
+            user,
+            question,
+            k=candidates,
+            folder=options.folder,
+            filters=options.filters,
+        )
+    if options.reranker is not None:
+        with timer.stage("rerank"):
+            hits = options.reranker.rerank(question, hits, timer)[:k]
+    with timer.stage("prompt"):
+        return build_prompt(question, hits)
+
+
+def cited_indexes(answer, sources):
+    """Números das fontes citadas na resposta, sem repetição."""
+    valid = {source.index for source in sources}
+    return sorted({
+        int(number)
+        for number in CITATION_PATTERN.findall(answer)
+        if int(number) in valid
+    })
+
+
+def iter_answer_events(prompt, llm, timer=None):
+    """
+    Gera os eventos da resposta, na ordem em que devem ser enviados.
+
+    Eventos:
+    - "sources": citações das fontes do contexto
+    - "token": pedaço da resposta ({"text"})
+    - "error": falha do LLM ({"error"}), encerra a geração
+    - "done": fontes citadas, duração de cada etapa e detalhes das
+      etapas (por exemplo, quantos candidatos o reranker pontuou)
+
+    Sem fontes, a resposta é NO_CONTEXT_ANSWER e o LLM não é chamado.
+
+    Args:
+        prompt: Prompt montado por prepare_answer
+        llm: Cliente de LLM (ver rag.llm)
+        timer: StageTimer com as etapas anteriores (opcional)
+
+    Yields:
+        tuple: (nome do evento, dados serializáveis em JSON)
+    """
+    timer = timer or StageTimer()
+    yield ("sources", [source.citation() for source in prompt.sources])
+
+    started = time.perf_counter()
+    pieces = []
+    try:
+        stream = (
+            llm.stream(prompt) if prompt.sources else iter([NO_CONTEXT_ANSWER])
+        )
+        for piece in stream:
+            if not pieces:
+                timer.record("first_token", started)
+            pieces.append(piece)
+            yield ("token", {"text": piece})
+    except (requests.RequestException, ValueError) as e:
+        yield ("error", {"error": f"Falha na geração: {e}"})
+    timer.record("generation", started)
+
+    yield ("done", {
+        "citations": cited_indexes("".join(pieces), prompt.sources),
+        "timings": timer.as_dict(),
+        "details": timer.details,
+    })
+
+
+def format_sse(event, data):
+    """Serializa um evento no formato text/event-stream."""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,255 @@
+"""
+Reranking dos chunks recuperados, em CPU.
+
+A busca híbrida devolve um top-N ruidoso (RAG_RERANK_CANDIDATES); o
+reranker pontua cada par (pergunta, chunk) e reordena os candidatos
+antes da montagem do prompt. O modelo é plugável e escolhido em
+RAG_RERANKER:
+- "" (padrão): sem reranking
+- "lexical": pontuação local por sobreposição de termos (BM25 sobre
+  os próprios candidatos, sem acentos, com bônus para bigramas da
+  pergunta), sem dependências
+- "cross-encoder": modelo CrossEncoder do sentence-transformers
+  (RAG_RERANKER_MODEL) em CPU; se a biblioteca não estiver instalada,
+  usa o "lexical"
+
+Os candidatos são pontuados em lotes de RAG_RERANK_BATCH_SIZE dentro
+de um orçamento rígido por consulta (RAG_RERANK_BUDGET_MS): antes de
+cada lote, o custo é estimado pela média móvel do custo por candidato
+dos lotes anteriores, e o lote só roda se couber no orçamento. Os
+candidatos pontuados são reordenados; os demais seguem depois deles,
+na ordem original. A duração de cada lote vai para o StageTimer da
+consulta (rerank_batch_1, rerank_batch_2, ...).
+"""
+import logging
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+DEFAULT_CANDIDATES = 50
+
+DEFAULT_BATCH_SIZE = 16
+
+DEFAULT_BUDGET_MS = 300
+
+COST_SMOOTHING = 0.3
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+BIGRAM_WEIGHT = 0.5
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _terms(text):
+    """Palavras de um texto, em minúsculas e sem acentos."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return WORD_PATTERN.findall(text)
+
+
+class LexicalScorer:
+    """
+    Pontuação local por sobreposição de termos.
+
+    Calcula BM25 da pergunta contra cada texto, com a frequência de
+    documentos estimada no próprio lote, e soma BIGRAM_WEIGHT para
+    cada bigrama da pergunta presente no texto.
+    """
+
+    name = "lexical"
+
+    def score(self, question, texts):  # noqa: PLR6301
+        """
+        Pontua os textos em relação à pergunta.
+
+        Returns:
+            np.ndarray: Pontuações float32, uma por texto
+        """
+        query = _terms(question)
+        query_bigrams = set(zip(query, query[1:]))
+        documents = [_terms(text) for text in texts]
+        average_length = (
+            sum(len(words) for words in documents) / len(documents) or 1.0
+        )
+        frequency = Counter(
+            term for words in documents for term in set(words)
+        )
+
+        scores = np.zeros(len(documents), dtype=np.float32)
+        for row, words in enumerate(documents):
+            counts = Counter(words)
+            norm = BM25_K1 * (
+                1 - BM25_B + BM25_B * len(words) / average_length
+            )
+            total = 0.0
+            for term in set(query):
+                tf = counts.get(term, 0)
+                if not tf:
+                    continue
+                idf = math.log(
+                    1 + (len(documents) - frequency[term] + 0.5)
+                    / (frequency[term] + 0.5)
+                )
+                total += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            total += BIGRAM_WEIGHT * len(
+                query_bigrams & set(zip(words, words[1:]))
+            )
+            scores[row] = total
+        return scores
+
+
+class CrossEncoderScorer:
+    """
+    Cross-encoder do sentence-transformers executado em CPU.
+    """
+
+    def __init__(self, model_name):
+        from sentence_transformers import CrossEncoder  # noqa: PLC0415
+
+        self.name = f"cross-encoder-{model_name}"
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def score(self, question, texts):
+        """
+        Pontua os pares (pergunta, texto) em uma chamada ao modelo.
+
+        Returns:
+            np.ndarray: Pontuações float32, uma por texto
+        """
+        return np.asarray(
+            self.model.predict(
+                [(question, text) for text in texts],
+                batch_size=len(texts),
+                show_progress_bar=False,
+            ),
+            dtype=np.float32,
+        )
+
+
+class Reranker:
+    """
+    Reordena candidatos em lotes, dentro de um orçamento de tempo.
+
+    Args:
+        scorer: Objeto com score(question, texts) -> np.ndarray
+        batch_size: Candidatos por chamada ao modelo
+        budget_ms: Tempo máximo de reranking por consulta
+    """
+
+    def __init__(self, scorer, batch_size=DEFAULT_BATCH_SIZE,
+                 budget_ms=DEFAULT_BUDGET_MS):
+        self.scorer = scorer
+        self.batch_size = max(1, batch_size)
+        self.budget_ms = budget_ms
+        self.item_ms = None
+
+    def _observe(self, batch_ms, size):
+        """Atualiza a média móvel do custo por candidato."""
+        cost = batch_ms / size
+        if self.item_ms is None:
+            self.item_ms = cost
+        else:
+            self.item_ms += COST_SMOOTHING * (cost - self.item_ms)
+
+    def rerank(self, question, hits, timer=None):
+        """
+        Reordena os candidatos que couberem no orçamento.
+
+        Args:
+            question: Pergunta do usuário
+            hits: Lista de (Chunk, score) em ordem de relevância
+            timer: StageTimer que recebe a duração de cada lote e, em
+                details["rerank"], o modelo e quantos candidatos foram
+                pontuados (opcional)
+
+        Returns:
+            list: (Chunk, score) com os pontuados primeiro, na ordem do
+                reranker, e os demais na ordem original
+        """
+        started = time.perf_counter()
+        scored = []
+        for number, start in enumerate(
+            range(0, len(hits), self.batch_size), start=1
+        ):
+            batch = hits[start:start + self.batch_size]
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if (
+                self.item_ms is not None
+                and elapsed_ms + self.item_ms * len(batch) > self.budget_ms
+            ):
+                break
+
+            batch_started = time.perf_counter()
+            scores = self.scorer.score(
+                question, [chunk.text for chunk, _ in batch]
+            )
+            batch_ms = (time.perf_counter() - batch_started) * 1000
+            self._observe(batch_ms, len(batch))
+            if timer is not None:
+                timer.add(f"rerank_batch_{number}", batch_ms)
+            positions = range(start, start + len(batch))
+            scored.extend(zip(scores.tolist(), positions))
+
+        order = [
+            position
+            for _, position in sorted(scored, key=lambda item: -item[0])
+        ]
+        if timer is not None:
+            timer.details["rerank"] = {
+                "scorer": self.scorer.name,
+                "candidates": len(hits),
+                "scored": len(order),
+            }
+        return [hits[position] for position in order] + hits[len(order):]
+
+
+@lru_cache(maxsize=1)
+def get_reranker():
+    """
+    Reranker configurado em RAG_RERANKER (um por processo).
+
+    Returns:
+        Reranker: Reranker configurado, ou None se desativado
+
+    Raises:
+        ImproperlyConfigured: Se o modelo for desconhecido
+    """
+    backend = getattr(settings, "RAG_RERANKER", "")
+    if not backend:
+        return None
+
+    if backend == "lexical":
+        scorer = LexicalScorer()
+    elif backend == "cross-encoder":
+        model = getattr(settings, "RAG_RERANKER_MODEL", DEFAULT_MODEL)
+        try:
+            scorer = CrossEncoderScorer(model)
+        except ImportError:
+            logger.warning(
+                "sentence-transformers não instalado; usando o reranker "
+                "lexical"
+            )
+            scorer = LexicalScorer()
+    else:
+        raise ImproperlyConfigured(f"RAG_RERANKER inválido: '{backend}'.")
+
+    return Reranker(
+        scorer,
+        batch_size=getattr(
+            settings, "RAG_RERANK_BATCH_SIZE", DEFAULT_BATCH_SIZE
+        ),
+        budget_ms=getattr(settings, "RAG_RERANK_BUDGET_MS", DEFAULT_BUDGET_MS),
+    )
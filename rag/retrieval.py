@@ -0,0 +1,152 @@
+"""
+Recuperação de chunks: busca por palavras-chave e busca híbrida.
+
+A busca por palavras-chave usa o full-text search do Postgres: cada
+chunk guarda um tsvector com a configuração "portuguese" (título com
+peso A, texto com peso B), indexado por GIN e mantido pelo pipeline de
+ingestão (update_search_vectors). O ranking usa ts_rank_cd (cover
+density).
+
+A busca híbrida combina, em uma única chamada, o ranking por
+palavras-chave e o ranking vetorial (rag.vector_index) com reciprocal
+rank fusion (RRF): score = soma de 1 / (RRF_K + posição) em cada
+ranking em que o chunk aparece. Os filtros de metadados (rag.facets)
+são aplicados antes da pontuação nos dois rankings: como bitmaps nas
+facetas do índice vetorial e como condições SQL na busca por
+palavras-chave.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db.models import F
+
+from .embeddings import encode_query, get_encoder
+from .facets import scope_filter
+from .models import Chunk
+from .vector_index import get_index, searchable_chunks
+
+SEARCH_CONFIG = "portuguese"
+
+RRF_K = 60
+
+CANDIDATE_MULTIPLIER = 4
+
+
+def chunk_search_vector():
+    """Expressão do tsvector de um chunk (título A, texto B)."""
+    return SearchVector(
+        "heading", weight="A", config=SEARCH_CONFIG
+    ) + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+
+
+def update_search_vectors(chunk_ids):
+    """
+    Recalcula o tsvector dos chunks informados com um único UPDATE.
+
+    Args:
+        chunk_ids: IDs dos chunks novos ou alterados
+    """
+    Chunk.objects.filter(pk__in=chunk_ids).update(
+        search_vector=chunk_search_vector()
+    )
+
+
+def keyword_search(query, chunks=None, k=10):
+    """
+    Busca chunks por palavras-chave.
+
+    A consulta aceita a sintaxe de busca web do Postgres (aspas para
+    frases, "-" para excluir termos, "or").
+
+    Args:
+        query: Texto da consulta
+        chunks: QuerySet de chunks permitidos (padrão: todos os
+            pesquisáveis)
+        k: Quantidade de resultados
+
+    Returns:
+        list: (chunk_id, score ts_rank_cd) em ordem decrescente
+    """
+    if chunks is None:
+        chunks = searchable_chunks()
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type="websearch"
+    )
+    return list(
+        chunks.filter(search_vector=search_query)
+        .annotate(rank=SearchRank(
+            F("search_vector"), search_query, cover_density=True
+        ))
+        .order_by("-rank", "pk")
+        .values_list("pk", "rank")[:k]
+    )
+
+
+def reciprocal_rank_fusion(rankings, k=10, rrf_k=RRF_K):
+    """
+    Funde rankings de (chunk_id, score) por reciprocal rank fusion.
+
+    Args:
+        rankings: Lista de rankings, cada um em ordem decrescente
+        k: Quantidade de resultados
+        rrf_k: Constante de suavização do RRF
+
+    Returns:
+        list: (chunk_id, score RRF) em ordem decrescente
+    """
+    fused = {}
+    for ranking in rankings:
+        for position, (chunk_id, _) in enumerate(ranking, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (
+                rrf_k + position
+            )
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def hybrid_search(user, query, k=10, folder=None, filters=None):
+    """
+    Busca híbrida (vetorial + palavras-chave) nos chunks de um usuário.
+
+    Cada ranking busca CANDIDATE_MULTIPLIER * k candidatos com o mesmo
+    filtro (dono, subárvore, lixeira e filtros de metadados) e o
+    resultado é fundido por RRF. Os chunks finais são lidos pelo mesmo
+    filtro no banco, o que descarta resultados de facetas ainda não
+    atualizadas pelo feed de mudanças (rag.changes).
+
+    Args:
+        user: Dono dos arquivos
+        query: Texto da consulta
+        k: Quantidade de resultados
+        folder: Restringe à subárvore desta pasta (opcional)
+        filters: rag.facets.FacetFilter com filtros de metadados
+            (opcional, ver rag.facets.build_filter)
+
+    Returns:
+        list: (Chunk, score RRF) em ordem decrescente
+    """
+    candidates = k * CANDIDATE_MULTIPLIER
+    chunks = searchable_chunks(user, folder)
+    scope = scope_filter(user, folder)
+    if filters:
+        chunks = chunks.filter(filters.q())
+        scope += filters
+
+    encoder = get_encoder()
+    vector_hits = get_index(encoder).search(
+        encode_query(query, encoder),
+        k=candidates,
+        filters=scope,
+    )[0]
+    keyword_hits = keyword_search(query, chunks, k=candidates)
+
+    fused = reciprocal_rank_fusion([vector_hits, keyword_hits], k=k)
+    found = chunks.select_related("file").in_bulk(
+        [chunk_id for chunk_id, _ in fused]
+    )
+    return [
+        (found[chunk_id], score)
+        for chunk_id, score in fused
+        if chunk_id in found
+    ]
@@ -0,0 +1,66 @@
+"""
+Tarefas em segundo plano do app rag.
+
+Registradas na fila do app jobs (ver jobs.queue.task) e executadas
+pelos workers do comando run_workers.
+"""
+from jobs.models import Job
+from jobs.queue import task
+from workspace.models import File
+
+from .answer_cache import bump_corpus_version, invalidate_files
+from .changes import CHANGES_TASK, apply_index_changes
+from .chunking import sync_chunks
+from .embeddings import embed_file
+from .extraction import EXTRACT_TASK, run_extraction
+from .models import Chunk, DocumentExtraction
+from .vector_index import index_chunks, update_file_facets
+
+EXTRACT_TIMEOUT = 10 * 60
+
+
+@task(
+    EXTRACT_TASK,
+    priority=Job.PRIORITY_INTERACTIVE,
+    timeout=EXTRACT_TIMEOUT,
+)
+def extract_document(file_id):
+    """
+    Extrai o texto de um arquivo enviado, o divide em chunks, gera os
+    embeddings que faltam e anexa os chunks novos ao índice vetorial
+    (ver run_extraction, sync_chunks, embed_file e index_chunks). Os
+    chunks de uma versão anterior do arquivo ficam marcados como
+    removidos nas facetas do índice (update_file_facets).
+
+    Com o arquivo pesquisável, a versão do acervo do dono é trocada e
+    as respostas em cache que citavam uma versão anterior do arquivo
+    são apagadas (ver rag.answer_cache).
+
+    Args:
+        file_id: ID do File
+    """
+    if run_extraction(file_id) == DocumentExtraction.STATUS_DONE:
+        sync_chunks(file_id)
+        embed_file(file_id)
+        index_chunks(Chunk.objects.filter(file_id=file_id))
+        update_file_facets([file_id])
+        invalidate_files([file_id])
+        bump_corpus_version(
+            File.objects.filter(pk=file_id).values_list(
+                "uploader_id", flat=True
+            )
+        )
+
+
+@task(
+    CHANGES_TASK,
+    priority=Job.PRIORITY_INTERACTIVE,
+    release_key=True,
+)
+def apply_changes():
+    """
+    Aplica aos índices as mudanças de metadados pendentes (renomear,
+    mover e excluir), sem reextrair nem recalcular embeddings (ver
+    rag.changes).
+    """
+    apply_index_changes()
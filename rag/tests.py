@@ -0,0 +1,1484 @@
+"""
+Testes do app rag.
+
+Cobrem a extração de texto de cada formato permitido (páginas geradas
+em streaming, com planilhas e textos longos divididos em blocos) e os
+estados da extração (pending, processing, done, failed). Os documentos
+de teste são montados em memória e gravados em um MEDIA_ROOT
+temporário por teste.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+from datetime import datetime
+from http import HTTPStatus
+from unittest import mock
+
+import numpy as np
+import pytest
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from redis.exceptions import RedisError
+
+from jobs.models import Job
+from jobs.queue import claim_jobs, run_job
+from workspace.blobs import store_uploaded_file
+from workspace.models import File, Folder
+
+from . import extraction as extraction_module
+from . import vector_index
+from .answer_cache import (
+    ANSWER_CACHE_ALIAS,
+    AnswerCache,
+    bump_corpus_version,
+    invalidate_files,
+    normalize_question,
+)
+from .changes import (
+    CHANGES_TASK,
+    apply_index_changes,
+    record_file_changes,
+    record_folder_change,
+)
+from .chunking import (
+    PAGE_SEPARATOR,
+    count_tokens,
+    iter_chunks,
+    sync_chunks,
+)
+from .embeddings import (
+    HashingEncoder,
+    HttpEncoder,
+    embed_file,
+    embed_texts,
+    encode_query,
+    get_encoder,
+    iter_batches,
+    load_vectors,
+    missing_embeddings,
+    normalize_rows,
+)
+from .extraction import (
+    EXTRACT_TASK,
+    enqueue_extractions,
+    iter_extracted_pages,
+    run_extraction,
+)
+from .extractors import UnsupportedFormatError, extract_pages
+from .facets import (
+    FACET_DTYPE,
+    FILE_TYPES,
+    STATE_LIVE,
+    STATE_REMOVED,
+    STATE_TRASHED,
+    TYPE_GROUPS,
+    FacetClause,
+    FacetFilter,
+    FilterTerm,
+    build_filter,
+    chunk_facets,
+    day_number,
+    file_type,
+    parse_filter,
+    scope_filter,
+)
+from .llm import HttpLLM, StubLLM
+from .models import Chunk, DocumentExtraction, IndexChange
+from .query import (
+    NO_CONTEXT_ANSWER,
+    StageTimer,
+    build_prompt,
+    cited_indexes,
+    iter_answer_events,
+)
+from .reranking import LexicalScorer, Reranker, get_reranker
+from .retrieval import (
+    hybrid_search,
+    keyword_search,
+    reciprocal_rank_fusion,
+    update_search_vectors,
+)
+from .vector_index import (
+    VectorIndex,
+    get_index,
+    index_chunks,
+    live_chunk_ids,
+    update_file_facets,
+)
+
+User = get_user_model()
+
+WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _pdf(texts):
+    """PDF mínimo com uma página por texto (fonte Helvetica)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream"
+            % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792]"
+            b" /Resources << /Font << /F1 3 0 R >> >>"
+            b" /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids), len(kids)
+    )
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return output.getvalue()
+
+
+def _docx(body):
+    """DOCX mínimo com o XML informado dentro de w:body."""
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            f'<w:document xmlns:w="{WORD_NS}"><w:body>{body}'
+            "</w:body></w:document>",
+        )
+    return output.getvalue()
+
+
+def _xlsx(sheets):
+    """Pasta de trabalho .xlsx com {nome: linhas}."""
+    from openpyxl import Workbook  # noqa: PLC0415
+
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets.items():
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def _biff(record_type, data=b""):
+    """Registro BIFF8."""
+    return struct.pack("<HH", record_type, len(data)) + data
+
+
+def _biff_text(text):
+    """String BIFF8 compactada (latin-1)."""
+    return b"\x00" + text.encode("latin-1")
+
+
+def _xls(sheets):
+    """Stream BIFF8 (sem contêiner OLE) com {nome: linhas de texto}."""
+    def bof(kind):
+        return _biff(
+            0x0809, struct.pack("<HHHHII", 0x0600, kind, 0, 0, 0, 6)
+        )
+
+    def boundsheets(offsets):
+        return b"".join(
+            _biff(
+                0x0085,
+                struct.pack("<IBBB", offset, 0, 0, len(name))
+                + _biff_text(name),
+            )
+            for offset, name in zip(offsets, sheets)
+        )
+
+    bodies = [
+        bof(0x0010)
+        + b"".join(
+            _biff(
+                0x0204,
+                struct.pack("<HHHH", row, column, 0, len(value))
+                + _biff_text(value),
+            )
+            for row, values in enumerate(rows)
+            for column, value in enumerate(values)
+        )
+        + _biff(0x000A)
+        for rows in sheets.values()
+    ]
+    offset = len(bof(0x0005) + boundsheets([0] * len(sheets))) + 4
+    offsets = []
+    for body in bodies:
+        offsets.append(offset)
+        offset += len(body)
+    return (
+        bof(0x0005) + boundsheets(offsets) + _biff(0x000A) + b"".join(bodies)
+    )
+
+
+class _FakeOle:
+    """
+    Substitui olefile.OleFileIO com os streams de um .doc cujo texto
+    fica em uma única peça compactada (cp1252).
+    """
+
+    def __init__(self, text):
+        fib = bytearray(0x01AA)
+        struct.pack_into("<H", fib, 0x0A, 0x0200)
+        plc = struct.pack("<ii", 0, len(text)) + struct.pack(
+            "<HIH", 0, (len(fib) * 2) | 0x40000000, 0
+        )
+        clx = b"\x02" + struct.pack("<I", len(plc)) + plc
+        struct.pack_into("<iI", fib, 0x01A2, 0, len(clx))
+        self.streams = {
+            "WordDocument": bytes(fib) + text.encode("cp1252"),
+            "1Table": clx,
+        }
+
+    def openstream(self, name):
+        return io.BytesIO(self.streams[name])
+
+    def close(self):
+        self.streams = {}
+
+
+class ExtractorTests(SimpleTestCase):
+    """Extratores de cada formato permitido."""
+
+    def setUp(self):
+        """Cria o diretório temporário dos documentos."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def extract(self, name, content):
+        """Grava um documento em disco e extrai suas páginas."""
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as document:
+            document.write(content)
+        with open(path, "rb") as document:
+            return list(extract_pages(document, name))
+
+    def test_txt_detects_encoding_and_splits_long_text(self):
+        """Textos longos viram blocos cortados em quebras de linha."""
+        content = "Ação\nlinha dois\nlinha três\n".encode("cp1252")
+        with mock.patch("rag.extractors.PAGE_CHARS", 12):
+            pages = self.extract("notas.txt", content)
+
+        assert pages == [
+            ("Parte 1", "Ação"),
+            ("Parte 2", "linha dois"),
+            ("Parte 3", "linha três"),
+        ]
+
+    def test_csv_detects_delimiter_and_splits_rows(self):
+        """Linhas do CSV são agrupadas em páginas de ROWS_PER_PAGE."""
+        content = b"nome;valor\nana;1\n;\nbia;2\n"
+        with mock.patch("rag.extractors.ROWS_PER_PAGE", 2):
+            pages = self.extract("dados.csv", content)
+
+        assert pages == [
+            ("CSV (linhas 1-2)", "nome | valor\nana | 1"),
+            ("CSV (linhas 4-4)", "bia | 2"),
+        ]
+
+    def test_pdf_yields_one_page_at_a_time(self):
+        """Cada página do PDF é uma página extraída."""
+        content = _pdf(["Primeira pagina", "Segunda"])
+        pages = self.extract("livro.pdf", content)
+
+        assert pages == [
+            ("Página 1", "Primeira pagina"),
+            ("Página 2", "Segunda"),
+        ]
+
+    def test_docx_reads_headings_tables_and_page_breaks(self):
+        """Títulos, linhas de tabela e quebras de página do DOCX."""
+        body = (
+            '<w:p><w:pPr><w:pStyle w:val="Heading2"/></w:pPr>'
+            "<w:r><w:t>Resumo</w:t></w:r></w:p>"
+            "<w:p><w:r><w:t>Texto</w:t>"
+            '<w:br w:type="page"/></w:r></w:p>'
+            "<w:tbl><w:tr>"
+            "<w:tc><w:p><w:r><w:t>a</w:t></w:r></w:p></w:tc>"
+            "<w:tc><w:p><w:r><w:t>b</w:t></w:r></w:p></w:tc>"
+            "</w:tr></w:tbl>"
+        )
+        pages = self.extract("relatorio.docx", _docx(body))
+
+        assert pages == [
+            ("Parte 1", "## Resumo\nTexto"),
+            ("Parte 2", "a | b"),
+        ]
+
+    def test_doc_reads_pieces_and_drops_field_codes(self):
+        """Texto das peças do .doc, sem as instruções de campos."""
+        text = "Título\rVer \x13 PAGEREF x \x14página 2\x15\x0cFim"
+        with mock.patch("olefile.OleFileIO", return_value=_FakeOle(text)):
+            pages = self.extract("antigo.doc", b"")
+
+        assert pages == [("Parte 1", "Título\nVer página 2\n\nFim")]
+
+    def test_xlsx_and_xlsm_split_each_sheet(self):
+        """Cada planilha é lida em blocos de ROWS_PER_PAGE linhas."""
+        content = _xlsx({
+            "Vendas": [["mês", "total"], [datetime(2024, 1, 31), 10.0],
+                       ["fev", 2.5]],
+            "Vazia": [],
+        })
+        with mock.patch("rag.extractors.ROWS_PER_PAGE", 2):
+            pages = self.extract("planilha.xlsx", content)
+
+        assert pages == [
+            ("Vendas (linhas 1-2)", "mês | total\n31/01/2024 | 10"),
+            ("Vendas (linhas 3-3)", "fev | 2.5"),
+        ]
+        assert self.extract("macro.xlsm", content) == [
+            ("Vendas (linhas 1-3)", "mês | total\n31/01/2024 | 10\nfev | 2.5"),
+        ]
+
+    def test_xls_loads_one_sheet_at_a_time(self):
+        """Planilhas do .xls são extraídas em sequência."""
+        content = _xls({"Plan1": [["a", "b"], ["c"]], "Plan2": [["d"]]})
+        pages = self.extract("antiga.xls", content)
+
+        assert pages == [
+            ("Plan1 (linhas 1-2)", "a | b\nc"),
+            ("Plan2 (linhas 1-1)", "d"),
+        ]
+
+    def test_unsupported_extension_raises(self):
+        """Extensões sem extrator são recusadas."""
+        with pytest.raises(UnsupportedFormatError, match=".png"):
+            self.extract("foto.png", b"")
+
+
+class ExtractionTestCase(TestCase):
+    """TestCase com MEDIA_ROOT e índice temporários e fila em banco."""
+
+    def setUp(self):
+        """Cria o MEDIA_ROOT temporário e o usuário."""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            RAG_INDEX_ROOT=os.path.join(self.media_root, "index"),
+            JOBS_BACKEND="database",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(vector_index._indexes.clear)
+        vector_index._indexes.clear()
+        self.user = User.objects.create(username="ana")
+
+    def create_file(self, name="notas.txt", content=b"Primeira linha\n"):
+        """Cria um File com extração pendente."""
+        blob = store_uploaded_file(SimpleUploadedFile(name, content))
+        file = File.objects.create(
+            name=name, file=blob.file.name, uploader=self.user, blob=blob
+        )
+        enqueue_extractions([file])
+        return file
+
+
+class ExtractionStatusTests(ExtractionTestCase):
+    """Estados de DocumentExtraction ao longo da extração."""
+
+    def test_enqueue_registers_pending_extraction_once(self):
+        """Extração pendente e tarefa únicas por arquivo."""
+        file = self.create_file()
+        enqueue_extractions([file])
+
+        extraction = DocumentExtraction.objects.get()
+        assert extraction.status == DocumentExtraction.STATUS_PENDING
+        assert Job.objects.get().key == f"{EXTRACT_TASK}:{file.pk}"
+
+    def test_run_goes_through_processing_to_done(self):
+        """A extração fica em processing enquanto o arquivo é lido."""
+        file = self.create_file()
+        statuses = []
+        write_pages = extraction_module._write_pages
+
+        def spy(*args):
+            statuses.append(DocumentExtraction.objects.get().status)
+            return write_pages(*args)
+
+        with mock.patch.object(extraction_module, "_write_pages", spy):
+            status = run_extraction(file.pk)
+
+        extraction = DocumentExtraction.objects.get()
+        assert statuses == [DocumentExtraction.STATUS_PROCESSING]
+        assert status == extraction.status == DocumentExtraction.STATUS_DONE
+        assert extraction.attempts == 1
+        assert extraction.bytes_read >= file.blob.size
+        assert list(iter_extracted_pages(extraction)) == [
+            {"page": 1, "label": "Parte 1", "text": "Primeira linha"}
+        ]
+
+    def test_same_content_reuses_extracted_text(self):
+        """Um arquivo com conteúdo já extraído não é lido de novo."""
+        first = self.create_file("a.txt")
+        second = self.create_file("b.txt")
+        run_extraction(first.pk)
+        run_extraction(second.pk)
+
+        extraction = DocumentExtraction.objects.get(file=second)
+        assert extraction.status == DocumentExtraction.STATUS_DONE
+        assert extraction.bytes_read == 0
+        assert extraction.page_count == 1
+
+    def test_corrupt_document_fails_without_retry(self):
+        """Documentos inválidos marcam a extração como failed."""
+        file = self.create_file("quebrado.docx", b"nao e um zip")
+
+        assert run_extraction(file.pk) == DocumentExtraction.STATUS_FAILED
+        extraction = DocumentExtraction.objects.get()
+        assert extraction.error.startswith("BadZipFile")
+        assert not default_storage.exists(
+            extraction_module.extracted_text_name(file.blob.sha256)
+        )
+
+    def test_storage_error_fails_and_is_raised_for_retry(self):
+        """Erros de storage são registrados e propagados à fila."""
+        file = self.create_file()
+        default_storage.delete(file.file.name)
+
+        with pytest.raises(FileNotFoundError):
+            run_extraction(file.pk)
+        extraction = DocumentExtraction.objects.get()
+        assert extraction.status == DocumentExtraction.STATUS_FAILED
+        assert extraction.finished_at is not None
+
+    def test_removed_file_is_ignored(self):
+        """Arquivos removidos definitivamente não têm extração."""
+        file = self.create_file()
+        file.delete()
+
+        assert run_extraction(file.pk) is None
+        assert not DocumentExtraction.objects.exists()
+
+
+def _page(number, text):
+    """Página no formato de iter_extracted_pages."""
+    return {"page": number, "label": f"Parte {number}", "text": text}
+
+
+def _rewrite_extracted(file, pages):
+    """Troca o texto extraído de um arquivo (como uma nova extração)."""
+    extraction = DocumentExtraction.objects.get(file=file)
+    with default_storage.open(extraction.output_name, "w") as output:
+        output.writelines(json.dumps(page) + "\n" for page in pages)
+
+
+class ChunkingTests(SimpleTestCase):
+    """Divisão das páginas extraídas em chunks."""
+
+    def setUp(self):
+        """Documento de duas páginas, a segunda com um título."""
+        self.pages = [
+            _page(1, "um dois tres\nquatro cinco seis\nsete oito nove"),
+            _page(2, "# Titulo\ndez onze doze\ntreze catorze quinze"),
+        ]
+        self.budget = 6
+        self.overlap = 3
+
+    def chunks(self, pages):
+        """Chunks das páginas com o orçamento do teste."""
+        return list(iter_chunks(pages, self.budget, self.overlap))
+
+    def test_budget_overlap_and_headings(self):
+        """Chunks respeitam o orçamento; títulos não recebem overlap."""
+        chunks = self.chunks(self.pages)
+
+        assert [chunk.text for chunk in chunks] == [
+            "um dois tres\nquatro cinco seis",
+            "quatro cinco seis\nsete oito nove",
+            "# Titulo\ndez onze doze",
+            "dez onze doze\ntreze catorze quinze",
+        ]
+        assert [chunk.heading for chunk in chunks] == [
+            "", "", "Titulo", "Titulo"
+        ]
+        assert [chunk.page_start for chunk in chunks] == [1, 1, 2, 2]
+
+    def test_offsets_point_into_the_document_text(self):
+        """char_start/char_end delimitam o chunk no documento."""
+        document = PAGE_SEPARATOR.join(page["text"] for page in self.pages)
+
+        for chunk in self.chunks(self.pages):
+            assert document[chunk.char_start:chunk.char_end] == chunk.text
+
+    def test_long_line_is_split_by_sentences(self):
+        """Uma linha acima do orçamento é dividida em frases."""
+        line = "Frase um dois tres quatro. Frase cinco seis sete oito. Nove"
+        chunks = self.chunks([_page(1, line)])
+
+        assert [chunk.text for chunk in chunks] == [
+            "Frase um dois tres quatro.",
+            "Frase cinco seis sete oito.",
+            "Nove",
+        ]
+        assert all(chunk.token_count <= self.budget for chunk in chunks)
+
+    def test_hash_identifies_the_text(self):
+        """O mesmo texto gera o mesmo content_hash."""
+        first = self.chunks(self.pages)
+        second = self.chunks(self.pages[1:])
+
+        assert first[-1].content_hash == second[-1].content_hash
+        assert first[-1].content_hash != first[-2].content_hash
+
+
+@override_settings(RAG_CHUNK_TOKENS=3, RAG_CHUNK_OVERLAP_TOKENS=0)
+class SyncChunksTests(ExtractionTestCase):
+    """Gravação incremental dos chunks de um arquivo."""
+
+    def test_only_changed_chunks_are_rewritten(self):
+        """Chunks iguais são mantidos; os que sobraram são apagados."""
+        file = self.create_file(
+            content=b"um dois tres\nquatro cinco seis\nsete"
+        )
+        run_extraction(file.pk)
+        assert sync_chunks(file.pk) == len(["um", "quatro", "sete"])
+        first = {chunk.ordinal: chunk.pk for chunk in Chunk.objects.all()}
+
+        _rewrite_extracted(file, [_page(1, "um dois tres\nquatro mudou")])
+        assert sync_chunks(file.pk) == 1
+
+        chunks = list(Chunk.objects.order_by("ordinal"))
+        assert [chunk.text for chunk in chunks] == [
+            "um dois tres", "quatro mudou"
+        ]
+        assert chunks[0].pk == first[0]
+        assert chunks[1].pk != first[1]
+        assert chunks[0].search_vector
+
+    def test_pending_extraction_has_no_chunks(self):
+        """Sem extração concluída não há o que dividir."""
+        file = self.create_file()
+
+        assert sync_chunks(file.pk) == 0
+        assert not Chunk.objects.exists()
+
+
+def _create_chunks(file, texts):
+    """Grava um Chunk por texto, como sync_chunks faria."""
+    return Chunk.objects.bulk_create([
+        Chunk(
+            file=file,
+            ordinal=ordinal,
+            text=text,
+            content_hash=hashlib.sha256(text.encode()).hexdigest(),
+            token_count=count_tokens(text),
+            page_start=1,
+            page_end=1,
+            char_start=0,
+            char_end=len(text),
+        )
+        for ordinal, text in enumerate(texts)
+    ])
+
+
+class _RecordingEncoder(HashingEncoder):
+    """HashingEncoder que registra o tamanho de cada lote codificado."""
+
+    def __init__(self, dimension=16):
+        super().__init__(dimension)
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(len(texts))
+        return super().encode(texts)
+
+
+class EncoderTests(SimpleTestCase):
+    """Encoders e divisão em lotes."""
+
+    def setUp(self):
+        """Encoder local pequeno e URL da API de embeddings."""
+        self.encoder = HashingEncoder(dimension=64)
+        self.url = "http://embeddings.test/v1/embeddings"
+
+    def test_hashing_encoder_is_normalized_and_deterministic(self):
+        """Vetores de norma 1; acentos e caixa não mudam o vetor."""
+        matrix = self.encoder.encode(["Ação rápida", "acao RAPIDA"])
+
+        assert matrix.dtype == np.float32
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+        assert np.array_equal(matrix[0], matrix[1])
+
+    def test_similar_texts_are_closer(self):
+        """Textos com vocabulário comum ficam mais próximos."""
+        query, near, far = self.encoder.encode([
+            "contrato de aluguel",
+            "aluguel do contrato vigente",
+            "relatorio financeiro anual",
+        ])
+
+        assert query @ near > query @ far
+
+    def test_batches_respect_count_and_memory(self):
+        """Lotes são limitados por quantidade e por bytes."""
+        items = [(str(index), "texto") for index in range(5)]
+        row_bytes = self.encoder.dimension * 4 * 2 + len("texto")
+
+        by_count = iter_batches(items, self.encoder.dimension, max_items=2)
+        by_memory = iter_batches(
+            items, self.encoder.dimension, max_items=10,
+            max_bytes=row_bytes * 3,
+        )
+        assert [len(batch) for batch in by_count] == [2, 2, 1]
+        assert [len(batch) for batch in by_memory] == [3, 2]
+
+    def test_http_encoder_orders_rows_by_index(self):
+        """A resposta da API é ordenada pelo índice de cada item."""
+        encoder = HttpEncoder(self.url, "modelo", 2, "chave")
+        response = mock.Mock()
+        response.json.return_value = {"data": [
+            {"index": 1, "embedding": [0.0, 2.0]},
+            {"index": 0, "embedding": [3.0, 0.0]},
+        ]}
+
+        with mock.patch.object(
+            encoder.session, "post", return_value=response
+        ) as post:
+            matrix = encoder.encode(["a", "b"])
+
+        assert matrix.tolist() == [[1.0, 0.0], [0.0, 1.0]]
+        assert post.call_args.args == (self.url,)
+        assert post.call_args.kwargs["json"] == {
+            "model": "modelo", "input": ["a", "b"]
+        }
+        assert encoder.session.headers["Authorization"] == "Bearer chave"
+
+    def test_http_backend_requires_url(self):
+        """O backend "http" sem URL é uma configuração inválida."""
+        get_encoder.cache_clear()
+        self.addCleanup(get_encoder.cache_clear)
+
+        with (
+            override_settings(RAG_EMBEDDING_BACKEND="http"),
+            pytest.raises(ImproperlyConfigured, match="RAG_EMBEDDING_URL"),
+        ):
+            get_encoder()
+
+
+class EmbeddingCacheTests(ExtractionTestCase):
+    """Cache de embeddings por hash do conteúdo."""
+
+    def setUp(self):
+        """Encoder que registra os lotes."""
+        super().setUp()
+        self.encoder = _RecordingEncoder()
+
+    def test_identical_texts_are_encoded_once(self):
+        """Hashes repetidos e já em cache não são codificados."""
+        items = [("h1", "um"), ("h2", "dois"), ("h1", "um")]
+
+        first = embed_texts(items, self.encoder)
+        second = embed_texts(items, self.encoder)
+
+        assert (first.encoded, first.cached) == (2, 1)
+        assert (second.encoded, second.cached) == (0, len(items))
+        assert self.encoder.batches == [2]
+        assert set(load_vectors(["h1", "h2"], self.encoder)) == {"h1", "h2"}
+
+    def test_embed_file_reads_pending_chunks_in_pages(self):
+        """embed_file lê os chunks do arquivo em lotes de batch_size."""
+        file = self.create_file()
+        other = self.create_file("outro.txt", b"outro")
+        chunks = _create_chunks(file, [f"trecho {n}" for n in range(5)])
+        _create_chunks(other, ["de outro arquivo"])
+        embed_texts([(chunks[0].content_hash, chunks[0].text)], self.encoder)
+
+        report = embed_file(file.pk, self.encoder, batch_size=2)
+
+        assert self.encoder.batches == [1, 2, 2]
+        assert (report.chunks, report.encoded) == (4, 4)
+        assert missing_embeddings(self.encoder).get().file_id == other.pk
+
+
+def _unit_rows(count, dimension, seed=0):
+    """Matriz float32 aleatória com linhas de norma 1."""
+    matrix = np.random.default_rng(seed).standard_normal(
+        (count, dimension)
+    ).astype(np.float32)
+    return normalize_rows(matrix)
+
+
+def _facets(uploaders, state=STATE_LIVE):
+    """Facetas com um arquivo por linha e o dono informado."""
+    facets = np.zeros(len(uploaders), dtype=FACET_DTYPE)
+    facets["file"] = np.arange(len(uploaders))
+    facets["uploader"] = uploaders
+    facets["state"] = state
+    return facets
+
+
+class VectorIndexTests(SimpleTestCase):
+    """Índice vetorial em segmentos memory-mapped."""
+
+    def setUp(self):
+        """Índice vazio em um diretório temporário."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.dimension = 16
+        self.vectors = _unit_rows(40, self.dimension)
+        self.ids = np.arange(100, 140, dtype=np.int64)
+        self.index = VectorIndex(self.directory, self.dimension)
+
+    def append_halves(self, index, uploaders=None):
+        """Anexa os vetores em dois segmentos."""
+        if uploaders is None:
+            uploaders = np.ones(len(self.ids), dtype=np.int64)
+        for rows in (slice(0, 20), slice(20, 40)):
+            index.append(
+                self.ids[rows], self.vectors[rows], _facets(uploaders[rows])
+            )
+
+    def test_exact_search_across_segments(self):
+        """Cada vetor é o vizinho mais próximo de si mesmo."""
+        self.append_halves(self.index)
+
+        results = self.index.search(self.vectors[[3, 25]], k=5)
+
+        assert self.index.rows == len(self.ids)
+        assert [hits[0][0] for hits in results] == [103, 125]
+        assert all(len(hits) == 5 for hits in results)  # noqa: PLR2004
+        scores = [score for _, score in results[0]]
+        assert scores == sorted(scores, reverse=True)
+        assert scores[0] == pytest.approx(1.0)
+
+    def test_filters_are_applied_before_scoring(self):
+        """O top-k vem inteiro das linhas permitidas pelo filtro."""
+        uploaders = np.where(np.arange(len(self.ids)) % 2, 2, 1)
+        self.append_halves(self.index, uploaders)
+        only_second = FacetFilter((FacetClause.values("uploader", [2]),))
+
+        hits = self.index.search(self.vectors[0], k=10, filters=only_second)[0]
+        allowed = self.index.search(
+            self.vectors[0], k=10, allowed_ids=self.ids[:3]
+        )[0]
+
+        assert len(hits) == len(range(10))
+        assert all(chunk_id % 2 for chunk_id, _ in hits)
+        assert {chunk_id for chunk_id, _ in allowed} == {100, 101, 102}
+
+    def test_compact_drops_removed_rows_and_builds_ivf(self):
+        """compact junta os segmentos, descarta removidos e cria o IVF."""
+        self.append_halves(self.index)
+        self.index.append(
+            np.array([999]), self.vectors[:1], _facets([1], STATE_REMOVED)
+        )
+
+        with mock.patch.object(vector_index, "IVF_MIN_ROWS", 10):
+            kept = self.index.compact(live_ids=self.ids[1:])
+
+        assert kept == len(self.ids) - 1
+        assert len(self.index.segments) == 1
+        assert self.index.segments[0].centroids is not None
+        hits = self.index.search(self.vectors[7], k=1, nprobe=64)[0]
+        assert hits[0][0] == self.ids[7]
+
+    def test_int8_vectors_keep_the_ranking(self):
+        """Vetores quantizados em int8 mantêm o vizinho mais próximo."""
+        index = VectorIndex(
+            os.path.join(self.directory, "int8"),
+            self.dimension,
+            quantize_vectors=True,
+        )
+        self.append_halves(index)
+
+        hits = index.search(self.vectors[11], k=1)[0]
+        assert hits[0][0] == self.ids[11]
+        assert hits[0][1] == pytest.approx(1.0, abs=0.02)
+
+
+class IndexChunksTests(ExtractionTestCase):
+    """Inclusão dos chunks com embedding no índice vetorial."""
+
+    def test_indexes_embedded_chunks_once(self):
+        """Só chunks com embedding entram, e uma única vez."""
+        file = self.create_file()
+        chunks = _create_chunks(file, ["contrato de aluguel", "sem vetor"])
+        embed_texts([(chunks[0].content_hash, chunks[0].text)])
+
+        assert index_chunks(Chunk.objects.all()) == 1
+        assert index_chunks(Chunk.objects.all()) == 0
+        assert list(
+            Chunk.objects.filter(indexed_at__isnull=False)
+            .values_list("pk", flat=True)
+        ) == [chunks[0].pk]
+
+        hits = get_index().search(
+            encode_query("aluguel"), k=5, allowed_ids=live_chunk_ids(self.user)
+        )[0]
+        assert [chunk_id for chunk_id, _ in hits] == [chunks[0].pk]
+        assert not len(live_chunk_ids(User.objects.create(username="bia")))
+
+
+def _index_texts(file, texts, headings=()):
+    """Grava, codifica e indexa chunks, como o pipeline de ingestão."""
+    chunks = _create_chunks(file, texts)
+    for chunk, heading in zip(chunks, headings):
+        chunk.heading = heading
+        chunk.save(update_fields=["heading"])
+    update_search_vectors([chunk.pk for chunk in chunks])
+    embed_texts([(chunk.content_hash, chunk.text) for chunk in chunks])
+    index_chunks(Chunk.objects.filter(file=file))
+    return chunks
+
+
+class KeywordSearchTests(ExtractionTestCase):
+    """Busca por palavras-chave e busca híbrida."""
+
+    def setUp(self):
+        """Arquivo com três chunks indexados."""
+        super().setUp()
+        self.file = self.create_file("contratos.txt")
+        self.chunks = _index_texts(
+            self.file,
+            [
+                "Os contratos de locação vencem em março.",
+                "Cláusulas gerais",
+                "Relatório financeiro anual da secretaria.",
+            ],
+            headings=["", "Contrato de locação", ""],
+        )
+
+    def test_stems_words_and_weights_headings(self):
+        """A busca usa o radical em português; o título pesa mais."""
+        hits = keyword_search("contrato locação")
+
+        assert [chunk_id for chunk_id, _ in hits] == [
+            self.chunks[1].pk, self.chunks[0].pk
+        ]
+        assert keyword_search('"financeiro anual" -contrato') == [
+            (self.chunks[2].pk, mock.ANY)
+        ]
+
+    def test_hybrid_search_is_scoped_to_the_user(self):
+        """A busca híbrida só devolve chunks do dono fora da lixeira."""
+        other = User.objects.create(username="bia")
+        other_file = File.objects.create(
+            name="outro.txt", file=self.file.file.name, uploader=other,
+            blob=self.file.blob,
+        )
+        _index_texts(other_file, ["contrato de locação de outro usuário"])
+
+        results = hybrid_search(self.user, "contrato de locação", k=3)
+        assert {chunk.file_id for chunk, _ in results} == {self.file.pk}
+        assert results[0][0].pk in {self.chunks[0].pk, self.chunks[1].pk}
+
+        File.objects.filter(pk=self.file.pk).update(is_deleted=True)
+        assert hybrid_search(self.user, "contrato de locação") == []
+
+
+class FusionAndDateTests(SimpleTestCase):
+    """Reciprocal rank fusion e períodos dos filtros de data."""
+
+    def setUp(self):
+        """Dois rankings com um chunk em comum e datas inexistentes."""
+        self.rankings = [[(1, 0.9), (2, 0.8)], [(3, 5.0), (1, 4.0)]]
+        self.invalid_dates = ("uploaded:2024-13", "uploaded:2023-02-29")
+
+    def test_rrf_rewards_chunks_in_both_rankings(self):
+        """Um chunk bem colocado nos dois rankings sobe ao topo."""
+        fused = reciprocal_rank_fusion(self.rankings, k=3, rrf_k=60)
+
+        assert [chunk_id for chunk_id, _ in fused] == [1, 3, 2]
+        assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+    def test_date_periods(self):
+        """Ano, mês (com o último dia certo) e dia; datas inválidas."""
+        february = build_filter(None, "uploaded:2024-02").clauses[0]
+        first, last = february.ranges[0]
+
+        assert last - first == len(range(29)) - 1
+        assert build_filter(None, "data<2024").clauses[0].ranges[0][1] == (
+            day_number(datetime(2023, 12, 31).date())
+        )
+        for text in self.invalid_dates:
+            with pytest.raises(ValidationError, match="Data inválida"):
+                build_filter(None, text)
+
+
+def _events(body):
+    """Eventos (nome, dados) de um corpo text/event-stream."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        events.append((
+            name.removeprefix("event: "),
+            json.loads(data.removeprefix("data: ")),
+        ))
+    return events
+
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "answers": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "rag-tests-answers",
+    },
+}
+
+
+class PromptAndEventsTests(ExtractionTestCase):
+    """Montagem do prompt e eventos da resposta."""
+
+    def setUp(self):
+        """Três chunks de tamanhos conhecidos."""
+        super().setUp()
+        self.chunks = _create_chunks(self.create_file(), [
+            "O prazo de matrícula termina em março.",
+            "A secretaria atende de manhã.",
+            "Documento sem relação.",
+        ])
+        self.hits = [
+            (chunk, 1.0 / position)
+            for position, chunk in enumerate(self.chunks, start=1)
+        ]
+
+    def test_prompt_respects_the_context_budget(self):
+        """Os chunks entram em ordem até o orçamento; o primeiro sempre."""
+        budget = self.chunks[0].token_count + self.chunks[1].token_count
+
+        prompt = build_prompt("Qual o prazo?", self.hits, max_tokens=budget)
+        tiny = build_prompt("Qual o prazo?", self.hits, max_tokens=1)
+
+        assert [source.index for source in prompt.sources] == [1, 2]
+        assert "[2] (notas.txt, p. 1)" in prompt.messages[1]["content"]
+        assert [source.chunk for source in tiny.sources] == self.chunks[:1]
+
+    def test_events_stream_tokens_and_citations(self):
+        """sources, tokens e done com as fontes citadas e as etapas."""
+        prompt = build_prompt("Qual o prazo?", self.hits)
+        timer = StageTimer()
+        timer.add("retrieval", 1.0)
+
+        events = list(iter_answer_events(prompt, StubLLM(), timer))
+
+        names = [name for name, _ in events]
+        assert names[0] == "sources"
+        assert set(names[1:-1]) == {"token"}
+        assert names[-1] == "done"
+        answer = "".join(data["text"] for name, data in events[1:-1])
+        assert answer.startswith("O prazo de matrícula termina em março. [1]")
+        done = events[-1][1]
+        assert done["citations"] == [1, 2, 3]
+        assert {"retrieval", "first_token", "generation"} <= set(
+            done["timings"]
+        )
+
+    def test_without_sources_the_llm_is_not_called(self):
+        """Sem contexto a resposta é fixa e o LLM não é chamado."""
+        llm = mock.Mock()
+
+        events = list(iter_answer_events(build_prompt("?", []), llm))
+
+        assert events[1] == ("token", {"text": NO_CONTEXT_ANSWER})
+        llm.stream.assert_not_called()
+        sources = build_prompt("?", self.hits).sources
+        assert cited_indexes("[2] [9] [2]", sources) == [2]
+
+    def test_llm_errors_end_the_stream(self):
+        """Uma falha do LLM vira o evento "error" antes de "done"."""
+        llm = mock.Mock()
+        llm.stream.side_effect = requests.ConnectionError("recusada")
+
+        events = list(iter_answer_events(build_prompt("?", self.hits), llm))
+
+        assert [name for name, _ in events] == ["sources", "error", "done"]
+        assert "recusada" in events[1][1]["error"]
+
+
+class HttpLLMTests(SimpleTestCase):
+    """Leitura do streaming da API /chat/completions."""
+
+    def setUp(self):
+        """Cliente apontando para uma URL de teste."""
+        self.llm = HttpLLM("http://llm.test/v1/chat/completions", "modelo")
+
+    def test_yields_delta_contents_until_done(self):
+        """Os pedaços chegam na ordem e [DONE] encerra a leitura."""
+        response = mock.MagicMock()
+        response.__enter__.return_value = response
+        response.iter_lines.return_value = [
+            ": keep-alive",
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            'data: {"choices": [{"delta": {"content": "Olá"}}]}',
+            "",
+            'data: {"choices": [{"delta": {"content": " mundo"}}]}',
+            "data: [DONE]",
+            'data: {"choices": [{"delta": {"content": "ignorado"}}]}',
+        ]
+        prompt = mock.Mock(messages=[{"role": "user", "content": "oi"}])
+
+        with mock.patch.object(
+            self.llm.session, "post", return_value=response
+        ) as post:
+            pieces = list(self.llm.stream(prompt))
+
+        assert pieces == ["Olá", " mundo"]
+        assert post.call_args.kwargs["json"]["stream"] is True
+        response.iter_lines.assert_called_once_with(
+            chunk_size=None, decode_unicode=True
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, RAG_RERANKER="")
+class QueryViewTests(ExtractionTestCase):
+    """View /rag/query com a resposta em server-sent events."""
+
+    def setUp(self):
+        """Usuário autenticado com um arquivo indexado."""
+        super().setUp()
+        caches[ANSWER_CACHE_ALIAS].clear()
+        self.async_client.force_login(self.user)
+        self.url = reverse("rag_query")
+        self.chunks = _index_texts(
+            self.create_file("calendario.txt"),
+            ["O ano letivo começa em fevereiro."],
+        )
+
+    async def test_streams_sources_tokens_and_done(self):
+        """A resposta cita o chunk e traz as etapas no Server-Timing."""
+        response = await self.async_client.get(
+            self.url, {"q": "Quando começa o ano?"}
+        )
+
+        assert response.is_async
+        assert response["Content-Type"] == "text/event-stream"
+        assert response["X-Accel-Buffering"] == "no"
+        assert "retrieval;dur=" in response["Server-Timing"]
+        events = _events(b"".join([
+            chunk async for chunk in response.streaming_content
+        ]).decode())
+        assert events[0][0] == "sources"
+        assert events[0][1][0]["chunk_id"] == self.chunks[0].pk
+        assert events[-1][0] == "done"
+        assert events[-1][1]["citations"] == [1]
+
+    async def test_tokens_are_sent_as_the_llm_produces_them(self):
+        """Cada token sai antes de o LLM produzir o seguinte."""
+        produced = []
+
+        def stream(prompt):
+            for token in ["Em ", "fevereiro ", "[1]."]:
+                produced.append(token)
+                yield token
+
+        llm = mock.Mock(**{"stream.side_effect": stream})
+        with mock.patch("rag.views.get_llm", return_value=llm):
+            response = await self.async_client.get(
+                self.url, {"q": "Quando começa o ano?"}
+            )
+            chunks = aiter(response.streaming_content)
+            await anext(chunks)
+            first_token = await anext(chunks)
+            assert produced == ["Em "]
+            rest = [chunk async for chunk in chunks]
+
+        assert _events(first_token.decode()) == [("token", {"text": "Em "})]
+        assert produced == ["Em ", "fevereiro ", "[1]."]
+        assert _events(b"".join(rest).decode())[-1][0] == "done"
+
+    async def test_rejects_missing_question_and_bad_filters(self):
+        """Pergunta vazia e filtros inválidos respondem 400."""
+        missing = await self.async_client.get(self.url)
+        bad_filter = await self.async_client.post(
+            self.url,
+            {"q": "ano letivo", "filter": "tipo:exe"},
+            content_type="application/json",
+        )
+
+        assert missing.status_code == HTTPStatus.BAD_REQUEST
+        assert bad_filter.status_code == HTTPStatus.BAD_REQUEST
+        assert "exe" in bad_filter.json()["error"]
+
+
+@override_settings(CACHES=LOCMEM_CACHES, RAG_ANSWER_CACHE_THRESHOLD=0.5)
+class AnswerCacheTests(SimpleTestCase):
+    """Acertos exatos e semânticos e invalidação do cache de respostas."""
+
+    def setUp(self):
+        """Cache vazio e um usuário sem banco."""
+        caches[ANSWER_CACHE_ALIAS].clear()
+        self.user = mock.Mock(pk=1)
+        self.sources = [{"index": 1, "file_id": 7, "chunk_id": 70}]
+
+    def remember(self, question, answer="Começa em fevereiro. [1]"):
+        """Consulta o cache e grava a resposta de uma geração."""
+        cache = AnswerCache(self.user, question)
+        assert cache.lookup() is None
+        list(cache.remember([
+            ("sources", self.sources),
+            ("token", {"text": answer}),
+            ("done", {"citations": [1]}),
+        ]))
+
+    def lookup(self, question="calendário escolar 2026"):
+        """Procura a pergunta no escopo do usuário."""
+        return AnswerCache(self.user, question).lookup()
+
+    def test_questions_are_normalized_for_the_exact_key(self):
+        """Acentos, maiúsculas e pontuação não mudam a chave."""
+        self.remember("Calendário escolar 2026?")
+
+        cached = AnswerCache(self.user, "calendario  ESCOLAR 2026").lookup()
+
+        assert normalize_question("Calendário, escolar!") == (
+            "calendario escolar"
+        )
+        assert cached.answer == "Começa em fevereiro. [1]"
+        assert cached.similarity == 1.0
+        assert cached.sources == self.sources
+
+    def test_similar_questions_hit_within_the_scope(self):
+        """Perguntas parecidas reaproveitam; outro escopo não."""
+        self.remember("calendário escolar 2026")
+
+        similar = AnswerCache(
+            self.user, "qual o calendário escolar de 2026"
+        ).lookup()
+        other_user = AnswerCache(
+            mock.Mock(pk=2), "calendário escolar 2026"
+        ).lookup()
+        unrelated = AnswerCache(self.user, "cardápio da cantina").lookup()
+
+        assert similar.citations == [1]
+        assert 0.5 <= similar.similarity < 1.0  # noqa: PLR2004
+        assert other_user is None
+        assert unrelated is None
+
+    def test_version_bump_and_file_invalidation(self):
+        """Trocar a versão ou apagar um arquivo citado esvazia o cache."""
+        self.remember("calendário escolar 2026")
+        bump_corpus_version([self.user.pk])
+        assert self.lookup() is None
+
+        self.remember("calendário escolar 2026")
+        invalidate_files([self.sources[0]["file_id"]])
+        assert self.lookup() is None
+
+    def test_failed_generations_are_not_stored(self):
+        """Respostas com erro não são gravadas."""
+        cache = AnswerCache(self.user, "calendário escolar 2026")
+        cache.lookup()
+        list(cache.remember([
+            ("sources", self.sources),
+            ("error", {"error": "falhou"}),
+            ("done", {"citations": []}),
+        ]))
+
+        assert self.lookup() is None
+
+    def test_redis_errors_are_treated_as_a_miss(self):
+        """Uma falha do Redis vira ausência de cache, sem exceção."""
+        cache = AnswerCache(self.user, "calendário escolar 2026")
+
+        with (
+            mock.patch.object(cache.cache, "get", side_effect=RedisError),
+            self.assertLogs("rag.answer_cache", level="WARNING"),
+        ):
+            assert cache.lookup() is None
+        assert cache.scope is None
+
+
+class _ClockScorer:
+    """Scorer que avança um relógio falso 10 ms por candidato."""
+
+    name = "relogio"
+
+    def __init__(self):
+        self.now = 0.0
+        self.batches = []
+
+    def perf_counter(self):
+        """Relógio usado no lugar de time.perf_counter."""
+        return self.now
+
+    def score(self, question, texts):
+        """Pontua pela posição inversa, para inverter a ordem."""
+        self.batches.append(len(texts))
+        self.now += 0.01 * len(texts)
+        return -np.arange(len(texts), dtype=np.float32) - len(self.batches)
+
+
+def _hits(texts):
+    """Candidatos (chunk, score) com chunks falsos."""
+    return [(mock.Mock(text=text), 0.0) for text in texts]
+
+
+class RerankingTests(SimpleTestCase):
+    """Lotes, orçamento de tempo e escolha do reranker."""
+
+    def setUp(self):
+        """Seis candidatos e um scorer com relógio falso."""
+        self.hits = _hits([f"candidato {number}" for number in range(6)])
+        self.scorer = _ClockScorer()
+        self.lexical = LexicalScorer()
+        patcher = mock.patch(
+            "rag.reranking.time.perf_counter", self.scorer.perf_counter
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_reranker.cache_clear()
+        self.addCleanup(get_reranker.cache_clear)
+
+    def test_batches_stop_when_the_budget_would_be_exceeded(self):
+        """O custo estimado do próximo lote é conferido antes dele."""
+        reranker = Reranker(self.scorer, batch_size=2, budget_ms=45)
+        timer = StageTimer()
+
+        reranked = reranker.rerank("pergunta", self.hits, timer)
+
+        assert self.scorer.batches == [2, 2]
+        assert reranked == [*self.hits[:4], *self.hits[4:]]
+        assert list(timer.stages) == ["rerank_batch_1", "rerank_batch_2"]
+        assert timer.details["rerank"] == {
+            "scorer": "relogio", "candidates": 6, "scored": 4,
+        }
+
+    def test_scored_candidates_come_first_in_score_order(self):
+        """Os pontuados são reordenados; os demais mantêm a ordem."""
+        hits = self.hits[:3]
+        scorer = mock.Mock(
+            name="fixo",
+            **{"score.return_value": np.array([0.1, 0.9, 0.5])},
+        )
+
+        reranked = Reranker(scorer, batch_size=len(hits)).rerank("?", hits)
+
+        assert reranked == [hits[1], hits[2], hits[0]]
+
+    def test_lexical_scorer_ignores_case_and_accents(self):
+        """Termos e bigramas da pergunta pontuam, sem acentos."""
+        scores = self.lexical.score(
+            "Matrícula de alunos",
+            [
+                "Calendário de provas.",
+                "A MATRICULA DE ALUNOS abre em março.",
+                "Alunos novos fazem a matrícula.",
+            ],
+        )
+
+        assert scores.argmax() == 1
+        assert scores[2] > scores[0]
+
+    def test_backend_setting(self):
+        """Vazio desativa; o cross-encoder sem biblioteca vira lexical."""
+        with override_settings(RAG_RERANKER=""):
+            assert get_reranker() is None
+        get_reranker.cache_clear()
+        with (
+            override_settings(RAG_RERANKER="cross-encoder"),
+            mock.patch.dict("sys.modules", {"sentence_transformers": None}),
+            self.assertLogs("rag.reranking", level="WARNING"),
+        ):
+            assert isinstance(get_reranker().scorer, LexicalScorer)
+        get_reranker.cache_clear()
+        with (
+            override_settings(RAG_RERANKER="gpt"),
+            pytest.raises(ImproperlyConfigured, match="RAG_RERANKER"),
+        ):
+            get_reranker()
+
+
+class FacetFilterTests(ExtractionTestCase):
+    """Filtros de metadados: sintaxe, resolução, facetas e busca."""
+
+    def setUp(self):
+        """Pasta com subpasta e dois arquivos indexados."""
+        super().setUp()
+        self.office = Folder.objects.create(
+            name="Secretaria 2025", owner=self.user
+        )
+        self.minutes = Folder.objects.create(
+            name="Atas", owner=self.user, parent=self.office
+        )
+        self.sheet = self.create_file("matriculas.xlsx")
+        File.objects.filter(pk=self.sheet.pk).update(folder=self.minutes)
+        self.text = self.create_file("matriculas.txt")
+        self.sheet_chunks = _index_texts(
+            self.sheet, ["Lista de matrículas do turno da manhã."]
+        )
+        self.text_chunks = _index_texts(
+            self.text, ["Prazo de matrículas do turno da tarde."]
+        )
+
+    def test_parse_filter_syntax(self):
+        """Campos em português, OU por vírgula, negação e aspas."""
+        terms = parse_filter(
+            f'tipo:planilha,pdf -pasta:"{self.office.name}"'
+        )
+
+        assert terms == [
+            FilterTerm("type", ":", ("planilha", "pdf")),
+            FilterTerm("folder", ":", (self.office.name,), negate=True),
+        ]
+        for text, message in [
+            ("tipo", "Filtro inválido"),
+            ("cor:azul", "Campo de filtro desconhecido"),
+            ("tipo>pdf", "Comparação"),
+            ('pasta:"Secretaria', "aspas"),
+        ]:
+            with pytest.raises(ValidationError, match=message):
+                parse_filter(text)
+
+    def test_build_filter_resolves_folders_uploaders_and_types(self):
+        """Pastas levam a subárvore; autores e tipos viram códigos."""
+        folder, uploader, kind = build_filter(
+            self.user, 'pasta:"secretaria 2025" autor:ana tipo:planilha'
+        ).clauses
+
+        assert folder.ranges == (
+            (self.office.pk, self.office.pk),
+            (self.minutes.pk, self.minutes.pk),
+        )
+        assert uploader.ranges == ((self.user.pk, self.user.pk),)
+        assert {low for low, _ in kind.ranges} == {
+            file_type(f"a{extension}")
+            for extension in TYPE_GROUPS["planilha"]
+        }
+        for text, message in [
+            ("pasta:Inexistente", "Pasta não encontrada"),
+            ("autor:bia", "Usuário não encontrado"),
+            ("tipo:exe", "Tipo de arquivo desconhecido"),
+        ]:
+            with pytest.raises(ValidationError, match=message):
+                build_filter(self.user, text)
+
+    def test_chunk_facets_follow_the_database(self):
+        """Facetas lidas do banco e regravadas no índice no lugar."""
+        chunk = self.sheet_chunks[0]
+        facets = chunk_facets([chunk.pk, 0])
+
+        assert facets["folder"].tolist() == [self.minutes.pk, 0]
+        assert facets["type"][0] == FILE_TYPES.index(".xlsx")
+        assert facets["state"].tolist() == [STATE_LIVE, STATE_REMOVED]
+
+        File.objects.filter(pk=self.sheet.pk).update(is_deleted=True)
+        self.text_chunks[0].delete()
+        assert update_file_facets([self.sheet.pk, self.text.pk]) == len(
+            [self.sheet, self.text]
+        )
+        states = [
+            state
+            for segment in get_index().segments
+            for state in segment.facets["state"].tolist()
+        ]
+        assert sorted(states) == [STATE_TRASHED, STATE_REMOVED]
+        assert update_file_facets([self.sheet.pk]) == 0
+
+    def test_filters_restrict_the_hybrid_search(self):
+        """A busca filtrada só devolve chunks que atendem ao filtro."""
+        filters = build_filter(self.user, "tipo:planilha")
+        folder_filter = build_filter(self.user, "-pasta:Atas")
+
+        by_type = hybrid_search(self.user, "matrículas", filters=filters)
+        by_folder = hybrid_search(
+            self.user, "matrículas", filters=folder_filter
+        )
+
+        assert [chunk for chunk, _ in by_type] == self.sheet_chunks
+        assert [chunk for chunk, _ in by_folder] == self.text_chunks
+
+
+def _vector_search_ids(query, filters):
+    """IDs achados só pelo índice vetorial, com o filtro."""
+    hits = get_index().search(encode_query(query), k=5, filters=filters)
+    return {chunk_id for chunk_id, _ in hits[0]}
+
+
+class ChangeFeedTests(ExtractionTestCase):
+    """Feed de mudanças de metadados aplicado ao índice vetorial."""
+
+    def setUp(self):
+        """Arquivo em uma pasta e arquivo na raiz, indexados."""
+        super().setUp()
+        self.folder = Folder.objects.create(name="Atas", owner=self.user)
+        self.target = Folder.objects.create(name="Outra", owner=self.user)
+        self.nested = self.create_file("ata.txt")
+        File.objects.filter(pk=self.nested.pk).update(folder=self.folder)
+        self.loose = self.create_file("avulso.txt")
+        self.nested_chunks = _index_texts(self.nested, ["Ata da reunião."])
+        self.loose_chunks = _index_texts(self.loose, ["Ata avulsa."])
+
+    def test_changes_enqueue_a_single_task(self):
+        """Mudanças seguidas dividem uma única tarefa ativa."""
+        with self.captureOnCommitCallbacks(execute=True):
+            record_file_changes([self.loose.pk], IndexChange.ACTION_RENAME)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_folder_change(self.folder, IndexChange.ACTION_MOVE)
+
+        assert IndexChange.objects.count() == len([self.loose, self.folder])
+        job = Job.objects.get(task=CHANGES_TASK)
+        assert job.key == CHANGES_TASK
+
+    def test_change_during_a_run_enqueues_the_next_run(self):
+        """Uma mudança após a última leitura da execução não se perde."""
+        Job.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            record_file_changes([self.loose.pk], IndexChange.ACTION_RENAME)
+        running = claim_jobs("teste:1", limit=1)[0]
+
+        def apply_then_change():
+            applied = apply_index_changes()
+            with self.captureOnCommitCallbacks(execute=True):
+                record_file_changes(
+                    [self.nested.pk], IndexChange.ACTION_MOVE
+                )
+            return applied
+
+        with mock.patch("rag.tasks.apply_index_changes", apply_then_change):
+            assert run_job(running)
+
+        assert IndexChange.objects.get().object_id == self.nested.pk
+        assert run_job(claim_jobs("teste:1", limit=1)[0])
+        assert not IndexChange.objects.exists()
+
+    def test_apply_rewrites_facets_of_moved_and_deleted_items(self):
+        """Arquivo movido e subárvore excluída chegam às facetas."""
+        File.objects.filter(pk=self.loose.pk).update(folder=self.target)
+        record_file_changes([self.loose.pk], IndexChange.ACTION_MOVE)
+        Folder.objects.filter(pk=self.folder.pk).update(is_deleted=True)
+        File.objects.filter(pk=self.nested.pk).update(is_deleted=True)
+        record_folder_change(self.folder, IndexChange.ACTION_DELETE)
+
+        assert apply_index_changes(batch_size=1) == len(
+            [self.loose, self.folder]
+        )
+        assert not IndexChange.objects.exists()
+        loose_ids = {chunk.pk for chunk in self.loose_chunks}
+        assert _vector_search_ids("ata", scope_filter(self.user)) == loose_ids
+        assert _vector_search_ids("ata", FacetFilter((
+            FacetClause.values("folder", [self.target.pk]),
+        ))) == loose_ids
@@ -0,0 +1,16 @@
+"""
+Configuração de URLs do app rag.
+
+Este módulo define as rotas de consulta aos documentos indexados.
+"""
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path(
+        route="query",
+        view=views.query,
+        name="rag_query"
+    ),
+]
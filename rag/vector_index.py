@@ -0,0 +1,810 @@
+"""
+Índice vetorial em processo, sem banco vetorial externo.
+
+Os vetores dos chunks ficam em segmentos no disco (RAG_INDEX_ROOT, ao
+lado do MEDIA_ROOT), lidos com memória mapeada (np.memmap):
+- Cada segmento guarda os vetores (float32 ou int8 quantizado por
+  linha), os IDs dos chunks e, se for grande, um índice IVF
+- Uploads novos viram segmentos pequenos anexados ao manifesto, sem
+  reconstruir o índice; compact() junta os segmentos, descarta chunks
+  que não existem mais e constrói o IVF quando vale a pena
+- A busca é exata (produto interno em blocos, top-k com
+  argpartition) em segmentos pequenos e aproximada (IVF: só as nprobe
+  listas mais próximas são lidas) nos grandes
+
+Cada segmento guarda também as facetas de cada linha (arquivo, pasta,
+dono, dia do envio, tipo e estado; ver rag.facets), em um arquivo
+à parte que é atualizado no lugar quando os metadados do arquivo mudam
+(update_file_facets), sem reescrever vetores. Os filtros (dono,
+subárvore de pasta, lixeira e os filtros de metadados da consulta)
+viram um bitmap por segmento antes da busca: só as linhas permitidas
+são pontuadas, então o top-k nunca precisa ser completado por
+pós-filtragem. Com um filtro estreito, os segmentos com IVF também são
+lidos de forma exata, o que é mais rápido e não perde resultados fora
+das listas sondadas.
+
+Os vetores são normalizados, então o produto interno é a similaridade
+de cosseno.
+"""
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from workspace.models import File
+
+from .embeddings import get_encoder, load_vectors
+from .facets import (
+    FACET_DTYPE,
+    STATE_REMOVED,
+    FacetClause,
+    FacetPostings,
+    chunk_facets,
+)
+from .models import Chunk
+
+MANIFEST_NAME = "manifest.json"
+
+LOCK_NAME = ".lock"
+
+SCORE_BLOCK_ROWS = 32_768
+
+IVF_MIN_ROWS = 50_000
+
+IVF_MAX_LISTS = 1024
+
+IVF_TRAIN_ROWS = 50_000
+
+IVF_ITERATIONS = 10
+
+DEFAULT_NPROBE = 8
+
+BITMAP_CACHE_SIZE = 16
+
+DIRECT_BITMAP_RANGES = 4
+
+# A coluna "file" de uma linha nunca muda: sua ordenação sobrevive às
+# atualizações de facetas
+STABLE_FACETS = {"file"}
+
+INDEX_BATCH_SIZE = 1000
+
+
+def index_root():
+    """Diretório base do índice (RAG_INDEX_ROOT)."""
+    return os.fspath(
+        getattr(
+            settings,
+            "RAG_INDEX_ROOT",
+            os.path.join(os.path.dirname(settings.MEDIA_ROOT), "index"),
+        )
+    )
+
+
+def _write_array(path, array):
+    """Grava um .npy de forma atômica (temporário + rename)."""
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix=".part"
+    )
+    with os.fdopen(fd, "wb") as output:
+        np.save(output, array)
+    os.replace(temp_path, path)
+
+
+def quantize(matrix):
+    """
+    Quantiza linhas float32 em int8 com uma escala por linha.
+
+    Returns:
+        tuple: (matriz int8, escalas float32)
+    """
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+    return (quantized, scales.astype(np.float32))
+
+
+def _kmeans(matrix, lists, seed=0):
+    """
+    K-means esférico (centroides normalizados) para o IVF.
+
+    Treina com uma amostra de até IVF_TRAIN_ROWS linhas.
+    """
+    rng = np.random.default_rng(seed)
+    sample = matrix
+    if len(matrix) > IVF_TRAIN_ROWS:
+        sample = matrix[rng.choice(len(matrix), IVF_TRAIN_ROWS, replace=False)]
+    sample = np.asarray(sample, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+
+    for _ in range(IVF_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for cluster in range(lists):
+            members = sample[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+    return centroids
+
+
+def _assign(matrix, centroids):
+    """Lista IVF de cada linha, calculada em blocos."""
+    assignment = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        block = np.asarray(
+            matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32
+        )
+        assignment[start:start + len(block)] = np.argmax(
+            block @ centroids.T, axis=1
+        )
+    return assignment
+
+
+class Segment:
+    """
+    Segmento imutável do índice, aberto com memória mapeada.
+    """
+
+    def __init__(self, directory, meta, dimension):
+        self.name = meta["name"]
+        self.rows = meta["rows"]
+        self.quantized = meta["dtype"] == "int8"
+        base = os.path.join(directory, self.name)
+
+        self.ids = np.load(f"{base}.ids.npy", mmap_mode="r")
+        self.vectors = np.memmap(
+            f"{base}.vectors",
+            dtype=np.int8 if self.quantized else np.float32,
+            mode="r",
+            shape=(self.rows, dimension),
+        )
+        self.scales = (
+            np.load(f"{base}.scales.npy", mmap_mode="r")
+            if self.quantized
+            else None
+        )
+        self.centroids = None
+        self.offsets = None
+        if meta.get("ivf"):
+            self.centroids = np.load(f"{base}.centroids.npy")
+            self.offsets = np.load(f"{base}.offsets.npy")
+
+        self.facets_path = f"{base}.facets"
+        self.facets = None
+        self.facets_version = None
+        self._postings = {}
+        self._bitmaps = {}
+        self.load_facets(meta)
+
+    def load_facets(self, meta):
+        """
+        (Re)abre as facetas na geração informada pelo manifesto.
+
+        Bitmaps e ordenações das colunas que podem mudar são
+        descartados; a da coluna "file" é mantida.
+        """
+        self.facets_version = meta.get("facets")
+        self.facets = None
+        if self.facets_version:
+            self.facets = np.memmap(
+                self.facets_path,
+                dtype=FACET_DTYPE,
+                mode="r",
+                shape=(self.rows,),
+            )
+        self._postings = {
+            column: postings
+            for column, postings in self._postings.items()
+            if column in STABLE_FACETS
+        }
+        self._bitmaps = {}
+
+    def postings(self, column):
+        """Coluna de facetas ordenada (calculada uma vez por carga)."""
+        if column not in self._postings:
+            self._postings[column] = FacetPostings(self.facets[column])
+        return self._postings[column]
+
+    def _compute_bitmap(self, column, ranges):
+        """
+        Até DIRECT_BITMAP_RANGES intervalos, compara a coluna
+        diretamente (uma passada vetorizada); com mais intervalos (as
+        pastas de uma subárvore, por exemplo), usa a coluna ordenada.
+        """
+        if len(ranges) > DIRECT_BITMAP_RANGES:
+            return self.postings(column).bitmap(ranges)
+        values = self.facets[column]
+        mask = np.zeros(self.rows, dtype=bool)
+        for low, high in ranges:
+            mask |= (values >= low) & (values <= high)
+        return mask
+
+    def bitmap(self, column, ranges):
+        """
+        Bitmap das linhas com a coluna nos intervalos informados.
+
+        Os BITMAP_CACHE_SIZE bitmaps mais recentes ficam em memória
+        (como o de dono e lixeira, repetido em toda consulta do
+        usuário) até as facetas serem recarregadas. O resultado não
+        deve ser alterado.
+        """
+        key = (column, ranges)
+        mask = self._bitmaps.pop(key, None)
+        if mask is None:
+            mask = self._compute_bitmap(column, ranges)
+            if len(self._bitmaps) >= BITMAP_CACHE_SIZE:
+                del self._bitmaps[next(iter(self._bitmaps))]
+        self._bitmaps[key] = mask
+        return mask
+
+    def bitset(self, allowed_ids):
+        """
+        Máscara booleana das linhas cujos chunks estão em allowed_ids.
+
+        Args:
+            allowed_ids: Array int64 ordenado, ou None (sem filtro)
+        """
+        if allowed_ids is None:
+            return None
+        if not len(allowed_ids):
+            return np.zeros(self.rows, dtype=bool)
+        positions = np.searchsorted(allowed_ids, self.ids)
+        positions[positions == len(allowed_ids)] = 0
+        return allowed_ids[positions] == self.ids
+
+    def score(self, rows, queries):
+        """
+        Similaridade das linhas informadas com cada consulta.
+
+        Returns:
+            np.ndarray: Matriz (len(rows), len(queries))
+        """
+        block = np.asarray(self.vectors[rows], dtype=np.float32)
+        scores = block @ queries.T
+        if self.quantized:
+            scores *= self.scales[rows][:, None]
+        return scores
+
+    def probes(self, mask, nprobe):
+        """
+        Se a consulta deve sondar as listas IVF (em vez de ler de forma
+        exata as linhas permitidas).
+
+        A leitura exata é escolhida quando o bitmap permite menos
+        linhas do que as nprobe listas teriam em média.
+        """
+        if self.centroids is None or not nprobe:
+            return False
+        if mask is None:
+            return True
+        expected = self.rows * nprobe / len(self.centroids)
+        return np.count_nonzero(mask) > expected
+
+    def candidate_rows(self, query, mask, nprobe):
+        """
+        Linhas a pontuar para uma consulta.
+
+        Com IVF, apenas as listas dos nprobe centroides mais próximos;
+        sem IVF, todas. O bitmap é aplicado antes da pontuação.
+        """
+        if self.centroids is not None and nprobe:
+            nearest = np.argsort(self.centroids @ query)[::-1][:nprobe]
+            rows = np.concatenate([
+                np.arange(self.offsets[cluster], self.offsets[cluster + 1])
+                for cluster in nearest
+            ])
+        else:
+            rows = np.arange(self.rows)
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return rows
+
+
+def _top_k(ids, scores, k):
+    """Os k maiores (id, score), em ordem decrescente de score."""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")
+    return (ids[order], scores[order])
+
+
+def _segment_facets(segment):
+    """
+    Facetas de um segmento; as de segmentos gravados antes das facetas
+    existirem são lidas do banco.
+    """
+    if segment.facets is not None:
+        return np.array(segment.facets)
+    return chunk_facets(segment.ids)
+
+
+@dataclass
+class _Candidates:
+    """Melhores resultados parciais de uma consulta."""
+    ids: np.ndarray
+    scores: np.ndarray
+
+    def merge(self, ids, scores, k):
+        self.ids, self.scores = _top_k(
+            np.concatenate([self.ids, ids]),
+            np.concatenate([self.scores, scores]),
+            k,
+        )
+
+
+class VectorIndex:
+    """
+    Conjunto de segmentos de um encoder, descrito por um manifesto.
+
+    Escritas (append, compact) são serializadas por um lock de
+    arquivo, de modo que vários workers possam anexar segmentos ao
+    mesmo índice.
+    """
+
+    def __init__(self, directory, dimension, quantize_vectors=False):
+        self.directory = directory
+        self.dimension = dimension
+        self.quantize_vectors = quantize_vectors
+        self._segments = []
+        self._manifest_mtime = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def manifest_path(self):
+        """Caminho do manifesto."""
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    @contextmanager
+    def _locked(self):
+        """Lock exclusivo do índice (entre processos)."""
+        lock_path = os.path.join(self.directory, LOCK_NAME)
+        with open(lock_path, "w", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_manifest(self):
+        """Conteúdo do manifesto (vazio se o índice é novo)."""
+        try:
+            with open(self.manifest_path, encoding="utf-8") as manifest:
+                return json.load(manifest)
+        except FileNotFoundError:
+            return {"next": 1, "segments": []}
+
+    def _write_manifest(self, manifest):
+        """Grava o manifesto de forma atômica."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as output:
+            json.dump(manifest, output)
+        os.replace(temp_path, self.manifest_path)
+
+    def _load_segment(self, meta):
+        """
+        Segmento descrito por meta, reaproveitando o já carregado com
+        o mesmo nome (segmentos são imutáveis; só as facetas mudam).
+        """
+        for segment in self._segments:
+            if segment.name == meta["name"]:
+                if segment.facets_version != meta.get("facets"):
+                    segment.load_facets(meta)
+                return segment
+        return Segment(self.directory, meta, self.dimension)
+
+    @property
+    def segments(self):
+        """
+        Segmentos atuais (recarregados se o manifesto mudou).
+
+        Segmentos sem facetas recebem as facetas na primeira carga
+        (backfill_facets).
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime != self._manifest_mtime:
+            manifest = self._read_manifest()
+            if not all(meta.get("facets") for meta in manifest["segments"]):
+                self.backfill_facets()
+                mtime = os.stat(self.manifest_path).st_mtime_ns
+                manifest = self._read_manifest()
+            self._segments = [
+                self._load_segment(meta) for meta in manifest["segments"]
+            ]
+            self._manifest_mtime = mtime
+        return self._segments
+
+    @property
+    def rows(self):
+        """Total de vetores em todos os segmentos."""
+        return sum(segment.rows for segment in self.segments)
+
+    def _write_segment(self, name, ids, matrix, facets, build_ivf):
+        """Grava os arquivos de um segmento e devolve seus metadados."""
+        base = os.path.join(self.directory, name)
+        meta = {
+            "name": name,
+            "rows": len(ids),
+            "dtype": "int8" if self.quantize_vectors else "float32",
+            "ivf": False,
+            "facets": 1,
+        }
+
+        if build_ivf:
+            lists = min(IVF_MAX_LISTS, max(1, int(np.sqrt(len(ids)))))
+            centroids = _kmeans(matrix, lists)
+            assignment = _assign(matrix, centroids)
+            order = np.argsort(assignment, kind="stable")
+            ids, matrix, facets = ids[order], matrix[order], facets[order]
+            offsets = np.searchsorted(
+                assignment[order], np.arange(lists + 1)
+            )
+            _write_array(f"{base}.centroids.npy", centroids)
+            _write_array(f"{base}.offsets.npy", offsets)
+            meta["ivf"] = True
+
+        if self.quantize_vectors:
+            matrix, scales = quantize(matrix)
+            _write_array(f"{base}.scales.npy", scales)
+        _write_array(f"{base}.ids.npy", ids.astype(np.int64))
+        np.ascontiguousarray(matrix).tofile(f"{base}.vectors")
+        np.ascontiguousarray(facets, dtype=FACET_DTYPE).tofile(
+            f"{base}.facets"
+        )
+        return meta
+
+    def append(self, ids, matrix, facets=None):
+        """
+        Anexa um segmento novo com os vetores informados.
+
+        Args:
+            ids: Array de IDs de chunk
+            matrix: Matriz float32 (len(ids), dimension), normalizada
+            facets: Facetas das linhas (padrão: lidas do banco, ver
+                rag.facets.chunk_facets)
+        """
+        if not len(ids):
+            return
+        if facets is None:
+            facets = chunk_facets(ids)
+        with self._locked():
+            manifest = self._read_manifest()
+            name = f"seg-{manifest['next']:06d}"
+            manifest["next"] += 1
+            manifest["segments"].append(self._write_segment(
+                name,
+                np.asarray(ids, dtype=np.int64),
+                np.asarray(matrix, dtype=np.float32),
+                np.asarray(facets, dtype=FACET_DTYPE),
+                build_ivf=False,
+            ))
+            self._write_manifest(manifest)
+
+    def compact(self, live_ids=None):
+        """
+        Junta todos os segmentos em um só.
+
+        Descarta chunks fora de live_ids ou marcados como removidos
+        nas facetas (chunks apagados ou substituídos) e constrói o IVF
+        se o resultado tiver pelo menos IVF_MIN_ROWS vetores.
+
+        Args:
+            live_ids: Array int64 ordenado de chunks existentes, ou
+                None para manter todos
+
+        Returns:
+            int: Vetores no segmento resultante
+        """
+        with self._locked():
+            manifest = self._read_manifest()
+            segments = [
+                Segment(self.directory, meta, self.dimension)
+                for meta in manifest["segments"]
+            ]
+            parts_ids = []
+            parts_vectors = []
+            parts_facets = []
+            for segment in segments:
+                facets = _segment_facets(segment)
+                mask = facets["state"] != STATE_REMOVED
+                if live_ids is not None:
+                    mask &= segment.bitset(live_ids)
+                rows = np.flatnonzero(mask)
+                vectors = np.asarray(
+                    segment.vectors[rows], dtype=np.float32
+                )
+                if segment.quantized:
+                    vectors *= segment.scales[rows][:, None]
+                parts_ids.append(np.asarray(segment.ids[rows]))
+                parts_vectors.append(vectors)
+                parts_facets.append(facets[rows])
+
+            ids = (
+                np.concatenate(parts_ids)
+                if parts_ids
+                else np.empty(0, dtype=np.int64)
+            )
+            name = f"seg-{manifest['next']:06d}"
+            manifest["next"] += 1
+            old_names = [meta["name"] for meta in manifest["segments"]]
+            manifest["segments"] = []
+            if len(ids):
+                manifest["segments"].append(self._write_segment(
+                    name,
+                    ids,
+                    np.concatenate(parts_vectors),
+                    np.concatenate(parts_facets),
+                    build_ivf=len(ids) >= IVF_MIN_ROWS,
+                ))
+            self._write_manifest(manifest)
+            self._remove_segment_files(old_names)
+        return len(ids)
+
+    def clear(self):
+        """Remove todos os segmentos do índice."""
+        with self._locked():
+            manifest = self._read_manifest()
+            old_names = [meta["name"] for meta in manifest["segments"]]
+            manifest["segments"] = []
+            self._write_manifest(manifest)
+            self._remove_segment_files(old_names)
+
+    def _remove_segment_files(self, names):
+        """Apaga os arquivos de segmentos que saíram do manifesto."""
+        for entry in os.listdir(self.directory):
+            if entry.split(".", 1)[0] in names:
+                os.remove(os.path.join(self.directory, entry))
+
+    def backfill_facets(self):
+        """
+        Grava as facetas dos segmentos que ainda não as têm (índices
+        criados antes das facetas), lendo-as do banco.
+
+        Returns:
+            int: Segmentos atualizados
+        """
+        with self._locked():
+            manifest = self._read_manifest()
+            missing = [
+                meta for meta in manifest["segments"]
+                if not meta.get("facets")
+            ]
+            for meta in missing:
+                segment = Segment(self.directory, meta, self.dimension)
+                chunk_facets(segment.ids).tofile(segment.facets_path)
+                meta["facets"] = 1
+            if missing:
+                self._write_manifest(manifest)
+        return len(missing)
+
+    def update_facets(self, file_ids):
+        """
+        Regrava, no lugar, as facetas das linhas dos arquivos
+        informados com os metadados atuais do banco.
+
+        Só as linhas desses arquivos são lidas e escritas, achadas pela
+        ordenação da coluna "file" dos segmentos já carregados; linhas
+        de chunks que não existem mais ficam com STATE_REMOVED. A
+        geração das facetas dos segmentos alterados é incrementada no
+        manifesto, para que os processos recarreguem só as facetas.
+
+        Args:
+            file_ids: IDs dos arquivos renomeados, movidos, excluídos
+                ou reprocessados
+
+        Returns:
+            int: Linhas alteradas
+        """
+        clause = FacetClause.values("file", file_ids)
+        loaded = {segment.name: segment for segment in self.segments}
+        changed = 0
+        with self._locked():
+            manifest = self._read_manifest()
+            for meta in manifest["segments"]:
+                if not meta.get("facets"):
+                    continue
+                segment = loaded.get(meta["name"]) or Segment(
+                    self.directory, meta, self.dimension
+                )
+                rows = segment.postings("file").rows(clause.ranges)
+                if not len(rows):
+                    continue
+                current = chunk_facets(segment.ids[rows])
+                different = current != segment.facets[rows]
+                if not different.any():
+                    continue
+                facets = np.memmap(
+                    segment.facets_path,
+                    dtype=FACET_DTYPE,
+                    mode="r+",
+                    shape=(segment.rows,),
+                )
+                facets[rows[different]] = current[different]
+                facets.flush()
+                meta["facets"] += 1
+                changed += int(np.count_nonzero(different))
+            if changed:
+                self._write_manifest(manifest)
+        return changed
+
+    def search(self, queries, k=10, allowed_ids=None, nprobe=None,
+               filters=None):
+        """
+        Busca os k vetores mais similares a cada consulta.
+
+        Args:
+            queries: Matriz float32 (n, dimension), normalizada
+            k: Resultados por consulta
+            allowed_ids: Array int64 ordenado de chunks permitidos
+                (bitset aplicado antes da busca), ou None
+            nprobe: Listas IVF lidas por consulta (padrão:
+                RAG_INDEX_NPROBE; 0 força busca exata)
+            filters: rag.facets.FacetFilter avaliado nas facetas de
+                cada segmento antes da busca (opcional)
+
+        Returns:
+            list: Para cada consulta, lista de (chunk_id, score)
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if nprobe is None:
+            nprobe = getattr(settings, "RAG_INDEX_NPROBE", DEFAULT_NPROBE)
+        candidates = [
+            _Candidates(np.empty(0, dtype=np.int64), np.empty(0))
+            for _ in queries
+        ]
+
+        for segment in self.segments:
+            mask = segment.bitset(allowed_ids)
+            if filters:
+                selected = filters.bitmap(segment)
+                mask = selected if mask is None else mask & selected
+            if mask is not None and not mask.any():
+                continue
+            if segment.probes(mask, nprobe):
+                for number, query in enumerate(queries):
+                    rows = segment.candidate_rows(query, mask, nprobe)
+                    scores = segment.score(rows, query[None, :])[:, 0]
+                    candidates[number].merge(segment.ids[rows], scores, k)
+                continue
+
+            rows = (
+                np.arange(segment.rows)
+                if mask is None
+                else np.flatnonzero(mask)
+            )
+            for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+                block = rows[start:start + SCORE_BLOCK_ROWS]
+                scores = segment.score(block, queries)
+                block_ids = segment.ids[block]
+                for number in range(len(queries)):
+                    candidates[number].merge(
+                        block_ids, scores[:, number], k
+                    )
+
+        return [
+            list(zip(item.ids.tolist(), item.scores.tolist()))
+            for item in candidates
+        ]
+
+
+_indexes = {}
+
+
+def get_index(encoder=None):
+    """
+    Índice do encoder atual (um objeto por processo).
+    """
+    encoder = encoder or get_encoder()
+    if encoder.name not in _indexes:
+        _indexes[encoder.name] = VectorIndex(
+            os.path.join(index_root(), encoder.name),
+            encoder.dimension,
+            quantize_vectors=getattr(settings, "RAG_INDEX_INT8", False),
+        )
+    return _indexes[encoder.name]
+
+
+def index_chunks(chunks, encoder=None):
+    """
+    Anexa ao índice os chunks que já têm embedding.
+
+    Args:
+        chunks: QuerySet de Chunk
+
+    Returns:
+        int: Chunks indexados
+    """
+    encoder = encoder or get_encoder()
+    index = get_index(encoder)
+    total = 0
+    last_pk = 0
+    pending = chunks.filter(indexed_at__isnull=True).order_by("pk")
+
+    while True:
+        rows = list(
+            pending.filter(pk__gt=last_pk).values_list(
+                "pk", "content_hash"
+            )[:INDEX_BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        vectors = load_vectors({content_hash for _, content_hash in rows})
+        ready = [(pk, vectors[h]) for pk, h in rows if h in vectors]
+        if not ready:
+            continue
+        index.append(
+            np.array([pk for pk, _ in ready], dtype=np.int64),
+            np.stack([vector for _, vector in ready]),
+        )
+        Chunk.objects.filter(pk__in=[pk for pk, _ in ready]).update(
+            indexed_at=timezone.now()
+        )
+        total += len(ready)
+    return total
+
+
+def update_file_facets(file_ids, encoder=None):
+    """
+    Atualiza as facetas dos arquivos no índice do encoder atual.
+
+    Chamado quando um arquivo é renomeado, movido, excluído ou
+    reprocessado (ver VectorIndex.update_facets).
+
+    Args:
+        file_ids: IDs dos arquivos alterados
+
+    Returns:
+        int: Linhas alteradas
+    """
+    file_ids = list(file_ids)
+    if not file_ids:
+        return 0
+    return get_index(encoder).update_facets(file_ids)
+
+
+def searchable_chunks(user=None, folder=None):
+    """
+    Chunks pesquisáveis: de arquivos fora da lixeira e, opcionalmente,
+    de um usuário e de uma subárvore de pasta.
+
+    Returns:
+        QuerySet: Chunks permitidos
+    """
+    files = File.objects.filter(is_deleted=False)
+    if user is not None:
+        files = files.filter(uploader=user)
+    if folder is not None:
+        files = files.filter(
+            Q(folder=folder) | Q(folder__path__startswith=folder.subtree_path)
+        )
+    return Chunk.objects.filter(file__in=files)
+
+
+def live_chunk_ids(user=None, folder=None):
+    """
+    IDs (ordenados) dos chunks pesquisáveis (ver searchable_chunks).
+
+    Returns:
+        np.ndarray: Array int64 ordenado
+    """
+    ids = np.fromiter(
+        searchable_chunks(user, folder)
+        .values_list("pk", flat=True)
+        .iterator(),
+        dtype=np.int64,
+    )
+    ids.sort()
+    return ids
@@ -0,0 +1,192 @@
+"""
+Views do app rag.
+
+Este módulo expõe a consulta aos documentos do workspace: a pergunta
+passa por busca, rerank opcional e montagem do prompt, e a resposta
+do LLM é transmitida como server-sent events (ver rag.query).
+
+A view é assíncrona: a busca e a montagem do prompt rodam em funções
+síncronas chamadas com sync_to_async, e a resposta é um gerador
+assíncrono que pede cada evento ao gerador síncrono da geração, de
+modo que cada token vai para o cliente assim que chega do LLM, sem
+prender um processo do servidor durante a geração.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+
+from workspace.models import Folder
+from workspace.uploads import extract_error_message
+
+from .answer_cache import AnswerCache, iter_cached_events
+from .facets import build_filter
+from .llm import get_llm
+from .query import (
+    MAX_TOP_K,
+    QueryOptions,
+    StageTimer,
+    format_sse,
+    iter_answer_events,
+    prepare_answer,
+)
+from .reranking import get_reranker
+
+
+def _query_params(request):
+    """
+    Parâmetros da consulta: query string (GET, compatível com
+    EventSource) ou corpo JSON (POST).
+    """
+    if request.method == "GET":
+        return request.GET
+    try:
+        data = json.loads(request.body or b"{}")
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _top_k(value):
+    """Converte o parâmetro k, limitado a MAX_TOP_K (None = padrão)."""
+    try:
+        return max(1, min(int(value), MAX_TOP_K))
+    except (TypeError, ValueError):
+        return None
+
+
+def _reranker(value):
+    """Reranker configurado, a menos que a consulta o dispense."""
+    if str(value).lower() in {"0", "false"}:
+        return None
+    return get_reranker()
+
+
+def _answer_events(user, question, params, folder, timer):
+    """
+    Parte síncrona da consulta: filtros, cache de respostas, busca e
+    montagem do prompt.
+
+    Args:
+        user: Usuário autenticado
+        question: Pergunta
+        params: Parâmetros da consulta ('filter', 'k' e 'rerank')
+        folder: Pasta que restringe a busca, ou None
+        timer: StageTimer da consulta
+
+    Returns:
+        generator: (evento, dados) da resposta em cache ou do LLM
+
+    Raises:
+        ValidationError: Se o filtro for inválido
+    """
+    filters = build_filter(user, str(params.get("filter") or ""))
+    answer_cache = AnswerCache(user, question, folder, filters)
+    with timer.stage("cache"):
+        cached = answer_cache.lookup()
+    if cached is not None:
+        return iter_cached_events(cached, timer)
+
+    prompt = prepare_answer(
+        user,
+        question,
+        QueryOptions(
+            folder=folder,
+            k=_top_k(params.get("k")),
+            reranker=_reranker(params.get("rerank")),
+            filters=filters,
+        ),
+        timer,
+    )
+    return answer_cache.remember(
+        iter_answer_events(prompt, get_llm(), timer)
+    )
+
+
+async def _stream_events(events):
+    """
+    Converte o gerador síncrono de eventos em server-sent events.
+
+    Cada evento é pedido com sync_to_async (a leitura do próximo token
+    do LLM bloqueia), sempre na mesma thread da requisição. O gerador é
+    fechado no fim ou quando o cliente desconecta, o que encerra a
+    conexão com o LLM.
+
+    Yields:
+        str: Evento formatado (ver rag.query.format_sse)
+    """
+    next_event = sync_to_async(next)
+    try:
+        while (item := await next_event(events, None)) is not None:
+            event, data = item
+            yield format_sse(event, data)
+    finally:
+        await sync_to_async(events.close)()
+
+
+@login_required(login_url="/")
+async def query(request):
+    """
+    View de perguntas sobre os documentos (server-sent events).
+
+    Recebe a pergunta em 'q', a pasta opcional em 'folder' (a busca
+    fica restrita à subárvore), filtros de metadados em 'filter'
+    (sintaxe em rag.facets, por exemplo "type:planilha
+    uploaded:2025"), a quantidade de chunks em 'k' e 'rerank=0' para
+    dispensar o reranker configurado. A
+    resposta é um text/event-stream com os eventos "sources", "token",
+    "error" e "done"; o cabeçalho Server-Timing traz a duração das
+    etapas anteriores à geração. Perguntas iguais ou parecidas com uma
+    já respondida são servidas pelo cache de respostas
+    (rag.answer_cache), sem busca nem geração.
+
+    Args:
+        request: Objeto HttpRequest do Django
+
+    Returns:
+        StreamingHttpResponse: Eventos da resposta
+        JsonResponse: Erro de validação
+    """
+    if request.method not in {"GET", "POST"}:
+        return JsonResponse({"error": "Método inválido."}, status=405)
+
+    user = await request.auser()
+    params = _query_params(request)
+    question = str(params.get("q") or "").strip()
+    if not question:
+        return JsonResponse(
+            {"error": "Informe a pergunta."},
+            status=400
+        )
+
+    folder = None
+    if params.get("folder"):
+        folder = await aget_object_or_404(
+            Folder,
+            id=params["folder"],
+            owner=user,
+            is_deleted=False,
+        )
+
+    timer = StageTimer()
+    try:
+        events = await sync_to_async(_answer_events)(
+            user, question, params, folder, timer
+        )
+    except ValidationError as e:
+        return JsonResponse(
+            {"error": extract_error_message(e)},
+            status=400
+        )
+
+    response = StreamingHttpResponse(
+        _stream_events(events),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    response["Server-Timing"] = timer.server_timing()
+    return response
@@ -6,6 +6,7 @@
  * - Seleção e arraste de itens (drag and drop)
  * - Renomear e deletar itens
  * - Navegação por drag and drop em breadcrumbs
+ * - Upload em partes retomável de arquivos e pastas
  *
  * Utiliza IIFE para evitar poluição do escopo global e aguarda
  * o carregamento completo do DOM antes de inicializar.
@@ -457,6 +458,361 @@
             });
         });
 
+        // ====================================================================
+        // UPLOAD EM PARTES (RETOMÁVEL)
+        // ====================================================================
+
+        // Endpoints do protocolo de upload em partes:
+        // criar sessão -> enviar partes (PUT) -> consultar status -> finalizar
+        const uploadEndpoint = configElement?.dataset.uploadEndpoint || '';
+        const uploadTreeEndpoint = (
+            configElement?.dataset.uploadTreeEndpoint || ''
+        );
+        const currentFolderId = configElement?.dataset.currentFolder || '';
+
+        const fileInput = document.getElementById("file_input");
+        const folderInput = document.getElementById("folder_input");
+        const uploadMenu = document.getElementById("upload_menu");
+        const progressBox = document.getElementById("upload_progress");
+        const progressText = document.getElementById("upload_progress_text");
+        const progressBar = document.getElementById("upload_progress_bar");
+
+        // Partes enviadas em paralelo por arquivo
+        const PARALLEL_CHUNKS = 4;
+        // Arquivos enviados em paralelo em um upload de pasta
+        const PARALLEL_FILES = 3;
+        // Tentativas por parte antes de desistir do arquivo
+        const MAX_CHUNK_RETRIES = 5;
+        // Prefixo das chaves no localStorage usadas para retomar uploads
+        const STORAGE_PREFIX = "workspace-upload:";
+
+        /**
+         * Aguarda o tempo informado (em milissegundos).
+         *
+         * @param {number} ms - Tempo de espera
+         */
+        function sleep(ms) {
+            return new Promise(resolve => setTimeout(resolve, ms));
+        }
+
+        /**
+         * Faz uma requisição e devolve o JSON, lançando erro se falhar.
+         *
+         * Erros 4xx são marcados como permanentes (não adianta repetir).
+         *
+         * @param {string} url - Endereço da requisição
+         * @param {object} options - Opções do fetch
+         */
+        async function requestJson(url, options = {}) {
+            const response = await fetch(url, options);
+            const data = await response.json().catch(() => ({}));
+            if (!response.ok) {
+                const error = new Error(
+                    data.error || "Erro inesperado no upload."
+                );
+                error.permanent = response.status < 500;
+                throw error;
+            }
+            return data;
+        }
+
+        /**
+         * Envia um objeto como JSON via POST com o token CSRF.
+         *
+         * @param {string} url - Endereço da requisição
+         * @param {object} payload - Dados a enviar
+         */
+        function postJson(url, payload) {
+            return requestJson(url, {
+                method: "POST",
+                headers: {
+                    "Content-Type": "application/json",
+                    "X-CSRFToken": csrfToken,
+                },
+                body: JSON.stringify(payload),
+            });
+        }
+
+        /**
+         * Atualiza o painel de progresso do upload.
+         *
+         * @param {string} text - Texto exibido
+         * @param {number} fraction - Progresso entre 0 e 1
+         */
+        function showProgress(text, fraction) {
+            if (!progressBox) return;
+            progressBox.classList.remove("hidden");
+            if (progressText) progressText.textContent = text;
+            if (progressBar) {
+                const percent = Math.round(Math.min(fraction, 1) * 100);
+                progressBar.style.width = `${percent}%`;
+            }
+        }
+
+        /**
+         * Abre uma sessão de upload, reaproveitando a sessão salva no
+         * localStorage quando o mesmo arquivo é enviado de novo (por
+         * exemplo após recarregar a página).
+         *
+         * @param {File} file - Arquivo selecionado
+         * @param {string} folderId - Pasta de destino
+         * @param {string} relativePath - Caminho relativo do arquivo
+         */
+        async function openSession(file, folderId, relativePath) {
+            const key = STORAGE_PREFIX + [
+                folderId,
+                relativePath || file.name,
+                file.size,
+                file.lastModified,
+            ].join("|");
+
+            const savedId = localStorage.getItem(key);
+            if (savedId) {
+                try {
+                    const status = await requestJson(
+                        `${uploadEndpoint}${savedId}/`
+                    );
+                    if (status.status === "active") {
+                        return { key, session: status };
+                    }
+                } catch (error) {
+                    // Sessão expirada ou removida: cria uma nova
+                }
+                localStorage.removeItem(key);
+            }
+
+            const session = await postJson(uploadEndpoint, {
+                name: file.name,
+                size: file.size,
+                folder: folderId || "",
+            });
+            localStorage.setItem(key, session.id);
+            return { key, session };
+        }
+
+        /**
+         * Envia uma parte do arquivo, repetindo com backoff exponencial
+         * em caso de falha de rede ou erro do servidor.
+         *
+         * @param {object} session - Sessão de upload
+         * @param {File} file - Arquivo sendo enviado
+         * @param {number} index - Número da parte
+         */
+        async function sendChunk(session, file, index) {
+            const start = index * session.chunk_size;
+            const end = Math.min(start + session.chunk_size, file.size);
+            const url = `${uploadEndpoint}${session.id}/chunks/${index}/`;
+
+            for (let attempt = 0; ; attempt++) {
+                try {
+                    await requestJson(url, {
+                        method: "PUT",
+                        headers: {
+                            "Content-Type": "application/octet-stream",
+                            "X-CSRFToken": csrfToken,
+                        },
+                        body: file.slice(start, end),
+                    });
+                    return end - start;
+                } catch (error) {
+                    if (error.permanent || attempt >= MAX_CHUNK_RETRIES) {
+                        throw error;
+                    }
+                }
+                await sleep(500 * 2 ** attempt);
+            }
+        }
+
+        /**
+         * Executa tarefas com no máximo `limit` delas em paralelo.
+         *
+         * @param {Array} items - Itens a processar
+         * @param {number} limit - Paralelismo máximo
+         * @param {Function} worker - Função assíncrona por item
+         */
+        async function runPool(items, limit, worker) {
+            const queue = items.slice();
+            const runners = [];
+            for (let i = 0; i < Math.min(limit, queue.length); i++) {
+                runners.push((async () => {
+                    while (queue.length) {
+                        await worker(queue.shift());
+                    }
+                })());
+            }
+            await Promise.all(runners);
+        }
+
+        /**
+         * Envia um arquivo completo: abre (ou retoma) a sessão, envia
+         * as partes que faltam em paralelo e finaliza a sessão.
+         *
+         * @param {File} file - Arquivo selecionado
+         * @param {string} folderId - Pasta de destino
+         * @param {string} relativePath - Caminho relativo do arquivo
+         * @param {Function} onBytes - Callback com bytes enviados
+         */
+        async function uploadFile(file, folderId, relativePath, onBytes) {
+            const { key, session } = await openSession(
+                file, folderId, relativePath
+            );
+
+            const received = new Set(session.received);
+            const pending = [];
+            for (let index = 0; index < session.total_chunks; index++) {
+                if (received.has(index)) {
+                    const start = index * session.chunk_size;
+                    onBytes(
+                        Math.min(session.chunk_size, file.size - start)
+                    );
+                } else {
+                    pending.push(index);
+                }
+            }
+
+            await runPool(pending, PARALLEL_CHUNKS, async index => {
+                onBytes(await sendChunk(session, file, index));
+            });
+
+            await postJson(`${uploadEndpoint}${session.id}/finalize/`, {});
+            localStorage.removeItem(key);
+        }
+
+        /**
+         * Envia uma lista de arquivos mostrando o progresso total e
+         * recarrega a página ao final.
+         *
+         * @param {Array} entries - Itens {file, folderId, path}
+         */
+        async function uploadEntries(entries) {
+            const totalBytes = entries.reduce(
+                (sum, entry) => sum + entry.file.size, 0
+            ) || 1;
+            let sentBytes = 0;
+            let doneFiles = 0;
+            const errors = [];
+
+            const refresh = () => showProgress(
+                `Enviando ${doneFiles} de ${entries.length} arquivo(s)...`,
+                sentBytes / totalBytes
+            );
+            refresh();
+
+            await runPool(entries, PARALLEL_FILES, async entry => {
+                try {
+                    await uploadFile(
+                        entry.file,
+                        entry.folderId,
+                        entry.path,
+                        bytes => {
+                            sentBytes += bytes;
+                            refresh();
+                        }
+                    );
+                } catch (error) {
+                    errors.push(`${entry.file.name}: ${error.message}`);
+                }
+                doneFiles += 1;
+                refresh();
+            });
+
+            if (errors.length) {
+                alert(errors.slice(0, 5).join("\n"));
+            }
+            window.location.reload();
+        }
+
+        /**
+         * Detecta o nome da pasta raiz a partir dos caminhos relativos.
+         *
+         * @param {Array} paths - Caminhos relativos dos arquivos
+         */
+        function detectFolderName(paths) {
+            const firstDirs = new Set();
+            paths.forEach(path => {
+                const parts = path.split("/");
+                if (parts.length > 1 && parts[0].trim()) {
+                    firstDirs.add(parts[0].trim());
+                }
+            });
+            if (firstDirs.size === 0) return "";
+            return paths[0].split("/")[0];
+        }
+
+        /**
+         * Cria (ou reaproveita após recarregar) a árvore de pastas de um
+         * upload de pasta e devolve a pasta de destino de cada arquivo.
+         *
+         * @param {Array} files - Arquivos selecionados
+         * @param {Array} paths - Caminhos relativos dos arquivos
+         */
+        async function prepareTree(files, paths) {
+            const folderName = detectFolderName(paths);
+            const totalSize = files.reduce((sum, f) => sum + f.size, 0);
+            const key = STORAGE_PREFIX + [
+                "tree",
+                currentFolderId,
+                folderName,
+                files.length,
+                totalSize,
+            ].join("|");
+
+            const saved = localStorage.getItem(key);
+            if (saved) {
+                return { key, tree: JSON.parse(saved) };
+            }
+
+            const tree = await postJson(uploadTreeEndpoint, {
+                folder: currentFolderId,
+                folder_name: folderName,
+                paths: paths,
+            });
+            localStorage.setItem(key, JSON.stringify(tree));
+            return { key, tree };
+        }
+
+        // Upload de arquivos avulsos
+        if (fileInput && uploadEndpoint) {
+            fileInput.addEventListener("change", () => {
+                const files = Array.from(fileInput.files || []);
+                if (!files.length) return;
+                if (uploadMenu) uploadMenu.classList.add("hidden");
+
+                uploadEntries(files.map(file => ({
+                    file,
+                    folderId: currentFolderId,
+                    path: file.name,
+                })));
+            });
+        }
+
+        // Upload de pastas inteiras
+        if (folderInput && uploadEndpoint && uploadTreeEndpoint) {
+            folderInput.addEventListener("change", async () => {
+                const files = Array.from(folderInput.files || []);
+                if (!files.length) return;
+                if (uploadMenu) uploadMenu.classList.add("hidden");
+
+                // webkitRelativePath contém o caminho completo do arquivo
+                const paths = files.map(
+                    file => file.webkitRelativePath || file.name
+                );
+
+                try {
+                    showProgress("Criando pastas...", 0);
+                    const { key, tree } = await prepareTree(files, paths);
+                    await uploadEntries(files.map((file, i) => ({
+                        file,
+                        folderId: String(tree.targets[i]),
+                        path: paths[i],
+                    })));
+                    localStorage.removeItem(key);
+                } catch (error) {
+                    alert(error.message);
+                    window.location.reload();
+                }
+            });
+        }
 
     });
 })();
@@ -0,0 +1,424 @@
+"""
+Armazenamento deduplicado por conteúdo do app workspace.
+
+Cada conteúdo distinto é gravado uma única vez em blobs/, no caminho
+derivado do seu SHA-256 (ver blob_upload_to). Os registros File
+apontam para um Blob compartilhado e o Blob guarda quantos File o
+referenciam (ref_count):
+- Um upload cujo hash já existe não grava nenhum byte no storage
+- Mover ou renomear um File não toca no arquivo físico
+- O blob e o arquivo físico só são apagados quando o último File que
+  o referencia é removido definitivamente (purge_files), junto com os
+  arquivos derivados do conteúdo (texto extraído)
+
+O hash dos uploads multipart é calculado pelo HashingUploadHandler
+enquanto o corpo é lido; para os demais arquivos ele é calculado aqui,
+lendo o conteúdo em blocos.
+
+O conteúdo de um blob novo é gravado antes do commit da linha. Se a
+transação do blob falhar, os arquivos gravados são apagados na hora;
+se quem a desfaz é uma transação externa (ou o processo morre), o
+arquivo fica sem linha e é removido depois por sweep_orphan_blobs,
+executada junto com a limpeza da lixeira.
+"""
+import hashlib
+import itertools
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Blob, File, blob_upload_to
+
+HASH_BLOCK_BYTES = 1024 * 1024
+
+BLOB_ROOT = "blobs"
+
+# Idade mínima de um arquivo sem Blob para ser considerado órfão (uma
+# transação ainda aberta pode estar criando a linha)
+ORPHAN_BLOB_GRACE = timedelta(days=1)
+
+SWEEP_BATCH_SIZE = 1000
+
+
+def extracted_text_name(digest):
+    """
+    Caminho do texto extraído (JSON Lines) de um conteúdo.
+
+    Args:
+        digest: SHA-256 do conteúdo
+
+    Returns:
+        str: Caminho relativo ao MEDIA_ROOT
+    """
+    return os.path.join(
+        "extracted", digest[:2], digest[2:4], f"{digest}.jsonl"
+    )
+
+
+def content_sha256(uploaded_file):
+    """
+    Retorna o SHA-256 de um arquivo enviado.
+
+    Usa o hash calculado durante o upload quando disponível e, caso
+    contrário, lê o arquivo em blocos.
+
+    Args:
+        uploaded_file: Arquivo enviado pelo usuário
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    digest = getattr(uploaded_file, "sha256", None)
+    if digest:
+        return digest
+
+    hasher = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        hasher.update(chunk)
+    uploaded_file.sha256 = hasher.hexdigest()
+    return uploaded_file.sha256
+
+
+def storage_sha256(storage_name):
+    """
+    Calcula o SHA-256 de um arquivo já gravado no storage.
+
+    Args:
+        storage_name: Caminho relativo ao MEDIA_ROOT
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    hasher = hashlib.sha256()
+    with default_storage.open(storage_name, "rb") as stored:
+        for chunk in iter(lambda: stored.read(HASH_BLOCK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _adjust_ref_counts(deltas):
+    """
+    Soma deltas ({blob_id: n}) aos contadores com um único UPDATE.
+    """
+    if not deltas:
+        return
+    Blob.objects.filter(pk__in=deltas).update(
+        ref_count=F("ref_count") + Case(
+            *[
+                When(pk=blob_id, then=Value(delta))
+                for blob_id, delta in deltas.items()
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def _lock_blobs(digests):
+    """
+    Bloqueia e retorna os blobs existentes para os hashes informados.
+    """
+    return {
+        blob.sha256: blob
+        for blob in Blob.objects.select_for_update().filter(
+            sha256__in=digests
+        ).order_by("pk")
+    }
+
+
+def _acquire(sources, writes_content=True):
+    """
+    Obtém (criando se preciso) os blobs de uma lista de conteúdos e
+    incrementa a referência de cada um.
+
+    Args:
+        sources: Lista de (sha256, size, filename, save), onde save
+            recebe o caminho desejado, grava o conteúdo e retorna o
+            caminho final no storage
+        writes_content: False se save apenas reserva o caminho (o
+            conteúdo é movido pelo chamador após o commit); nesse caso
+            não há arquivo a apagar se a transação falhar
+
+    Returns:
+        list: Blob de cada item, na mesma ordem de sources
+    """
+    written = []
+    try:
+        blobs = _acquire_in_transaction(sources, written)
+    except BaseException:
+        # As linhas dos blobs novos não foram gravadas
+        if writes_content:
+            _delete_from_storage(written)
+        raise
+    return [blobs[digest] for digest, _, _, _ in sources]
+
+
+def _acquire_in_transaction(sources, written):
+    """
+    Corpo transacional de _acquire.
+
+    Args:
+        sources: Ver _acquire
+        written: Lista que recebe os caminhos gravados pelos save
+
+    Returns:
+        dict: Blob por hash
+    """
+    digests = {digest for digest, _, _, _ in sources}
+
+    with transaction.atomic():
+        blobs = _lock_blobs(digests)
+
+        new_blobs = {}
+        for digest, size, filename, save in sources:
+            if digest in blobs or digest in new_blobs:
+                continue
+            blob = Blob(sha256=digest, size=size)
+            blob.file = save(blob_upload_to(blob, filename))
+            written.append(blob.file.name)
+            new_blobs[digest] = blob
+
+        if new_blobs:
+            Blob.objects.bulk_create(
+                new_blobs.values(), ignore_conflicts=True
+            )
+            blobs = _lock_blobs(digests)
+            for digest, blob in new_blobs.items():
+                # Outro upload criou o mesmo blob: descarta a cópia
+                if blobs[digest].file.name != blob.file.name:
+                    written.remove(blob.file.name)
+                    default_storage.delete(blob.file.name)
+
+        references = Counter(digest for digest, _, _, _ in sources)
+        _adjust_ref_counts({
+            blobs[digest].pk: count
+            for digest, count in references.items()
+        })
+
+    return blobs
+
+
+def store_uploaded_files(uploaded_files):
+    """
+    Guarda arquivos enviados no storage deduplicado.
+
+    Conteúdos já existentes não são gravados de novo. Cada arquivo
+    recebe uma referência no blob retornado; se o File não chegar a
+    ser criado, a referência deve ser devolvida com release_blobs.
+
+    Args:
+        uploaded_files: Lista de arquivos enviados
+
+    Returns:
+        list: Blob de cada arquivo, na mesma ordem
+    """
+    sources = [
+        (
+            content_sha256(uploaded_file),
+            uploaded_file.size,
+            uploaded_file.name,
+            lambda name, content=uploaded_file: default_storage.save(
+                name, content
+            ),
+        )
+        for uploaded_file in uploaded_files
+    ]
+    return _acquire(sources)
+
+
+def store_uploaded_file(uploaded_file):
+    """
+    Guarda um único arquivo enviado (ver store_uploaded_files).
+    """
+    return store_uploaded_files([uploaded_file])[0]
+
+
+def store_assembled_file(storage_name, filename):
+    """
+    Converte um arquivo montado no storage (upload em partes) em blob.
+
+    O arquivo só é tocado depois do commit da transação: se o conteúdo
+    já existir ele é apagado; caso contrário é movido (rename, sem
+    copiar bytes) para o caminho reservado para o blob. Se a transação
+    for desfeita, o arquivo montado continua no lugar.
+
+    Args:
+        storage_name: Caminho do arquivo montado no storage
+        filename: Nome original do arquivo
+
+    Returns:
+        Blob: Blob com uma referência reservada para o novo File
+    """
+    reserved = []
+
+    def reserve(name):
+        reserved.append(default_storage.get_available_name(name))
+        return reserved[-1]
+
+    blob = _acquire(
+        [(
+            storage_sha256(storage_name),
+            default_storage.size(storage_name),
+            filename,
+            reserve,
+        )],
+        writes_content=False,
+    )[0]
+
+    if blob.file.name in reserved:
+        transaction.on_commit(
+            lambda: _move_in_storage(storage_name, blob.file.name)
+        )
+    else:
+        transaction.on_commit(lambda: _delete_from_storage([storage_name]))
+    return blob
+
+
+def _move_in_storage(source_name, target_name):
+    """Move um arquivo dentro do storage (rename, sem copiar bytes)."""
+    target = default_storage.path(target_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(default_storage.path(source_name), target)
+
+
+def release_blobs(blob_ids):
+    """
+    Devolve referências e apaga os blobs que ficaram sem nenhuma.
+
+    Os arquivos físicos são apagados após o commit da transação.
+
+    Args:
+        blob_ids: IDs de blob, um por referência devolvida
+
+    Returns:
+        int: Bytes liberados no storage
+    """
+    references = Counter(
+        blob_id for blob_id in blob_ids if blob_id is not None
+    )
+    if not references:
+        return 0
+
+    with transaction.atomic():
+        _adjust_ref_counts({
+            blob_id: -count for blob_id, count in references.items()
+        })
+        orphans = list(
+            Blob.objects.select_for_update().filter(
+                pk__in=references, ref_count=0
+            )
+        )
+        if not orphans:
+            return 0
+
+        Blob.objects.filter(pk__in=[blob.pk for blob in orphans]).delete()
+        names = [blob.file.name for blob in orphans]
+        names += [extracted_text_name(blob.sha256) for blob in orphans]
+        transaction.on_commit(lambda: _delete_from_storage(names))
+
+    return sum(blob.size for blob in orphans)
+
+
+def purge_files(files):
+    """
+    Remove definitivamente arquivos e coleta os blobs órfãos.
+
+    Arquivos antigos, sem blob, têm o arquivo físico apagado
+    diretamente.
+
+    Args:
+        files: QuerySet de File a remover
+
+    Returns:
+        int: Bytes liberados no storage
+    """
+    with transaction.atomic():
+        rows = list(files.values_list("pk", "blob_id", "file"))
+        if not rows:
+            return 0
+
+        File.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+
+        legacy_names = [
+            name for _, blob_id, name in rows if blob_id is None and name
+        ]
+        reclaimed = sum(_storage_size(name) for name in legacy_names)
+        if legacy_names:
+            transaction.on_commit(
+                lambda: _delete_from_storage(legacy_names)
+            )
+
+        reclaimed += release_blobs(blob_id for _, blob_id, _ in rows)
+
+    return reclaimed
+
+
+def _storage_size(name):
+    """Tamanho de um arquivo no storage, ou 0 se ele não existir."""
+    try:
+        return default_storage.size(name)
+    except OSError:
+        return 0
+
+
+def _delete_from_storage(names):
+    """Apaga arquivos do storage (os inexistentes são ignorados)."""
+    for name in names:
+        default_storage.delete(name)
+
+
+def _old_blob_files(cutoff):
+    """
+    Percorre os arquivos de blobs/ modificados antes de cutoff.
+
+    Yields:
+        tuple: (caminho relativo ao MEDIA_ROOT, tamanho em bytes)
+    """
+    root = default_storage.path(BLOB_ROOT)
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime < cutoff:
+                name = os.path.relpath(path, default_storage.location)
+                yield (name.replace(os.sep, "/"), stat.st_size)
+
+
+def sweep_orphan_blobs(grace=ORPHAN_BLOB_GRACE,
+                       batch_size=SWEEP_BATCH_SIZE):
+    """
+    Apaga os arquivos de blobs/ que não pertencem a nenhum Blob.
+
+    São arquivos gravados por transações desfeitas depois da gravação
+    (ou por processos interrompidos). Só arquivos mais antigos que
+    grace são considerados, para não apagar o conteúdo de uma
+    transação ainda aberta.
+
+    Args:
+        grace: Idade mínima dos arquivos apagados
+        batch_size: Arquivos conferidos no banco por consulta
+
+    Returns:
+        int: Bytes liberados no storage
+    """
+    files = _old_blob_files(time.time() - grace.total_seconds())
+    reclaimed = 0
+    while batch := dict(itertools.islice(files, batch_size)):
+        known = set(
+            Blob.objects.filter(file__in=batch).values_list(
+                "file", flat=True
+            )
+        )
+        for name, size in batch.items():
+            if name not in known:
+                default_storage.delete(name)
+                reclaimed += size
+    return reclaimed
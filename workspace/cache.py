@@ -0,0 +1,152 @@
+"""
+Cache do workspace com chaves por namespace e invalidação por versão.
+
+Cada namespace (por exemplo, "folder:<usuário>:<pasta>") tem uma
+versão, um token aleatório guardado no cache "workspace". As entradas
+do namespace são gravadas em chaves que incluem essa versão:
+
+    <namespace>:<versão>:<chave>
+
+Invalidar um namespace é trocar a versão (bump_versions): as entradas
+antigas deixam de ser lidas e expiram pelo TTL (WORKSPACE_CACHE_TTL) ou
+pelo despejo LRU do Redis, sem varrer nem apagar chave por chave. Um
+token (e não um contador) evita que a versão volte a um valor antigo
+se a chave da versão for despejada.
+
+Quem lê lê a versão uma única vez e grava com ela (get_or_set): um
+valor calculado enquanto o namespace mudava fica em uma versão que já
+não é consultada.
+
+Em produção o cache é o Redis do docker-compose; com
+CACHE_BACKEND=locmem, a memória do processo (ver CACHES). Falhas do
+Redis nunca interrompem a requisição: são registradas no log e
+tratadas como ausência de cache.
+"""
+import logging
+import uuid
+
+from django.core.cache import InvalidCacheBackendError, caches
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_CACHE_ALIAS = "workspace"
+
+
+def get_workspace_cache():
+    """Cache "workspace" configurado em CACHES, ou None se ausente."""
+    try:
+        return caches[WORKSPACE_CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return None
+
+
+def _version_key(namespace):
+    """Chave da versão de um namespace."""
+    return f"version:{namespace}"
+
+
+def versioned_key(namespace, version, key):
+    """Chave de uma entrada na versão informada do namespace."""
+    return f"{namespace}:{version}:{key}"
+
+
+def get_versions(namespaces):
+    """
+    Lê a versão de cada namespace, criando as que não existem.
+
+    Args:
+        namespaces: Nomes dos namespaces
+
+    Returns:
+        dict: Versão por namespace (vazio se o cache falhar)
+    """
+    cache = get_workspace_cache()
+    if cache is None:
+        return {}
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    try:
+        found = cache.get_many(keys)
+        for key in keys.keys() - found.keys():
+            # add não sobrescreve a versão criada por outro processo
+            # entre a leitura e a escrita
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            found[key] = cache.get(key)
+    except RedisError:
+        logger.warning("Cache do workspace indisponível", exc_info=True)
+        return {}
+    return {
+        namespace: found[key]
+        for key, namespace in keys.items()
+        if found.get(key)
+    }
+
+
+def get_version(namespace):
+    """Versão atual de um namespace (None se o cache falhar)."""
+    return get_versions([namespace]).get(namespace)
+
+
+def bump_versions(namespaces):
+    """
+    Troca a versão dos namespaces, invalidando todas as suas entradas.
+
+    Args:
+        namespaces: Nomes dos namespaces que mudaram
+    """
+    cache = get_workspace_cache()
+    namespaces = list(namespaces)
+    if cache is None or not namespaces:
+        return
+    try:
+        cache.set_many(
+            {
+                _version_key(namespace): uuid.uuid4().hex
+                for namespace in namespaces
+            },
+            timeout=None,
+        )
+    except RedisError:
+        logger.warning("Cache do workspace indisponível", exc_info=True)
+
+
+def get_or_set(namespace, key, compute, timeout=None, version=None):
+    """
+    Lê uma entrada da versão atual do namespace ou a calcula e grava.
+
+    Args:
+        namespace: Nome do namespace
+        key: Chave da entrada dentro do namespace
+        compute: Função sem argumentos que calcula o valor
+        timeout: Segundos de validade (padrão: WORKSPACE_CACHE_TTL)
+        version: Versão do namespace já lida pelo chamador (evita uma
+            nova leitura); por padrão, a versão atual
+
+    Returns:
+        tuple: (valor, versão do namespace usada, ou None se o cache
+            falhou e o valor foi apenas calculado)
+    """
+    cache = get_workspace_cache()
+    if version is None:
+        version = get_version(namespace)
+    if cache is None or version is None:
+        return (compute(), None)
+
+    cache_key = versioned_key(namespace, version, key)
+    try:
+        value = cache.get(cache_key)
+    except RedisError:
+        logger.warning("Cache do workspace indisponível", exc_info=True)
+        return (compute(), None)
+    if value is not None:
+        return (value, version)
+
+    value = compute()
+    try:
+        if timeout is None:
+            cache.set(cache_key, value)
+        else:
+            cache.set(cache_key, value, timeout)
+    except RedisError:
+        logger.warning("Cache do workspace indisponível", exc_info=True)
+    return (value, version)
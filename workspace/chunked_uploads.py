@@ -0,0 +1,373 @@
+"""
+Upload em partes (chunked) e retomável do app workspace.
+
+O protocolo tem quatro etapas:
+1. Criar a sessão informando nome e tamanho (validados de imediato)
+2. Enviar as partes numeradas com PUT, em qualquer ordem e em paralelo
+3. Consultar o status para descobrir quais partes faltam (retomada)
+4. Finalizar a sessão, o que cria o registro File
+
+Cada parte é copiada com pwrite para a posição final do arquivo dentro
+do MEDIA_ROOT, no caminho definido por workspace_upload_to. Sob ASGI
+(uvicorn) o Django lê o corpo inteiro de cada PUT antes de chamar a
+view (ASGIHandler.read_body), em um SpooledTemporaryFile que vai para
+o disco acima de FILE_UPLOAD_MAX_MEMORY_SIZE; a parte passa, portanto,
+por esse arquivo temporário antes da cópia. O tamanho das partes
+(WORKSPACE_UPLOAD_CHUNK_BYTES) limita esse custo por requisição.
+
+Na finalização o arquivo montado é movido para o storage deduplicado
+(workspace.blobs), ou descartado se o mesmo conteúdo já existir. Como
+as partes chegam fora de ordem, o SHA-256 é calculado nesse momento.
+O arquivo só sai do lugar depois do commit: se a finalização falhar,
+ela pode ser repetida.
+
+Cada sessão vale WORKSPACE_UPLOAD_SESSION_HOURS a partir da criação.
+Sessões vencidas não recebem partes nem são finalizadas; a tarefa
+"workspace.purge_upload_sessions", agendada na criação para a hora
+seguinte ao vencimento, remove as sessões vencidas, suas partes e o
+arquivo reservado de cada uma.
+"""
+import math
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from jobs.queue import enqueue
+
+from .blobs import store_assembled_file
+from .models import File, UploadChunk, UploadSession, workspace_upload_to
+from .naming import create_with_unique_name
+from .validators import (
+    SIGNATURE_BYTES,
+    validate_file,
+    validate_file_signature,
+)
+
+DEFAULT_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+STREAM_BLOCK_BYTES = 64 * 1024
+
+DEFAULT_UPLOAD_SESSION_HOURS = 24
+
+SESSION_PURGE_BATCH_SIZE = 500
+
+SESSION_PURGE_TASK = "workspace.purge_upload_sessions"
+
+
+@dataclass
+class DeclaredUpload:
+    """
+    Nome e tamanho informados pelo cliente ao criar a sessão.
+
+    Tem a mesma interface (name, size) usada por validate_file.
+    """
+    name: str
+    size: int
+
+
+class UploadFileGoneError(ValidationError):
+    """O arquivo de uma sessão concluída foi removido."""
+
+
+def upload_chunk_bytes():
+    """
+    Tamanho das partes configurado em WORKSPACE_UPLOAD_CHUNK_BYTES.
+    """
+    return getattr(
+        settings,
+        "WORKSPACE_UPLOAD_CHUNK_BYTES",
+        DEFAULT_UPLOAD_CHUNK_BYTES,
+    )
+
+
+def upload_session_hours():
+    """
+    Validade das sessões configurada em WORKSPACE_UPLOAD_SESSION_HOURS.
+    """
+    return getattr(
+        settings,
+        "WORKSPACE_UPLOAD_SESSION_HOURS",
+        DEFAULT_UPLOAD_SESSION_HOURS,
+    )
+
+
+def create_session(user, folder, name, size):
+    """
+    Cria uma sessão de upload e reserva o arquivo de destino.
+
+    Args:
+        user: Usuário que está enviando o arquivo
+        folder: Pasta de destino ou None para a raiz
+        name: Nome original do arquivo
+        size: Tamanho total declarado em bytes
+
+    Returns:
+        UploadSession: Sessão criada
+
+    Raises:
+        ValidationError: Se o nome ou o tamanho não forem permitidos
+    """
+    if size < 0:
+        raise ValidationError("Tamanho de arquivo inválido.")
+
+    declared = DeclaredUpload(name=os.path.basename(name), size=size)
+    validate_file(declared)
+    if size == 0:
+        validate_file_signature(declared.name, b"")
+
+    chunk_size = upload_chunk_bytes()
+    target = workspace_upload_to(
+        File(folder=folder, uploader=user), declared.name
+    )
+    storage_name = default_storage.save(target, ContentFile(b""))
+
+    session = UploadSession.objects.create(
+        owner=user,
+        folder=folder,
+        name=declared.name,
+        size=size,
+        chunk_size=chunk_size,
+        total_chunks=max(1, math.ceil(size / chunk_size)),
+        storage_name=storage_name,
+        expires_at=timezone.now() + timedelta(hours=upload_session_hours()),
+    )
+    schedule_session_purge(session.expires_at)
+    return session
+
+
+def _check_active(session):
+    """
+    Garante que a sessão ainda aceita partes e a finalização.
+
+    Raises:
+        ValidationError: Se a sessão já foi finalizada ou venceu
+    """
+    if session.status != UploadSession.STATUS_ACTIVE:
+        raise ValidationError("Sessão de upload já finalizada.")
+    if session.expires_at <= timezone.now():
+        raise ValidationError("Sessão de upload expirada.")
+
+
+def write_chunk(session, index, stream, content_length):
+    """
+    Grava uma parte diretamente na posição final do arquivo.
+
+    O corpo da requisição é lido em blocos de STREAM_BLOCK_BYTES e
+    escrito com pwrite no deslocamento index * chunk_size. Reenviar
+    uma parte apenas sobrescreve os mesmos bytes. Na parte 0 a
+    assinatura do arquivo é conferida antes de qualquer escrita.
+
+    Args:
+        session: UploadSession ativa
+        index: Número da parte (a partir de 0)
+        stream: Objeto com read(n), normalmente o HttpRequest
+        content_length: Tamanho declarado do corpo da requisição
+
+    Raises:
+        ValidationError: Se a parte for inválida ou estiver incompleta
+    """
+    _check_active(session)
+
+    if not 0 <= index < session.total_chunks:
+        raise ValidationError(f"Parte {index} fora do intervalo.")
+
+    expected = session.chunk_length(index)
+    if content_length != expected:
+        raise ValidationError(
+            f"A parte {index} deve ter {expected} bytes."
+        )
+
+    offset = index * session.chunk_size
+    remaining = expected
+    first_block = None
+    if index == 0 and expected:
+        first_block = stream.read(min(STREAM_BLOCK_BYTES, remaining))
+        validate_file_signature(session.name, first_block[:SIGNATURE_BYTES])
+
+    fd = os.open(default_storage.path(session.storage_name), os.O_WRONLY)
+    try:
+        while remaining:
+            block = first_block or stream.read(
+                min(STREAM_BLOCK_BYTES, remaining)
+            )
+            first_block = None
+            if not block:
+                raise ValidationError(f"A parte {index} chegou incompleta.")
+            view = memoryview(block)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                offset += written
+                remaining -= written
+                view = view[written:]
+    finally:
+        os.close(fd)
+
+    UploadChunk.objects.update_or_create(
+        session=session,
+        index=index,
+        defaults={"size": expected},
+    )
+
+
+def received_chunks(session):
+    """
+    Lista os números das partes já recebidas.
+    """
+    return list(session.chunks.values_list("index", flat=True))
+
+
+def session_status(session):
+    """
+    Representação JSON do estado de uma sessão.
+    """
+    return {
+        "id": str(session.id),
+        "name": session.name,
+        "size": session.size,
+        "chunk_size": session.chunk_size,
+        "total_chunks": session.total_chunks,
+        "received": received_chunks(session),
+        "status": session.status,
+        "file_id": session.file_id,
+    }
+
+
+def finalize_session(session):
+    """
+    Conclui a sessão e cria o File apontando para o arquivo montado.
+
+    A operação é idempotente: finalizar de novo uma sessão concluída
+    devolve o mesmo File. O arquivo montado só é movido para o blob
+    (ou apagado) após o commit, então uma finalização que falhe pode
+    ser repetida.
+
+    Args:
+        session: UploadSession com todas as partes recebidas
+
+    Returns:
+        File: Arquivo criado
+
+    Raises:
+        UploadFileGoneError: Se a sessão foi concluída, mas o arquivo
+            já foi excluído
+        ValidationError: Se ainda faltarem partes ou a sessão venceu
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(
+            pk=session.pk
+        )
+        if session.status == UploadSession.STATUS_COMPLETED:
+            if session.file is None or session.file.is_deleted:
+                raise UploadFileGoneError(
+                    "O arquivo deste upload foi removido."
+                )
+            return session.file
+        _check_active(session)
+
+        received = session.chunks.aggregate(count=Count("id"))["count"]
+        missing = session.total_chunks - received
+        if missing:
+            raise ValidationError(f"Faltam {missing} parte(s) do arquivo.")
+
+        blob = store_assembled_file(session.storage_name, session.name)
+
+        siblings = File.objects.filter(
+            uploader=session.owner,
+            folder=session.folder,
+            is_deleted=False,
+        )
+        file = create_with_unique_name(
+            siblings,
+            session.name,
+            lambda new_name: File.objects.create(
+                name=new_name,
+                file=blob.file.name,
+                blob=blob,
+                folder=session.folder,
+                uploader=session.owner,
+            ),
+        )
+
+        session.status = UploadSession.STATUS_COMPLETED
+        session.file = file
+        session.save(update_fields=["status", "file", "updated_at"])
+        session.chunks.all().delete()
+
+    return file
+
+
+def purge_expired_sessions(batch_size=SESSION_PURGE_BATCH_SIZE):
+    """
+    Remove as sessões vencidas, em lotes.
+
+    Sessões ativas vencidas têm as partes e o arquivo reservado
+    apagados (o arquivo, após o commit de cada lote). Sessões
+    concluídas só têm a linha removida: o arquivo já pertence ao blob.
+    Sessões em finalização no momento (bloqueadas) ficam para a
+    próxima limpeza.
+
+    Args:
+        batch_size: Máximo de sessões removidas por lote
+
+    Returns:
+        int: Quantidade de sessões removidas
+    """
+    removed = 0
+    while True:
+        with transaction.atomic():
+            sessions = list(
+                UploadSession.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=timezone.now())
+                .only("id", "status", "storage_name")
+                .order_by("expires_at")[:batch_size]
+            )
+            if not sessions:
+                return removed
+
+            names = [
+                session.storage_name
+                for session in sessions
+                if session.status == UploadSession.STATUS_ACTIVE
+            ]
+            UploadSession.objects.filter(
+                pk__in=[session.pk for session in sessions]
+            ).delete()
+            transaction.on_commit(
+                lambda names=names: _delete_from_storage(names)
+            )
+        removed += len(sessions)
+
+
+def _delete_from_storage(names):
+    """Apaga arquivos do storage (os inexistentes são ignorados)."""
+    for name in names:
+        default_storage.delete(name)
+
+
+def schedule_session_purge(expires_at):
+    """
+    Agenda a limpeza das sessões para depois de expires_at.
+
+    Usa uma tarefa por hora (chave idempotente): todas as sessões que
+    vencem na mesma hora compartilham a limpeza do início da hora
+    seguinte.
+
+    Args:
+        expires_at: Vencimento da sessão criada
+    """
+    run_after = expires_at.replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(hours=1)
+    enqueue(
+        SESSION_PURGE_TASK,
+        key=f"{SESSION_PURGE_TASK}:{run_after.isoformat()}",
+        run_after=run_after,
+    )
@@ -0,0 +1,190 @@
+"""
+Listagem de uma pasta do workspace, em cache por versão.
+
+A página do workspace mostra a pasta atual, os breadcrumbs e as
+subpastas e arquivos ativos da pasta. Esses dados ficam no cache do
+workspace (workspace.cache) sob duas versões do usuário:
+- versão da pasta ("listing:<usuário>:<pasta>"): trocada quando uma
+  subpasta ou um arquivo da pasta é criado, enviado, renomeado,
+  movido ou excluído
+- versão da árvore ("tree:<usuário>"): trocada quando uma pasta é
+  renomeada, movida ou excluída, pois o nome aparece nos breadcrumbs
+  de todas as pastas abaixo dela e a exclusão leva a subárvore junto
+
+As duas versões são lidas em uma única ida ao cache e formam o ETag da
+página: uma navegação de volta a uma pasta que não mudou é respondida
+com 304 Not Modified sem consultar a listagem no banco (só o usuário
+da sessão é lido, pelo login_required), e uma página que precisa ser
+montada custa uma leitura a mais. As versões são trocadas depois
+do commit da alteração (invalidate_listings), como a versão do acervo
+em rag.answer_cache.
+
+Os itens são guardados como ListingItem (ID, nome e URL do arquivo),
+e não como instâncias dos modelos, para que a entrada do cache não
+dependa do estado do ORM.
+"""
+from dataclasses import dataclass
+
+from django.shortcuts import get_object_or_404
+
+from .cache import bump_versions, get_or_set, get_versions
+from .models import File, Folder
+
+LISTING_KEY = "listing"
+
+
+@dataclass(frozen=True)
+class ListingItem:
+    """Pasta ou arquivo exibido na listagem."""
+    id: int
+    name: str
+    url: str = ""
+
+
+@dataclass(frozen=True)
+class Listing:
+    """Dados da página de uma pasta do workspace."""
+    current_folder: object
+    breadcrumbs: list
+    folders: list
+    files: list
+
+
+@dataclass(frozen=True)
+class ListingVersions:
+    """Versões do cache que identificam uma listagem."""
+    folder: str
+    tree: str
+
+
+def folder_namespace(user_id, folder_id):
+    """Namespace da listagem de uma pasta (None para a raiz)."""
+    return f"listing:{user_id}:{folder_id or 'root'}"
+
+
+def tree_namespace(user_id):
+    """Namespace da árvore de pastas de um usuário."""
+    return f"tree:{user_id}"
+
+
+def _item(instance, url=""):
+    """ListingItem de uma pasta ou arquivo."""
+    return ListingItem(id=instance.id, name=instance.name, url=url)
+
+
+def build_listing(user, folder):
+    """
+    Consulta a listagem de uma pasta no banco.
+
+    Args:
+        user: Dono da pasta
+        folder: Instância de Folder, ou None para a raiz
+
+    Returns:
+        Listing: Pasta atual, breadcrumbs, subpastas e arquivos ativos
+            ordenados pelo nome
+    """
+    folders = Folder.objects.filter(
+        owner=user,
+        parent=folder,
+        is_deleted=False
+    ).order_by("name")
+
+    files = File.objects.filter(
+        uploader=user,
+        folder=folder,
+        is_deleted=False
+    ).order_by("name")
+
+    breadcrumbs = []
+    if folder:
+        breadcrumbs = [
+            _item(ancestor)
+            for ancestor in [*folder.get_ancestors(), folder]
+        ]
+
+    return Listing(
+        current_folder=breadcrumbs[-1] if breadcrumbs else None,
+        breadcrumbs=breadcrumbs,
+        folders=[_item(subfolder) for subfolder in folders],
+        files=[_item(file, file.file.url) for file in files],
+    )
+
+
+def listing_versions(user_id, folder_id):
+    """
+    Lê as versões da listagem de uma pasta.
+
+    Args:
+        user_id: ID do dono da pasta
+        folder_id: ID da pasta, ou None para a raiz
+
+    Returns:
+        ListingVersions: Versões da pasta e da árvore, ou None se o
+            cache falhar
+    """
+    folder_key = folder_namespace(user_id, folder_id)
+    tree_key = tree_namespace(user_id)
+    versions = get_versions([folder_key, tree_key])
+    if folder_key not in versions or tree_key not in versions:
+        return None
+    return ListingVersions(
+        folder=versions[folder_key],
+        tree=versions[tree_key],
+    )
+
+
+def get_listing(user, folder_id, versions=None):
+    """
+    Lê a listagem de uma pasta do cache ou a consulta e grava.
+
+    Args:
+        user: Usuário autenticado
+        folder_id: ID da pasta, ou None para a raiz
+        versions: ListingVersions lidas por listing_versions (None se
+            o cache falhou: a listagem é apenas consultada)
+
+    Returns:
+        Listing: Listagem da pasta
+
+    Raises:
+        Http404: Se a pasta não existe ou não pertence ao usuário
+    """
+    def compute():
+        folder = None
+        if folder_id:
+            folder = get_object_or_404(Folder, id=folder_id, owner=user)
+        return build_listing(user, folder)
+
+    if versions is None:
+        return compute()
+
+    listing, _ = get_or_set(
+        folder_namespace(user.id, folder_id),
+        f"{LISTING_KEY}:{versions.tree}",
+        compute,
+        version=versions.folder,
+    )
+    return listing
+
+
+def invalidate_listings(user_id, folder_ids=(), tree=False):
+    """
+    Troca as versões das listagens alteradas.
+
+    Deve ser chamada depois do commit da alteração: uma listagem
+    consultada antes dele fica gravada em uma versão que já não é lida.
+
+    Args:
+        user_id: ID do dono das pastas
+        folder_ids: IDs das pastas cujo conteúdo mudou (None para a
+            raiz)
+        tree: True se uma pasta foi renomeada, movida ou excluída,
+            o que invalida todas as listagens do usuário
+    """
+    namespaces = {
+        folder_namespace(user_id, folder_id) for folder_id in folder_ids
+    }
+    if tree:
+        namespaces.add(tree_namespace(user_id))
+    bump_versions(namespaces)
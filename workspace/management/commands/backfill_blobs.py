@@ -0,0 +1,84 @@
+"""
+Comando que migra arquivos antigos para o storage deduplicado.
+
+Arquivos enviados antes da introdução dos blobs continuam no caminho
+workspace/user_<id>/folder_<id>/<nome>. Este comando calcula o SHA-256
+de cada um, associa o File ao Blob correspondente (gravando o conteúdo
+apenas se ele ainda não existir) e apaga a cópia antiga.
+
+Uso:
+    python manage.py backfill_blobs --batch-size 200
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from workspace.blobs import store_uploaded_file
+from workspace.models import File
+
+
+class Command(BaseCommand):
+    """
+    Associa a blobs os arquivos que ainda não têm um.
+    """
+
+    help = "Migra arquivos antigos para o storage deduplicado"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define o tamanho do lote de arquivos lidos por vez."""
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        """
+        Processa os arquivos sem blob em lotes.
+        """
+        migrated = 0
+        missing = 0
+        reclaimed = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                File.objects.filter(blob__isnull=True, pk__gt=last_pk)
+                .exclude(file="")
+                .order_by("pk")[:options["batch_size"]]
+            )
+            if not batch:
+                break
+
+            for file in batch:
+                last_pk = file.pk
+                old_name = file.file.name
+                if not default_storage.exists(old_name):
+                    missing += 1
+                    continue
+
+                size = _migrate_file(file)
+                if not _is_referenced(old_name):
+                    default_storage.delete(old_name)
+                    reclaimed += size
+                migrated += 1
+
+        self.stdout.write(
+            f"{migrated} arquivo(s) migrado(s), "
+            f"{missing} sem conteúdo no storage, "
+            f"{reclaimed / (1024 * 1024):.1f} MB liberados"
+        )
+
+
+def _migrate_file(file):
+    """
+    Associa um File ao blob do seu conteúdo e retorna o tamanho.
+    """
+    with file.file.open("rb") as content, transaction.atomic():
+        blob = store_uploaded_file(content)
+        File.objects.filter(pk=file.pk).update(
+            blob=blob,
+            file=blob.file.name,
+        )
+    return blob.size
+
+
+def _is_referenced(name):
+    """Indica se algum File ainda aponta para o caminho informado."""
+    return File.objects.filter(file=name).exists()
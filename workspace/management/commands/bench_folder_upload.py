@@ -0,0 +1,168 @@
+"""
+Comando de benchmark do upload de pastas.
+
+Compara a quantidade de consultas ao banco por arquivo entre o fluxo
+antigo (uma consulta por segmento de caminho e por candidato de nome)
+e o motor de upload em lote de workspace.uploads.
+
+Os dados são gerados em memória, gravados em um MEDIA_ROOT temporário
+e descartados ao final (a transação de cada execução é revertida).
+
+Uso:
+    python manage.py bench_folder_upload --files 2000 --depth 4
+"""
+import json
+import os
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from workspace.models import File, Folder
+from workspace.views import (
+    _process_folder_upload_complete,
+    _setup_folder_upload,
+)
+
+User = get_user_model()
+
+BENCH_FOLDER_NAME = "Bench"
+
+
+class Command(BaseCommand):
+    """
+    Mede consultas e tempo do upload de pasta antes e depois do lote.
+    """
+
+    help = "Mede consultas por arquivo no upload de pastas"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define os parâmetros do tamanho da árvore gerada."""
+        parser.add_argument("--files", type=int, default=1000)
+        parser.add_argument("--depth", type=int, default=3)
+        parser.add_argument("--fanout", type=int, default=4)
+
+    def handle(self, *args, **options):
+        """
+        Executa os dois fluxos sobre a mesma árvore sintética.
+        """
+        file_paths = _build_paths(
+            options["files"], options["depth"], options["fanout"]
+        )
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                before = _measure(_run_legacy, file_paths)
+                after = _measure(_run_bulk, file_paths)
+
+        total = len(file_paths)
+        for label, (queries, seconds) in (
+            ("antes", before),
+            ("depois", after),
+        ):
+            self.stdout.write(
+                f"{label:>6}: {queries} consultas, "
+                f"{queries / total:.2f} por arquivo, {seconds:.2f}s"
+            )
+
+
+def _build_paths(total, depth, fanout):
+    """
+    Gera caminhos relativos como os enviados pelo navegador.
+    """
+    paths = []
+    for i in range(total):
+        parts = [BENCH_FOLDER_NAME]
+        for level in range(depth):
+            parts.append(f"nivel{level}_{(i // fanout ** level) % fanout}")
+        parts.append(f"arquivo_{i % 50}.txt")
+        paths.append("/".join(parts))
+    return paths
+
+
+def _uploaded_files(file_paths):
+    """
+    Cria arquivos em memória para cada caminho.
+    """
+    return [
+        SimpleUploadedFile(path, b"conteudo de teste\n")
+        for path in file_paths
+    ]
+
+
+def _measure(runner, file_paths):
+    """
+    Executa um fluxo em uma transação revertida e conta consultas.
+    """
+    uploaded_files = _uploaded_files(file_paths)
+    with transaction.atomic():
+        user = User.objects.create(username="__bench_folder_upload__")
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            runner(user, uploaded_files, file_paths)
+        elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return (len(queries), elapsed)
+
+
+def _run_bulk(user, uploaded_files, file_paths):
+    """
+    Fluxo atual: árvore e arquivos criados em lote.
+    """
+    main_folder, folder_name = _setup_folder_upload(
+        user, uploaded_files, BENCH_FOLDER_NAME, None
+    )
+    _process_folder_upload_complete(
+        user,
+        uploaded_files,
+        json.dumps(file_paths),
+        folder_name,
+        main_folder,
+    )
+
+
+def _run_legacy(user, uploaded_files, file_paths):
+    """
+    Reproduz o fluxo anterior, usado como referência de comparação.
+
+    Cada segmento de caminho faz um filter().first() e um create(),
+    e cada arquivo resolve a pasta e testa nomes com exists().
+    """
+    main_folder = Folder.objects.create(
+        name=BENCH_FOLDER_NAME, owner=user
+    )
+    for uploaded_file, file_path in zip(uploaded_files, file_paths):
+        parent = main_folder
+        for name in file_path.split("/")[1:-1]:
+            folder = Folder.objects.filter(
+                owner=user, parent=parent, name=name, is_deleted=False
+            ).first()
+            if not folder:
+                folder = Folder.objects.create(
+                    name=name, owner=user, parent=parent
+                )
+            parent = folder
+
+        file_name = file_path.split("/")[-1]
+        base, ext = os.path.splitext(file_name)
+        new_name = file_name
+        counter = 1
+        while File.objects.filter(
+            uploader=user,
+            folder=parent,
+            name__iexact=new_name,
+            is_deleted=False,
+        ).exists():
+            new_name = f"{base} ({counter}){ext}"
+            counter += 1
+
+        File.objects.create(
+            name=new_name,
+            file=uploaded_file,
+            folder=parent,
+            uploader=user,
+        )
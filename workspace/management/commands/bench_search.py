@@ -0,0 +1,280 @@
+"""
+Comando de benchmark da busca do workspace.
+
+Gera um workspace sintético (por padrão 100 mil arquivos em 2 mil
+pastas, com nomes acentuados em português e texto extraído em parte
+dos arquivos), executa um conjunto de consultas pela mesma função da
+view (workspace.search.search_workspace) e informa as latências
+p50/p95 da primeira e da segunda página, na raiz e em uma subárvore.
+
+Os dados são criados em uma transação revertida ao final; com --keep
+eles são mantidos, para inspecionar os planos de consulta (EXPLAIN)
+ou repetir medições pela view.
+
+Uso:
+    python manage.py bench_search --files 100000 --folders 2000
+"""
+import hashlib
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from rag.models import Chunk
+from rag.retrieval import update_search_vectors
+from workspace.models import File, Folder
+from workspace.search import search_workspace
+
+User = get_user_model()
+
+BENCH_USERNAME = "__bench_search__"
+
+INSERT_BATCH_SIZE = 5000
+
+TARGET_MS = 100
+
+FOLDER_TOPICS = [
+    "Financeiro",
+    "Jurídico",
+    "Recursos Humanos",
+    "Operações",
+    "Comercial",
+    "Diretoria",
+    "Licitações",
+    "Almoxarifado",
+]
+
+FILE_TOPICS = [
+    "Relatório",
+    "Orçamento",
+    "Contrato",
+    "Ata de reunião",
+    "Planilha de custos",
+    "Análise de crédito",
+    "Projeção de vendas",
+    "Balanço patrimonial",
+    "Cotação",
+    "Nota fiscal",
+    "Currículo",
+    "Apresentação",
+]
+
+EXTENSIONS = [".pdf", ".docx", ".xlsx", ".csv", ".txt"]
+
+CONTENT_WORDS = [
+    "contrato", "prestação", "serviços", "cláusula", "pagamento",
+    "multa", "rescisão", "fornecedor", "orçamento", "trimestre",
+    "receita", "despesa", "auditoria", "conformidade", "licitação",
+    "empenho", "reunião", "aprovação", "diretoria", "funcionário",
+    "imposto", "folha", "benefício", "férias", "admissão",
+    "estoque", "inventário", "logística", "transporte", "entrega",
+    "cliente", "proposta", "desconto", "comissão", "meta",
+    "processo", "petição", "audiência", "sentença", "recurso",
+]
+
+CHUNK_WORDS = 40
+
+DEFAULT_QUERIES = [
+    "relatorio",
+    "orçamento",
+    "ata de reuniao",
+    "rescisão contrato",
+    "inexistente",
+]
+
+
+class Command(BaseCommand):
+    """
+    Gera um workspace grande e mede a latência da busca.
+    """
+
+    help = "Mede a latência da busca do workspace em um acervo sintético"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define o tamanho do acervo e as consultas medidas."""
+        parser.add_argument("--files", type=int, default=100_000)
+        parser.add_argument("--folders", type=int, default=2000)
+        parser.add_argument("--depth", type=int, default=3)
+        parser.add_argument(
+            "--content-ratio",
+            type=float,
+            default=0.2,
+            help="Fração dos arquivos com texto extraído",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            help="Consulta a medir (pode repetir; padrão: um conjunto "
+                 "fixo de consultas)",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Mantém o acervo gerado em vez de reverter a transação",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Gera o acervo, mede as consultas e descarta os dados.
+        """
+        rng = random.Random(options["seed"])
+        queries = options["queries"] or DEFAULT_QUERIES
+
+        with transaction.atomic():
+            user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+            start = time.perf_counter()
+            folders = _create_folders(
+                user, options["folders"], options["depth"], rng
+            )
+            files = _create_files(user, folders, options["files"], rng)
+            chunks = _create_chunks(files, options["content_ratio"], rng)
+            with connection.cursor() as cursor:
+                for model in (Folder, File, Chunk):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+            self.stdout.write(
+                f"acervo: {len(folders)} pastas, {len(files)} arquivos, "
+                f"{chunks} chunks em {time.perf_counter() - start:.1f}s"
+            )
+
+            scopes = [("raiz", None), ("subárvore", folders[0])]
+            for query in queries:
+                for scope_label, folder in scopes:
+                    self._report(
+                        user, query, folder, scope_label, options["repeat"]
+                    )
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def _report(self, user, query, folder, scope_label, repeat):
+        """
+        Mede a primeira e a segunda página de uma consulta.
+        """
+        first, page = _measure(
+            lambda: search_workspace(user, query, folder=folder), repeat
+        )
+        line = (
+            f"{query!r:>22} {scope_label:>9}: "
+            f"{len(page.results):>3} resultados, "
+            f"p50 {first[0]:6.1f} ms, p95 {first[1]:6.1f} ms"
+        )
+        worst = first[1]
+        if page.next_cursor:
+            second, _ = _measure(
+                lambda: search_workspace(
+                    user, query, folder=folder, cursor=page.next_cursor
+                ),
+                repeat,
+            )
+            line += f" | página 2: p95 {second[1]:6.1f} ms"
+            worst = max(worst, second[1])
+        if worst > TARGET_MS:
+            line += f"  (acima de {TARGET_MS} ms)"
+        self.stdout.write(line)
+
+
+def _measure(run, repeat):
+    """
+    Executa run repeat vezes e calcula p50 e p95 em milissegundos.
+
+    Returns:
+        tuple: ((p50, p95), último resultado)
+    """
+    timings = []
+    result = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return ((statistics.median(timings), p95), result)
+
+
+def _create_folders(user, total, depth, rng):
+    """
+    Cria a árvore de pastas, nível por nível, com path e depth.
+
+    Returns:
+        list: Pastas criadas (as do primeiro nível primeiro)
+    """
+    per_level = max(1, total // max(depth, 1))
+    created = []
+    parents = [None]
+    for level in range(depth):
+        count = per_level if level < depth - 1 else total - len(created)
+        level_folders = []
+        for index in range(count):
+            parent = rng.choice(parents)
+            topic = rng.choice(FOLDER_TOPICS)
+            level_folders.append(Folder(
+                name=f"{topic} {level}-{index}",
+                owner=user,
+                parent=parent,
+                path=parent.subtree_path if parent else "/",
+                depth=level,
+            ))
+        Folder.objects.bulk_create(
+            level_folders, batch_size=INSERT_BATCH_SIZE
+        )
+        created.extend(level_folders)
+        parents = level_folders
+    return created
+
+
+def _create_files(user, folders, total, rng):
+    """
+    Cria os arquivos espalhados pelas pastas e pela raiz.
+
+    O conteúdo não é gravado no storage: a busca só lê nomes e chunks.
+    """
+    locations = [None, *folders]
+    files = []
+    for index in range(total):
+        topic = rng.choice(FILE_TOPICS)
+        year = rng.randint(2015, 2025)
+        ext = rng.choice(EXTENSIONS)
+        files.append(File(
+            name=f"{topic} {year} {index}{ext}",
+            file=f"bench/{index}{ext}",
+            folder=rng.choice(locations),
+            uploader=user,
+        ))
+    return File.objects.bulk_create(files, batch_size=INSERT_BATCH_SIZE)
+
+
+def _create_chunks(files, ratio, rng):
+    """
+    Cria um chunk de texto para uma fração dos arquivos.
+
+    Returns:
+        int: Quantidade de chunks criados
+    """
+    chunks = []
+    for file in files:
+        if rng.random() >= ratio:
+            continue
+        text = " ".join(rng.choices(CONTENT_WORDS, k=CHUNK_WORDS))
+        chunks.append(Chunk(
+            file=file,
+            ordinal=0,
+            text=text,
+            content_hash=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            token_count=CHUNK_WORDS,
+            page_start=1,
+            page_end=1,
+            char_start=0,
+            char_end=len(text),
+        ))
+    created = Chunk.objects.bulk_create(chunks, batch_size=INSERT_BATCH_SIZE)
+    for start in range(0, len(created), INSERT_BATCH_SIZE):
+        update_search_vectors(
+            [chunk.pk for chunk in created[start:start + INSERT_BATCH_SIZE]]
+        )
+    return len(created)
@@ -0,0 +1,61 @@
+"""
+Comando que esvazia a lixeira do workspace.
+
+Remove definitivamente pastas e arquivos excluídos há mais tempo que o
+período de retenção, em lotes, e informa o espaço liberado no storage.
+Pode ser agendado (cron) ou executado manualmente.
+
+Uso:
+    python manage.py purge_trash --days 30 --batch-size 500
+"""
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from workspace.trash import PURGE_BATCH_SIZE, purge_trash
+
+
+class Command(BaseCommand):
+    """
+    Remove itens expirados da lixeira e relata os bytes liberados.
+    """
+
+    help = "Remove definitivamente itens expirados da lixeira"
+
+    def add_arguments(self, parser):  # noqa: PLR6301
+        """Define a retenção e o tamanho dos lotes."""
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Dias de retenção (padrão: WORKSPACE_TRASH_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=PURGE_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        """
+        Executa a limpeza mostrando o progresso de cada lote.
+        """
+        verbose = options["verbosity"] > 1
+
+        def on_batch(report):
+            if verbose:
+                self.stdout.write(_format_report(report))
+
+        report = purge_trash(
+            retention_days=options["days"],
+            batch_size=options["batch_size"],
+            on_batch=on_batch,
+        )
+        self.stdout.write(self.style.SUCCESS(_format_report(report)))
+
+
+def _format_report(report):
+    """Texto com os totais de um PurgeReport."""
+    return (
+        f"{report.files} arquivo(s) e {report.folders} pasta(s) "
+        f"removidos, {filesizeformat(report.bytes_reclaimed)} liberados"
+    )
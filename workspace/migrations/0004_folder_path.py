@@ -0,0 +1,63 @@
+from django.db import migrations, models
+
+
+def populate_folder_paths(apps, schema_editor):
+    """
+    Preenche path e depth das pastas existentes, nível por nível.
+    """
+    Folder = apps.get_model("workspace", "Folder")
+
+    level = {
+        folder_id: ("/", 0)
+        for folder_id in Folder.objects.filter(
+            parent__isnull=True
+        ).values_list("id", flat=True)
+    }
+
+    while level:
+        children = list(
+            Folder.objects.filter(parent_id__in=list(level)).only(
+                "id", "parent_id"
+            )
+        )
+        next_level = {}
+        for child in children:
+            parent_path, parent_depth = level[child.parent_id]
+            child.path = f"{parent_path}{child.parent_id}/"
+            child.depth = parent_depth + 1
+            next_level[child.id] = (child.path, child.depth)
+
+        Folder.objects.bulk_update(
+            children, ["path", "depth"], batch_size=500
+        )
+        level = next_level
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workspace", "0003_soft_delete_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="folder",
+            name="depth",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="depth"
+            ),
+        ),
+        migrations.AddField(
+            model_name="folder",
+            name="path",
+            field=models.CharField(
+                db_index=True,
+                default="/",
+                editable=False,
+                max_length=1024,
+                verbose_name="path",
+            ),
+        ),
+        migrations.RunPython(
+            populate_folder_paths, migrations.RunPython.noop
+        ),
+    ]
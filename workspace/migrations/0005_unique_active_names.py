@@ -0,0 +1,86 @@
+import os
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def _rename_duplicates(queryset, group_fields, keep_extension):
+    """
+    Renomeia itens ativos com nome repetido no mesmo diretório.
+    """
+    taken = {}
+    duplicates = []
+    for item in queryset.filter(is_deleted=False).order_by("id"):
+        key = tuple(getattr(item, field) for field in group_fields)
+        names = taken.setdefault(key, set())
+        if item.name.lower() in names:
+            duplicates.append((item, key))
+        else:
+            names.add(item.name.lower())
+
+    for item, key in duplicates:
+        names = taken[key]
+        if keep_extension:
+            base, ext = os.path.splitext(item.name)
+        else:
+            base, ext = item.name, ""
+        counter = 1
+        new_name = f"{base} ({counter}){ext}"
+        while new_name.lower() in names:
+            counter += 1
+            new_name = f"{base} ({counter}){ext}"
+        names.add(new_name.lower())
+        item.name = new_name
+        item.save(update_fields=["name"])
+
+
+def rename_duplicate_names(apps, schema_editor):
+    """
+    Remove duplicatas existentes antes de criar as constraints.
+    """
+    Folder = apps.get_model("workspace", "Folder")
+    File = apps.get_model("workspace", "File")
+    _rename_duplicates(
+        Folder.objects.only("id", "name", "owner_id", "parent_id"),
+        ("owner_id", "parent_id"),
+        keep_extension=False,
+    )
+    _rename_duplicates(
+        File.objects.only("id", "name", "uploader_id", "folder_id"),
+        ("uploader_id", "folder_id"),
+        keep_extension=True,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workspace", "0004_folder_path"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rename_duplicate_names, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="file",
+            constraint=models.UniqueConstraint(
+                Lower("name"),
+                models.F("uploader"),
+                models.F("folder"),
+                condition=models.Q(("is_deleted", False)),
+                name="unique_active_file_name",
+                nulls_distinct=False,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="folder",
+            constraint=models.UniqueConstraint(
+                Lower("name"),
+                models.F("owner"),
+                models.F("parent"),
+                condition=models.Q(("is_deleted", False)),
+                name="unique_active_folder_name",
+                nulls_distinct=False,
+            ),
+        ),
+    ]
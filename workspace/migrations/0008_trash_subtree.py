@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def mark_deleted_subtrees(apps, schema_editor):
+    """
+    Leva para a lixeira o conteúdo de pastas excluídas antes da
+    exclusão em subárvore.
+    """
+    Folder = apps.get_model("workspace", "Folder")
+    File = apps.get_model("workspace", "File")
+
+    now = timezone.now()
+    for model in (Folder, File):
+        model.objects.filter(
+            is_deleted=True, deleted_at__isnull=True
+        ).update(deleted_at=now)
+
+    deleted_folders = Folder.objects.filter(is_deleted=True).only(
+        "id", "path", "deleted_at"
+    ).order_by("depth")
+    for folder in deleted_folders.iterator():
+        subtree_path = f"{folder.path}{folder.id}/"
+        deleted_at = folder.deleted_at
+        Folder.objects.filter(
+            path__startswith=subtree_path,
+            is_deleted=False,
+        ).update(is_deleted=True, deleted_at=deleted_at)
+        File.objects.filter(
+            Q(folder_id=folder.id) | Q(folder__path__startswith=subtree_path),
+            is_deleted=False,
+        ).update(is_deleted=True, deleted_at=deleted_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0007_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            mark_deleted_subtrees, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='file_trash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='folder',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='folder_trash_idx'),
+        ),
+    ]
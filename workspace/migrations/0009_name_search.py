@@ -0,0 +1,42 @@
+import django.contrib.postgres.indexes
+import workspace.models
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    TrigramExtension,
+    UnaccentExtension,
+)
+from django.db import migrations, models
+
+NORMALIZE_NAME_SQL = """
+CREATE OR REPLACE FUNCTION workspace_normalize_name(value text)
+RETURNS text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, value))
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0008_trash_subtree'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(
+            NORMALIZE_NAME_SQL,
+            "DROP FUNCTION IF EXISTS workspace_normalize_name(text);",
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(workspace.models.NormalizedName('name'), name='gin_trgm_ops'), condition=models.Q(('is_deleted', False)), name='file_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='folder',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(workspace.models.NormalizedName('name'), name='gin_trgm_ops'), condition=models.Q(('is_deleted', False)), name='folder_name_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Validade das sessões criadas antes do campo (a mesma do padrão de
+# WORKSPACE_UPLOAD_SESSION_HOURS)
+EXISTING_SESSION_HOURS = 24
+
+
+def set_existing_expiry(apps, schema_editor):
+    """
+    Define a validade das sessões existentes a partir da criação.
+    """
+    UploadSession = apps.get_model("workspace", "UploadSession")
+    UploadSession.objects.update(
+        expires_at=F("created_at") + timedelta(hours=EXISTING_SESSION_HOURS)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0009_name_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='expires_at',
+            field=models.DateTimeField(null=True, verbose_name='expires at'),
+        ),
+        migrations.RunPython(
+            set_existing_expiry, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='expires_at',
+            field=models.DateTimeField(verbose_name='expires at'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['expires_at'], name='upload_session_expiry_idx'),
+        ),
+    ]
@@ -2,16 +2,40 @@
 Modelos do app workspace.
 
 Este módulo define os modelos Folder e File que representam
-a estrutura hierárquica de pastas e arquivos do workspace.
+a estrutura hierárquica de pastas e arquivos do workspace, além do
+Blob, que guarda o conteúdo físico deduplicado dos arquivos.
+
+Os nomes de pastas e arquivos ativos têm índices GIN de trigramas
+sobre o nome normalizado (NormalizedName), usados pela busca do
+workspace (workspace.search).
 """
 import os
 import re
+import uuid
 
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models import F, Func, Q, Value
+from django.db.models.functions import Concat, Lower, Substr
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+class NormalizedName(Func):
+    """
+    Nome normalizado para busca: minúsculas e sem acentos.
+
+    Chama a função imutável workspace_normalize_name, criada na
+    migração 0009 sobre unaccent(). Por ser imutável, a mesma
+    expressão pode ser indexada (índices de trigramas) e usada nas
+    consultas.
+    """
+
+    function = "workspace_normalize_name"
+    output_field = models.TextField()
+
+
 def workspace_upload_to(instance, filename):
     """
     Constrói o caminho onde o arquivo será salvo dentro de MEDIA_ROOT.
@@ -61,12 +85,44 @@ def workspace_upload_to(instance, filename):
     return os.path.join("workspace", user_part, folder_part, safe_name)
 
 
+def blob_upload_to(instance, filename):
+    """
+    Constrói o caminho de um blob a partir do hash do conteúdo.
+
+    Estrutura: blobs/<ab>/<cd>/<sha256><ext>
+
+    Os dois primeiros níveis evitam diretórios com milhões de entradas;
+    a extensão é mantida apenas para o servidor de mídia informar o
+    Content-Type correto.
+
+    Args:
+        instance: Instância do modelo Blob sendo salvo
+        filename: Nome original do arquivo
+
+    Returns:
+        str: Caminho relativo onde o conteúdo será armazenado
+    """
+    digest = instance.sha256
+    ext = os.path.splitext(filename)[1].lower()
+    ext = re.sub(r"[^a-z0-9.]", "", ext)
+    return os.path.join("blobs", digest[:2], digest[2:4], f"{digest}{ext}")
+
+
 class Folder(models.Model):
     """
     Representa uma pasta do workspace do usuário.
 
     Suporta hierarquia através de self-referencing ForeignKey (parent).
     Permite criar estruturas de pastas aninhadas indefinidamente.
+
+    Além do parent, cada pasta guarda um caminho materializado (path)
+    com os IDs de todos os ancestrais no formato "/1/5/9/" e a sua
+    profundidade (depth). Assim, breadcrumbs e verificações de
+    ancestralidade são resolvidos com uma única consulta indexada, sem
+    percorrer a hierarquia pasta por pasta.
+
+    Não podem existir duas pastas ativas com o mesmo nome (ignorando
+    maiúsculas) no mesmo diretório.
     """
 
     name = models.CharField(
@@ -88,6 +144,20 @@ class Folder(models.Model):
         related_name="children",
     )
 
+    path = models.CharField(
+        _("path"),
+        max_length=1024,
+        default="/",
+        db_index=True,
+        editable=False,
+    )
+
+    depth = models.PositiveIntegerField(
+        _("depth"),
+        default=0,
+        editable=False,
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     is_deleted = models.BooleanField(default=False)
@@ -97,17 +167,214 @@ class Folder(models.Model):
         ordering = ["-created_at"]
         verbose_name = _("Folder")
         verbose_name_plural = _("Folders")
+        indexes = [
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(is_deleted=True),
+                name="folder_trash_idx",
+            ),
+            GinIndex(
+                OpClass(NormalizedName("name"), name="gin_trgm_ops"),
+                condition=Q(is_deleted=False),
+                name="folder_name_trgm_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                Lower("name"),
+                "owner",
+                "parent",
+                condition=Q(is_deleted=False),
+                nulls_distinct=False,
+                name="unique_active_folder_name",
+            ),
+        ]
 
     def __str__(self):
         """Representação em string do modelo."""
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Salva a pasta mantendo path e depth coerentes com o parent.
+        """
+        self.sync_path()
+        super().save(*args, **kwargs)
+
+    def sync_path(self):
+        """
+        Recalcula path e depth a partir do parent.
+
+        Só consulta o parent quando ele mudou em relação ao path
+        armazenado, de modo que renomear uma pasta não gera consultas
+        extras.
+        """
+        ancestor_ids = self.ancestor_ids
+        current_parent_id = ancestor_ids[-1] if ancestor_ids else None
+        if self.pk and current_parent_id == self.parent_id:
+            return
+
+        if self.parent_id:
+            self.path = self.parent.subtree_path
+            self.depth = self.parent.depth + 1
+        else:
+            self.path = "/"
+            self.depth = 0
+
+    @property
+    def ancestor_ids(self):
+        """
+        Lista de IDs dos ancestrais (raiz -> pai imediato).
+        """
+        return [int(part) for part in self.path.split("/") if part]
+
+    @property
+    def subtree_path(self):
+        """
+        Prefixo de path compartilhado por todos os descendentes.
+        """
+        return f"{self.path}{self.pk}/"
+
+    def is_descendant_of(self, folder):
+        """
+        Verifica se esta pasta está dentro da subárvore de folder.
+
+        Args:
+            folder: Possível pasta ancestral
+
+        Returns:
+            bool: True se folder é ancestral desta pasta
+        """
+        return self.path.startswith(folder.subtree_path)
+
+    def get_ancestors(self):
+        """
+        Retorna os ancestrais ordenados da raiz até o pai imediato.
+
+        Returns:
+            QuerySet: Pastas ancestrais (uma única consulta)
+        """
+        return Folder.objects.filter(
+            id__in=self.ancestor_ids
+        ).order_by("depth")
+
+    def get_descendants(self):
+        """
+        Retorna todas as pastas da subárvore (sem incluir esta).
+
+        Returns:
+            QuerySet: Pastas descendentes
+        """
+        return Folder.objects.filter(path__startswith=self.subtree_path)
+
+    def move_to(self, new_parent):
+        """
+        Move a pasta para um novo pai e re-deriva o path da subárvore.
+
+        A pasta é salva com o novo parent e todos os descendentes têm o
+        prefixo de path substituído em um único UPDATE.
+
+        Args:
+            new_parent: Pasta de destino ou None para a raiz
+        """
+        old_subtree_path = self.subtree_path
+        old_depth = self.depth
+
+        with transaction.atomic():
+            self.parent = new_parent
+            self.save()
+            Folder.objects.filter(
+                path__startswith=old_subtree_path
+            ).update(
+                path=Concat(
+                    Value(self.subtree_path),
+                    Substr("path", len(old_subtree_path) + 1),
+                    output_field=models.CharField(),
+                ),
+                depth=F("depth") + (self.depth - old_depth),
+            )
+
+    def soft_delete(self):
+        """
+        Move a pasta e toda a sua subárvore para a lixeira.
+
+        Pastas descendentes e arquivos da subárvore são marcados com um
+        UPDATE por tabela, usando o prefixo de path. Itens que já
+        estavam na lixeira mantêm a data original de exclusão.
+
+        Returns:
+            datetime: Data de exclusão aplicada
+        """
+        deleted_at = timezone.now()
+        subtree_path = self.subtree_path
+
+        with transaction.atomic():
+            Folder.objects.filter(
+                Q(pk=self.pk) | Q(path__startswith=subtree_path),
+                is_deleted=False,
+            ).update(is_deleted=True, deleted_at=deleted_at)
+            File.objects.filter(
+                Q(folder=self) | Q(folder__path__startswith=subtree_path),
+                is_deleted=False,
+            ).update(is_deleted=True, deleted_at=deleted_at)
+
+        self.is_deleted = True
+        self.deleted_at = deleted_at
+        return deleted_at
+
+
+class Blob(models.Model):
+    """
+    Conteúdo físico de um arquivo, endereçado pelo SHA-256.
+
+    Vários registros File com o mesmo conteúdo apontam para o mesmo
+    Blob. ref_count guarda quantos File referenciam o blob; quando o
+    último é removido definitivamente, o blob e o arquivo físico são
+    apagados (ver workspace.blobs.release_blobs).
+    """
+
+    sha256 = models.CharField(
+        _("sha256"),
+        max_length=64,
+        unique=True
+    )
+
+    file = models.FileField(
+        _("file"),
+        upload_to=blob_upload_to,
+        max_length=255
+    )
+
+    size = models.BigIntegerField(_("size"))
+
+    ref_count = models.PositiveIntegerField(
+        _("reference count"),
+        default=0
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Blob")
+        verbose_name_plural = _("Blobs")
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return self.sha256
+
 
 class File(models.Model):
     """
     Representa um arquivo armazenado no workspace.
 
     Pode estar dentro de uma pasta (Folder) ou na raiz do workspace.
+    Não podem existir dois arquivos ativos com o mesmo nome
+    (ignorando maiúsculas) no mesmo diretório.
+
+    O conteúdo fica em um Blob compartilhado; o campo file aponta para
+    o mesmo caminho do blob. Arquivos antigos (blob nulo) continuam no
+    caminho gerado por workspace_upload_to até serem migrados com o
+    comando backfill_blobs.
     """
 
     name = models.CharField(
@@ -134,6 +401,15 @@ class File(models.Model):
         related_name="uploaded_files",
     )
 
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.PROTECT,
+        related_name="files",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     is_deleted = models.BooleanField(default=False)
@@ -143,7 +419,163 @@ class File(models.Model):
         ordering = ["-uploaded_at"]
         verbose_name = _("File")
         verbose_name_plural = _("Files")
+        indexes = [
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(is_deleted=True),
+                name="file_trash_idx",
+            ),
+            GinIndex(
+                OpClass(NormalizedName("name"), name="gin_trgm_ops"),
+                condition=Q(is_deleted=False),
+                name="file_name_trgm_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                Lower("name"),
+                "uploader",
+                "folder",
+                condition=Q(is_deleted=False),
+                nulls_distinct=False,
+                name="unique_active_file_name",
+            ),
+        ]
 
     def __str__(self):
         """Representação em string do modelo."""
         return self.name
+
+
+class UploadSession(models.Model):
+    """
+    Sessão de upload em partes (chunked upload) de um arquivo.
+
+    O cliente cria a sessão informando nome e tamanho, envia as partes
+    numeradas em qualquer ordem e finaliza a sessão para criar o File.
+    As partes são gravadas diretamente no arquivo final (storage_name),
+    de modo que uma conexão interrompida só exige reenviar as partes
+    que faltam.
+
+    A sessão vale até expires_at; sessões abandonadas são removidas,
+    com o arquivo reservado, pela tarefa de limpeza agendada na
+    criação (ver workspace.chunked_uploads).
+    """
+
+    STATUS_ACTIVE = "active"
+    STATUS_COMPLETED = "completed"
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, _("Active")),
+        (STATUS_COMPLETED, _("Completed")),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+
+    folder = models.ForeignKey(
+        Folder,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+        null=True,
+        blank=True,
+    )
+
+    name = models.CharField(
+        _("name"),
+        max_length=255
+    )
+
+    size = models.BigIntegerField(_("size"))
+
+    chunk_size = models.PositiveIntegerField(_("chunk size"))
+
+    total_chunks = models.PositiveIntegerField(_("total chunks"))
+
+    storage_name = models.CharField(
+        _("storage name"),
+        max_length=1024
+    )
+
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_ACTIVE,
+    )
+
+    expires_at = models.DateTimeField(_("expires at"))
+
+    file = models.ForeignKey(
+        File,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = _("Upload session")
+        verbose_name_plural = _("Upload sessions")
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="upload_session_expiry_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return f"{self.name} ({self.status})"
+
+    def chunk_length(self, index):
+        """
+        Tamanho esperado, em bytes, da parte de número index.
+        """
+        if index == self.total_chunks - 1:
+            return self.size - index * self.chunk_size
+        return self.chunk_size
+
+
+class UploadChunk(models.Model):
+    """
+    Parte já recebida de uma sessão de upload.
+    """
+
+    session = models.ForeignKey(
+        UploadSession,
+        on_delete=models.CASCADE,
+        related_name="chunks",
+    )
+
+    index = models.PositiveIntegerField(_("index"))
+
+    size = models.PositiveIntegerField(_("size"))
+
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["index"]
+        verbose_name = _("Upload chunk")
+        verbose_name_plural = _("Upload chunks")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "index"],
+                name="unique_upload_chunk_index",
+            ),
+        ]
+
+    def __str__(self):
+        """Representação em string do modelo."""
+        return f"{self.session_id}#{self.index}"
@@ -0,0 +1,126 @@
+"""
+Resolução de nomes duplicados do app workspace.
+
+Este módulo concentra a geração de nomes únicos no formato
+"nome (n).ext" usada por uploads, criação de pastas e cópias:
+- Os nomes irmãos que seguem o padrão são buscados em uma consulta
+- O próximo sufixo livre é calculado em memória
+- A unicidade final é garantida pelas constraints do banco; em caso de
+  corrida entre requisições concorrentes o nome é recalculado e a
+  criação é repetida
+"""
+import os
+
+from django.db import IntegrityError, transaction
+
+MAX_NAME_ATTEMPTS = 5
+
+
+def split_name(name, keep_extension=True):
+    """
+    Separa o nome em base e extensão.
+
+    Args:
+        name: Nome original
+        keep_extension: False para nomes de pasta (sem extensão)
+
+    Returns:
+        tuple: (base, ext)
+    """
+    if not keep_extension:
+        return (name, "")
+    return os.path.splitext(name)
+
+
+def next_free_name(name, taken_names, keep_extension=True):
+    """
+    Calcula em memória o próximo nome livre no formato "nome (n).ext".
+
+    Args:
+        name: Nome desejado
+        taken_names: Conjunto de nomes ocupados (em minúsculas)
+        keep_extension: False para nomes de pasta
+
+    Returns:
+        str: Nome livre
+    """
+    base, ext = split_name(name, keep_extension)
+    new_name = name
+    counter = 1
+    while new_name.lower() in taken_names:
+        new_name = f"{base} ({counter}){ext}"
+        counter += 1
+    return new_name
+
+
+def load_sibling_names(siblings, name, keep_extension=True):
+    """
+    Busca em uma consulta os nomes irmãos que podem colidir com name.
+
+    Args:
+        siblings: QuerySet dos itens ativos no mesmo diretório
+        name: Nome desejado
+        keep_extension: False para nomes de pasta
+
+    Returns:
+        set: Nomes ocupados em minúsculas
+    """
+    base, ext = split_name(name, keep_extension)
+    candidates = siblings.filter(name__istartswith=base)
+    if ext:
+        candidates = candidates.filter(name__iendswith=ext)
+    return {
+        sibling_name.lower()
+        for sibling_name in candidates.values_list("name", flat=True)
+    }
+
+
+def resolve_unique_name(siblings, name, keep_extension=True):
+    """
+    Retorna um nome livre entre os irmãos usando uma única consulta.
+
+    Args:
+        siblings: QuerySet dos itens ativos no mesmo diretório
+        name: Nome desejado
+        keep_extension: False para nomes de pasta
+
+    Returns:
+        str: Nome livre
+    """
+    taken_names = load_sibling_names(siblings, name, keep_extension)
+    return next_free_name(name, taken_names, keep_extension)
+
+
+def create_with_unique_name(siblings, name, create,
+                            keep_extension=True):
+    """
+    Cria um item com nome único, protegido contra corridas.
+
+    O nome é resolvido e a criação é feita em um savepoint. Se outra
+    requisição ocupar o mesmo nome entre a consulta e o INSERT, a
+    constraint de unicidade dispara IntegrityError e o processo é
+    repetido com os nomes atualizados.
+
+    Args:
+        siblings: QuerySet dos itens ativos no mesmo diretório
+        name: Nome desejado
+        create: Função que recebe o nome final e cria o item
+        keep_extension: False para nomes de pasta
+
+    Returns:
+        object: Item retornado por create
+
+    Raises:
+        IntegrityError: Se não houver nome livre após as tentativas
+    """
+    for _ in range(MAX_NAME_ATTEMPTS - 1):
+        new_name = resolve_unique_name(siblings, name, keep_extension)
+        try:
+            with transaction.atomic():
+                return create(new_name)
+        except IntegrityError:
+            continue
+
+    new_name = resolve_unique_name(siblings, name, keep_extension)
+    with transaction.atomic():
+        return create(new_name)
@@ -0,0 +1,254 @@
+"""
+Busca no workspace por nome e por conteúdo.
+
+Uma consulta procura, dentro da subárvore da pasta atual:
+- Pastas e arquivos cujo nome contém o termo, sem diferenciar
+  maiúsculas nem acentos ("relatorio" encontra "Relatório"); o filtro
+  LIKE sobre NormalizedName usa os índices GIN de trigramas
+  folder_name_trgm_idx e file_name_trgm_idx
+- Arquivos cujo texto extraído casa com a consulta no full-text search
+  dos chunks (rag.retrieval, índice chunk_search_idx)
+
+Os três conjuntos são unidos em uma única consulta (UNION, que também
+remove arquivos encontrados pelo nome e pelo conteúdo) e ordenados
+por (nome normalizado, tipo, id). A paginação é por keyset: o cursor
+guarda a chave do último item da página e a próxima página filtra
+"depois dele" em cada ramo da união, de modo que o custo não cresce
+com o número da página.
+"""
+import base64
+import binascii
+import json
+import unicodedata
+from dataclasses import dataclass
+
+from django.contrib.postgres.search import SearchQuery
+from django.core.exceptions import ValidationError
+from django.db.models import F, IntegerField, Q, Value
+
+from rag.models import Chunk
+from rag.retrieval import SEARCH_CONFIG
+
+from .models import File, Folder, NormalizedName
+
+MIN_QUERY_LENGTH = 3
+
+DEFAULT_PAGE_SIZE = 50
+
+MAX_PAGE_SIZE = 200
+
+KIND_FOLDER = 0
+KIND_FILE = 1
+KIND_NAMES = {KIND_FOLDER: "folder", KIND_FILE: "file"}
+
+RESULT_FIELDS = ("id", "name", "kind", "sort_name", "location")
+
+
+@dataclass
+class SearchPage:
+    """Uma página de resultados da busca."""
+    results: list
+    next_cursor: str | None
+
+
+def normalize_name(value):
+    """
+    Normaliza um texto como workspace_normalize_name no banco.
+
+    Remove acentos (decomposição NFKD sem as marcas combinantes) e
+    converte para minúsculas, o equivalente a lower(unaccent()) para
+    os caracteres do português.
+    """
+    value = unicodedata.normalize("NFKD", value.lower())
+    return "".join(
+        char for char in value if not unicodedata.combining(char)
+    )
+
+
+def encode_cursor(item):
+    """
+    Codifica a chave de ordenação de um resultado em um cursor opaco.
+    """
+    key = [item["sort_name"], item["kind"], item["id"]]
+    return base64.urlsafe_b64encode(
+        json.dumps(key, ensure_ascii=False).encode("utf-8")
+    ).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica um cursor gerado por encode_cursor.
+
+    Returns:
+        tuple: (nome normalizado, tipo, id)
+
+    Raises:
+        ValidationError: Se o cursor for inválido
+    """
+    try:
+        sort_name, kind, item_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValidationError("Cursor inválido.") from e
+    if not (
+        isinstance(sort_name, str)
+        and kind in KIND_NAMES
+        and isinstance(item_id, int)
+    ):
+        raise ValidationError("Cursor inválido.")
+    return (sort_name, kind, item_id)
+
+
+def _after(kind, cursor):
+    """
+    Condição "depois do cursor" para um ramo da união.
+
+    Como o tipo é constante em cada ramo, a comparação da chave
+    (nome, tipo, id) se reduz a uma condição sobre nome e id.
+    """
+    sort_name, cursor_kind, item_id = cursor
+    if kind > cursor_kind:
+        return Q(sort_name__gte=sort_name)
+    if kind < cursor_kind:
+        return Q(sort_name__gt=sort_name)
+    return Q(sort_name__gt=sort_name) | Q(
+        sort_name=sort_name, id__gt=item_id
+    )
+
+
+def _scoped_folders(user, folder):
+    """Pastas ativas do usuário dentro da subárvore de folder."""
+    folders = Folder.objects.filter(owner=user, is_deleted=False)
+    if folder is not None:
+        folders = folders.filter(path__startswith=folder.subtree_path)
+    return folders
+
+
+def _scoped_files(user, folder):
+    """Arquivos ativos do usuário dentro da subárvore de folder."""
+    files = File.objects.filter(uploader=user, is_deleted=False)
+    if folder is not None:
+        files = files.filter(
+            Q(folder=folder) | Q(folder__path__startswith=folder.subtree_path)
+        )
+    return files
+
+
+def _branch(queryset, kind, cursor, name_term=None):
+    """
+    Prepara um ramo da união com as colunas de RESULT_FIELDS.
+
+    Args:
+        queryset: Pastas ou arquivos já restritos ao escopo
+        kind: KIND_FOLDER ou KIND_FILE
+        cursor: Chave decodificada do cursor (ou None)
+        name_term: Termo normalizado que o nome deve conter (opcional)
+    """
+    parent_field = "parent_id" if kind == KIND_FOLDER else "folder_id"
+    queryset = queryset.annotate(
+        kind=Value(kind, output_field=IntegerField()),
+        sort_name=NormalizedName("name"),
+        location=F(parent_field),
+    )
+    if name_term:
+        queryset = queryset.filter(sort_name__contains=name_term)
+    if cursor is not None:
+        queryset = queryset.filter(_after(kind, cursor))
+    return queryset.order_by().values(*RESULT_FIELDS)
+
+
+def _content_matches(file_ids, search_query):
+    """
+    Primeiro chunk que casa com a consulta em cada arquivo.
+
+    Returns:
+        dict: {file_id: dados do chunk}
+    """
+    chunks = (
+        Chunk.objects.filter(file_id__in=file_ids, search_vector=search_query)
+        .order_by("file_id", "ordinal")
+        .distinct("file_id")
+        .values(
+            "file_id",
+            "id",
+            "ordinal",
+            "page_start",
+            "page_end",
+            "char_start",
+            "char_end",
+        )
+    )
+    return {chunk.pop("file_id"): chunk for chunk in chunks}
+
+
+def search_workspace(user, query, folder=None, cursor=None,
+                     limit=DEFAULT_PAGE_SIZE):
+    """
+    Busca pastas e arquivos por nome e arquivos por conteúdo.
+
+    Args:
+        user: Dono do workspace
+        query: Texto da consulta
+        folder: Restringe à subárvore desta pasta (opcional)
+        cursor: Cursor da página anterior (next_cursor)
+        limit: Resultados por página (até MAX_PAGE_SIZE)
+
+    Returns:
+        SearchPage: Resultados e cursor da próxima página (None na
+            última)
+
+    Raises:
+        ValidationError: Se o cursor for inválido
+    """
+    query = query.strip()
+    term = normalize_name(query)
+    if len(term) < MIN_QUERY_LENGTH:
+        return SearchPage(results=[], next_cursor=None)
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type="websearch"
+    )
+
+    files = _scoped_files(user, folder)
+    folders_by_name = _branch(
+        _scoped_folders(user, folder), KIND_FOLDER, after, term
+    )
+    files_by_name = _branch(files, KIND_FILE, after, term)
+    files_by_content = _branch(
+        files.filter(
+            pk__in=Chunk.objects.filter(
+                search_vector=search_query
+            ).values("file_id")
+        ),
+        KIND_FILE,
+        after,
+    )
+
+    rows = list(
+        folders_by_name.union(files_by_name, files_by_content)
+        .order_by("sort_name", "kind", "id")[:limit + 1]
+    )
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    rows = rows[:limit]
+
+    matches = _content_matches(
+        [row["id"] for row in rows if row["kind"] == KIND_FILE],
+        search_query,
+    )
+    results = []
+    for row in rows:
+        item = {
+            "type": KIND_NAMES[row["kind"]],
+            "id": row["id"],
+            "name": row["name"],
+            "folder": row["location"],
+            "name_match": term in row["sort_name"],
+        }
+        if row["kind"] == KIND_FILE:
+            item["content_match"] = matches.get(row["id"])
+        results.append(item)
+
+    return SearchPage(results=results, next_cursor=next_cursor)
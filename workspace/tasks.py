@@ -0,0 +1,29 @@
+"""
+Tarefas em segundo plano do app workspace.
+
+Registradas na fila do app jobs (ver jobs.queue.task) e executadas
+pelos workers do comando run_workers.
+"""
+from jobs.models import Job
+from jobs.queue import task
+
+from .chunked_uploads import SESSION_PURGE_TASK, purge_expired_sessions
+from .trash import PURGE_TASK, purge_trash
+
+PURGE_TIMEOUT = 60 * 60
+
+
+@task(PURGE_TASK, priority=Job.PRIORITY_BULK, timeout=PURGE_TIMEOUT)
+def purge_expired_trash():
+    """
+    Remove definitivamente os itens expirados da lixeira.
+    """
+    purge_trash()
+
+
+@task(SESSION_PURGE_TASK, priority=Job.PRIORITY_BULK, timeout=PURGE_TIMEOUT)
+def purge_upload_sessions():
+    """
+    Remove as sessões de upload em partes vencidas.
+    """
+    purge_expired_sessions()
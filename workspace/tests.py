@@ -1,14 +1,1074 @@
 """
 Testes do app workspace.
 
-Este módulo deve conter os testes unitários e de integração
-para os modelos, views e formulários do workspace.
+Cobrem o storage deduplicado (blobs gravados por transações
+desfeitas), o upload em partes (finalização, vencimento e limpeza das
+sessões), a busca por nome e por conteúdo, o caminho materializado das
+pastas, o upload em lote, os nomes únicos, os upload handlers, a
+lixeira, o acesso a itens de outro usuário e o cache das listagens.
+Os arquivos são gravados em um MEDIA_ROOT temporário por teste.
 
 TODO: Implementar testes para:
-- Criação, edição e exclusão de pastas
-- Upload, renomeação e exclusão de arquivos
-- Validações de tipo e tamanho de arquivo
-- Navegação hierárquica de pastas
-- Movimentação de itens
-- Soft delete de pastas e arquivos
+- Criação de pastas pela view
+- Upload de arquivos e pastas pelos formulários tradicionais
 """
+import hashlib
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from jobs.models import Job
+from rag.models import Chunk
+from rag.retrieval import update_search_vectors
+
+from . import cache as workspace_cache
+from .blobs import ORPHAN_BLOB_GRACE, store_uploaded_file, sweep_orphan_blobs
+from .chunked_uploads import (
+    SESSION_PURGE_TASK,
+    create_session,
+    finalize_session,
+    purge_expired_sessions,
+    write_chunk,
+)
+from .models import Blob, File, Folder, UploadSession
+from .naming import (
+    MAX_NAME_ATTEMPTS,
+    create_with_unique_name,
+    resolve_unique_name,
+)
+from .search import search_workspace
+from .upload_handlers import get_upload_rejections, get_uploaded_files
+from .uploads import PendingFile, build_folder_tree, bulk_create_files
+
+User = get_user_model()
+
+CONTENT = b"conteudo do arquivo de teste\n"
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "workspace": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "workspace-tests",
+    },
+}
+
+folder_path_migration = importlib.import_module(
+    "workspace.migrations.0004_folder_path"
+)
+
+
+class MediaRootTestCase(TestCase):
+    """TestCase com MEDIA_ROOT temporário e fila em banco."""
+
+    def setUp(self):
+        """Cria o MEDIA_ROOT temporário e o usuário."""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            JOBS_BACKEND="database",
+            WORKSPACE_UPLOAD_CHUNK_BYTES=16,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create(username="ana")
+
+    def upload(self, name="notas.txt", content=CONTENT):
+        """Cria uma sessão e envia todas as partes."""
+        session = create_session(self.user, None, name, len(content))
+        for index in range(session.total_chunks):
+            start = index * session.chunk_size
+            chunk = content[start:start + session.chunk_size]
+            write_chunk(session, index, io.BytesIO(chunk), len(chunk))
+        return session
+
+
+def _age(name, delta):
+    """Recua a data de modificação de um arquivo do storage."""
+    past = time.time() - delta.total_seconds()
+    os.utime(default_storage.path(name), (past, past))
+
+
+def _statements(queries, prefix):
+    """SQL capturado que começa com o prefixo dado."""
+    return [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith(prefix)
+    ]
+
+
+def _store_and_roll_back(uploaded_file):
+    """Guarda um arquivo em uma transação externa que é desfeita."""
+    with transaction.atomic():
+        blob = store_uploaded_file(uploaded_file)
+        transaction.set_rollback(True)
+    return blob
+
+
+class BlobStorageTests(MediaRootTestCase):
+    """Arquivos de blobs gravados por transações desfeitas."""
+
+    def blob_files(self):
+        """Arquivos existentes em MEDIA_ROOT/blobs."""
+        return [
+            filename
+            for _, _, filenames in os.walk(
+                os.path.join(self.media_root, "blobs")
+            )
+            for filename in filenames
+        ]
+
+    def test_failed_insert_deletes_written_file(self):
+        """Se a linha do blob falha, o arquivo gravado é apagado."""
+        with (
+            mock.patch.object(
+                Blob.objects, "bulk_create", side_effect=RuntimeError
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            store_uploaded_file(SimpleUploadedFile("a.txt", CONTENT))
+
+        assert self.blob_files() == []
+
+    def test_sweep_deletes_files_of_rolled_back_blobs(self):
+        """Blobs de uma transação externa desfeita são varridos."""
+        kept = store_uploaded_file(SimpleUploadedFile("a.txt", CONTENT))
+        orphan = _store_and_roll_back(
+            SimpleUploadedFile("b.txt", b"desfeito")
+        )
+
+        assert len(self.blob_files()) == len([kept, orphan])
+        assert sweep_orphan_blobs() == 0
+
+        old_enough = ORPHAN_BLOB_GRACE + timedelta(hours=1)
+        _age(orphan.file.name, old_enough)
+        _age(kept.file.name, old_enough)
+        assert sweep_orphan_blobs() == len(b"desfeito")
+        assert not default_storage.exists(orphan.file.name)
+        assert default_storage.exists(kept.file.name)
+
+
+class FinalizeSessionTests(MediaRootTestCase):
+    """Finalização das sessões de upload em partes."""
+
+    def test_moves_assembled_file_after_commit(self):
+        """O arquivo montado vira o blob só depois do commit."""
+        session = self.upload()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            file = finalize_session(session)
+            assert default_storage.exists(session.storage_name)
+
+        assert not default_storage.exists(session.storage_name)
+        with default_storage.open(file.blob.file.name, "rb") as stored:
+            assert stored.read() == CONTENT
+
+    def test_failed_finalize_can_be_retried(self):
+        """Uma falha depois do blob não perde o arquivo montado."""
+        session = self.upload()
+
+        with (
+            mock.patch(
+                "workspace.chunked_uploads.create_with_unique_name",
+                side_effect=RuntimeError("falha simulada"),
+            ),
+            self.captureOnCommitCallbacks(execute=True),
+            pytest.raises(RuntimeError),
+        ):
+            finalize_session(session)
+
+        assert default_storage.exists(session.storage_name)
+        assert not Blob.objects.exists()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            file = finalize_session(session)
+        assert file.name == "notas.txt"
+        assert Blob.objects.get().ref_count == 1
+
+    def test_duplicate_content_reuses_blob(self):
+        """Conteúdo repetido descarta o arquivo montado."""
+        first = self.upload("a.txt")
+        with self.captureOnCommitCallbacks(execute=True):
+            finalize_session(first)
+        second = self.upload("b.txt")
+        with self.captureOnCommitCallbacks(execute=True):
+            file = finalize_session(second)
+
+        assert not default_storage.exists(second.storage_name)
+        assert Blob.objects.get().ref_count == len([first, second])
+        assert default_storage.exists(file.blob.file.name)
+
+    @override_settings(WORKSPACE_UPLOAD_WORKERS=0)
+    def test_finalize_after_purge_returns_gone(self):
+        """Refinalizar uma sessão cujo arquivo foi expurgado dá 410."""
+        session = self.upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            file = finalize_session(session)
+        File.objects.filter(pk=file.pk).delete()
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("finalize_upload", args=[session.id])
+        )
+
+        assert response.status_code == HTTPStatus.GONE
+        assert "error" in response.json()
+
+
+def _expire(session):
+    """Faz a sessão vencer."""
+    UploadSession.objects.filter(pk=session.pk).update(
+        expires_at=timezone.now() - timedelta(minutes=1)
+    )
+    session.refresh_from_db()
+
+
+class SessionExpiryTests(MediaRootTestCase):
+    """Vencimento e limpeza das sessões de upload."""
+
+    def test_schedules_one_purge_per_hour(self):
+        """Sessões que vencem na mesma hora dividem uma limpeza."""
+        self.upload("a.txt")
+        self.upload("b.txt")
+
+        jobs = Job.objects.filter(task=SESSION_PURGE_TASK)
+        assert jobs.count() == 1
+        session = UploadSession.objects.first()
+        assert jobs.get().run_after > session.expires_at
+
+    def test_expired_session_rejects_chunks_and_finalize(self):
+        """Uma sessão vencida não recebe partes nem é finalizada."""
+        session = self.upload()
+        _expire(session)
+
+        with pytest.raises(ValidationError, match="expirada"):
+            write_chunk(session, 0, io.BytesIO(CONTENT[:16]), 16)
+        with pytest.raises(ValidationError, match="expirada"):
+            finalize_session(session)
+
+    def test_purge_removes_expired_sessions_and_files(self):
+        """A limpeza apaga sessões vencidas, partes e arquivos."""
+        abandoned = self.upload("abandonado.txt")
+        completed = self.upload("concluido.txt", b"outro conteudo")
+        with self.captureOnCommitCallbacks(execute=True):
+            file = finalize_session(completed)
+        active = self.upload("ativo.txt", b"em andamento")
+        _expire(abandoned)
+        _expire(completed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            removed = purge_expired_sessions(batch_size=1)
+
+        assert removed == len([abandoned, completed])
+        assert list(
+            UploadSession.objects.values_list("pk", flat=True)
+        ) == [active.pk]
+        assert not default_storage.exists(abandoned.storage_name)
+        assert default_storage.exists(active.storage_name)
+        assert default_storage.exists(
+            File.objects.get(pk=file.pk).file.name
+        )
+
+
+class WorkspaceSearchTests(MediaRootTestCase):
+    """Busca por nome e por conteúdo dentro de uma subárvore."""
+
+    def setUp(self):
+        """Pasta com subpasta, arquivos e um arquivo com texto."""
+        super().setUp()
+        self.reports = Folder.objects.create(
+            name="Relatórios", owner=self.user
+        )
+        self.archive = Folder.objects.create(
+            name="Arquivo", owner=self.user, parent=self.reports
+        )
+        self.final = self.create_file("relatorio-final.pdf", self.archive)
+        self.notes = self.create_file("notas.txt", self.reports)
+        chunk = Chunk.objects.create(
+            file=self.notes, ordinal=0, text="Previsão do orçamento anual",
+            content_hash="0" * 64, token_count=4, page_start=1, page_end=1,
+            char_start=0, char_end=27,
+        )
+        update_search_vectors([chunk.pk])
+        self.chunk = chunk
+
+    def create_file(self, name, folder=None, user=None):
+        """Cria um File ativo com conteúdo próprio."""
+        blob = store_uploaded_file(SimpleUploadedFile(name, name.encode()))
+        return File.objects.create(
+            name=name, file=blob.file.name, blob=blob, folder=folder,
+            uploader=user or self.user,
+        )
+
+    def test_names_ignore_case_and_accents(self):
+        """"RELATORIO" encontra "Relatórios" e "relatorio-final.pdf"."""
+        other = User.objects.create(username="bia")
+        self.create_file("relatorio.txt", user=other)
+
+        page = search_workspace(self.user, "RELATORIO")
+
+        assert [(item["type"], item["name"]) for item in page.results] == [
+            ("file", "relatorio-final.pdf"),
+            ("folder", "Relatórios"),
+        ]
+        assert all(item["name_match"] for item in page.results)
+        assert page.next_cursor is None
+
+    def test_content_matches_point_to_the_chunk(self):
+        """Arquivos achados pelo texto trazem o primeiro chunk."""
+        page = search_workspace(self.user, "orçamentos", folder=self.reports)
+
+        assert [item["id"] for item in page.results] == [self.notes.pk]
+        result = page.results[0]
+        assert not result["name_match"]
+        assert result["content_match"]["id"] == self.chunk.pk
+
+    def test_scope_is_the_folder_subtree_without_trash(self):
+        """Só a subárvore da pasta entra; a lixeira fica de fora."""
+        assert [
+            item["name"]
+            for item in search_workspace(
+                self.user, "relat", folder=self.archive
+            ).results
+        ] == ["relatorio-final.pdf"]
+
+        File.objects.filter(pk=self.final.pk).update(is_deleted=True)
+        assert search_workspace(
+            self.user, "final", folder=self.reports
+        ).results == []
+        assert search_workspace(self.user, "re").results == []
+
+    def test_keyset_pages_cover_every_result_once(self):
+        """As páginas seguem o cursor sem repetir nem pular itens."""
+        for number in range(5):
+            self.create_file(f"ata {number}.txt", self.archive)
+
+        names = []
+        cursor = None
+        while True:
+            page = search_workspace(self.user, "ata", cursor=cursor, limit=2)
+            names += [item["name"] for item in page.results]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert names == [f"ata {number}.txt" for number in range(5)]
+        with pytest.raises(ValidationError, match="Cursor"):
+            search_workspace(self.user, "ata", cursor="nao-e-base64")
+
+    def test_view_returns_json_and_rejects_bad_cursors(self):
+        """A view devolve JSON e 400 para um cursor inválido."""
+        self.client.force_login(self.user)
+        url = reverse("workspace_search")
+
+        response = self.client.get(url, {"q": "notas"})
+        assert response.json()["results"][0]["id"] == self.notes.pk
+        response = self.client.get(url, {"q": "notas", "cursor": "x"})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+class FolderPathTests(TestCase):
+    """Caminho materializado (path e depth) das pastas."""
+
+    def setUp(self):
+        """Árvore a/b/c/d e destino t/u."""
+        self.user = User.objects.create(username="ana")
+        self.a = self.folder("a")
+        self.b = self.folder("b", self.a)
+        self.c = self.folder("c", self.b)
+        self.d = self.folder("d", self.c)
+        self.t = self.folder("t")
+        self.u = self.folder("u", self.t)
+
+    def folder(self, name, parent=None):
+        """Cria uma pasta do usuário."""
+        return Folder.objects.create(
+            name=name, owner=self.user, parent=parent
+        )
+
+    def test_migration_backfills_nested_trees(self):
+        """A migração preenche path e depth nível por nível."""
+        expected = dict(
+            Folder.objects.values_list("pk", "path")
+        )
+        Folder.objects.update(path="/", depth=0)
+
+        folder_path_migration.populate_folder_paths(apps, None)
+
+        assert dict(Folder.objects.values_list("pk", "path")) == expected
+        self.d.refresh_from_db()
+        assert self.d.path == f"/{self.a.pk}/{self.b.pk}/{self.c.pk}/"
+        assert self.d.depth == len([self.a, self.b, self.c])
+
+    def test_move_rewrites_the_subtree_in_one_update(self):
+        """O prefixo dos descendentes é trocado em um único UPDATE."""
+        with CaptureQueriesContext(connection) as queries:
+            self.b.move_to(self.u)
+
+        updates = _statements(queries, 'UPDATE "workspace_folder"')
+        assert len(updates) == len([self.b, "descendentes"])
+        self.c.refresh_from_db()
+        self.d.refresh_from_db()
+        assert self.b.path == self.u.subtree_path
+        assert self.c.path == self.b.subtree_path
+        assert self.d.path == self.c.subtree_path
+        assert [self.b.depth, self.c.depth, self.d.depth] == [2, 3, 4]
+
+        self.b.move_to(None)
+        self.d.refresh_from_db()
+        assert self.d.path == f"/{self.b.pk}/{self.c.pk}/"
+        assert self.d.depth == len([self.b, self.c])
+
+    def test_ancestry_checks_and_ancestors(self):
+        """Ancestrais em uma consulta, da raiz até o pai imediato."""
+        with self.assertNumQueries(1):
+            ancestors = list(self.d.get_ancestors())
+
+        assert ancestors == [self.a, self.b, self.c]
+        assert self.d.is_descendant_of(self.a)
+        assert self.d.is_descendant_of(self.c)
+        assert not self.d.is_descendant_of(self.d)
+        assert not self.a.is_descendant_of(self.d)
+        assert not self.u.is_descendant_of(self.a)
+        assert list(self.b.get_descendants().order_by("depth")) == [
+            self.c, self.d
+        ]
+
+
+class BulkUploadTests(MediaRootTestCase):
+    """Criação em lote da árvore de pastas e dos arquivos."""
+
+    def setUp(self):
+        """Cria a pasta raiz do upload."""
+        super().setUp()
+        self.root = Folder.objects.create(name="envio", owner=self.user)
+
+    def test_folder_tree_uses_one_query_per_level(self):
+        """Cada nível custa uma consulta e um bulk_create."""
+        paths = ["a", "a/b", "a/b/c", "a/d", "e", "e/f"]
+        with CaptureQueriesContext(connection) as queries:
+            cache = build_folder_tree(self.user, self.root, paths)
+
+        levels = len(["a e", "b d f", "c"])
+        assert len(_statements(queries, "SELECT")) == levels
+        assert len(_statements(queries, "INSERT")) == levels
+        assert cache["a/b/c"].parent == cache["a/b"]
+        assert cache["a/b/c"].path == cache["a/b"].subtree_path
+        assert cache["e/f"].depth == cache["e"].depth + 1
+
+    def test_folder_tree_reuses_folders_ignoring_case(self):
+        """Pastas existentes são reaproveitadas sem novo INSERT."""
+        existing = Folder.objects.create(
+            name="Docs", owner=self.user, parent=self.root
+        )
+
+        cache = build_folder_tree(self.user, self.root, ["docs", "docs/x"])
+
+        assert cache["docs"] == existing
+        assert cache["docs/x"].parent == existing
+        assert Folder.objects.filter(parent=self.root).count() == 1
+
+    def test_files_are_inserted_in_batches(self):
+        """Os arquivos entram em lotes com nomes livres em memória."""
+        File.objects.create(
+            name="nota.txt", folder=self.root, uploader=self.user
+        )
+        pending = [
+            PendingFile(
+                SimpleUploadedFile("nota.txt", CONTENT + str(index).encode()),
+                "nota.txt",
+                "",
+            )
+            for index in range(5)
+        ]
+        pending.append(
+            PendingFile(SimpleUploadedFile("x.exe", CONTENT), "x.exe", "")
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            result = bulk_create_files(
+                self.user, pending, {"": self.root}, batch_size=2
+            )
+
+        inserts = _statements(queries, 'INSERT INTO "workspace_file"')
+        assert len(inserts) == len(["2", "2", "1"])
+        assert result.uploaded_count == len(pending) - 1
+        assert result.error_count == 1
+        assert sorted(f.name for f in result.created_files) == [
+            f"nota ({index}).txt" for index in range(1, 6)
+        ]
+
+
+class UniqueNameTests(TestCase):
+    """Criação de itens com nomes únicos entre os irmãos."""
+
+    def setUp(self):
+        """Cria o usuário e o conjunto de pastas na raiz."""
+        self.user = User.objects.create(username="ana")
+        self.siblings = Folder.objects.filter(
+            owner=self.user, parent=None, is_deleted=False
+        )
+        self.attempts = []
+
+    def create_folder(self, name):
+        """Cria a pasta na raiz registrando a tentativa."""
+        self.attempts.append(name)
+        return Folder.objects.create(name=name, owner=self.user)
+
+    def create_unique(self, name, keep_extension=False):
+        """Cria uma pasta com create_with_unique_name."""
+        return create_with_unique_name(
+            self.siblings, name, self.create_folder, keep_extension
+        )
+
+    def test_collisions_ignore_case(self):
+        """Um irmão com outra caixa também ocupa o nome."""
+        self.create_folder("Relatorio.PDF")
+
+        folder = self.create_unique("relatorio.pdf", keep_extension=True)
+
+        assert folder.name == "relatorio (1).pdf"
+
+    def test_suffix_takes_the_next_free_number(self):
+        """Os sufixos seguem a sequência (1), (2), ..."""
+        names = [self.create_unique("Plano").name for _ in range(4)]
+        self.create_folder("Plano (5)")
+
+        assert names == ["Plano", "Plano (1)", "Plano (2)", "Plano (3)"]
+        assert self.create_unique("plano").name == "plano (4)"
+        assert self.create_unique("plano").name == "plano (6)"
+
+    def test_concurrent_insert_is_retried_with_a_new_name(self):
+        """Um nome ocupado entre a consulta e o INSERT é recalculado."""
+        self.create_folder("Plano")
+        self.attempts.clear()
+        stale_names = iter(["Plano"])
+
+        def resolve(siblings, name, keep_extension=True):
+            return next(stale_names, None) or resolve_unique_name(
+                siblings, name, keep_extension
+            )
+
+        with mock.patch("workspace.naming.resolve_unique_name", resolve):
+            folder = self.create_unique("Plano")
+
+        assert folder.name == "Plano (1)"
+        assert self.attempts == ["Plano", "Plano (1)"]
+
+    def test_gives_up_after_max_attempts(self):
+        """Sem nome livre após as tentativas, o IntegrityError sobe."""
+        self.create_folder("Plano")
+        self.attempts.clear()
+
+        with (
+            mock.patch(
+                "workspace.naming.resolve_unique_name", return_value="Plano"
+            ),
+            pytest.raises(IntegrityError),
+        ):
+            self.create_unique("Plano")
+
+        assert self.attempts == ["Plano"] * MAX_NAME_ATTEMPTS
+
+
+class UploadHandlerTests(TestCase):
+    """Validação e hash dos arquivos durante a leitura do multipart."""
+
+    def setUp(self):
+        """Cria a fábrica de requisições."""
+        self.factory = RequestFactory()
+
+    def post_files(self, *uploaded_files):
+        """Interpreta um POST multipart com os handlers do projeto."""
+        request = self.factory.post("/", {"files": list(uploaded_files)})
+        return (
+            get_uploaded_files(request, "files"),
+            [
+                rejection.file_name
+                for rejection in get_upload_rejections(request, "files")
+            ],
+        )
+
+    def test_invalid_files_are_skipped(self):
+        """Extensão proibida e assinatura errada não viram arquivos."""
+        accepted, rejected = self.post_files(
+            SimpleUploadedFile("virus.exe", CONTENT),
+            SimpleUploadedFile("falso.pdf", CONTENT),
+            SimpleUploadedFile("notas.txt", CONTENT),
+        )
+
+        assert [f.name for f in accepted] == ["notas.txt"]
+        assert rejected == ["virus.exe", "falso.pdf"]
+
+    def test_oversized_files_are_skipped(self):
+        """O tamanho recebido acima do limite descarta o arquivo."""
+        limit = len(CONTENT) - 1
+        with (
+            mock.patch("workspace.upload_handlers.MAX_FILE_BYTES", limit),
+            mock.patch("workspace.validators.MAX_FILE_BYTES", limit),
+        ):
+            accepted, rejected = self.post_files(
+                SimpleUploadedFile("grande.txt", CONTENT),
+                SimpleUploadedFile("pequeno.txt", CONTENT[:limit]),
+            )
+
+        assert [f.name for f in accepted] == ["pequeno.txt"]
+        assert rejected == ["grande.txt"]
+
+    def test_accepted_files_carry_their_sha256(self):
+        """Cada arquivo aceito recebe o SHA-256 do seu conteúdo."""
+        accepted, _ = self.post_files(
+            SimpleUploadedFile("ruim.exe", b"x"),
+            SimpleUploadedFile("a.txt", CONTENT),
+            SimpleUploadedFile("b.csv", b"a;b\n1;2\n"),
+        )
+
+        assert [f.sha256 for f in accepted] == [
+            hashlib.sha256(CONTENT).hexdigest(),
+            hashlib.sha256(b"a;b\n1;2\n").hexdigest(),
+        ]
+
+
+class TrashTests(MediaRootTestCase):
+    """Exclusão de subárvores e limpeza definitiva da lixeira."""
+
+    def setUp(self):
+        """Árvore a/b/c com arquivos em a e c."""
+        super().setUp()
+        self.a = Folder.objects.create(name="a", owner=self.user)
+        self.b = Folder.objects.create(
+            name="b", owner=self.user, parent=self.a
+        )
+        self.c = Folder.objects.create(
+            name="c", owner=self.user, parent=self.b
+        )
+        self.other = Folder.objects.create(name="outra", owner=self.user)
+
+    def create_file(self, name, folder, content=CONTENT):
+        """Cria um arquivo com blob no storage deduplicado."""
+        blob = store_uploaded_file(SimpleUploadedFile(name, content))
+        return File.objects.create(
+            name=name,
+            file=blob.file.name,
+            blob=blob,
+            folder=folder,
+            uploader=self.user,
+        )
+
+    def test_folder_delete_marks_the_subtree_at_once(self):
+        """A subárvore inteira recebe o mesmo deleted_at."""
+        self.create_file("a.txt", self.a)
+        self.create_file("c.txt", self.c)
+        kept = self.create_file("fora.txt", self.other)
+        earlier = self.create_file("antes.txt", self.b)
+        earlier_at = timezone.now() - timedelta(days=3)
+        File.objects.filter(pk=earlier.pk).update(
+            is_deleted=True, deleted_at=earlier_at
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted_at = self.a.soft_delete()
+
+        assert not _statements(queries, "SELECT")
+        assert len(_statements(queries, "UPDATE")) == len(
+            ["pastas", "arquivos"]
+        )
+
+        folders = Folder.objects.filter(
+            pk__in=[self.a.pk, self.b.pk, self.c.pk]
+        )
+        assert set(folders.values_list("deleted_at", flat=True)) == {
+            deleted_at
+        }
+        assert set(
+            File.objects.filter(folder__in=folders)
+            .exclude(pk=earlier.pk)
+            .values_list("deleted_at", flat=True)
+        ) == {deleted_at}
+        earlier.refresh_from_db()
+        kept.refresh_from_db()
+        assert earlier.deleted_at == earlier_at
+        assert not kept.is_deleted
+        assert not Folder.objects.get(pk=self.other.pk).is_deleted
+
+    def test_purge_removes_only_expired_items_and_releases_blobs(self):
+        """A limpeza respeita a retenção e libera os blobs sem uso."""
+        shared = self.create_file("igual.txt", self.c)
+        self.create_file("copia.txt", self.other)
+        unique = self.create_file("unico.txt", self.b, b"so aqui\n")
+        recent = self.create_file("recente.txt", self.other, b"novo\n")
+        self.a.soft_delete()
+        File.objects.filter(pk=recent.pk).update(
+            is_deleted=True, deleted_at=timezone.now()
+        )
+        Folder.objects.filter(pk=self.a.pk).update(
+            deleted_at=timezone.now() - timedelta(days=1)
+        )
+        old = timezone.now() - timedelta(days=31)
+        Folder.objects.filter(pk__in=[self.b.pk, self.c.pk]).update(
+            deleted_at=old
+        )
+        File.objects.filter(pk__in=[shared.pk, unique.pk]).update(
+            deleted_at=old
+        )
+        unique_name = unique.blob.file.name
+        out = io.StringIO()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("purge_trash", days=30, stdout=out)
+
+        assert "2 arquivo(s) e 2 pasta(s)" in out.getvalue()
+        assert not File.objects.filter(pk__in=[shared.pk, unique.pk])
+        assert list(
+            Folder.objects.filter(is_deleted=True).values_list(
+                "pk", flat=True
+            )
+        ) == [self.a.pk]
+        assert Blob.objects.get(pk=shared.blob_id).ref_count == 1
+        assert not Blob.objects.filter(pk=unique.blob_id).exists()
+        assert not default_storage.exists(unique_name)
+        assert File.objects.filter(pk=recent.pk).exists()
+
+
+class OwnershipTests(MediaRootTestCase):
+    """Views assíncronas não alcançam itens de outro usuário."""
+
+    def setUp(self):
+        """Pasta e arquivo de ana; bia é quem faz as requisições."""
+        super().setUp()
+        self.folder = Folder.objects.create(name="Privada", owner=self.user)
+        self.file = File.objects.create(
+            name="segredo.txt", folder=self.folder, uploader=self.user
+        )
+        self.intruder = User.objects.create(username="bia")
+        self.own_folder = Folder.objects.create(
+            name="Minha", owner=self.intruder
+        )
+        self.client.force_login(self.intruder)
+
+    def post(self, name, data=None, args=()):
+        """POST em uma view do workspace."""
+        return self.client.post(reverse(name, args=args), data or {})
+
+    def test_folder_views_return_not_found(self):
+        """Excluir, renomear e abrir a pasta alheia dá 404."""
+        responses = [
+            self.post("delete_folder", args=[self.folder.pk]),
+            self.post(
+                "rename_folder", {"name": "Minha agora"}, [self.folder.pk]
+            ),
+            self.client.get(
+                reverse("workspace_home"), {"folder": self.folder.pk}
+            ),
+        ]
+
+        assert {response.status_code for response in responses} == {
+            HTTPStatus.NOT_FOUND
+        }
+        self.folder.refresh_from_db()
+        assert self.folder.name == "Privada"
+        assert not self.folder.is_deleted
+
+    def test_file_views_return_not_found(self):
+        """Excluir e renomear o arquivo alheio dá 404."""
+        responses = [
+            self.post("delete_file", args=[self.file.pk]),
+            self.post("rename_file", {"name": "meu.txt"}, [self.file.pk]),
+        ]
+
+        assert {response.status_code for response in responses} == {
+            HTTPStatus.NOT_FOUND
+        }
+        self.file.refresh_from_db()
+        assert self.file.name == "segredo.txt"
+        assert not self.file.is_deleted
+
+    def test_move_returns_not_found(self):
+        """Mover item alheio, ou para uma pasta alheia, dá 404."""
+        own_file = File.objects.create(
+            name="meu.txt", uploader=self.intruder
+        )
+        responses = [
+            self.post("move_item", {
+                "item_type": "folder",
+                "item_id": self.folder.pk,
+                "target_folder": self.own_folder.pk,
+            }),
+            self.post("move_item", {
+                "item_type": "file",
+                "item_id": self.file.pk,
+                "target_folder": self.own_folder.pk,
+            }),
+            self.post("move_item", {
+                "item_type": "file",
+                "item_id": own_file.pk,
+                "target_folder": self.folder.pk,
+            }),
+        ]
+
+        assert {response.status_code for response in responses} == {
+            HTTPStatus.NOT_FOUND
+        }
+        self.folder.refresh_from_db()
+        self.file.refresh_from_db()
+        own_file.refresh_from_db()
+        assert self.folder.parent_id is None
+        assert self.file.folder_id == self.folder.pk
+        assert own_file.folder_id is None
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VersionedCacheTests(SimpleTestCase):
+    """Chaves versionadas do cache do workspace e falhas do cache."""
+
+    def setUp(self):
+        """Limpa o cache e conta as chamadas de compute."""
+        self.cache = workspace_cache.get_workspace_cache()
+        self.cache.clear()
+        self.computed = []
+
+    def compute(self):
+        """Valor de teste, registrando cada cálculo."""
+        self.computed.append(len(self.computed) + 1)
+        return self.computed[-1]
+
+    def test_versions_are_created_once_and_bumped_per_namespace(self):
+        """A versão persiste até o bump, que só troca a do namespace."""
+        first = workspace_cache.get_versions(["a", "b"])
+
+        assert set(first) == {"a", "b"}
+        assert workspace_cache.get_versions(["a", "b"]) == first
+
+        workspace_cache.bump_versions(["a"])
+        second = workspace_cache.get_versions(["a", "b"])
+
+        assert second["a"] != first["a"]
+        assert second["b"] == first["b"]
+        assert self.cache.get("version:a") == second["a"]
+
+    def test_entries_live_under_the_namespace_version(self):
+        """Um bump faz a entrada ser recalculada em outra chave."""
+        value, version = workspace_cache.get_or_set("a", "k", self.compute)
+        assert workspace_cache.get_or_set("a", "k", self.compute) == (
+            value, version
+        )
+        assert self.cache.get(
+            workspace_cache.versioned_key("a", version, "k")
+        ) == value
+
+        workspace_cache.bump_versions(["a"])
+        value, new_version = workspace_cache.get_or_set(
+            "a", "k", self.compute
+        )
+
+        assert new_version != version
+        assert value == self.computed[-1]
+        assert len(self.computed) == len([version, new_version])
+
+    def test_value_computed_with_a_stale_version_is_not_read(self):
+        """Gravar com a versão lida antes do bump não afeta a atual."""
+        stale = workspace_cache.get_version("a")
+        workspace_cache.bump_versions(["a"])
+
+        workspace_cache.get_or_set("a", "k", self.compute, version=stale)
+        _, current = workspace_cache.get_or_set("a", "k", self.compute)
+
+        assert current != stale
+        assert len(self.computed) == len([stale, current])
+
+    def test_cache_failures_fall_back_to_compute(self):
+        """Com o Redis fora, os valores são só calculados."""
+        with (
+            self.assertLogs("workspace.cache", "WARNING") as logs,
+            mock.patch.object(self.cache, "get_many", side_effect=RedisError),
+            mock.patch.object(self.cache, "set_many", side_effect=RedisError),
+        ):
+            assert workspace_cache.get_versions(["a"]) == {}
+            workspace_cache.bump_versions(["a"])
+            assert workspace_cache.get_or_set("a", "k", self.compute) == (
+                1, None
+            )
+
+        assert len(logs.records) == len(["get_versions", "bump", "get"])
+
+        version = workspace_cache.get_version("a")
+        with (
+            self.assertLogs("workspace.cache", "WARNING"),
+            mock.patch.object(self.cache, "get", side_effect=RedisError),
+        ):
+            assert workspace_cache.get_or_set(
+                "a", "k", self.compute, version=version
+            ) == (2, None)
+        with (
+            self.assertLogs("workspace.cache", "WARNING"),
+            mock.patch.object(self.cache, "set", side_effect=RedisError),
+        ):
+            assert workspace_cache.get_or_set(
+                "a", "k", self.compute, version=version
+            ) == (3, version)
+
+    @override_settings(CACHES={"default": LOCMEM_CACHES["default"]})
+    def test_missing_alias_only_computes(self):
+        """Sem o alias "workspace", nada é gravado."""
+        assert workspace_cache.get_versions(["a"]) == {}
+        assert workspace_cache.get_or_set("a", "k", self.compute) == (
+            1, None
+        )
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+)
+class ListingCacheTests(MediaRootTestCase):
+    """ETag da página do workspace e invalidação das listagens."""
+
+    def setUp(self):
+        """Árvore a/b/c e um arquivo em b; ana está logada."""
+        super().setUp()
+        workspace_cache.get_workspace_cache().clear()
+        self.a = Folder.objects.create(name="a", owner=self.user)
+        self.b = Folder.objects.create(
+            name="b", owner=self.user, parent=self.a
+        )
+        self.c = Folder.objects.create(
+            name="c", owner=self.user, parent=self.b
+        )
+        self.file = File.objects.create(
+            name="nota.txt",
+            file="workspace/nota.txt",
+            folder=self.b,
+            uploader=self.user,
+        )
+        self.client.force_login(self.user)
+        self.client.cookies["csrftoken"] = "x" * 32
+
+    def page(self, folder=None, **headers):
+        """GET da página do workspace na pasta dada."""
+        data = {"folder": folder.pk} if folder else {}
+        return self.client.get(reverse("workspace_home"), data, **headers)
+
+    def etag(self, folder=None):
+        """ETag atual da página da pasta."""
+        return self.page(folder)["ETag"]
+
+    def etags(self):
+        """ETags atuais da raiz e das pastas a, b e c."""
+        return {
+            name: self.etag(folder)
+            for name, folder in [
+                ("raiz", None), ("a", self.a), ("b", self.b), ("c", self.c)
+            ]
+        }
+
+    def changed(self, before):
+        """Pastas cujo ETag mudou desde before."""
+        after = self.etags()
+        return {name for name in before if after[name] != before[name]}
+
+    def test_matching_etag_is_answered_without_listing_queries(self):
+        """Com If-None-Match igual, 304 sem consultar a listagem."""
+        etag = self.etag(self.b)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.page(self.b, headers={"If-None-Match": etag})
+
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response["ETag"] == etag
+        # Só o usuário da sessão, carregado pelo login_required
+        assert [
+            query["sql"] for query in queries.captured_queries
+            if 'FROM "auth_user"' not in query["sql"]
+        ] == []
+        assert len(queries.captured_queries) == 1
+
+    def test_file_changes_change_the_etag_of_their_folders(self):
+        """Renomear, mover e excluir arquivo trocam só as pastas dele."""
+        before = self.etags()
+        self.client.post(
+            reverse("rename_file", args=[self.file.pk]), {"name": "x.txt"}
+        )
+        assert self.changed(before) == {"b"}
+
+        before = self.etags()
+        self.client.post(reverse("move_item"), {
+            "item_type": "file",
+            "item_id": self.file.pk,
+            "target_folder": self.c.pk,
+        })
+        assert self.changed(before) == {"b", "c"}
+
+        before = self.etags()
+        self.client.post(reverse("delete_file", args=[self.file.pk]))
+        assert self.changed(before) == {"c"}
+
+    @override_settings(WORKSPACE_UPLOAD_WORKERS=0)
+    def test_upload_changes_the_etag_of_its_folder(self):
+        """Um upload concluído troca o ETag da pasta de destino."""
+        before = self.etags()
+        session = self.upload()
+
+        self.client.post(reverse("finalize_upload", args=[session.id]))
+
+        assert self.changed(before) == {"raiz"}
+
+    def test_folder_changes_change_every_etag(self):
+        """Renomear, mover e excluir pasta trocam a árvore toda."""
+        before = self.etags()
+        self.client.post(
+            reverse("rename_folder", args=[self.c.pk]), {"name": "c2"}
+        )
+        assert self.changed(before) == set(before)
+
+        before = self.etags()
+        self.client.post(reverse("move_item"), {
+            "item_type": "folder",
+            "item_id": self.c.pk,
+            "target_folder": self.a.pk,
+        })
+        assert self.changed(before) == set(before)
+
+        before = self.etags()
+        self.client.post(reverse("delete_folder", args=[self.c.pk]))
+        assert self.changed(before) == set(before)
+
+    def test_folder_rename_updates_descendant_breadcrumbs(self):
+        """O novo nome aparece nos breadcrumbs das pastas abaixo."""
+        assert [
+            item.name for item in self.page(self.c).context["breadcrumbs"]
+        ] == ["a", "b", "c"]
+
+        self.client.post(
+            reverse("rename_folder", args=[self.a.pk]), {"name": "A2"}
+        )
+
+        assert [
+            item.name for item in self.page(self.c).context["breadcrumbs"]
+        ] == ["A2", "b", "c"]
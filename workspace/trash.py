@@ -0,0 +1,147 @@
+"""
+Limpeza definitiva da lixeira do app workspace.
+
+Itens na lixeira há mais tempo que WORKSPACE_TRASH_RETENTION_DAYS são
+removidos em lotes limitados, sem carregar a árvore de um usuário em
+memória:
+- Arquivos são removidos primeiro, um lote de IDs por vez; os blobs
+  que ficam sem referência têm o arquivo físico apagado
+- Pastas são removidas das mais profundas para as mais rasas e apenas
+  quando já estão vazias, de modo que nenhum DELETE em cascata precise
+  percorrer uma subárvore inteira
+- Por fim, os arquivos de blobs/ sem Blob (gravados por transações
+  desfeitas) são apagados (workspace.blobs.sweep_orphan_blobs)
+
+A limpeza roda pelo comando purge_trash ou como tarefa da fila
+("workspace.purge_trash"), agendada pelas views de exclusão para o dia
+em que os itens excluídos saem da retenção.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from jobs.queue import enqueue
+
+from .blobs import purge_files, sweep_orphan_blobs
+from .models import File, Folder
+
+DEFAULT_TRASH_RETENTION_DAYS = 30
+
+PURGE_BATCH_SIZE = 500
+
+PURGE_TASK = "workspace.purge_trash"
+
+
+@dataclass
+class PurgeReport:
+    """Resultado de uma limpeza da lixeira."""
+    files: int = 0
+    folders: int = 0
+    bytes_reclaimed: int = 0
+
+
+def trash_retention_days():
+    """
+    Dias de retenção configurados em WORKSPACE_TRASH_RETENTION_DAYS.
+    """
+    return getattr(
+        settings,
+        "WORKSPACE_TRASH_RETENTION_DAYS",
+        DEFAULT_TRASH_RETENTION_DAYS,
+    )
+
+
+def expired_files(cutoff):
+    """
+    Arquivos na lixeira excluídos antes de cutoff.
+    """
+    return File.objects.filter(is_deleted=True, deleted_at__lt=cutoff)
+
+
+def expired_empty_folders(cutoff):
+    """
+    Pastas na lixeira excluídas antes de cutoff e já sem conteúdo.
+    """
+    return Folder.objects.filter(
+        is_deleted=True,
+        deleted_at__lt=cutoff,
+    ).exclude(
+        Exists(Folder.objects.filter(parent=OuterRef("pk")))
+    ).exclude(
+        Exists(File.objects.filter(folder=OuterRef("pk")))
+    )
+
+
+def purge_trash(retention_days=None, batch_size=PURGE_BATCH_SIZE,
+                on_batch=None):
+    """
+    Remove definitivamente os itens da lixeira fora da retenção e
+    apaga os arquivos de blobs órfãos.
+
+    Args:
+        retention_days: Dias de retenção (padrão: configuração)
+        batch_size: Máximo de linhas removidas por lote
+        on_batch: Callback opcional chamado com o PurgeReport parcial
+            após cada lote
+
+    Returns:
+        PurgeReport: Totais de arquivos, pastas e bytes liberados
+    """
+    if retention_days is None:
+        retention_days = trash_retention_days()
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    report = PurgeReport()
+
+    while True:
+        file_ids = list(
+            expired_files(cutoff)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not file_ids:
+            break
+        report.bytes_reclaimed += purge_files(
+            File.objects.filter(pk__in=file_ids)
+        )
+        report.files += len(file_ids)
+        if on_batch:
+            on_batch(report)
+
+    while True:
+        folder_ids = list(
+            expired_empty_folders(cutoff)
+            .order_by("-depth", "pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not folder_ids:
+            break
+        Folder.objects.filter(pk__in=folder_ids).delete()
+        report.folders += len(folder_ids)
+        if on_batch:
+            on_batch(report)
+
+    report.bytes_reclaimed += sweep_orphan_blobs()
+    return report
+
+
+def schedule_purge(deleted_at):
+    """
+    Agenda a limpeza da lixeira para quando deleted_at expirar.
+
+    Usa uma tarefa por dia (chave idempotente), de modo que várias
+    exclusões no mesmo dia compartilhem uma única limpeza, executada
+    na madrugada seguinte ao fim da retenção.
+
+    Args:
+        deleted_at: Data da exclusão
+    """
+    due = timezone.localdate(deleted_at) + timedelta(
+        days=trash_retention_days() + 1
+    )
+    run_after = timezone.make_aware(
+        datetime.combine(due, datetime.min.time())
+    )
+    enqueue(PURGE_TASK, key=f"{PURGE_TASK}:{due}", run_after=run_after)
@@ -0,0 +1,119 @@
+"""
+Executor limitado para o trabalho bloqueante das views de upload.
+
+Sob ASGI, cada view síncrona ocupa uma thread própria durante toda a
+requisição. Um upload de pasta interpreta o corpo multipart (validação
+e SHA-256 nos upload handlers), grava os blobs no storage e cria as
+linhas no banco, o que pode levar minutos; vários deles ao mesmo tempo
+disputam CPU e conexões com a navegação, que é rápida.
+
+O decorador upload_view transforma uma view de upload síncrona em uma
+view assíncrona que executa o corpo original em um ThreadPoolExecutor
+próprio, com WORKSPACE_UPLOAD_WORKERS threads por processo. Uploads
+além desse limite esperam na fila do executor, sem bloquear o event
+loop nem as views assíncronas do workspace.
+
+O corpo da requisição já chega inteiro à view: o ASGIHandler.read_body
+o grava em um SpooledTemporaryFile (em disco acima de
+FILE_UPLOAD_MAX_MEMORY_SIZE) antes de qualquer middleware. Só a
+interpretação do multipart fica para o executor: a view fica isenta do
+CsrfViewMiddleware (que leria request.POST no thread da requisição) e
+a mesma verificação de CSRF é feita no executor, antes do corpo da
+view. Com WORKSPACE_UPLOAD_WORKERS = 0, o corpo roda no thread da
+requisição, como uma view síncrona comum (usado pelos benchmarks que
+revertem uma transação ao final, pois o executor usa outras conexões
+com o banco).
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+
+DEFAULT_UPLOAD_WORKERS = 4
+
+_csrf = CsrfViewMiddleware(lambda request: None)
+
+
+def upload_workers():
+    """Threads do executor de uploads (0 desativa o executor)."""
+    return max(
+        getattr(settings, "WORKSPACE_UPLOAD_WORKERS", DEFAULT_UPLOAD_WORKERS),
+        0,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_upload_executor():
+    """
+    Retorna o executor de uploads do processo, criado no primeiro uso
+    (depois do fork dos processos do servidor).
+
+    Returns:
+        ThreadPoolExecutor: Executor com upload_workers() threads
+    """
+    return ThreadPoolExecutor(
+        max_workers=upload_workers(),
+        thread_name_prefix="workspace-upload",
+    )
+
+
+def _run_view(view, request, args, kwargs):
+    """
+    Verifica o CSRF e executa a view síncrona.
+    """
+    rejection = _csrf.process_view(request, None, (), {})
+    if rejection is not None:
+        return rejection
+    return view(request, *args, **kwargs)
+
+
+def _run_view_in_executor(view, request, args, kwargs):
+    """
+    Executa a view em uma thread do executor.
+
+    As threads do executor sobrevivem à requisição, então a conexão com
+    o banco usada nelas é devolvida ao pool (ou fechada, conforme
+    CONN_MAX_AGE) ao final, como o Django faz ao fim de cada requisição.
+    No thread da requisição isso fica a cargo do próprio Django, e
+    fechar a conexão ali quebraria uma transação externa aberta.
+    """
+    try:
+        return _run_view(view, request, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def upload_view(view):
+    """
+    Decorador que executa uma view de upload síncrona no executor de
+    uploads.
+
+    Deve ficar abaixo do login_required, que então roda no caminho
+    assíncrono. O usuário é carregado antes (request.auser) e atribuído
+    a request.user, para que o corpo da view não consulte a sessão de
+    novo.
+
+    Args:
+        view: View síncrona (request, *args, **kwargs)
+
+    Returns:
+        function: View assíncrona, isenta do CsrfViewMiddleware
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request.user = await request.auser()
+        if upload_workers():
+            run = sync_to_async(
+                _run_view_in_executor,
+                thread_sensitive=False,
+                executor=get_upload_executor(),
+            )
+        else:
+            run = sync_to_async(_run_view)
+        return await run(view, request, args, kwargs)
+
+    return csrf_exempt(wrapper)
@@ -0,0 +1,224 @@
+"""
+Upload handlers do app workspace.
+
+O ValidatingUploadHandler roda antes dos handlers padrão do Django e
+valida cada arquivo enquanto o corpo multipart é interpretado:
+- Extensão e tamanho declarado são verificados no início da parte
+- A assinatura (magic bytes) é verificada no primeiro bloco recebido
+- O tamanho real é acompanhado bloco a bloco
+
+Um arquivo rejeitado é descartado com SkipFile antes que qualquer byte
+chegue aos handlers seguintes, que montariam uma cópia dele (memória
+ou arquivo temporário) para gravá-la no storage. As rejeições ficam
+em request.upload_rejections para que as views as exibam junto com os
+demais erros de upload.
+
+Os handlers não evitam a recepção do corpo: sob ASGI (uvicorn) o
+ASGIHandler.read_body grava a requisição inteira em um
+SpooledTemporaryFile antes de qualquer middleware ou view, e o parser
+multipart só lê desse arquivo depois. Por isso o nginx limita o
+tamanho do corpo do upload multipart, e arquivos grandes usam o
+upload em partes (workspace.chunked_uploads), que valida nome e
+tamanho ao criar a sessão e a assinatura na primeira parte, antes de
+o conteúdo ser enviado.
+
+O HashingUploadHandler calcula o SHA-256 de cada arquivo aceito no
+mesmo fluxo de leitura, para que o storage deduplicado (workspace.blobs)
+não precise ler o arquivo de novo.
+"""
+import hashlib
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from .validators import (
+    MAX_FILE_BYTES,
+    SIGNATURE_BYTES,
+    validate_file_signature,
+    validate_file_size,
+    validate_file_type,
+)
+
+
+@dataclass
+class DeclaredPart:
+    """
+    Nome e tamanho de uma parte multipart.
+
+    Tem a mesma interface (name, size) usada pelos validadores.
+    """
+    name: str
+    size: int
+
+
+@dataclass
+class UploadRejection:
+    """Arquivo descartado durante a leitura do upload."""
+    field_name: str
+    index: int
+    file_name: str
+    message: str
+
+
+def get_upload_rejections(request, field_name):
+    """
+    Retorna as rejeições de um campo de upload da requisição.
+
+    Args:
+        request: Objeto HttpRequest do Django
+        field_name: Nome do campo de arquivo (ex.: "file", "files")
+
+    Returns:
+        list: UploadRejection na ordem em que os arquivos chegaram
+    """
+    return [
+        rejection
+        for rejection in getattr(request, "upload_rejections", [])
+        if rejection.field_name == field_name
+    ]
+
+
+def get_uploaded_files(request, field_name):
+    """
+    Retorna os arquivos de um campo com o SHA-256 já calculado.
+
+    Cada arquivo recebe o atributo sha256 calculado pelo
+    HashingUploadHandler durante a leitura do corpo.
+
+    Args:
+        request: Objeto HttpRequest do Django
+        field_name: Nome do campo de arquivo
+
+    Returns:
+        list: Arquivos aceitos, na ordem do formulário
+    """
+    uploaded_files = request.FILES.getlist(field_name)
+    digests = getattr(request, "upload_digests", {}).get(field_name, [])
+    if len(digests) == len(uploaded_files):
+        for uploaded_file, digest in zip(uploaded_files, digests):
+            uploaded_file.sha256 = digest
+    return uploaded_files
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """
+    Rejeita arquivos inválidos assim que cada parte começa a chegar.
+
+    Deve ser o primeiro item de FILE_UPLOAD_HANDLERS.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.field_counts = {}
+        self.received = 0
+        if request is not None:
+            request.upload_rejections = []
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        """
+        Valida extensão e tamanho declarado antes de ler o conteúdo.
+        """
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.index = self.field_counts.get(field_name, 0)
+        self.field_counts[field_name] = self.index + 1
+        self.received = 0
+
+        declared = DeclaredPart(
+            name=file_name,
+            size=self.content_length or 0,
+        )
+        self._check(validate_file_type, declared)
+        self._check(validate_file_size, declared)
+
+    def receive_data_chunk(self, raw_data, start):
+        """
+        Verifica a assinatura no primeiro bloco e o tamanho acumulado.
+
+        Arquivos vazios não geram blocos e são rejeitados depois por
+        validate_file, que também confere a assinatura.
+        """
+        if start == 0:
+            header = raw_data[:SIGNATURE_BYTES]
+            self._check(
+                lambda name: validate_file_signature(name, header),
+                self.file_name,
+            )
+
+        self.received += len(raw_data)
+        if self.received > MAX_FILE_BYTES:
+            self._check(
+                validate_file_size,
+                DeclaredPart(name=self.file_name, size=self.received),
+            )
+
+        return raw_data
+
+    def file_complete(self, file_size):  # noqa: PLR6301
+        """
+        Não monta o arquivo; o próximo handler da lista o fará.
+        """
+        return None
+
+    def _check(self, validator, value):
+        """
+        Executa um validador e descarta a parte se ele falhar.
+
+        Raises:
+            SkipFile: Quando o arquivo é rejeitado
+        """
+        try:
+            validator(value)
+        except ValidationError as e:
+            self._reject(e)
+            raise SkipFile from e
+
+    def _reject(self, error):
+        """Registra a rejeição da parte atual na requisição."""
+        if self.request is None:
+            return
+        message = error.messages[0] if error.messages else str(error)
+        self.request.upload_rejections.append(UploadRejection(
+            field_name=self.field_name,
+            index=self.index,
+            file_name=self.file_name,
+            message=f"{self.file_name}: {message}",
+        ))
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Calcula o SHA-256 de cada arquivo enquanto ele é recebido.
+
+    Deve vir logo após o ValidatingUploadHandler e antes dos handlers
+    que montam o arquivo (memória / arquivo temporário).
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.hasher = None
+        if request is not None:
+            request.upload_digests = {}
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        """Inicia o hash de um novo arquivo."""
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        """Atualiza o hash e repassa o bloco sem alterações."""
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        """
+        Registra o hash do arquivo concluído na requisição.
+
+        Os hashes ficam na mesma ordem de request.FILES.getlist(),
+        pois só são registrados para arquivos que não foram
+        descartados.
+        """
+        if self.request is not None:
+            self.request.upload_digests.setdefault(
+                self.field_name, []
+            ).append(self.hasher.hexdigest())
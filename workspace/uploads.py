@@ -0,0 +1,287 @@
+"""
+Motor de upload em lote do app workspace.
+
+Este módulo cria a árvore de pastas e os registros de File de um
+upload de pasta com um número constante de consultas:
+- Pastas existentes são resolvidas com uma consulta por nível da árvore
+- Pastas novas são inseridas com bulk_create, também por nível
+- Colisões de nome são resolvidas em memória contra um único conjunto
+  pré-carregado de nomes irmãos
+- Os conteúdos vão para o storage deduplicado (workspace.blobs) com
+  uma consulta para todo o upload
+- Os arquivos são inseridos em lotes dentro de uma única transação
+
+Se um upload concorrente ocupar um nome entre a leitura dos irmãos e o
+INSERT, as constraints de unicidade rejeitam o lote, os nomes são
+recarregados e o lote é reenviado.
+"""
+import logging
+import traceback
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .blobs import release_blobs, store_uploaded_files
+from .models import File, Folder
+from .naming import MAX_NAME_ATTEMPTS, next_free_name
+from .validators import validate_file
+
+FILE_BULK_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingFile:
+    """Arquivo aguardando inserção no upload em lote."""
+    uploaded_file: object
+    file_name: str
+    folder_key: str
+
+
+@dataclass
+class BulkUploadResult:
+    """Resultado da inserção em lote de arquivos."""
+    uploaded_count: int = 0
+    error_count: int = 0
+    error_messages: list = field(default_factory=list)
+    created_files: list = field(default_factory=list)
+
+    def add_error(self, message):
+        """Registra um arquivo com erro."""
+        self.error_count += 1
+        self.error_messages.append(message)
+
+
+def folder_key(path_parts):
+    """
+    Normaliza componentes de caminho em uma chave de pasta.
+
+    Args:
+        path_parts: Componentes do caminho (sem o nome do arquivo)
+
+    Returns:
+        str: Caminho normalizado, ex.: "docs/2025"
+    """
+    return "/".join(
+        part.strip() for part in path_parts if part.strip()
+    )
+
+
+def build_folder_tree(user, main_folder, sorted_paths):
+    """
+    Garante que todas as pastas do upload existam.
+
+    Processa a árvore nível por nível: para cada nível faz uma consulta
+    para encontrar as pastas já existentes e um bulk_create para as
+    que faltam.
+
+    Args:
+        user: Dono das pastas
+        main_folder: Pasta raiz do upload
+        sorted_paths: Caminhos de pastas relativos à pasta raiz
+
+    Returns:
+        dict: Cache de caminho normalizado -> Folder
+    """
+    folders_cache = {"": main_folder}
+
+    levels = {}
+    for folder_path in sorted_paths:
+        parts = [part.strip() for part in folder_path.split("/")]
+        parts = [part for part in parts if part]
+        if parts:
+            levels.setdefault(len(parts), set()).add(tuple(parts))
+
+    for depth in sorted(levels):
+        wanted = {}
+        for parts in levels[depth]:
+            parent = folders_cache[folder_key(parts[:-1])]
+            _, keys, _ = wanted.setdefault(
+                (parent.id, parts[-1].lower()), (parts[-1], [], parent)
+            )
+            keys.append(folder_key(parts))
+
+        for attempt in range(MAX_NAME_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    _create_level(user, wanted, folders_cache)
+                break
+            except IntegrityError:
+                if attempt == MAX_NAME_ATTEMPTS - 1:
+                    raise
+
+    return folders_cache
+
+
+def _create_level(user, wanted, folders_cache):
+    """
+    Resolve as pastas de um nível: reaproveita as existentes (uma
+    consulta, ignorando maiúsculas) e cria as demais com bulk_create.
+    """
+    existing = {}
+    for folder in Folder.objects.filter(
+        owner=user,
+        parent_id__in={parent_id for parent_id, _ in wanted},
+        is_deleted=False,
+    ).order_by("-created_at"):
+        existing.setdefault((folder.parent_id, folder.name.lower()), folder)
+
+    new_folders = []
+    for lookup, (name, keys, parent) in wanted.items():
+        folder = existing.get(lookup)
+        if folder is None:
+            folder = Folder(
+                name=name,
+                owner=user,
+                parent=parent,
+                path=parent.subtree_path,
+                depth=parent.depth + 1,
+            )
+            new_folders.append(folder)
+        for key in keys:
+            folders_cache[key] = folder
+
+    if new_folders:
+        Folder.objects.bulk_create(new_folders)
+
+
+def _load_taken_names(user, folder_ids):
+    """
+    Carrega em uma consulta os nomes de arquivos ativos por pasta.
+    """
+    taken = {folder_id: set() for folder_id in folder_ids}
+    for folder_id, name in File.objects.filter(
+        uploader=user,
+        folder_id__in=folder_ids,
+        is_deleted=False,
+    ).values_list("folder_id", "name"):
+        taken[folder_id].add(name.lower())
+    return taken
+
+
+def bulk_create_files(user, pending_files, folders_cache,
+                      batch_size=FILE_BULK_BATCH_SIZE):
+    """
+    Valida e insere os arquivos de um upload em lote.
+
+    Os nomes duplicados são resolvidos em memória e os registros são
+    inseridos em lotes de batch_size dentro de uma transação. Uma
+    falha em um lote é registrada como erro dos arquivos daquele lote
+    sem desfazer os demais.
+
+    Args:
+        user: Usuário que está enviando os arquivos
+        pending_files: Lista de PendingFile
+        folders_cache: Cache retornado por build_folder_tree
+        batch_size: Quantidade de registros por INSERT
+
+    Returns:
+        BulkUploadResult: Contadores, mensagens e arquivos criados
+    """
+    result = BulkUploadResult()
+    target_ids = {
+        folders_cache[pending.folder_key].id
+        for pending in pending_files
+    }
+    taken = _load_taken_names(user, target_ids)
+
+    valid_files = []
+    for pending in pending_files:
+        try:
+            validate_file(pending.uploaded_file)
+        except Exception as e:
+            result.add_error(extract_error_message(e))
+            continue
+        valid_files.append(pending)
+
+    blobs = store_uploaded_files(
+        [pending.uploaded_file for pending in valid_files]
+    )
+
+    entries = []
+    for pending, blob in zip(valid_files, blobs):
+        instance = File(
+            name=pending.file_name,
+            file=blob.file.name,
+            blob=blob,
+            folder=folders_cache[pending.folder_key],
+            uploader=user,
+        )
+        entries.append((instance, pending.file_name))
+
+    _assign_names(entries, taken)
+
+    with transaction.atomic():
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            try:
+                _insert_batch(user, batch)
+            except Exception as e:
+                _log_batch_error(e)
+                release_blobs(instance.blob_id for instance, _ in batch)
+                for instance, _ in batch:
+                    result.add_error(
+                        f"{instance.name}: Erro ao salvar arquivo - {e}"
+                    )
+                continue
+            result.uploaded_count += len(batch)
+            result.created_files.extend(
+                instance for instance, _ in batch
+            )
+
+    return result
+
+
+def _assign_names(entries, taken):
+    """
+    Atribui nomes livres em memória às instâncias de (File, nome).
+    """
+    for instance, desired_name in entries:
+        taken_names = taken[instance.folder.id]
+        instance.name = next_free_name(desired_name, taken_names)
+        taken_names.add(instance.name.lower())
+
+
+def _insert_batch(user, batch):
+    """
+    Insere um lote de arquivos, renomeando-o se houver corrida.
+
+    Em caso de IntegrityError os nomes ocupados das pastas do lote são
+    recarregados (uma consulta) e o INSERT é repetido.
+    """
+    for attempt in range(MAX_NAME_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                File.objects.bulk_create(
+                    [instance for instance, _ in batch]
+                )
+            return
+        except IntegrityError:
+            if attempt == MAX_NAME_ATTEMPTS - 1:
+                raise
+            taken = _load_taken_names(
+                user, {instance.folder.id for instance, _ in batch}
+            )
+            _assign_names(batch, taken)
+
+
+def extract_error_message(exception):
+    """
+    Extrai a mensagem de erro de uma exceção de validação.
+    """
+    if hasattr(exception, 'messages') and exception.messages:
+        return str(exception.messages[0])
+    if hasattr(exception, 'message'):
+        return str(exception.message)
+    return str(exception)
+
+
+def _log_batch_error(exception):
+    """
+    Registra no log a falha de um lote quando em modo DEBUG.
+    """
+    if settings.DEBUG:
+        logger.error(f"Erro ao salvar lote de arquivos: {exception}")
+        logger.error(traceback.format_exc())
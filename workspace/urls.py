@@ -14,6 +14,11 @@ urlpatterns = [
         view=views.workspace_home,
         name="workspace_home"
     ),
+    path(
+        route="workspace/search",
+        view=views.workspace_search,
+        name="workspace_search"
+    ),
     path(
         route="create-folder/",
         view=views.create_folder,
@@ -29,6 +34,31 @@ urlpatterns = [
         view=views.upload_folder,
         name="upload_folder"
     ),
+    path(
+        route="uploads/",
+        view=views.create_upload_session,
+        name="create_upload_session"
+    ),
+    path(
+        route="uploads/tree/",
+        view=views.create_upload_tree,
+        name="create_upload_tree"
+    ),
+    path(
+        route="uploads/<uuid:session_id>/",
+        view=views.upload_session_status,
+        name="upload_session_status"
+    ),
+    path(
+        route="uploads/<uuid:session_id>/chunks/<int:index>/",
+        view=views.upload_chunk,
+        name="upload_chunk"
+    ),
+    path(
+        route="uploads/<uuid:session_id>/finalize/",
+        view=views.finalize_upload,
+        name="finalize_upload"
+    ),
     path(
         route="delete-folder/<int:folder_id>/",
         view=views.delete_folder,
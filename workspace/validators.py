@@ -2,7 +2,8 @@
 Validadores de arquivos do app workspace.
 
 Este módulo contém funções de validação para arquivos enviados,
-incluindo verificação de tipo (extensão) e tamanho.
+incluindo verificação de tipo (extensão), tamanho e assinatura
+(magic bytes) do conteúdo.
 """
 import os
 
@@ -27,6 +28,27 @@ ALLOWED_FORMATTED = ", ".join(
     ext.upper() for ext in ALLOWED_EXTENSIONS
 )
 
+# Assinaturas (magic bytes) esperadas no início de cada formato binário
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ZIP_SIGNATURE = b"PK\x03\x04"
+
+FILE_SIGNATURES = {
+    ".pdf": (b"%PDF-",),
+    ".doc": (OLE_SIGNATURE,),
+    ".xls": (OLE_SIGNATURE,),
+    ".docx": (ZIP_SIGNATURE,),
+    ".xlsx": (ZIP_SIGNATURE,),
+    ".xlsm": (ZIP_SIGNATURE,),
+}
+
+TEXT_EXTENSIONS = {".txt", ".csv"}
+
+# BOMs UTF-16 (texto legítimo que contém bytes nulos)
+UTF16_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+# Quantidade de bytes iniciais analisados na verificação de assinatura
+SIGNATURE_BYTES = 1024
+
 
 def validate_file_type(uploaded_file):
     """
@@ -72,11 +94,59 @@ def validate_file_size(uploaded_file):
         raise ValidationError(msg)
 
 
+def validate_file_signature(file_name, header):
+    """
+    Valida os primeiros bytes do conteúdo contra a extensão declarada.
+
+    Formatos binários precisam começar com a assinatura do formato;
+    arquivos de texto não podem conter bytes nulos (exceto UTF-16).
+
+    Args:
+        file_name: Nome do arquivo (usado para obter a extensão)
+        header: Primeiros bytes do arquivo (até SIGNATURE_BYTES)
+
+    Raises:
+        ValidationError: Se o conteúdo não corresponder à extensão
+    """
+    ext = os.path.splitext(file_name)[1].lower()
+
+    if ext in TEXT_EXTENSIONS:
+        matches = header.startswith(UTF16_BOMS) or b"\x00" not in header
+    else:
+        signatures = FILE_SIGNATURES.get(ext)
+        matches = not signatures or header.startswith(signatures)
+
+    if not matches:
+        msg = (
+            f"Arquivo inválido: '{file_name}'. "
+            f"O conteúdo não corresponde ao formato '{ext}'."
+        )
+        raise ValidationError(msg)
+
+
+def read_file_header(uploaded_file):
+    """
+    Lê os primeiros bytes de um arquivo sem alterar sua posição.
+
+    Args:
+        uploaded_file: Arquivo enviado pelo usuário
+
+    Returns:
+        bytes: Até SIGNATURE_BYTES bytes iniciais
+    """
+    position = uploaded_file.tell()
+    uploaded_file.seek(0)
+    header = uploaded_file.read(SIGNATURE_BYTES)
+    uploaded_file.seek(position)
+    return header
+
+
 def validate_file(uploaded_file):
     """
     Validação completa do arquivo.
 
-    Executa todas as validações necessárias: tipo e tamanho.
+    Executa todas as validações necessárias: tipo, tamanho e, quando
+    o conteúdo está disponível, a assinatura do arquivo.
 
     Args:
         uploaded_file: Arquivo enviado pelo usuário
@@ -86,3 +156,7 @@ def validate_file(uploaded_file):
     """
     validate_file_type(uploaded_file)
     validate_file_size(uploaded_file)
+    if hasattr(uploaded_file, "read"):
+        validate_file_signature(
+            uploaded_file.name, read_file_header(uploaded_file)
+        )
@@ -4,24 +4,74 @@ Views do app workspace.
 Este módulo contém todas as views relacionadas ao gerenciamento
 de pastas e arquivos no workspace, incluindo CRUD completo e
 operações de movimentação.
+
+A navegação (workspace_home), a movimentação, a renomeação e a
+exclusão são views assíncronas que usam o ORM assíncrono do Django;
+as escritas que precisam de transaction.atomic (indisponível no código
+assíncrono) ficam em funções síncronas chamadas com sync_to_async. As
+views de upload continuam síncronas, mas rodam no executor limitado de
+workspace.upload_executor, para que uploads lentos não ocupem as
+threads que a navegação usa.
+
+A listagem de cada pasta fica em cache por versão (workspace.listing),
+com ETag e 304 Not Modified na navegação; toda view que cria, envia,
+renomeia, move ou exclui itens troca a versão das pastas afetadas
+depois de gravar.
 """
+import hashlib
 import json
-import logging
-import os
-import traceback
 from collections import Counter
 from dataclasses import dataclass
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import (
+    aget_object_or_404,
+    get_object_or_404,
+    redirect,
+    render,
+)
 from django.utils import timezone
-
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from rag.answer_cache import bump_corpus_version, invalidate_files
+from rag.changes import record_file_changes, record_folder_change
+from rag.extraction import enqueue_extractions
+from rag.models import IndexChange
+
+from .blobs import release_blobs, store_uploaded_file
+from .chunked_uploads import (
+    UploadFileGoneError,
+    create_session,
+    finalize_session,
+    session_status,
+    write_chunk,
+)
 from .forms import FolderForm
-from .models import File, Folder
+from .listing import (
+    build_listing,
+    get_listing,
+    invalidate_listings,
+    listing_versions,
+)
+from .models import File, Folder, UploadSession
+from .naming import create_with_unique_name
+from .search import DEFAULT_PAGE_SIZE, search_workspace
+from .trash import schedule_purge
+from .upload_executor import upload_view
+from .upload_handlers import get_upload_rejections, get_uploaded_files
+from .uploads import (
+    PendingFile,
+    build_folder_tree,
+    bulk_create_files,
+    extract_error_message,
+    folder_key,
+)
 from .validators import validate_file
 
 MAX_ERROR_MESSAGES_UPLOAD_FILE = 3
@@ -43,42 +93,73 @@ def _validate_uploaded_file(uploaded_file):
         return f"{uploaded_file.name}: {error_message}"
 
 
-def _generate_unique_filename(user, folder, original_name):
+async def _auser(request):
     """
-    Gera um nome de arquivo único para evitar duplicatas.
+    Carrega o usuário da requisição pelo caminho assíncrono.
+
+    O usuário também é atribuído a request.user, para que o template e
+    as mensagens não disparem a consulta síncrona do objeto preguiçoso.
     """
-    base, ext = os.path.splitext(original_name)
-    new_name = original_name
-    counter = 1
+    request.user = await request.auser()
+    return request.user
 
-    while File.objects.filter(
+
+def _active_files(user, folder):
+    """
+    Retorna os arquivos ativos de um diretório do usuário.
+    """
+    return File.objects.filter(
         uploader=user,
         folder=folder,
-        name__iexact=new_name,
         is_deleted=False
-    ).exists():
-        new_name = f"{base} ({counter}){ext}"
-        counter += 1
+    )
 
-    return new_name
+
+def _active_folders(user, parent_folder):
+    """
+    Retorna as pastas ativas de um diretório do usuário.
+    """
+    return Folder.objects.filter(
+        owner=user,
+        parent=parent_folder,
+        is_deleted=False
+    )
 
 
-def _create_file_instance(user, folder, uploaded_file, new_name):
+def _create_file_instance(user, folder, uploaded_file):
     """
-    Cria uma instância de File no banco de dados.
+    Cria uma instância de File no banco de dados com nome único.
+
+    Nomes repetidos recebem o sufixo " (n)" calculado pelo resolvedor
+    compartilhado de nomes. O conteúdo vai para o storage deduplicado;
+    se o File não puder ser criado, a referência ao blob é devolvida.
+    A extração de texto é apenas enfileirada.
     Retorna True se bem-sucedido, False caso contrário.
     """
     try:
-        File.objects.create(
-            name=new_name,
-            file=uploaded_file,
-            folder=folder,
-            uploader=user,
+        blob = store_uploaded_file(uploaded_file)
+    except Exception:
+        return False
+
+    try:
+        file = create_with_unique_name(
+            _active_files(user, folder),
+            uploaded_file.name,
+            lambda new_name: File.objects.create(
+                name=new_name,
+                file=blob.file.name,
+                blob=blob,
+                folder=folder,
+                uploader=user,
+            ),
         )
-        return True
     except Exception:
+        release_blobs([blob.pk])
         return False
 
+    enqueue_extractions([file])
+    return True
+
 
 def _process_single_file_upload(user, folder, uploaded_file):
     """
@@ -89,27 +170,12 @@ def _process_single_file_upload(user, folder, uploaded_file):
     if error_msg:
         return (False, error_msg)
 
-    new_name = _generate_unique_filename(
-        user, folder, uploaded_file.name
-    )
-
-    if _create_file_instance(user, folder, uploaded_file, new_name):
+    if _create_file_instance(user, folder, uploaded_file):
         return (True, None)
 
     return (False, f"{uploaded_file.name}: Erro ao salvar arquivo")
 
 
-@dataclass
-class FileUploadParams:
-    """Parâmetros para processamento de upload de arquivo."""
-    user: object
-    uploaded_file: object
-    file_path: str
-    folder_name: str
-    target_folder: object
-    folders_cache: dict
-
-
 @dataclass
 class UploadResults:
     """Resultados do upload de pasta."""
@@ -132,73 +198,74 @@ class FolderUploadParams:
     folders_cache: dict
 
 
+def _listing_etag(request, versions):
+    """
+    ETag da página do workspace.
+
+    Combina as versões da listagem com o segredo do cookie de CSRF,
+    pois a página traz o token dos formulários: depois de um novo
+    login (que troca o segredo), a cópia do navegador não é reusada.
+
+    Returns:
+        str: ETag entre aspas, ou None se não houver versões ou cookie
+    """
+    csrf_secret = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    if versions is None or not csrf_secret:
+        return None
+    digest = hashlib.sha256(
+        f"{versions.folder}:{versions.tree}:{csrf_secret}".encode()
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+
 @login_required(login_url="/")
-def workspace_home(request):
+async def workspace_home(request):
     """
     View principal do workspace.
 
     Exibe as pastas e arquivos do usuário, suportando navegação
     hierárquica através do parâmetro 'folder' na query string.
 
+    A listagem vem do cache por versão de workspace.listing. A
+    resposta leva um ETag dessas versões; se o navegador já tem a
+    página (If-None-Match) e não há mensagens a exibir, a resposta é
+    304 Not Modified, sem consultas ao banco além da leitura do
+    usuário feita pelo login_required.
+
     Args:
         request: Objeto HttpRequest do Django
 
     Returns:
-        HttpResponse: Renderiza o template workspace_home.html
+        HttpResponse: Renderiza o template workspace_home.html ou
+            responde 304 Not Modified
     """
-    folder_id = request.GET.get("folder")
+    user = await _auser(request)
+    folder_id = request.GET.get("folder") or None
 
-    if folder_id:
-        current_folder = get_object_or_404(
-            Folder,
-            id=folder_id,
-            owner=request.user
-        )
+    versions = await sync_to_async(listing_versions)(user.id, folder_id)
+    etag = _listing_etag(request, versions)
 
-        folders = Folder.objects.filter(
-            parent=current_folder,
-            owner=request.user,
-            is_deleted=False
-        ).order_by("name")
-
-        files = File.objects.filter(
-            folder=current_folder,
-            uploader=request.user,
-            is_deleted=False
-        ).order_by("name")
-
-        breadcrumbs = []
-        temp = current_folder
-        while temp:
-            breadcrumbs.append(temp)
-            temp = temp.parent
-        breadcrumbs.reverse()
-
-    else:
-        current_folder = None
+    if etag and not messages.get_messages(request):
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            patch_cache_control(not_modified, private=True, no_cache=True)
+            return not_modified
 
-        folders = Folder.objects.filter(
-            owner=request.user,
-            parent__isnull=True,
-            is_deleted=False
-        ).order_by("name")
-
-        files = File.objects.filter(
-            uploader=request.user,
-            folder__isnull=True,
-            is_deleted=False
-        ).order_by("name")
-
-        breadcrumbs = []
+    listing = await sync_to_async(get_listing)(user, folder_id, versions)
 
     context = {
-        "current_folder": current_folder,
-        "folders": folders,
-        "files": files,
-        "breadcrumbs": breadcrumbs,
+        "current_folder": listing.current_folder,
+        "folders": listing.folders,
+        "files": listing.files,
+        "breadcrumbs": listing.breadcrumbs,
     }
 
-    return render(request, "pages/workspace_home.html", context)
+    response = render(request, "pages/workspace_home.html", context)
+    if etag:
+        response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @login_required(login_url="/")
@@ -230,22 +297,20 @@ def create_folder(request):
         if form.is_valid():
             name = form.cleaned_data["name"]
 
-            if Folder.objects.filter(
-                owner=request.user,
-                name__iexact=name,
-                parent=parent_folder,
-                is_deleted=False
-            ).exists():
+            new_folder = form.save(commit=False)
+            new_folder.owner = request.user
+            new_folder.parent = parent_folder
+
+            try:
+                with transaction.atomic():
+                    new_folder.save()
+            except IntegrityError:
                 form.add_error(
                     "name",
                     "Já existe uma pasta com esse nome nesse diretório."
                 )
             else:
-                new_folder = form.save(commit=False)
-                new_folder.owner = request.user
-                new_folder.parent = parent_folder
-                new_folder.save()
-
+                invalidate_listings(request.user.id, [parent_id])
                 messages.success(
                     request,
                     f"Pasta '{name}' criada com sucesso!"
@@ -254,35 +319,14 @@ def create_folder(request):
                     request.POST.get("next", "workspace_home")
                 )
 
-        if parent_folder:
-            folders = Folder.objects.filter(
-                parent=parent_folder,
-                is_deleted=False
-            )
-            files = File.objects.filter(
-                folder=parent_folder,
-                is_deleted=False
-            )
-            breadcrumbs = build_breadcrumbs(parent_folder)
-        else:
-            folders = Folder.objects.filter(
-                owner=request.user,
-                parent__isnull=True,
-                is_deleted=False
-            )
-            files = File.objects.filter(
-                uploader=request.user,
-                folder__isnull=True,
-                is_deleted=False
-            )
-            breadcrumbs = []
+        listing = build_listing(request.user, parent_folder)
 
         context = {
             "form": form,
-            "current_folder": parent_folder,
-            "folders": folders,
-            "files": files,
-            "breadcrumbs": breadcrumbs,
+            "current_folder": listing.current_folder,
+            "folders": listing.folders,
+            "files": listing.files,
+            "breadcrumbs": listing.breadcrumbs,
             "show_modal": True,
         }
 
@@ -292,13 +336,14 @@ def create_folder(request):
 
 
 @login_required(login_url="/")
+@upload_view
 def upload_file(request):
     """
     View para upload de arquivos (um ou múltiplos).
 
     Realiza validações de extensão e tamanho, além de renomear
     automaticamente arquivos duplicados. Suporta upload de
-    um ou múltiplos arquivos.
+    um ou múltiplos arquivos. Roda no executor de uploads.
 
     Args:
         request: Objeto HttpRequest do Django
@@ -307,7 +352,8 @@ def upload_file(request):
         HttpResponse: Redireciona após upload ou exibe erros
     """
     if request.method == "POST":
-        uploaded_files = request.FILES.getlist("file")
+        uploaded_files = get_uploaded_files(request, "file")
+        rejections = get_upload_rejections(request, "file")
         next_url = request.POST.get("next", "workspace_home")
         folder_id = request.POST.get("folder")
         folder = None
@@ -319,13 +365,13 @@ def upload_file(request):
                 owner=request.user
             )
 
-        if not uploaded_files:
+        if not uploaded_files and not rejections:
             messages.error(request, "Nenhum arquivo foi enviado.")
             return redirect(next_url)
 
         uploaded_count = 0
-        error_count = 0
-        error_messages = []
+        error_count = len(rejections)
+        error_messages = [rejection.message for rejection in rejections]
 
         for uploaded_file in uploaded_files:
             success, error_message = _process_single_file_upload(
@@ -339,6 +385,7 @@ def upload_file(request):
                 error_messages.append(error_message)
 
         if uploaded_count > 0:
+            invalidate_listings(request.user.id, [folder_id])
             if uploaded_count == 1:
                 messages.success(
                     request,
@@ -396,32 +443,6 @@ def _determine_folder_name(uploaded_files, folder_name):
     return f"Pasta Upload {timestamp}"
 
 
-def _ensure_unique_folder_name(user, parent_folder, folder_name):
-    """
-    Garante que o nome da pasta seja único no mesmo nível hierárquico.
-    """
-    if not Folder.objects.filter(
-        owner=user,
-        parent=parent_folder,
-        name__iexact=folder_name,
-        is_deleted=False
-    ).exists():
-        return folder_name
-
-    base_name = folder_name
-    counter = 1
-    while Folder.objects.filter(
-        owner=user,
-        parent=parent_folder,
-        name__iexact=folder_name,
-        is_deleted=False
-    ).exists():
-        folder_name = f"{base_name} ({counter})"
-        counter += 1
-
-    return folder_name
-
-
 def _normalize_path_parts(file_path, folder_name):
     """
     Normaliza os path_parts removendo o primeiro diretório se for igual ao
@@ -463,176 +484,25 @@ def _collect_folder_paths(file_paths_list, folder_name):
     return sorted(all_folder_paths, key=lambda x: (x.count("/"), x))
 
 
-def _create_subfolders(user, main_folder, sorted_paths):
-    """
-    Cria todas as subpastas necessárias e retorna um cache de pastas.
-    """
-    folders_cache = {}
-    folders_cache[""] = main_folder
-
-    for folder_path in sorted_paths:
-        if folder_path in folders_cache:
-            continue
-
-        current_path = ""
-        current_parent = main_folder
-
-        for raw_subfolder_name in folder_path.split("/"):
-            cleaned_name = raw_subfolder_name.strip()
-            if not cleaned_name:
-                continue
-
-            if current_path:
-                current_path = f"{current_path}/{cleaned_name}"
-            else:
-                current_path = cleaned_name
-
-            if current_path in folders_cache:
-                current_parent = folders_cache[current_path]
-                continue
-
-            existing_folder = Folder.objects.filter(
-                owner=user,
-                parent=current_parent,
-                name=cleaned_name,
-                is_deleted=False
-            ).first()
-
-            if existing_folder:
-                folders_cache[current_path] = existing_folder
-                current_parent = existing_folder
-            else:
-                new_folder = Folder.objects.create(
-                    name=cleaned_name,
-                    owner=user,
-                    parent=current_parent
-                )
-                folders_cache[current_path] = new_folder
-                current_parent = new_folder
-
-    return folders_cache
-
-
-def _get_target_folder(user, main_folder, path_parts, folders_cache):
-    """
-    Obtém a pasta de destino para um arquivo baseado em seu caminho.
-    """
-    if len(path_parts) <= 1:
-        return main_folder
-
-    folder_path = "/".join(path_parts[:-1])
-    if not folder_path or not folder_path.strip():
-        return main_folder
-
-    folder_path_stripped = folder_path.strip()
-    if folder_path_stripped in folders_cache:
-        return folders_cache[folder_path_stripped]
-
-    path_components = folder_path_stripped.split("/")
-    current_parent = main_folder
-    for subfolder_name in path_components:
-        if not subfolder_name:
-            continue
-        existing_folder = Folder.objects.filter(
-            owner=user,
-            parent=current_parent,
-            name=subfolder_name,
-            is_deleted=False
-        ).first()
-        if existing_folder:
-            current_parent = existing_folder
-        else:
-            break
-
-    return current_parent
-
-
-def _extract_error_message(exception):
-    """
-    Extrai a mensagem de erro de uma exceção.
-    """
-    if isinstance(exception, ValidationError):
-        if hasattr(exception, 'messages') and exception.messages:
-            return str(exception.messages[0])
-        if hasattr(exception, 'message'):
-            return str(exception.message)
-        return str(exception)
-
-    if hasattr(exception, 'message'):
-        return str(exception.message)
-
-    return str(exception)
-
-
-def _extract_error_detail(exception):
-    """
-    Extrai detalhes de erro de uma exceção para logging.
-    """
-    error_detail = str(exception)
-    if isinstance(exception, ValidationError):
-        if hasattr(exception, 'messages') and exception.messages:
-            error_detail = str(exception.messages[0])
-        elif hasattr(exception, 'message_dict'):
-            error_detail = str(exception.message_dict)
-    return error_detail
-
-
-def _process_file_upload(params: FileUploadParams):
+def _skip_rejected_paths(file_paths_json, rejections):
     """
-    Processa o upload de um arquivo individual.
-    Retorna (success, error_message, file_name).
+    Remove do JSON de caminhos os arquivos descartados durante a
+    leitura do upload, mantendo o alinhamento com request.FILES.
     """
-    if not params.file_path:
-        params.file_path = params.uploaded_file.name
-
-    path_parts = _normalize_path_parts(
-        params.file_path, params.folder_name
-    )
-    file_name = path_parts[-1]
-
-    target_folder = _get_target_folder(
-        params.user, params.target_folder, path_parts, params.folders_cache
-    )
+    if not file_paths_json or not rejections:
+        return file_paths_json
 
     try:
-        validate_file(params.uploaded_file)
-    except Exception as e:
-        error_message = _extract_error_message(e)
-        return (False, error_message, file_name)
-
-    base, ext = os.path.splitext(file_name)
-    new_name = file_name
-    counter = 1
+        file_paths_list = json.loads(file_paths_json)
+    except json.JSONDecodeError:
+        return file_paths_json
 
-    while File.objects.filter(
-        uploader=params.user,
-        folder=target_folder,
-        name__iexact=new_name,
-        is_deleted=False
-    ).exists():
-        new_name = f"{base} ({counter}){ext}"
-        counter += 1
-
-    try:
-        File.objects.create(
-            name=new_name,
-            file=params.uploaded_file,
-            folder=target_folder,
-            uploader=params.user,
-        )
-        return (True, None, file_name)
-    except Exception as e:
-        error_detail = _extract_error_detail(e)
-        if settings.DEBUG:
-            logger = logging.getLogger(__name__)
-            logger.error(
-                f"Erro ao salvar arquivo {file_name}: {error_detail}"
-            )
-            logger.error(traceback.format_exc())
-        error_message = (
-            f"{file_name}: Erro ao salvar arquivo - {error_detail}"
-        )
-        return (False, error_message, file_name)
+    skipped = {rejection.index for rejection in rejections}
+    return json.dumps([
+        file_path
+        for i, file_path in enumerate(file_paths_list)
+        if i not in skipped
+    ])
 
 
 def _prepare_file_paths(uploaded_files, file_paths_json):
@@ -662,17 +532,19 @@ def _setup_folder_upload(user, uploaded_files, folder_name_input,
     Retorna (main_folder, folder_name).
     """
     folder_name = _determine_folder_name(uploaded_files, folder_name_input)
-    folder_name = _ensure_unique_folder_name(
-        user, parent_folder, folder_name
-    )
 
-    main_folder = Folder.objects.create(
-        name=folder_name,
-        owner=user,
-        parent=parent_folder
+    main_folder = create_with_unique_name(
+        _active_folders(user, parent_folder),
+        folder_name,
+        lambda new_name: Folder.objects.create(
+            name=new_name,
+            owner=user,
+            parent=parent_folder
+        ),
+        keep_extension=False,
     )
 
-    return (main_folder, folder_name)
+    return (main_folder, main_folder.name)
 
 
 def _process_folder_upload_complete(user, uploaded_files, file_paths_json,
@@ -683,9 +555,7 @@ def _process_folder_upload_complete(user, uploaded_files, file_paths_json,
     """
     file_paths_list = _prepare_file_paths(uploaded_files, file_paths_json)
     sorted_paths = _collect_folder_paths(file_paths_list, folder_name)
-    folders_cache = _create_subfolders(
-        user, main_folder, sorted_paths
-    )
+    folders_cache = build_folder_tree(user, main_folder, sorted_paths)
 
     folder_params = FolderUploadParams(
         user=user,
@@ -702,41 +572,39 @@ def _process_folder_upload_complete(user, uploaded_files, file_paths_json,
 def _process_folder_uploads(params: FolderUploadParams):
     """
     Processa todos os uploads de arquivos em uma pasta.
+
+    Associa cada arquivo à sua pasta de destino pelo cache de pastas e
+    delega a validação e a inserção em lote para o motor de upload.
+    Os arquivos criados entram na fila de extração de texto.
     Retorna (uploaded_count, error_count, error_messages).
     """
-    files_with_paths = []
+    pending_files = []
     for i, uploaded_file in enumerate(params.uploaded_files):
         file_path = (
             params.file_paths_list[i]
             if i < len(params.file_paths_list)
             else uploaded_file.name
         )
-        files_with_paths.append((uploaded_file, file_path))
+        if not file_path:
+            file_path = uploaded_file.name
 
-    uploaded_count = 0
-    error_count = 0
-    error_messages = []
+        path_parts = _normalize_path_parts(file_path, params.folder_name)
+        key = folder_key(path_parts[:-1])
+        if key not in params.folders_cache:
+            key = ""
 
-    for uploaded_file, file_path in files_with_paths:
-        file_params = FileUploadParams(
-            user=params.user,
+        pending_files.append(PendingFile(
             uploaded_file=uploaded_file,
-            file_path=file_path,
-            folder_name=params.folder_name,
-            target_folder=params.main_folder,
-            folders_cache=params.folders_cache
-        )
-        success, error_message, file_name = _process_file_upload(
-            file_params
-        )
+            file_name=path_parts[-1],
+            folder_key=key,
+        ))
 
-        if success:
-            uploaded_count += 1
-        else:
-            error_count += 1
-            error_messages.append(error_message)
-
-    return (uploaded_count, error_count, error_messages)
+    result = bulk_create_files(
+        params.user, pending_files, params.folders_cache
+    )
+    enqueue_extractions(result.created_files)
+    return (result.uploaded_count, result.error_count,
+            result.error_messages)
 
 
 def _handle_upload_results(results: UploadResults):
@@ -775,12 +643,13 @@ def _handle_upload_results(results: UploadResults):
 
 
 @login_required(login_url="/")
+@upload_view
 def upload_folder(request):
     """
     View para upload de pastas inteiras.
 
     Cria a pasta principal e todas as subpastas detectadas.
-    Não processa arquivos.
+    Não processa arquivos. Roda no executor de uploads.
 
     Args:
         request: Objeto HttpRequest do Django
@@ -791,7 +660,8 @@ def upload_folder(request):
     if request.method != "POST":
         return redirect("workspace_home")
 
-    uploaded_files = request.FILES.getlist("files")
+    uploaded_files = get_uploaded_files(request, "files")
+    rejections = get_upload_rejections(request, "files")
     next_url = request.POST.get("next", "workspace_home")
     folder_id = request.POST.get("folder")
     parent_folder = None
@@ -803,7 +673,7 @@ def upload_folder(request):
             owner=request.user
         )
 
-    if not uploaded_files:
+    if not uploaded_files and not rejections:
         messages.error(request, "Nenhuma pasta foi selecionada.")
         return redirect(next_url)
 
@@ -812,7 +682,9 @@ def upload_folder(request):
         request.user, uploaded_files, folder_name_input, parent_folder
     )
 
-    file_paths_json = request.POST.get("file_paths", "")
+    file_paths_json = _skip_rejected_paths(
+        request.POST.get("file_paths", ""), rejections
+    )
     uploaded_count, error_count, error_messages = (
         _process_folder_upload_complete(
             request.user,
@@ -828,40 +700,320 @@ def upload_folder(request):
         main_folder=main_folder,
         folder_name=folder_name,
         uploaded_count=uploaded_count,
-        error_count=error_count,
-        error_messages=error_messages
+        error_count=error_count + len(rejections),
+        error_messages=[
+            rejection.message for rejection in rejections
+        ] + error_messages
     )
     _handle_upload_results(results)
+    invalidate_listings(request.user.id, [folder_id])
 
     return redirect(next_url)
 
 
-def build_breadcrumbs(folder):
+def _load_json_body(request):
+    """
+    Lê o corpo JSON de uma requisição AJAX.
+    Retorna um dicionário (vazio se o corpo for inválido).
     """
-    Constrói a lista de breadcrumbs (caminho completo).
+    try:
+        data = json.loads(request.body or b"{}")
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
 
-    Percorre a hierarquia de pastas desde a pasta atual até a raiz,
-    construindo uma lista ordenada do caminho completo.
+
+def _get_target_folder(user, folder_id):
+    """
+    Obtém a pasta ativa do usuário ou None para a raiz.
+    """
+    if not folder_id:
+        return None
+    return get_object_or_404(
+        Folder,
+        id=folder_id,
+        owner=user,
+        is_deleted=False,
+    )
+
+
+def _method_not_allowed():
+    """
+    Resposta JSON padrão para métodos HTTP não suportados.
+    """
+    return JsonResponse(
+        {"error": "Método inválido."},
+        status=405
+    )
+
+
+@login_required(login_url="/")
+def workspace_search(request):
+    """
+    View de busca no workspace (via AJAX).
+
+    Procura pastas e arquivos pelo nome (sem diferenciar acentos) e
+    arquivos pelo texto extraído, dentro da subárvore da pasta
+    informada em 'folder'. A paginação é por cursor: a resposta traz
+    next_cursor, que deve ser enviado em 'cursor' para a próxima
+    página.
 
     Args:
-        folder: Instância de Folder para construir o caminho
+        request: Objeto HttpRequest do Django
 
     Returns:
-        list: Lista de pastas do caminho (raiz -> atual)
+        JsonResponse: Resultados e cursor da próxima página ou erro
     """
-    breadcrumbs = []
-    while folder:
-        breadcrumbs.insert(0, folder)
-        folder = folder.parent
-    return breadcrumbs
+    if request.method != "GET":
+        return _method_not_allowed()
+
+    folder = _get_target_folder(request.user, request.GET.get("folder"))
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+
+    try:
+        page = search_workspace(
+            request.user,
+            request.GET.get("q", ""),
+            folder=folder,
+            cursor=request.GET.get("cursor"),
+            limit=limit,
+        )
+    except ValidationError as e:
+        return JsonResponse(
+            {"error": extract_error_message(e)},
+            status=400
+        )
+
+    return JsonResponse({
+        "results": page.results,
+        "next_cursor": page.next_cursor,
+    })
 
 
 @login_required(login_url="/")
-def delete_folder(request, folder_id):
+def create_upload_session(request):
+    """
+    View para criar uma sessão de upload em partes (via AJAX).
+
+    Recebe JSON com name, size e folder. O nome e o tamanho são
+    validados antes de qualquer byte ser enviado.
+
+    Args:
+        request: Objeto HttpRequest do Django
+
+    Returns:
+        JsonResponse: Estado da sessão criada ou erro
+    """
+    if request.method != "POST":
+        return _method_not_allowed()
+
+    data = _load_json_body(request)
+    name = str(data.get("name", "")).strip()
+    try:
+        size = int(data.get("size"))
+    except (TypeError, ValueError):
+        size = -1
+
+    if not name or size < 0:
+        return JsonResponse(
+            {"error": "Dados insuficientes para iniciar o upload."},
+            status=400
+        )
+
+    folder = _get_target_folder(request.user, data.get("folder"))
+
+    try:
+        session = create_session(request.user, folder, name, size)
+    except ValidationError as e:
+        return JsonResponse(
+            {"error": extract_error_message(e)},
+            status=400
+        )
+
+    return JsonResponse(session_status(session), status=201)
+
+
+@login_required(login_url="/")
+def upload_session_status(request, session_id):
+    """
+    View que informa as partes já recebidas de uma sessão.
+
+    Usada pelo cliente para retomar um upload interrompido.
+
+    Args:
+        request: Objeto HttpRequest do Django
+        session_id: UUID da sessão de upload
+
+    Returns:
+        JsonResponse: Estado da sessão
+    """
+    session = get_object_or_404(
+        UploadSession,
+        id=session_id,
+        owner=request.user
+    )
+    return JsonResponse(session_status(session))
+
+
+@login_required(login_url="/")
+@upload_view
+def upload_chunk(request, session_id, index):
+    """
+    View que recebe uma parte do arquivo (PUT com corpo binário).
+
+    Roda no executor de uploads.
+
+    Args:
+        request: Objeto HttpRequest do Django
+        session_id: UUID da sessão de upload
+        index: Número da parte (a partir de 0)
+
+    Returns:
+        JsonResponse: Confirmação da parte recebida ou erro
+    """
+    if request.method != "PUT":
+        return _method_not_allowed()
+
+    session = get_object_or_404(
+        UploadSession,
+        id=session_id,
+        owner=request.user
+    )
+
+    try:
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        write_chunk(session, index, request, content_length)
+    except ValidationError as e:
+        return JsonResponse(
+            {"error": extract_error_message(e)},
+            status=400
+        )
+
+    return JsonResponse({"success": True, "index": index})
+
+
+@login_required(login_url="/")
+@upload_view
+def finalize_upload(request, session_id):
+    """
+    View que conclui uma sessão de upload e cria o arquivo.
+
+    Junta as partes no storage, por isso roda no executor de uploads.
+
+    Args:
+        request: Objeto HttpRequest do Django
+        session_id: UUID da sessão de upload
+
+    Returns:
+        JsonResponse: ID e nome final do arquivo ou erro
+    """
+    if request.method != "POST":
+        return _method_not_allowed()
+
+    session = get_object_or_404(
+        UploadSession,
+        id=session_id,
+        owner=request.user
+    )
+
+    try:
+        file = finalize_session(session)
+    except UploadFileGoneError as e:
+        return JsonResponse(
+            {"error": extract_error_message(e)},
+            status=410
+        )
+    except ValidationError as e:
+        return JsonResponse(
+            {"error": extract_error_message(e)},
+            status=400
+        )
+
+    enqueue_extractions([file])
+    invalidate_listings(request.user.id, [file.folder_id])
+    return JsonResponse({"file_id": file.id, "name": file.name})
+
+
+@login_required(login_url="/")
+def create_upload_tree(request):
+    """
+    View que cria a estrutura de pastas de um upload de pasta em partes.
+
+    Recebe JSON com folder (pasta pai), folder_name e paths (caminhos
+    relativos dos arquivos). Cria a pasta principal e todas as
+    subpastas em lote e devolve, na mesma ordem de paths, o ID da
+    pasta de destino de cada arquivo.
+
+    Args:
+        request: Objeto HttpRequest do Django
+
+    Returns:
+        JsonResponse: Pasta principal e destinos dos arquivos
+    """
+    if request.method != "POST":
+        return _method_not_allowed()
+
+    data = _load_json_body(request)
+    paths = [str(path) for path in data.get("paths") or []]
+    if not paths:
+        return JsonResponse(
+            {"error": "Nenhuma pasta foi selecionada."},
+            status=400
+        )
+
+    parent_folder = _get_target_folder(request.user, data.get("folder"))
+    folder_name_input = str(data.get("folder_name", "")).strip()
+    main_folder, folder_name = _setup_folder_upload(
+        request.user, [], folder_name_input, parent_folder
+    )
+
+    path_root = folder_name_input or folder_name
+    folders_cache = build_folder_tree(
+        request.user,
+        main_folder,
+        _collect_folder_paths(paths, path_root),
+    )
+
+    targets = []
+    for path in paths:
+        path_parts = _normalize_path_parts(path, path_root)
+        target = folders_cache.get(folder_key(path_parts[:-1]))
+        targets.append((target or main_folder).id)
+
+    invalidate_listings(
+        request.user.id, [parent_folder.id if parent_folder else None]
+    )
+    return JsonResponse({
+        "folder_id": main_folder.id,
+        "folder_name": folder_name,
+        "targets": targets,
+    }, status=201)
+
+
+def _trash_folder(folder):
+    """
+    Move a pasta para a lixeira, registra a mudança para os índices,
+    agenda a remoção definitiva e invalida as listagens do usuário.
+    """
+    with transaction.atomic():
+        deleted_at = folder.soft_delete()
+        record_folder_change(folder, IndexChange.ACTION_DELETE)
+    schedule_purge(deleted_at)
+    bump_corpus_version([folder.owner_id])
+    invalidate_listings(folder.owner_id, [folder.parent_id], tree=True)
+
+
+@login_required(login_url="/")
+async def delete_folder(request, folder_id):
     """
     View para exclusão de pasta (soft delete).
 
-    Marca a pasta como deletada sem removê-la fisicamente do banco.
+    Marca a pasta, suas subpastas e arquivos como deletados sem
+    removê-los fisicamente do banco. A remoção definitiva é apenas
+    agendada na fila de tarefas para o fim do período de retenção.
     Retorna para a pasta pai ou para a raiz.
 
     Args:
@@ -871,35 +1023,47 @@ def delete_folder(request, folder_id):
     Returns:
         HttpResponseRedirect: Redireciona após exclusão
     """
-    folder = get_object_or_404(
+    folder = await aget_object_or_404(
         Folder,
         id=folder_id,
-        owner=request.user
+        owner=await _auser(request)
     )
 
-    parent = folder.parent
-
-    folder.is_deleted = True
-    folder.deleted_at = timezone.now()
-    folder.save()
+    await sync_to_async(_trash_folder)(folder)
 
     messages.success(
         request,
         f"Pasta '{folder.name}' movida para a lixeira."
     )
 
-    if parent:
-        return redirect(f"/workspace?folder={parent.id}")
+    if folder.parent_id:
+        return redirect(f"/workspace?folder={folder.parent_id}")
 
     return redirect("workspace_home")
 
 
+def _trash_file(file):
+    """
+    Move o arquivo para a lixeira, registra a mudança para os índices,
+    agenda a remoção definitiva e invalida a listagem da pasta.
+    """
+    file.is_deleted = True
+    file.deleted_at = timezone.now()
+    with transaction.atomic():
+        file.save()
+        record_file_changes([file.id], IndexChange.ACTION_DELETE)
+    schedule_purge(file.deleted_at)
+    invalidate_files([file.id])
+    invalidate_listings(file.uploader_id, [file.folder_id])
+
+
 @login_required(login_url="/")
-def delete_file(request, file_id):
+async def delete_file(request, file_id):
     """
     View para exclusão de arquivo (soft delete).
 
-    Marca o arquivo como deletado sem removê-lo fisicamente do banco.
+    Marca o arquivo como deletado sem removê-lo fisicamente do banco
+    e agenda a remoção definitiva na fila de tarefas.
     Retorna para a pasta onde estava ou para a raiz.
 
     Args:
@@ -909,31 +1073,41 @@ def delete_file(request, file_id):
     Returns:
         HttpResponseRedirect: Redireciona após exclusão
     """
-    file = get_object_or_404(
+    file = await aget_object_or_404(
         File,
         id=file_id,
-        uploader=request.user
+        uploader=await _auser(request)
     )
 
-    folder = file.folder
-
-    file.is_deleted = True
-    file.deleted_at = timezone.now()
-    file.save()
+    await sync_to_async(_trash_file)(file)
 
     messages.success(
         request,
         f"Arquivo '{file.name}' movido para a lixeira."
     )
 
-    if folder:
-        return redirect(f"/workspace?folder={folder.id}")
+    if file.folder_id:
+        return redirect(f"/workspace?folder={file.folder_id}")
 
     return redirect("workspace_home")
 
 
+def _save_folder_rename(folder):
+    """
+    Grava o novo nome da pasta, registra a mudança para os índices e
+    invalida as listagens do usuário (o nome aparece nos breadcrumbs).
+
+    Raises:
+        IntegrityError: Se já existe uma pasta com esse nome
+    """
+    with transaction.atomic():
+        folder.save()
+        record_folder_change(folder, IndexChange.ACTION_RENAME)
+    invalidate_listings(folder.owner_id, [folder.parent_id], tree=True)
+
+
 @login_required(login_url="/")
-def rename_folder(request, folder_id):
+async def rename_folder(request, folder_id):
     """
     View para renomear pasta.
 
@@ -946,10 +1120,10 @@ def rename_folder(request, folder_id):
     Returns:
         HttpResponseRedirect: Redireciona após renomeação
     """
-    folder = get_object_or_404(
+    folder = await aget_object_or_404(
         Folder,
         id=folder_id,
-        owner=request.user,
+        owner=await _auser(request),
         is_deleted=False
     )
 
@@ -966,20 +1140,16 @@ def rename_folder(request, folder_id):
         )
         return redirect(next_url)
 
-    if Folder.objects.filter(
-        owner=request.user,
-        parent=folder.parent,
-        name__iexact=new_name,
-        is_deleted=False,
-    ).exclude(id=folder.id).exists():
+    folder.name = new_name
+    try:
+        await sync_to_async(_save_folder_rename)(folder)
+    except IntegrityError:
         messages.error(
             request,
             "Já existe uma pasta com esse nome nesse diretório."
         )
         return redirect(next_url)
 
-    folder.name = new_name
-    folder.save()
     messages.success(
         request,
         f"Pasta renomeada para '{new_name}'."
@@ -987,8 +1157,23 @@ def rename_folder(request, folder_id):
     return redirect(next_url)
 
 
+def _save_file_rename(file):
+    """
+    Grava o novo nome do arquivo, registra a mudança para os índices e
+    invalida as respostas em cache que o citam e a listagem da pasta.
+
+    Raises:
+        IntegrityError: Se já existe um arquivo com esse nome
+    """
+    with transaction.atomic():
+        file.save()
+        record_file_changes([file.id], IndexChange.ACTION_RENAME)
+    invalidate_files([file.id])
+    invalidate_listings(file.uploader_id, [file.folder_id])
+
+
 @login_required(login_url="/")
-def rename_file(request, file_id):
+async def rename_file(request, file_id):
     """
     View para renomear arquivo.
 
@@ -1001,10 +1186,10 @@ def rename_file(request, file_id):
     Returns:
         HttpResponseRedirect: Redireciona após renomeação
     """
-    file = get_object_or_404(
+    file = await aget_object_or_404(
         File,
         id=file_id,
-        uploader=request.user,
+        uploader=await _auser(request),
         is_deleted=False
     )
 
@@ -1021,20 +1206,16 @@ def rename_file(request, file_id):
         )
         return redirect(next_url)
 
-    if File.objects.filter(
-        uploader=request.user,
-        folder=file.folder,
-        name__iexact=new_name,
-        is_deleted=False,
-    ).exclude(id=file.id).exists():
+    file.name = new_name
+    try:
+        await sync_to_async(_save_file_rename)(file)
+    except IntegrityError:
         messages.error(
             request,
             "Já existe um arquivo com esse nome neste diretório."
         )
         return redirect(next_url)
 
-    file.name = new_name
-    file.save()
     messages.success(
         request,
         f"Arquivo renomeado para '{new_name}'."
@@ -1046,8 +1227,9 @@ def _is_descendant(folder, potential_parent):
     """
     Helper para evitar mover uma pasta para ela mesma ou seus filhos.
 
-    Verifica se a pasta potencial pai é descendente da pasta atual,
-    o que criaria um ciclo na hierarquia.
+    Verifica se a pasta potencial pai é a própria pasta ou uma de suas
+    descendentes, o que criaria um ciclo na hierarquia. A verificação
+    usa apenas o caminho materializado, sem consultas ao banco.
 
     Args:
         folder: Pasta que está sendo movida
@@ -1056,16 +1238,110 @@ def _is_descendant(folder, potential_parent):
     Returns:
         bool: True se potential_parent é descendente de folder
     """
-    current = potential_parent
-    while current:
-        if current == folder:
-            return True
-        current = current.parent
-    return False
+    return (
+        potential_parent == folder or
+        potential_parent.is_descendant_of(folder)
+    )
+
+
+def _name_conflict_response():
+    """
+    Resposta JSON para movimentações que gerariam nomes duplicados.
+    """
+    return JsonResponse(
+        {"error": "Já existe um item com esse nome na pasta de destino."},
+        status=400,
+    )
+
+
+def _save_folder_move(folder, target_folder):
+    """
+    Move a pasta, registra a mudança para os índices e invalida as
+    listagens do usuário.
+
+    Raises:
+        IntegrityError: Se o destino já tem uma pasta com esse nome
+    """
+    previous_parent_id = folder.parent_id
+    with transaction.atomic():
+        folder.move_to(target_folder)
+        record_folder_change(folder, IndexChange.ACTION_MOVE)
+    bump_corpus_version([folder.owner_id])
+    invalidate_listings(
+        folder.owner_id,
+        [previous_parent_id, folder.parent_id],
+        tree=True,
+    )
+
+
+async def _move_folder(user, folder_id, target_folder):
+    """
+    Move uma pasta (e sua subárvore) para target_folder.
+    Retorna a JsonResponse da operação.
+    """
+    folder = await aget_object_or_404(
+        Folder,
+        id=folder_id,
+        owner=user,
+        is_deleted=False,
+    )
+
+    if target_folder and _is_descendant(folder, target_folder):
+        error_message = (
+            "Não é possível mover a pasta para dentro dela mesma."
+        )
+        return JsonResponse(
+            {"error": error_message},
+            status=400,
+        )
+
+    try:
+        await sync_to_async(_save_folder_move)(folder, target_folder)
+    except IntegrityError:
+        return _name_conflict_response()
+    return JsonResponse({"success": True})
+
+
+def _save_file_move(file, previous_folder_id):
+    """
+    Grava a nova pasta do arquivo, registra a mudança para os índices e
+    invalida as respostas em cache que o citam e as listagens da pasta
+    de origem e de destino.
+
+    Raises:
+        IntegrityError: Se o destino já tem um arquivo com esse nome
+    """
+    with transaction.atomic():
+        file.save()
+        record_file_changes([file.id], IndexChange.ACTION_MOVE)
+    invalidate_files([file.id])
+    invalidate_listings(
+        file.uploader_id, [previous_folder_id, file.folder_id]
+    )
+
+
+async def _move_file(user, file_id, target_folder):
+    """
+    Move um arquivo para target_folder.
+    Retorna a JsonResponse da operação.
+    """
+    file = await aget_object_or_404(
+        File,
+        id=file_id,
+        uploader=user,
+        is_deleted=False,
+    )
+    previous_folder_id = file.folder_id
+    file.folder = target_folder
+    try:
+        await sync_to_async(_save_file_move)(file, previous_folder_id)
+    except IntegrityError:
+        return _name_conflict_response()
+    return JsonResponse({"success": True})
 
 
 @login_required(login_url="/")
-def move_item(request):
+async def move_item(request):
     """
     View para mover pastas ou arquivos (via AJAX).
 
@@ -1084,6 +1360,7 @@ def move_item(request):
             status=405
         )
 
+    user = await _auser(request)
     item_type = request.POST.get("item_type")
     item_id = request.POST.get("item_id")
     target_folder_id = request.POST.get("target_folder") or None
@@ -1096,44 +1373,18 @@ def move_item(request):
 
     target_folder = None
     if target_folder_id:
-        target_folder = get_object_or_404(
+        target_folder = await aget_object_or_404(
             Folder,
             id=target_folder_id,
-            owner=request.user,
+            owner=user,
             is_deleted=False,
         )
 
     if item_type == "folder":
-        folder = get_object_or_404(
-            Folder,
-            id=item_id,
-            owner=request.user,
-            is_deleted=False,
-        )
-
-        if target_folder and _is_descendant(folder, target_folder):
-            error_message = (
-                "Não é possível mover a pasta para dentro dela mesma."
-            )
-            return JsonResponse(
-                {"error": error_message},
-                status=400,
-            )
-
-        folder.parent = target_folder
-        folder.save()
-        return JsonResponse({"success": True})
+        return await _move_folder(user, item_id, target_folder)
 
     elif item_type == "file":
-        file = get_object_or_404(
-            File,
-            id=item_id,
-            uploader=request.user,
-            is_deleted=False,
-        )
-        file.folder = target_folder
-        file.save()
-        return JsonResponse({"success": True})
+        return await _move_file(user, item_id, target_folder)
 
     return JsonResponse(
         {"error": "Tipo de item inválido."},